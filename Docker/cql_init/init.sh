@@ -23,5 +23,6 @@ fi
 echo "Loading Cassandra keyspaces and data..."
 cqlsh cassandra -f /cql_init/01_create_keyspaces.cql
 cqlsh cassandra -f /cql_init/02_seed_data.cql
+cqlsh cassandra -f /cql_init/03_create_raw_league_data.cql
 
 echo "Cassandra initialization completed successfully."
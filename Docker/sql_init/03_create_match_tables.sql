@@ -0,0 +1,105 @@
+\connect "GameAnalytics"
+
+-- Match tables from docs/SQL.dbml, loaded by python/Pipeline/pg_loader.py.
+-- Child tables carry the natural keys (MatchID, PUUID) the loader upserts on; surrogate IDs stay serial.
+-- MatchID is the Riot match ID ("NA1_5168231556"): the numeric gameId is only unique within a platform.
+
+CREATE TABLE IF NOT EXISTS Summoners (
+    SummonerID serial PRIMARY KEY,
+    PUUID varchar UNIQUE NOT NULL,
+    SummonerName varchar,
+    ProfileIcon int,
+    Level int,
+    LocationID int
+);
+
+CREATE TABLE IF NOT EXISTS Matches (
+    MatchID varchar PRIMARY KEY,
+    GameMode varchar,
+    GameType varchar,
+    GameCreation timestamp,
+    GameStart timestamp,
+    GameEnd timestamp,
+    GameDuration int,
+    MapID int,
+    GameVersion varchar,
+    QueueID int,
+    EndOfGameResult varchar
+);
+
+CREATE TABLE IF NOT EXISTS Teams (
+    MatchID varchar REFERENCES Matches (MatchID),
+    TeamID int,
+    Win boolean,
+    FirstBlood boolean,
+    FirstTower boolean,
+    TeamPosition varchar,
+    PRIMARY KEY (MatchID, TeamID)
+);
+
+CREATE TABLE IF NOT EXISTS TeamObjectives (
+    ObjectiveID serial PRIMARY KEY,
+    MatchID varchar,
+    TeamID int,
+    ObjectiveType varchar,
+    Kills int,
+    First boolean,
+    ObjectiveValue varchar,
+    UNIQUE (MatchID, TeamID, ObjectiveType),
+    FOREIGN KEY (MatchID, TeamID) REFERENCES Teams (MatchID, TeamID)
+);
+
+CREATE TABLE IF NOT EXISTS TeamBans (
+    BanID serial PRIMARY KEY,
+    MatchID varchar,
+    TeamID int,
+    ChampionID int,
+    PickTurn int,
+    UNIQUE (MatchID, TeamID, PickTurn),
+    FOREIGN KEY (MatchID, TeamID) REFERENCES Teams (MatchID, TeamID)
+);
+
+CREATE TABLE IF NOT EXISTS Players (
+    PlayerID serial PRIMARY KEY,
+    MatchID varchar REFERENCES Matches (MatchID),
+    PUUID varchar NOT NULL,
+    SummonerID int REFERENCES Summoners (SummonerID),
+    TeamID int,
+    ChampionID int,
+    TeamPosition varchar,
+    Role varchar,
+    Win boolean,
+    SummonerSpell1ID int,
+    SummonerSpell2ID int,
+    ProfileIcon int,
+    IndividualPosition varchar,
+    UNIQUE (MatchID, PUUID)
+);
+
+CREATE TABLE IF NOT EXISTS PlayerItems (
+    PlayerItemID serial PRIMARY KEY,
+    PlayerID int REFERENCES Players (PlayerID),
+    ItemID int,
+    Slot int,
+    UNIQUE (PlayerID, Slot)
+);
+
+CREATE TABLE IF NOT EXISTS Performance (
+    PerformanceID serial PRIMARY KEY,
+    PlayerID int UNIQUE REFERENCES Players (PlayerID),
+    Kills int DEFAULT 0,
+    Deaths int DEFAULT 0,
+    Assists int DEFAULT 0,
+    TotalDamageDealt int,
+    TotalDamageTaken int,
+    VisionScore int,
+    GoldEarned int,
+    TurretsDestroyed int DEFAULT 0,
+    WardsPlaced int DEFAULT 0,
+    WardsKilled int DEFAULT 0,
+    MinionsKilled int DEFAULT 0,
+    NeutralMinionsKilled int DEFAULT 0,
+    DamageToChampionsMagic int,
+    DamageToChampionsPhysical int,
+    DamageToChampionsTrue int
+);
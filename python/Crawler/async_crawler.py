@@ -0,0 +1,284 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from python.config import CRAWL_CONCURRENCY_PER_REGION, REGIONS
+from python.Crawler.match_writer import MatchWriter
+from python.Crawler.seen_index import SeenIndex, match_key
+from python.utils.api_utils import get_url, call_endpoint, cached_response, rate_limiter
+from python.utils.logger import get_logger
+from python.utils.metrics import MATCH_IDS_WRITTEN
+from python.utils.response_cache import get_response_cache
+
+"""Asynchronous crawl engine for match identifiers and match details.
+
+    Keeps many Account_Matches and Match requests in flight per routing value (americas, europe, asia) and
+    overlaps them with asynchronous Cassandra writes. HTTP calls go through the shared `call_endpoint` on a
+    worker pool so the same transport and error handling are used as the serial crawler, while the event loop
+    bounds in-flight requests per region with a semaphore.
+
+    A player whose match history could not be paged through completely is reported as None rather than with the
+    IDs retrieved so far, so callers do not mark them crawled. Match rows that fail to write, and match details
+    that fail to download while an `on_match` callback is waiting for them, go to the retry queue (see
+    python/utils/retry_queue.py) as "match_ids" and "match_detail" operations.
+
+Classes:
+    AsyncCrawler: Crawls match identifiers and match details for many PUUIDs concurrently.
+
+Functions:
+    bridge_future(loop, response_future): Awaitable asyncio future for a cassandra-driver ResponseFuture.
+    run_async_crawl(session, targets, fetch_details): Synchronous entry point wrapping `AsyncCrawler.crawl`.
+"""
+
+logger = get_logger("async_crawler.log", namespace="async_crawler")
+
+
+def bridge_future(loop, response_future):
+    """Wraps a cassandra-driver ResponseFuture in an asyncio future bound to `loop`.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The running event loop.
+        response_future (cassandra.cluster.ResponseFuture): Future returned by `session.execute_async`.
+
+    Returns:
+        asyncio.Future: Resolves with the driver result or raises the driver error.
+    """
+    future = loop.create_future()
+
+    def _set_result(result):
+        if not future.done():
+            future.set_result(result)
+
+    def _set_exception(error):
+        if not future.done():
+            future.set_exception(error)
+
+    response_future.add_callbacks(
+        lambda result: loop.call_soon_threadsafe(_set_result, result),
+        lambda error: loop.call_soon_threadsafe(_set_exception, error),
+    )
+    return future
+
+
+class AsyncCrawler:
+    """
+    Crawls match identifiers and match details for many PUUIDs concurrently.
+    """
+
+    def __init__(
+        self, session, concurrency_per_region=None, max_workers=None, count=100, seen_index=None
+    ):
+        """
+        Initialize the crawler with a Cassandra session and concurrency limits.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            concurrency_per_region (int, optional): Maximum in-flight HTTP requests per routing value.
+                Defaults to CRAWL_CONCURRENCY_PER_REGION.
+            max_workers (int, optional): Size of the HTTP worker pool. Defaults to enough workers to
+                saturate every region.
+            count (int, optional): Page size for Account_Matches requests (max 100). Defaults to 100.
+            seen_index (SeenIndex, optional): Index used to skip match rows written recently.
+        """
+        self.session = session
+        self.concurrency_per_region = concurrency_per_region or CRAWL_CONCURRENCY_PER_REGION
+        self.max_workers = max_workers or self.concurrency_per_region * len(REGIONS)
+        self.count = count
+        self.seen_index = seen_index
+        self.writer = MatchWriter(session, seen_index=seen_index)
+        self.retry_queue = self.writer.retry_queue
+        self.requests_made = 0
+        self.matches_written = 0
+        self._semaphores = {}
+        self._executor = None
+
+    def _semaphore(self, region):
+        if region not in self._semaphores:
+            self._semaphores[region] = asyncio.Semaphore(self.concurrency_per_region)
+        return self._semaphores[region]
+
+    async def _call(self, region, method, url, params=None):
+        """Runs one `call_endpoint` on the worker pool while holding the region's semaphore.
+
+        The rate-limit slot is taken on the event loop first so worker threads are never parked
+        waiting for quota. Responses in the response cache are returned before taking either.
+        """
+        loop = asyncio.get_running_loop()
+        cache = get_response_cache()
+        if cache is not None and cache.caches(method):
+            cached = await loop.run_in_executor(self._executor, partial(cached_response, url, params, method))
+            if cached is not None:
+                return cached
+        async with self._semaphore(region):
+            await rate_limiter.acquire_async(region, method)
+            self.requests_made += 1
+            return await loop.run_in_executor(
+                self._executor,
+                partial(
+                    call_endpoint, url, params, region=region, method=method, throttle=False,
+                    lookup_cache=cache is None,
+                ),
+            )
+
+    async def _write_match(self, puuid, match_id):
+        """Writes one puuid_matches row; returns False if the write failed."""
+        key = match_key(match_id, puuid)
+        status = self.seen_index.lookup(key) if self.seen_index else None
+        if status == SeenIndex.SEEN:
+            return True
+        loop = asyncio.get_running_loop()
+        try:
+            await bridge_future(
+                loop, self.session.execute_async(self.writer.match_statement(status), (match_id, puuid))
+            )
+            self.matches_written += 1
+            MATCH_IDS_WRITTEN.inc()
+            if self.seen_index:
+                self.seen_index.add(key)
+            return True
+        except Exception as e:
+            logger.error("Error adding Match Id %s for PUUID %s: %s", match_id, puuid, e)
+            return False
+
+    async def fetch_match_ids(self, region, puuid, start_time=None):
+        """Pages through a player's match history and writes every match identifier to Cassandra.
+
+        Writes for a page are scheduled without waiting for them, so the next page request overlaps with the
+        Cassandra round trips of the previous one.
+
+        Args:
+            region (str): The routing value for the player's account.
+            puuid (str): The player's unique identifier.
+            start_time (int, optional): Epoch seconds; only matches after this time are requested.
+
+        Returns:
+            list or None: All match identifiers retrieved for the player, or None if a page request failed (the
+                IDs of earlier pages are still written).
+        """
+        url = get_url("Account_Matches", region=region, puuid=puuid)
+        start = 0
+        match_ids = []
+        writes = []
+        complete = True
+
+        while True:
+            params = {"start": start, "count": self.count}
+            if start_time is not None:
+                params["startTime"] = start_time
+
+            page = await self._call(region, "Account_Matches", url, params)
+            if page is None:
+                logger.error("Account_Matches request for PUUID %s failed at offset %d.", puuid, start)
+                complete = False
+                break
+            if not page:
+                break
+
+            match_ids.extend(page)
+            writes.extend(
+                asyncio.ensure_future(self._write_match(puuid, match_id))
+                for match_id in page
+            )
+            if len(page) < self.count:
+                break
+            start += self.count
+
+        written = await asyncio.gather(*writes)
+        failed = [match_id for match_id, ok in zip(match_ids, written) if not ok]
+        if failed and self.retry_queue is not None:
+            self.retry_queue.enqueue("match_ids", {"puuid": puuid, "match_ids": failed}, "write failed")
+        logger.info("Retrieved %d match IDs for PUUID %s.", len(match_ids), puuid)
+        return match_ids if complete else None
+
+    async def fetch_match(self, region, match_id):
+        """Fetches the Match-V5 details for a single match.
+
+        Args:
+            region (str): The routing value the match belongs to.
+            match_id (str): The match identifier (e.g. 'NA1_5168231556').
+
+        Returns:
+            dict or None: The match payload, or None if the request failed.
+        """
+        url = get_url("Match", region=region, matchId=match_id)
+        return await self._call(region, "Match", url)
+
+    async def crawl(
+        self, targets, fetch_details=False, on_match=None, details_per_player=None, start_times=None
+    ):
+        """Crawls every (region, puuid) target concurrently.
+
+        Args:
+            targets (iterable): Pairs of (region, puuid) to crawl.
+            fetch_details (bool, optional): Also fetch the Match details of every discovered match ID.
+            on_match (callable, optional): Called with (region, match_id, payload) for each fetched match. It
+                runs on the event loop, so it must not block; a coroutine function is awaited.
+            details_per_player (int, optional): Only fetch details for each player's most recent N matches.
+            start_times (dict, optional): puuid -> epoch seconds; only matches after that time are requested
+                for the player. Players not in it are crawled from the start of their history.
+
+        Returns:
+            dict: Mapping of puuid to the list of match identifiers retrieved, or None for players whose match
+                history could not be retrieved completely.
+        """
+        # Semaphores bind to the running loop, so each crawl gets fresh ones
+        self._semaphores = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            targets = list(targets)
+            pages = await asyncio.gather(
+                *(
+                    self.fetch_match_ids(region, puuid, (start_times or {}).get(puuid))
+                    for region, puuid in targets
+                )
+            )
+            results = {puuid: ids for (_, puuid), ids in zip(targets, pages)}
+
+            if fetch_details:
+                seen = {}
+                for (region, _), ids in zip(targets, pages):
+                    for match_id in (ids or [])[:details_per_player]:
+                        seen.setdefault(match_id, region)
+
+                async def _fetch(match_id, region):
+                    payload = await self.fetch_match(region, match_id)
+                    if on_match and payload:
+                        result = on_match(region, match_id, payload)
+                        if inspect.isawaitable(result):
+                            await result
+                    elif on_match and payload is None and self.retry_queue is not None:
+                        self.retry_queue.enqueue("match_detail", {"match_id": match_id}, "Match request failed")
+
+                await asyncio.gather(
+                    *(_fetch(match_id, region) for match_id, region in seen.items())
+                )
+            return results
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def run_async_crawl(session, targets, fetch_details=False, on_match=None, details_per_player=None, **kwargs):
+    """Runs an `AsyncCrawler` over `targets` to completion from synchronous code.
+
+    Args:
+        session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+        targets (iterable): Pairs of (region, puuid) to crawl.
+        fetch_details (bool, optional): Also fetch the Match details of every discovered match ID.
+        on_match (callable, optional): Called with (region, match_id, payload) for each fetched match.
+        details_per_player (int, optional): Only fetch details for each player's most recent N matches.
+        **kwargs: Passed through to `AsyncCrawler`.
+
+    Returns:
+        dict: Mapping of puuid to the list of match identifiers retrieved, or None where retrieval failed.
+    """
+    crawler = AsyncCrawler(session, **kwargs)
+    started = time.perf_counter()
+    results = asyncio.run(crawler.crawl(targets, fetch_details, on_match, details_per_player))
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Async crawl finished: %d requests, %d matches written in %.2fs (%.1f req/s)",
+        crawler.requests_made, crawler.matches_written, elapsed, crawler.requests_made / elapsed if elapsed else 0,
+    )
+    return results
@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from python.config import (
+    BACKFILL_HISTORY_START,
+    BACKFILL_INITIAL_WINDOW_SECONDS,
+    BACKFILL_MAX_WINDOW_SECONDS,
+    BACKFILL_MIN_WINDOW_SECONDS,
+    BACKFILL_PARALLEL_WINDOWS,
+    BACKFILL_TARGET_MATCHES_PER_WINDOW,
+)
+from python.Crawler.async_crawler import AsyncCrawler, bridge_future
+from python.Crawler.match_sync import ADVANCE_QUERY, INSERT_STATE_QUERY, MARK_PROCESSED_QUERY
+from python.utils.api_utils import get_url
+from python.utils.logger import get_logger
+from python.utils.metrics import start_exporter
+
+"""Time-sliced, parallel backfill of players' historical match IDs.
+
+    Offset paging (`start += 100`) has to walk a history one page at a time. The backfill instead cuts the history
+    into `startTime`/`endTime` windows, newest first, and keeps several windows per player in flight at once. All
+    requests go through `AsyncCrawler._call`, so they share the per-region semaphores and the application rate
+    limiter with every other crawl.
+
+    Window sizes follow the match density seen so far: every finished window resizes the next ones so they are
+    expected to hold `target_per_window` matches. An empty window triggers a single-ID probe of everything older than
+    the windows planned so far: if it is empty too, the rest of the history is skipped, otherwise the next windows
+    are four times wider. A window that still holds
+    more than a page is paged by offset inside its fixed time range, so no request is ever thrown away. Until the
+    first window of a new player has finished, that window is the only one in flight, since windows sized without
+    knowing the density would mostly come back empty or overfull.
+
+    Progress is checkpointed in `backfill_progress` as the oldest point down to which every window has been fetched
+    and written, so an interrupted backfill resumes from there. A finished backfill hands the player over to
+    `MatchSync` by setting their watermark to the end of the backfilled history.
+
+Classes:
+    Backfiller: Backfills the match histories of many players concurrently.
+
+Functions:
+    run_backfill(session, targets, now, **kwargs): Synchronous entry point wrapping `Backfiller.backfill`.
+"""
+
+logger = get_logger("backfill.log", namespace="backfill")
+
+WindowResult = namedtuple("WindowResult", ["start", "end", "match_ids", "status"])
+
+SELECT_PROGRESS_QUERY = """SELECT history_start, history_end, completed_until, window_seconds, done
+                   FROM backfill_progress WHERE puuid = ?"""
+INSERT_PROGRESS_QUERY = """INSERT INTO backfill_progress
+                   (puuid, region, history_start, history_end, completed_until, window_seconds, done, updated)
+                   VALUES (?, ?, ?, ?, ?, ?, false, toTimestamp(now()))"""
+CHECKPOINT_QUERY = """UPDATE backfill_progress SET completed_until = ?, window_seconds = ?, updated = toTimestamp(now())
+                   WHERE puuid = ?"""
+FINISH_QUERY = "UPDATE backfill_progress SET done = true, updated = toTimestamp(now()) WHERE puuid = ?"
+
+
+class _PlayerBackfill:
+    """
+    Window plan and checkpoint bookkeeping for one player's backfill.
+    """
+
+    def __init__(self, region, puuid, history_start, history_end, completed_until, window_seconds):
+        self.region = region
+        self.puuid = puuid
+        self.history_start = history_start
+        self.history_end = history_end
+        self.completed_until = completed_until
+        self.window_seconds = window_seconds
+        self.cursor = completed_until
+        # A resumed backfill starts from the checkpointed window size
+        self.calibrated = completed_until < history_end
+        self.finished = {}
+        self.match_ids = set()
+        self.failed = False
+
+    def has_windows(self):
+        return not self.failed and self.cursor > self.history_start
+
+    def next_window(self):
+        """Returns the next (start, end) to fetch, moving back from the newest unfetched point."""
+        end = self.cursor
+        self.cursor = max(self.history_start, end - self.window_seconds)
+        return self.cursor, end
+
+    def skip_rest(self):
+        """Marks everything older than the planned windows as fetched, e.g. once it is known to be empty."""
+        self.finished[self.cursor] = self.history_start
+        self.cursor = self.history_start
+
+    def complete(self, start, end):
+        """Records a fetched window; returns True if the contiguous checkpoint moved."""
+        self.finished[end] = start
+        moved = False
+        while self.completed_until in self.finished:
+            self.completed_until = self.finished.pop(self.completed_until)
+            moved = True
+        return moved
+
+    @property
+    def done(self):
+        return not self.failed and self.completed_until <= self.history_start
+
+
+class Backfiller(AsyncCrawler):
+    """
+    Backfills players' match IDs in parallel time windows.
+    """
+
+    def __init__(
+        self,
+        session,
+        parallel_windows=None,
+        initial_window=None,
+        min_window=None,
+        max_window=None,
+        target_per_window=None,
+        history_start=None,
+        **kwargs,
+    ):
+        """
+        Initialize the backfiller and prepare its checkpoint statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            parallel_windows (int, optional): Windows in flight per player. Defaults to BACKFILL_PARALLEL_WINDOWS.
+            initial_window (int, optional): Seconds covered by a new player's first windows.
+                Defaults to BACKFILL_INITIAL_WINDOW_SECONDS.
+            min_window (int, optional): Lower bound on the adapted window size. Defaults to
+                BACKFILL_MIN_WINDOW_SECONDS.
+            max_window (int, optional): Upper bound on the adapted window size. Defaults to
+                BACKFILL_MAX_WINDOW_SECONDS.
+            target_per_window (int, optional): Match IDs a window is sized to return.
+                Defaults to BACKFILL_TARGET_MATCHES_PER_WINDOW.
+            history_start (int, optional): Epoch seconds where every history starts.
+                Defaults to BACKFILL_HISTORY_START.
+            **kwargs: Passed through to `AsyncCrawler`.
+        """
+        super().__init__(session, **kwargs)
+        self.parallel_windows = parallel_windows or BACKFILL_PARALLEL_WINDOWS
+        self.initial_window = initial_window or BACKFILL_INITIAL_WINDOW_SECONDS
+        self.min_window = min_window or BACKFILL_MIN_WINDOW_SECONDS
+        self.max_window = max_window or BACKFILL_MAX_WINDOW_SECONDS
+        self.target_per_window = min(target_per_window or BACKFILL_TARGET_MATCHES_PER_WINDOW, self.count)
+        self.history_start = history_start if history_start is not None else BACKFILL_HISTORY_START
+        self.windows_fetched = 0
+
+        self.select_progress = session.prepare(SELECT_PROGRESS_QUERY)
+        self.insert_progress = session.prepare(INSERT_PROGRESS_QUERY)
+        self.checkpoint = session.prepare(CHECKPOINT_QUERY)
+        self.finish = session.prepare(FINISH_QUERY)
+        self.insert_sync_state = session.prepare(INSERT_STATE_QUERY)
+        self.advance_sync = session.prepare(ADVANCE_QUERY)
+        self.mark_processed = session.prepare(MARK_PROCESSED_QUERY)
+
+    async def _execute(self, statement, parameters):
+        """Runs a statement asynchronously and returns its first row (callbacks receive a plain list of rows)."""
+        loop = asyncio.get_running_loop()
+        rows = await bridge_future(loop, self.session.execute_async(statement, parameters))
+        return rows[0] if rows else None
+
+    def _clamp(self, seconds):
+        return int(min(self.max_window, max(self.min_window, seconds)))
+
+    async def _load(self, region, puuid, now):
+        """Resumes a player's backfill from `backfill_progress`, or starts one; returns None if already done."""
+        row = await self._execute(self.select_progress, (puuid,))
+        if row is not None:
+            if row.done:
+                logger.info("PUUID %s is already backfilled; skipping", puuid)
+                return None
+            return _PlayerBackfill(
+                region, puuid, row.history_start, row.history_end, row.completed_until, row.window_seconds
+            )
+
+        player = _PlayerBackfill(region, puuid, self.history_start, now, now, self.initial_window)
+        await self._execute(
+            self.insert_progress, (puuid, region, player.history_start, now, now, player.window_seconds)
+        )
+        return player
+
+    async def _fetch_window(self, player, start, end):
+        """Fetches and writes every match ID in [start, end], paging by offset if it holds more than a page."""
+        url = get_url("Account_Matches", region=player.region, puuid=player.puuid)
+        params = {"startTime": start, "endTime": end, "start": 0, "count": self.count}
+        match_ids = []
+        while True:
+            page = await self._call(player.region, "Account_Matches", url, dict(params))
+            if page is None:
+                return WindowResult(start, end, match_ids, "failed")
+            match_ids.extend(page)
+            if len(page) < self.count:
+                break
+            params["start"] += self.count
+
+        written = await asyncio.gather(*(self._write_match(player.puuid, match_id) for match_id in match_ids))
+        return WindowResult(start, end, match_ids, "done" if all(written) else "failed")
+
+    async def _has_older_matches(self, player):
+        url = get_url("Account_Matches", region=player.region, puuid=player.puuid)
+        params = {"startTime": player.history_start, "endTime": player.cursor, "start": 0, "count": 1}
+        page = await self._call(player.region, "Account_Matches", url, params)
+        # A failed probe is treated as "maybe"; the windows will find out
+        return page is None or bool(page)
+
+    async def _handle(self, player, result):
+        if result.status == "failed":
+            logger.error(
+                "Backfill of PUUID %s failed on window [%d, %d]; will resume from %d",
+                player.puuid, result.start, result.end, player.completed_until,
+            )
+            player.failed = True
+        else:
+            self.windows_fetched += 1
+            player.calibrated = True
+            player.match_ids.update(result.match_ids)
+            if result.match_ids:
+                span = result.end - result.start
+                player.window_seconds = self._clamp(span * self.target_per_window / len(result.match_ids))
+            elif player.has_windows():
+                if await self._has_older_matches(player):
+                    player.window_seconds = self._clamp(player.window_seconds * 4)
+                else:
+                    player.skip_rest()
+            if player.complete(result.start, result.end):
+                await self._execute(
+                    self.checkpoint, (player.completed_until, player.window_seconds, player.puuid)
+                )
+
+    async def _hand_over(self, player):
+        """Marks the backfill done and starts the player's incremental sync where the backfill ended."""
+        await self._execute(self.finish, (player.puuid,))
+        await self._execute(self.insert_sync_state, (player.puuid,))
+        row = await self._execute(self.advance_sync, (player.history_end, None, None, player.puuid, None))
+        if row.applied:
+            await self._execute(self.mark_processed, (player.puuid,))
+
+    async def backfill_player(self, region, puuid, now):
+        """Backfills one player's match history, keeping up to `parallel_windows` windows in flight.
+
+        Args:
+            region (str): The routing value for the player's account.
+            puuid (str): The player's unique identifier.
+            now (int): Epoch seconds closing the history of a player without a checkpoint.
+
+        Returns:
+            int or None: Number of distinct match IDs retrieved in this run, or None if the player had
+                already been backfilled.
+        """
+        player = await self._load(region, puuid, now)
+        if player is None:
+            return None
+
+        pending = set()
+        while True:
+            limit = self.parallel_windows if player.calibrated else 1
+            while len(pending) < limit and player.has_windows():
+                start, end = player.next_window()
+                pending.add(asyncio.ensure_future(self._fetch_window(player, start, end)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                await self._handle(player, task.result())
+
+        if player.done:
+            await self._hand_over(player)
+            logger.info("Backfilled %d match IDs for PUUID %s", len(player.match_ids), puuid)
+        return len(player.match_ids)
+
+    async def backfill(self, targets, now=None):
+        """Backfills every (region, puuid) target concurrently.
+
+        Args:
+            targets (iterable): Pairs of (region, puuid) to backfill.
+            now (int, optional): Epoch seconds closing newly started histories. Defaults to the current time.
+
+        Returns:
+            dict: Mapping of puuid to the number of match IDs retrieved (None for players already backfilled).
+        """
+        now = int(now if now is not None else time.time())
+        self._semaphores = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            targets = list(targets)
+            counts = await asyncio.gather(
+                *(self.backfill_player(region, puuid, now) for region, puuid in targets)
+            )
+            return {puuid: count for (_, puuid), count in zip(targets, counts)}
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def run_backfill(session, targets, now=None, **kwargs):
+    """Runs a `Backfiller` over `targets` to completion from synchronous code.
+
+    Args:
+        session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+        targets (iterable): Pairs of (region, puuid) to backfill.
+        now (int, optional): Epoch seconds closing newly started histories. Defaults to the current time.
+        **kwargs: Passed through to `Backfiller`.
+
+    Returns:
+        dict: Mapping of puuid to the number of match IDs retrieved.
+    """
+    backfiller = Backfiller(session, **kwargs)
+    started = time.perf_counter()
+    results = asyncio.run(backfiller.backfill(targets, now))
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Backfill finished: {backfiller.requests_made} requests, {backfiller.windows_fetched} windows, "
+        f"{backfiller.matches_written} matches written in {elapsed:.2f}s"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    from python.config import SEEN_INDEX_PATH
+    from python.Crawler.puuid_index import PuuidIndex
+    from python.Crawler.seen_index import SeenIndex
+    from python.utils.Cassandra import CassandraClient
+
+    parser = argparse.ArgumentParser(description="Backfill players' match histories in parallel time windows.")
+    parser.add_argument("--region", default="americas")
+    parser.add_argument("--puuid", action="append", default=[], help="PUUID to backfill")
+    parser.add_argument("--latest", type=int, help="Also backfill the region's N most recently added PUUIDs")
+    parser.add_argument("--parallel-windows", type=int, help="Windows in flight per player")
+    args = parser.parse_args()
+
+    start_exporter()
+    cassandra_client = CassandraClient(keyspace="raw_league_data")
+    cassandra_client.connect()
+    seen_index = SeenIndex.load(SEEN_INDEX_PATH) if SEEN_INDEX_PATH else SeenIndex()
+    try:
+        session = cassandra_client.get_session()
+        puuids = list(args.puuid)
+        if args.latest:
+            puuids.extend(entry.puuid for entry in PuuidIndex(session).page(args.region, page_size=args.latest))
+        run_backfill(
+            session,
+            [(args.region, puuid) for puuid in dict.fromkeys(puuids)],
+            parallel_windows=args.parallel_windows,
+            seen_index=seen_index,
+        )
+    finally:
+        if SEEN_INDEX_PATH:
+            seen_index.save(SEEN_INDEX_PATH)
+        cassandra_client.close()
@@ -0,0 +1,167 @@
+import heapq
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import FRONTIER_BUCKETS
+from python.Crawler.seen_index import SeenIndex, frontier_key
+from python.utils.logger import get_logger
+
+"""Durable priority queue of PUUIDs to crawl, stored in Cassandra.
+
+    Every PUUID in the frontier has a `due` time. Entries live in `crawl_frontier`, clustered by `due` within
+    (region, bucket) partitions, so the most overdue players are read with one short clustering-range query
+    per bucket. `crawl_frontier_members` records each PUUID's current position so it is only enqueued once
+    and can be moved when it is rescheduled.
+
+    Popping does not delete anything: an entry stays in place until it is rescheduled after a crawl, so a
+    restarted crawler resumes exactly where the previous one stopped.
+
+    A frontier created with another `table` keeps its entries in that table and its positions in
+    `<table>_members`, so independent queues (such as the recrawl scheduler's) can serve the same region.
+
+Classes:
+    Frontier: Cassandra-backed priority queue of PUUIDs for one region.
+"""
+
+logger = get_logger("frontier.log", namespace="frontier")
+
+FrontierEntry = namedtuple("FrontierEntry", ["due", "puuid", "bucket"])
+
+SELECT_DUE_QUERY = (
+    "SELECT due, puuid FROM crawl_frontier WHERE region = ? AND bucket = ? AND due <= ? LIMIT ?"
+)
+INSERT_ENTRY_QUERY = "INSERT INTO crawl_frontier (region, bucket, due, puuid) VALUES (?, ?, ?, ?)"
+DELETE_ENTRY_QUERY = (
+    "DELETE FROM crawl_frontier WHERE region = ? AND bucket = ? AND due = ? AND puuid = ?"
+)
+INSERT_MEMBER_QUERY = """INSERT INTO crawl_frontier_members (puuid, region, bucket, due) VALUES (?, ?, ?, ?)
+                   IF NOT EXISTS"""
+UPDATE_MEMBER_QUERY = "UPDATE crawl_frontier_members SET due = ? WHERE puuid = ?"
+
+# The queries above name the snowball crawler's tables; other frontiers substitute their own
+FRONTIER_TABLE = "crawl_frontier"
+
+
+def utcnow():
+    # Cassandra timestamps have millisecond precision
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+class Frontier:
+    """
+    Cassandra-backed priority queue of PUUIDs for one region, ordered by due time.
+    """
+
+    def __init__(self, session, region, buckets=None, seen_index=None, table=FRONTIER_TABLE):
+        """
+        Prepare the frontier statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            region (str): The routing value this frontier serves.
+            buckets (int, optional): Partitions the region is spread over. Defaults to FRONTIER_BUCKETS.
+            seen_index (SeenIndex, optional): Index used to skip PUUIDs already enqueued.
+            table (str, optional): Entry table; positions are kept in `<table>_members`.
+                Defaults to crawl_frontier.
+        """
+        self.session = session
+        self.region = region
+        self.buckets = buckets or FRONTIER_BUCKETS
+        self.seen_index = seen_index
+        self.table = table
+
+        self.select_due = session.prepare(self._on_table(SELECT_DUE_QUERY))
+        self.insert_entry = session.prepare(self._on_table(INSERT_ENTRY_QUERY))
+        self.delete_entry = session.prepare(self._on_table(DELETE_ENTRY_QUERY))
+        self.insert_member = session.prepare(self._on_table(INSERT_MEMBER_QUERY))
+        self.update_member = session.prepare(self._on_table(UPDATE_MEMBER_QUERY))
+
+    def _on_table(self, query):
+        return query.replace(FRONTIER_TABLE, self.table)
+
+    def bucket(self, puuid):
+        return zlib.crc32(puuid.encode()) % self.buckets
+
+    def push(self, puuids, due=None):
+        """
+        Enqueues PUUIDs that are not already in the frontier.
+
+        Args:
+            puuids (iterable): Players' unique identifiers.
+            due (datetime, optional): When the players become due. Defaults to now.
+
+        Returns:
+            list: The PUUIDs that were newly enqueued.
+        """
+        due = due or utcnow()
+        candidates = []
+        for puuid in dict.fromkeys(puuids):
+            if self.seen_index and self.seen_index.lookup(frontier_key(puuid, self.table)) == SeenIndex.SEEN:
+                continue
+            candidates.append((puuid, self.region, self.bucket(puuid), due))
+        if not candidates:
+            return []
+
+        results = execute_concurrent_with_args(
+            self.session, self.insert_member, candidates, raise_on_first_error=False
+        )
+        added = []
+        for (puuid, region, bucket, _), (success, result) in zip(candidates, results):
+            if not success:
+                logger.error("Error enqueuing PUUID %s: %s", puuid, result)
+                continue
+            if self.seen_index:
+                self.seen_index.add(frontier_key(puuid, self.table))
+            if result.one().applied:
+                added.append((region, bucket, due, puuid))
+
+        if added:
+            execute_concurrent_with_args(self.session, self.insert_entry, added)
+            logger.info("Enqueued %d new PUUIDs in %s", len(added), self.region)
+        return [puuid for *_, puuid in added]
+
+    def pop(self, limit, now=None, buckets=None):
+        """
+        Returns up to `limit` entries that are due, most overdue first, without removing them.
+
+        Args:
+            limit (int): Maximum entries to return.
+            now (datetime, optional): Reference time. Defaults to now.
+            buckets (iterable, optional): Only read these buckets (e.g. the ones a worker has leased).
+                Defaults to every bucket.
+
+        Returns:
+            list: FrontierEntry tuples ordered by due time.
+        """
+        now = now or utcnow()
+        buckets = range(self.buckets) if buckets is None else buckets
+        parameters = [(self.region, bucket, now, limit) for bucket in buckets]
+        if not parameters:
+            return []
+        results = execute_concurrent_with_args(self.session, self.select_due, parameters)
+        entries = [
+            FrontierEntry(row.due, row.puuid, bucket)
+            for (_, bucket, _, _), (_, rows) in zip(parameters, results)
+            for row in rows
+        ]
+        return heapq.nsmallest(limit, entries)
+
+    def reschedule(self, entry, due):
+        """
+        Moves an entry to a new due time.
+
+        Args:
+            entry (FrontierEntry): An entry returned by `pop`.
+            due (datetime): When the player is next due.
+        """
+        self.session.execute(self.insert_entry, (self.region, entry.bucket, due, entry.puuid))
+        self.session.execute(self.update_member, (due, entry.puuid))
+        self.session.execute(self.delete_entry, (self.region, entry.bucket, entry.due, entry.puuid))
+
+    def defer(self, entry, delay):
+        """Reschedules an entry `delay` (a timedelta or seconds) from now."""
+        if not isinstance(delay, timedelta):
+            delay = timedelta(seconds=delay)
+        self.reschedule(entry, utcnow() + delay)
@@ -0,0 +1,161 @@
+import os
+import socket
+import threading
+import uuid
+from python.config import SHARD_HEARTBEAT_SECONDS, SHARD_LEASE_SECONDS
+from python.utils.logger import get_logger
+
+"""Cassandra-backed leases and worker membership for crawls split across processes and hosts.
+
+    A lease is a `crawl_leases` row naming the worker that owns a resource (for example one frontier bucket).
+    Rows are written with a TTL: acquiring is an `IF NOT EXISTS` insert and every heartbeat re-writes the row
+    `IF owner = <self>`, so a worker that stops heartbeating loses its leases after `lease_seconds` and another
+    worker can take them over. Both conditions go through Paxos, so two workers never hold the same lease.
+
+    Workers of a group also heartbeat a `crawl_workers` row with the same TTL, which is how each worker learns
+    how many peers are alive and therefore its fair share of the resources and of the API key's rate limits.
+
+    Ownership can lapse while work on a resource is in progress (for example after a long GC pause), so work
+    done under a lease must be safe to repeat.
+
+Classes:
+    LeaseManager: Acquires, renews and releases one worker's leases and keeps its membership row alive.
+"""
+
+logger = get_logger("leases.log", namespace="leases")
+
+ACQUIRE_QUERY = """INSERT INTO crawl_leases (resource, owner, acquired) VALUES (?, ?, toTimestamp(now()))
+                   IF NOT EXISTS USING TTL ?"""
+RENEW_QUERY = "UPDATE crawl_leases USING TTL ? SET owner = ? WHERE resource = ? IF owner = ?"
+RELEASE_QUERY = "DELETE FROM crawl_leases WHERE resource = ? IF owner = ?"
+HEARTBEAT_QUERY = """INSERT INTO crawl_workers (worker_group, worker, host, pid, heartbeat)
+                     VALUES (?, ?, ?, ?, toTimestamp(now())) USING TTL ?"""
+LEAVE_QUERY = "DELETE FROM crawl_workers WHERE worker_group = ? AND worker = ?"
+WORKERS_QUERY = "SELECT worker FROM crawl_workers WHERE worker_group = ?"
+
+
+def worker_id():
+    """Returns an identifier unique to this process: "<host>:<pid>:<random suffix>"."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """
+    Leases held by one worker of a group, renewed by a background heartbeat.
+    """
+
+    def __init__(self, session, group, owner=None, lease_seconds=None):
+        """
+        Prepare the lease statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            group (str): Name shared by the workers splitting the same resources (e.g. "snowball:americas").
+            owner (str, optional): This worker's identifier. Defaults to `worker_id()`.
+            lease_seconds (int, optional): TTL of leases and of the membership row. Defaults to SHARD_LEASE_SECONDS.
+        """
+        self.session = session
+        self.group = group
+        self.owner = owner or worker_id()
+        self.lease_seconds = lease_seconds or SHARD_LEASE_SECONDS
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.acquire_lease = session.prepare(ACQUIRE_QUERY)
+        self.renew_lease = session.prepare(RENEW_QUERY)
+        self.release_lease = session.prepare(RELEASE_QUERY)
+        self.heartbeat_worker = session.prepare(HEARTBEAT_QUERY)
+        self.leave_group = session.prepare(LEAVE_QUERY)
+        self.select_workers = session.prepare(WORKERS_QUERY)
+
+    @property
+    def held(self):
+        """set: Resources currently leased by this worker."""
+        with self._lock:
+            return set(self._held)
+
+    def acquire(self, resource):
+        """
+        Takes the lease on `resource` if nobody holds it.
+
+        Returns:
+            bool: True if this worker now holds the lease.
+        """
+        row = self.session.execute(self.acquire_lease, (resource, self.owner, self.lease_seconds)).one()
+        if not row.applied:
+            return False
+        with self._lock:
+            self._held.add(resource)
+        logger.info("%s acquired %s", self.owner, resource)
+        return True
+
+    def release(self, resource):
+        """Gives up the lease on `resource` so another worker can take it immediately."""
+        with self._lock:
+            self._held.discard(resource)
+        self.session.execute(self.release_lease, (resource, self.owner))
+        logger.info("%s released %s", self.owner, resource)
+
+    def live_workers(self):
+        """
+        Returns the workers of the group whose membership row has not expired, including this one.
+
+        Returns:
+            list: Worker identifiers.
+        """
+        return [row.worker for row in self.session.execute(self.select_workers, (self.group,))]
+
+    def heartbeat(self):
+        """
+        Refreshes this worker's membership row and renews every held lease.
+
+        Returns:
+            list: Resources whose lease had already been lost (expired or taken over).
+        """
+        self.session.execute(
+            self.heartbeat_worker,
+            (self.group, self.owner, socket.gethostname(), os.getpid(), self.lease_seconds),
+        )
+        lost = []
+        for resource in self.held:
+            row = self.session.execute(self.renew_lease, (self.lease_seconds, self.owner, resource, self.owner)).one()
+            if not row.applied:
+                lost.append(resource)
+        if lost:
+            with self._lock:
+                self._held.difference_update(lost)
+            logger.warning("%s lost leases on %s", self.owner, ", ".join(sorted(lost)))
+        return lost
+
+    def start(self, interval=None):
+        """
+        Joins the group and heartbeats from a daemon thread every `interval` seconds.
+
+        Args:
+            interval (float, optional): Seconds between heartbeats; well under `lease_seconds`.
+                Defaults to SHARD_HEARTBEAT_SECONDS.
+        """
+        interval = interval or SHARD_HEARTBEAT_SECONDS
+        self.heartbeat()
+
+        def _beat():
+            while not self._stopped.wait(interval):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    # Leases survive until their TTL, so a later heartbeat can still renew them
+                    logger.error("Heartbeat of %s failed: %s", self.owner, e)
+
+        self._thread = threading.Thread(target=_beat, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops heartbeating, releases every lease and leaves the group."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        for resource in self.held:
+            self.release(resource)
+        self.session.execute(self.leave_group, (self.group, self.owner))
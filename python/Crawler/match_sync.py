@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import namedtuple
+from python.Crawler.match_writer import MatchWriter
+from python.utils.api_utils import call_endpoint, get_url
+from python.utils.logger import get_logger
+from python.utils.retry_queue import get_retry_queue
+
+"""Incremental match-ID sync driven by per-PUUID watermarks.
+
+    `puuid_sync` stores, per player, the epoch-second watermark up to which the match history has been synced.
+    A sync requests only matches in the window [watermark, window_end), where window_end is fixed when the window
+    is opened, so offsets stay stable while new games are played. Every page that is written advances the stored
+    `next_start` checkpoint, and the last (short) page moves the watermark to window_end. Both updates are
+    compare-and-set on the watermark, so two workers cannot move it backwards or skip a window. A failed sync
+    resumes from its checkpoint instead of walking the history again, and is queued as a "match_sync" operation
+    on the retry queue (see python/utils/retry_queue.py) so it is resumed with back-off rather than at the
+    player's next scheduled crawl.
+
+    Re-syncing an active player costs one state read, one Account_Matches call and one conditional update.
+
+Classes:
+    MatchSync: Syncs players' match IDs incrementally.
+"""
+
+logger = get_logger("match_sync.log", namespace="match_sync")
+
+SyncState = namedtuple("SyncState", ["watermark", "window_end", "next_start"])
+
+SELECT_STATE_QUERY = "SELECT watermark, window_end, next_start FROM puuid_sync WHERE puuid = ?"
+INSERT_STATE_QUERY = "INSERT INTO puuid_sync (puuid) VALUES (?) IF NOT EXISTS"
+ADVANCE_QUERY = """UPDATE puuid_sync SET watermark = ?, window_end = ?, next_start = ?, updated = toTimestamp(now())
+                   WHERE puuid = ? IF watermark = ?"""
+MARK_PROCESSED_QUERY = "UPDATE puuids SET lastprocessed = toTimestamp(now()) WHERE puuid = ?"
+
+
+class MatchSync:
+    """
+    Syncs players' match IDs from their stored watermark onwards.
+    """
+
+    def __init__(self, session, writer=None, count=100, retry_queue=None):
+        """
+        Prepare the sync statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            writer (MatchWriter, optional): Writer for the match IDs. A new one is created if omitted.
+            count (int, optional): Match IDs per Account_Matches page (max 100). Defaults to 100.
+            retry_queue (RetryQueue, optional): Queue for failed syncs. Defaults to `get_retry_queue()`.
+        """
+        self.session = session
+        self.writer = writer or MatchWriter(session, retry_queue=retry_queue)
+        self.count = count
+        self.retry_queue = retry_queue or get_retry_queue()
+        # Total across threads; per-sync counts come from `sync_counted`
+        self.api_calls = 0
+        self._calls_lock = threading.Lock()
+
+        self.select_state = session.prepare(SELECT_STATE_QUERY)
+        self.insert_state = session.prepare(INSERT_STATE_QUERY)
+        self.advance = session.prepare(ADVANCE_QUERY)
+        self.mark_processed = session.prepare(MARK_PROCESSED_QUERY)
+
+        if self.retry_queue is not None:
+            self.retry_queue.register("match_sync", self._retry)
+
+    def state(self, puuid):
+        """
+        Reads a player's sync state.
+
+        Args:
+            puuid (str): The player's unique identifier.
+
+        Returns:
+            SyncState: Watermark and open window in epoch seconds, and the checkpointed page offset. All fields
+                are None for a player that has never been synced.
+        """
+        row = self.session.execute(self.select_state, (puuid,)).one()
+        if row is None:
+            return SyncState(None, None, None)
+        return SyncState(row.watermark, row.window_end, row.next_start)
+
+    def _advance(self, puuid, expected, watermark, window_end, next_start):
+        applied = self.session.execute(
+            self.advance, (watermark, window_end, next_start, puuid, expected)
+        ).one().applied
+        if not applied:
+            logger.warning("Watermark for PUUID %s moved concurrently; stopping this sync", puuid)
+        return applied
+
+    def sync(self, region, puuid, now=None):
+        """
+        Fetches and stores the match IDs a player has played since their watermark.
+
+        Args:
+            region (str): The routing value for the player's account.
+            puuid (str): The player's unique identifier.
+            now (int, optional): Epoch seconds closing a newly opened window. Defaults to the current time.
+
+        Returns:
+            list: The match identifiers retrieved, newest first. When a page fails, the IDs retrieved so far are
+                returned, the sync is queued for retry and the next sync resumes from the checkpoint.
+        """
+        return self.sync_counted(region, puuid, now)[0]
+
+    def sync_counted(self, region, puuid, now=None):
+        """
+        Same as `sync`, also returning the Account_Matches calls this sync made. Safe to call from several
+        threads at once, unlike diffing `api_calls`.
+
+        Args:
+            region (str): The routing value for the player's account.
+            puuid (str): The player's unique identifier.
+            now (int, optional): Epoch seconds closing a newly opened window. Defaults to the current time.
+
+        Returns:
+            tuple: (match IDs retrieved, number of Account_Matches calls made).
+        """
+        match_ids, error, calls = self._sync(region, puuid, now)
+        if error is not None and self.retry_queue is not None:
+            self.retry_queue.enqueue("match_sync", {"region": region, "puuid": puuid}, error)
+        return match_ids, calls
+
+    def _retry(self, payload):
+        _, error, _ = self._sync(payload["region"], payload["puuid"])
+        if error is not None:
+            raise RuntimeError(error)
+
+    def _sync(self, region, puuid, now=None):
+        """Runs one sync; returns the match IDs, why a page failed (None otherwise) and the calls made."""
+        state = self.state(puuid)
+        if state.watermark is None and state.window_end is None:
+            self.session.execute(self.insert_state, (puuid,))
+
+        window_end = state.window_end or int(now if now is not None else time.time())
+        start = state.next_start or 0
+        url = get_url("Account_Matches", region=region, puuid=puuid)
+        match_ids = []
+        calls = 0
+
+        while True:
+            params = {"start": start, "count": self.count, "endTime": window_end}
+            if state.watermark is not None:
+                params["startTime"] = state.watermark
+            calls += 1
+            with self._calls_lock:
+                self.api_calls += 1
+            page = call_endpoint(url, params, region=region, method="Account_Matches")
+            if page is None:
+                logger.error("Sync of PUUID %s stopped at offset %d; will resume from there", puuid, start)
+                return match_ids, f"Account_Matches request at offset {start} failed", calls
+
+            try:
+                self.writer.add_matches(puuid, page, strict=True)
+            except RuntimeError as e:
+                logger.error("Sync of PUUID %s stopped at offset %d: %s; will resume from there", puuid, start, e)
+                return match_ids, str(e), calls
+            match_ids.extend(page)
+
+            if len(page) < self.count:
+                if self._advance(puuid, state.watermark, window_end, None, None):
+                    self.session.execute(self.mark_processed, (puuid,))
+                    logger.info(
+                        "Synced %d match IDs for PUUID %s; watermark now %d", len(match_ids), puuid, window_end
+                    )
+                return match_ids, None, calls
+
+            start += self.count
+            # Losing the compare-and-set means another worker is syncing this player; nothing to retry
+            if not self._advance(puuid, state.watermark, state.watermark, window_end, start):
+                return match_ids, None, calls
@@ -0,0 +1,230 @@
+from cassandra import ConsistencyLevel
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import CASSANDRA_WRITE_CONCURRENCY, CASSANDRA_WRITE_CONSISTENCY
+from python.Crawler.frontier import utcnow
+from python.Crawler.puuid_index import PuuidIndex
+from python.Crawler.seen_index import SeenIndex, match_key, puuid_key
+from python.utils.logger import get_logger
+from python.utils.metrics import MATCH_IDS_WRITTEN
+from python.utils.retry_queue import get_retry_queue
+
+"""Bulk write path for puuids and puuid_matches.
+
+    Writes whole pages of identifiers with prepared statements through the driver's concurrent
+    execution instead of an unprepared SELECT before every row.
+
+    Match rows never touch the `processed` column, so replaying a page cannot reset a match that has
+    already been processed; a missing `processed` value means the match has not been processed yet.
+    `dateadded` is the time a row was first written (exports resume from it), so a row is only written
+    unconditionally when a warmed `SeenIndex` says it is new; every other row is written with
+    IF NOT EXISTS and an existing row is left as it is. PUUIDs written with `if_not_exists` follow the
+    same rule. Keys the index
+    saw recently are skipped altogether. Every PUUID row created is also written to the
+    `puuids_by_region` index with the same client-side `dateadded`.
+
+    Rows that fail to write in a non-strict call are queued on the retry queue (see python/utils/retry_queue.py)
+    as "match_ids" or "puuids" operations, which this writer also retries.
+
+Classes:
+    MatchWriter: Prepared, concurrent writer for PUUIDs and match identifiers.
+"""
+
+logger = get_logger("match_writer.log", namespace="match_writer")
+
+UPSERT_MATCH_QUERY = (
+    "INSERT INTO puuid_matches (match_id, puuid, dateadded) VALUES (?, ?, toTimestamp(now()))"
+)
+INSERT_MATCH_LWT_QUERY = UPSERT_MATCH_QUERY + " IF NOT EXISTS"
+UPSERT_PUUID_QUERY = "INSERT INTO puuids (puuid, region, dateadded) VALUES (?, ?, ?)"
+INSERT_PUUID_LWT_QUERY = UPSERT_PUUID_QUERY + " IF NOT EXISTS"
+
+
+class MatchWriter:
+    """
+    Prepared, concurrent writer for PUUIDs and match identifiers.
+    """
+
+    def __init__(self, session, concurrency=None, consistency=None, seen_index=None, retry_queue=None):
+        """
+        Prepare the write statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            concurrency (int, optional): Maximum in-flight statements per bulk call.
+                Defaults to CASSANDRA_WRITE_CONCURRENCY.
+            consistency (str, optional): Consistency level name (e.g. "LOCAL_ONE", "QUORUM").
+                Defaults to CASSANDRA_WRITE_CONSISTENCY.
+            seen_index (SeenIndex, optional): Index of keys already written, consulted before writing.
+            retry_queue (RetryQueue, optional): Queue for rows that failed to write. Defaults to
+                `get_retry_queue()`.
+        """
+        self.session = session
+        self.seen_index = seen_index
+        self.retry_queue = retry_queue or get_retry_queue()
+        self.concurrency = concurrency or CASSANDRA_WRITE_CONCURRENCY
+        consistency_level = ConsistencyLevel.name_to_value[
+            (consistency or CASSANDRA_WRITE_CONSISTENCY).upper()
+        ]
+
+        self.puuid_index = PuuidIndex(session, concurrency=self.concurrency)
+        self.insert_match = session.prepare(UPSERT_MATCH_QUERY)
+        self.insert_match_lwt = session.prepare(INSERT_MATCH_LWT_QUERY)
+        self.insert_puuid = session.prepare(UPSERT_PUUID_QUERY)
+        self.insert_puuid_lwt = session.prepare(INSERT_PUUID_LWT_QUERY)
+        for statement in (self.insert_match, self.insert_match_lwt, self.insert_puuid):
+            statement.consistency_level = consistency_level
+
+        if self.retry_queue is not None:
+            self.retry_queue.register(
+                "match_ids", lambda payload: self.add_matches(payload["puuid"], payload["match_ids"], strict=True)
+            )
+            self.retry_queue.register(
+                "puuids",
+                lambda payload: self.add_puuids(
+                    payload["puuids"], payload["region"], payload["if_not_exists"], strict=True
+                ),
+            )
+
+    def _execute(self, statement, parameters):
+        """Runs `statement` once per parameter tuple; returns the successful (params, result) pairs."""
+        results = execute_concurrent_with_args(
+            self.session,
+            statement,
+            parameters,
+            concurrency=self.concurrency,
+            raise_on_first_error=False,
+        )
+        succeeded = []
+        for params, (success, result) in zip(parameters, results):
+            if success:
+                succeeded.append((params, result))
+            else:
+                logger.error("Error writing %s: %s", params, result)
+        return succeeded
+
+    def _unseen(self, keyed_parameters):
+        """Splits (key, params) pairs into new and uncertain, dropping keys already seen."""
+        if not self.seen_index:
+            return [], [params for _, params in keyed_parameters]
+        new, uncertain = [], []
+        for key, params in keyed_parameters:
+            status = self.seen_index.lookup(key)
+            if status == SeenIndex.NEW:
+                new.append(params)
+            elif status == SeenIndex.UNCERTAIN:
+                uncertain.append(params)
+        return new, uncertain
+
+    def match_statement(self, status):
+        """
+        Picks the statement for a match row by its seen-index status.
+
+        Args:
+            status (str): `SeenIndex.lookup` of the row's key, or None without an index.
+
+        Returns:
+            PreparedStatement: The plain insert for rows a warmed index has never seen, otherwise the
+                IF NOT EXISTS insert, which keeps an existing row's `dateadded`.
+        """
+        if status == SeenIndex.NEW and self.seen_index is not None and self.seen_index.warmed:
+            return self.insert_match
+        return self.insert_match_lwt
+
+    def add_matches(self, puuid, match_ids, strict=False):
+        """
+        Writes a page of match identifiers for a player.
+
+        Args:
+            puuid (str): The player's unique identifier.
+            match_ids (list): Match identifiers, typically one page (up to 100) from Account_Matches.
+            strict (bool, optional): Raise if any row fails to write. Defaults to False (failed rows are
+                logged and queued for retry).
+
+        Returns:
+            int: Number of rows written successfully.
+
+        Raises:
+            RuntimeError: If `strict` is set and some rows could not be written.
+        """
+        new, uncertain = self._unseen([(match_key(match_id, puuid), (match_id, puuid)) for match_id in match_ids])
+        parameters = new + uncertain
+        if not parameters:
+            return 0
+        # Only a warmed index knows a row is new; anything else may exist and must keep its `dateadded`
+        if self.seen_index and self.seen_index.warmed:
+            succeeded = self._execute(self.insert_match, new) if new else []
+        else:
+            succeeded, uncertain = [], parameters
+        if uncertain:
+            succeeded += self._execute(self.insert_match_lwt, uncertain)
+        if self.seen_index:
+            self.seen_index.add_many(match_key(match_id, puuid) for (match_id, puuid), _ in succeeded)
+        MATCH_IDS_WRITTEN.inc(amount=len(succeeded))
+        logger.info("Wrote %d/%d match IDs for PUUID %s", len(succeeded), len(parameters), puuid)
+        if len(succeeded) < len(parameters):
+            if strict:
+                raise RuntimeError(f"{len(parameters) - len(succeeded)} match IDs for PUUID {puuid} were not written")
+            if self.retry_queue is not None:
+                written = {match_id for (match_id, _), _ in succeeded}
+                failed = [match_id for match_id, _ in parameters if match_id not in written]
+                self.retry_queue.enqueue("match_ids", {"puuid": puuid, "match_ids": failed}, "write failed")
+        return len(succeeded)
+
+    def add_puuids(self, puuids, region, if_not_exists=False, strict=False):
+        """
+        Writes a batch of PUUIDs for a region.
+
+        Args:
+            puuids (list): Players' unique identifiers.
+            region (str): The routing value the players belong to.
+            if_not_exists (bool, optional): Use a lightweight transaction so an existing row keeps its
+                original `dateadded`. With a warmed seen index, only uncertain PUUIDs pay for the
+                transaction and PUUIDs the index has never seen are plain upserts; a cold index only knows
+                this run's writes, so every unseen PUUID is written conditionally. Defaults to False (plain
+                upsert).
+            strict (bool, optional): Raise if any row fails to write. Defaults to False (failed rows are
+                logged and queued for retry).
+
+        Returns:
+            int: Number of rows written successfully.
+
+        Raises:
+            RuntimeError: If `strict` is set and some rows could not be written.
+        """
+        dateadded = utcnow()
+        new, uncertain = self._unseen([(puuid_key(puuid), (puuid, region, dateadded)) for puuid in puuids])
+        if not new and not uncertain:
+            return 0
+
+        # (params, created) per successful write; only created rows go to the region/time index
+        if if_not_exists and self.seen_index and self.seen_index.warmed:
+            succeeded = [(params, True) for params, _ in self._execute(self.insert_puuid, new)] if new else []
+            for params, result in self._execute(self.insert_puuid_lwt, uncertain) if uncertain else []:
+                applied = result.one().applied
+                if applied:
+                    self.seen_index.report_false_positive()
+                succeeded.append((params, applied))
+        elif if_not_exists:
+            succeeded = [
+                (params, result.one().applied)
+                for params, result in self._execute(self.insert_puuid_lwt, new + uncertain)
+            ]
+        else:
+            succeeded = [(params, True) for params, _ in self._execute(self.insert_puuid, new + uncertain)]
+
+        if self.seen_index:
+            self.seen_index.add_many(puuid_key(puuid) for (puuid, _, _), _ in succeeded)
+        self.puuid_index.add_many(
+            [puuid for (puuid, _, _), created in succeeded if created], region, dateadded
+        )
+        logger.info("Wrote %d/%d PUUIDs for region %s", len(succeeded), len(new) + len(uncertain), region)
+        if len(succeeded) < len(new) + len(uncertain):
+            written = {puuid for (puuid, _, _), _ in succeeded}
+            failed = [puuid for puuid, _, _ in new + uncertain if puuid not in written]
+            if strict:
+                raise RuntimeError(f"{len(failed)} PUUIDs for region {region} were not written")
+            if self.retry_queue is not None:
+                self.retry_queue.enqueue(
+                    "puuids", {"puuids": failed, "region": region, "if_not_exists": if_not_exists}, "write failed"
+                )
+        return len(succeeded)
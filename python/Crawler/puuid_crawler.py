@@ -1,9 +1,17 @@
-import time
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor
-from python.utils.Cassandra import CassandraClient
+import argparse
+import asyncio
+import threading
+from functools import partial
+from python.Crawler.async_crawler import run_async_crawl
+from python.Crawler.match_sync import MatchSync
+from python.Crawler.match_writer import MatchWriter
+from python.Crawler.seen_index import SeenIndex
+from python.config import SEEN_INDEX_PATH
+from python.utils.Cassandra import get_shared_session
 from python.utils.api_utils import get_url, call_endpoint
 from python.utils.logger import get_logger
+from python.utils.metrics import start_exporter
+from python.utils.retry_queue import retry_later
 
 """Manages League of Legends match and player data retrieval and storage. Provides functionality to fetch player identifiers,
     match histories, and persist data in a Cassandra database.
@@ -16,58 +24,58 @@ Functions:
     get_matches(region, puuid): Fetches recent match identifiers for a specific player.
     add_puuid(puuid, region): Adds a new PUUID to the database.
     add_match(puuid, match_id, region): Stores a match identifier for a specific player.
-"""
+    add_matches(puuid, match_ids, region): Stores a page of match identifiers with prepared, concurrent writes.
+    fetch_all_match_ids(region, puuid): Syncs a player's match identifiers incrementally from their watermark.
+    crawl_async(region, puuids, fetch_details): Crawls many PUUIDs concurrently with the async engine.
+    crawl(region, puuids, use_async, fetch_details, warm_index): Runs one crawl as the command line does.
+
+    The Cassandra session, seen index and writers are created on first use rather than at import, so importing
+    this module never blocks on cluster discovery. They remain available as the module attributes `session`,
+    `seen_index`, `match_writer` and `match_sync`.
 
-# Initialize Cassandra Client
-cassandra_client = CassandraClient(keyspace="raw_league_data")
-cassandra_client.connect()
-session = cassandra_client.get_session()
+    With RETRY_QUEUE_PATH set, writes and syncs that fail are queued for retry with back-off (see
+    python/utils/retry_queue.py) instead of only being logged.
+"""
 
 # Log Information
 logger = get_logger("match_crawler.log", namespace="match_crawler")
 
-# Throttling Parameters
-REQUESTS_PER_SECOND = 20
-REQUESTS_PER_TWO_MINUTES = 100
-SLEEP_INTERVAL = 1  # 1 second delay between requests if throttling is needed
-
-# Global deque for tracking requests
-requests_in_window = deque(
-    maxlen=100
-)  # Tracks up to 100 requests for 2-minute rate limiting
-
-# Get Start Time
-global_start_time = time.time()
-
-
-def throttle():
-    """
-    Enforce throttling based on rate limits.
-    """
-    global requests_in_window
-
-    # Remove timestamps older than 2 minutes from the deque
-    current_time = time.time()
-    while requests_in_window and (current_time - requests_in_window[0] > 120):
-        requests_in_window.popleft()
-
-    # Check if we are over the limit
-    if len(requests_in_window) >= REQUESTS_PER_TWO_MINUTES:
-        logger.info("Throttling: Waiting to respect rate limits.")
-        print("Throttling: Waiting to respect rate limits.")
+DEFAULT_PUUID = "HHk7hueAv-6OIn3vv7xOVPxIB_ARB2z9IAf7p5w14pbRN1COH0bCY5jZEXYioHKIaf3AMj3Ntuhvvg"
+
+_components = {}
+_components_lock = threading.Lock()
+
+
+def _component(name):
+    """Returns the shared session, seen index, match writer or match sync, creating all of them on first use."""
+    with _components_lock:
+        if not _components:
+            session = get_shared_session("raw_league_data")
+            # Skip writes for keys seen recently; persisted between runs when SEEN_INDEX_PATH is set
+            seen_index = SeenIndex.load(SEEN_INDEX_PATH) if SEEN_INDEX_PATH else SeenIndex()
+            match_writer = MatchWriter(session, seen_index=seen_index)
+            _components.update(
+                session=session,
+                seen_index=seen_index,
+                match_writer=match_writer,
+                match_sync=MatchSync(session, writer=match_writer),
+            )
+        return _components[name]
 
-        time.sleep(SLEEP_INTERVAL)
 
-    # Record the current request timestamp
-    requests_in_window.append(current_time)
+def __getattr__(name):
+    if name in ("session", "seen_index", "match_writer", "match_sync"):
+        return _component(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_most_recent_puuid(region):
     """Retrieves the most recently added player unique identifier (PUUID) for a specific region. Queries the database to
         find the latest PUUID based on the date added.
 
-    Searches the puuids table for entries matching the given region, sorts them by date in descending order,
-        and returns the most recent PUUID. Handles cases where no PUUID is found or an error occurs during the database query.
+    Reads the newest entry of the region's current partition in the puuids_by_region index, which is clustered
+        by date added in descending order, so the lookup is a single-partition LIMIT 1 read regardless of how many
+        PUUIDs are stored. Handles cases where no PUUID is found or an error occurs during the database query.
 
     Args:
         region (str): The server region to search for the most recent PUUID.
@@ -84,28 +92,18 @@ def get_most_recent_puuid(region):
     """
 
     try:
-
-        query = (
-            "SELECT puuid, dateadded FROM puuids WHERE region = %s and dateadded < %s"
-        )
-
-        results = session.execute(query, (region,))
-        if sorted_results := sorted(
-            results, key=lambda row: row.dateadded, reverse=True
-        ):
-            result = sorted_results[0] if sorted_results else None
-
-        if result:
+        latest = _component("match_writer").puuid_index.latest(region, limit=1)
+        if latest:
+            result = latest[0]
             logger.info(
-                f"Most Recent PUUID in {region}: {result.puuid}, DateAdded: {result.dateadded}"
+                "Most Recent PUUID in %s: %s, DateAdded: %s", region, result.puuid, result.dateadded
             )
             return result.puuid
         else:
-            logger.info(f"No PUUID found for region: {region}")
+            logger.info("No PUUID found for region: %s", region)
             return None
     except Exception as e:
-        print(f"Error querying PUUID for region {region}: {e}")
-        logger.info(f"Error querying PUUID for region {region}: {e}")
+        logger.error("Error querying PUUID for region %s: %s", region, e)
 
         return None
 
@@ -122,14 +120,14 @@ def get_matches(region, puuid, start=0, count=100, start_time=None):
         puuid (str): The player's unique identifier.
 
     Returns:
-        list: A list of match identifiers or API response data.
+        list or None: A list of match identifiers, or None if the request failed (as opposed to an empty list for
+            a player with no matches in range).
 
     Examples:
         >>> get_matches('americas', 'player-puuid-123')
         ['match1', 'match2', 'match3', 'match4', 'match5']
     """
     try:
-        throttle()  # Enforce throttling
         url = get_url("Account_Matches", region=region, puuid=puuid)
         query_params = {
             "type": None,
@@ -142,114 +140,155 @@ def get_matches(region, puuid, start=0, count=100, start_time=None):
 
         filtered_params = {k: v for k, v in query_params.items() if v is not None}
 
-        matches = call_endpoint(url, filtered_params)
-        return matches or []
+        # Rate limits are enforced per routing value inside call_endpoint
+        return call_endpoint(
+            url, filtered_params, region=region, method="Account_Matches"
+        )
     except Exception as e:
-        print(f"Error fetching matches for PUUID {puuid}: {e}")
-        logger.error(f"Error fetching matches for PUUID {puuid}: {e}")
+        logger.error("Error fetching matches for PUUID %s: %s", puuid, e)
+        return None
 
 
 def fetch_all_match_ids(region, puuid):
     """
-    Fetch all match IDs for a given PUUID and store them in the database.
+    Fetch the match IDs a player has played since their last sync and store them in the database.
+
+    Only matches after the player's watermark (epoch seconds, kept in puuid_sync) are requested; the first sync
+    of a player walks their whole history. See `MatchSync`.
+
+    Returns:
+        list: The match identifiers retrieved.
     """
+    return _component("match_sync").sync(region, puuid)
+
+
+def add_puuid(puuid, region):
     try:
-        update_query = """
-                UPDATE puuids
-                SET lastprocessed = DateAdded
-                WHERE lastprocessed IS NULL ALLOW FILTERING;
-            """
-        start_time_query = """
-                SELECT lastprocessed as starttime
-                FROM puuids
-                WHERE puuid = %s
-            """
-        results = session.execute(start_time_query, (puuid,))
-        start_time = results.one().starttime if results.one() else None
-        logger.info(f"Most recent start time for PUUID {puuid}: {start_time}")
+        # Lightweight transaction keeps an existing row's DateAdded; new rows are also indexed by region and time
+        if _component("match_writer").add_puuids([puuid], region, if_not_exists=True):
+            logger.info("PUUID %s written for region %s", puuid, region)
     except Exception as e:
-        logger.error(f"Error fetching start time for PUUID {puuid}: {e}")
-        start_time = None  # Default to None if there's an error
-    start = 0
-    count = 100  # Retrieve matches in larger batches if possible
-
-    while True:
-        try:
-            matches = get_matches(
-                region, puuid, start=start, count=count, start_time=start_time
-            )
-            if not matches:
-                logger.info(f"All match IDs retrieved for PUUID {puuid}.")
-                update_query = "UPDATE puuids SET lastprocessed = toTimestamp(now()) WHERE puuid = %s"
-                session.execute(update_query, (puuid,))
-                break
+        logger.error("Error adding PUUID %s for region %s: %s", puuid, region, e)
+        retry_later("puuids", {"puuids": [puuid], "region": region, "if_not_exists": True}, e)
 
-            for match_id in matches:
-                try:
-                    # Insert match_id into puuid_matches table if not already present
-                    add_match(puuid, match_id, region)
-                except Exception as e:
-                    logger.error(
-                        f"Error adding match ID {match_id} for PUUID {puuid}: {e}"
-                    )
 
-            # Increment the starting index for the next batch
-            start += count
+def add_match(puuid, match_id, region):
+    add_matches(puuid, [match_id], region)
 
-        except Exception as e:
-            logger.error(f"Error fetching matches for PUUID {puuid}: {e}")
-            break
 
+def add_matches(puuid, match_ids, region):
+    """Stores a page of match identifiers for a player.
 
-def add_puuid(puuid, region):
-    try:
-        query = """INSERT INTO puuids (puuid, region, DateAdded) VALUES (%s, %s, toTimestamp(now()))
-                   IF NOT EXISTS"""
+    Uses prepared, idempotent upserts executed concurrently, so a page of up to 100 IDs costs one
+    round of parallel writes rather than a SELECT plus a lightweight transaction per ID.
 
-        # Execute the query
-        result = session.execute(query, (puuid, region))
+    Args:
+        puuid (str): The player's unique identifier.
+        match_ids (list): Match identifiers returned by Account_Matches.
+        region (str): The routing value for the player's account.
 
-        # Check if the row was actually added
-        if result.one().applied:
-            logger.info(f"PUUID {puuid} successfully added for region {region}")
-        else:
-            logger.info(f"PUUID {puuid} already exists for region {region}")
+    Returns:
+        int: Number of match identifiers written.
+    """
+    try:
+        return _component("match_writer").add_matches(puuid, match_ids)
     except Exception as e:
-        print(f"Error adding PUUID {puuid} for region {region}: {e}")
+        logger.error("Error adding Match Ids for PUUID %s in region %s: %s", puuid, region, e)
+        retry_later("match_ids", {"puuid": puuid, "match_ids": list(match_ids)}, e)
+        return 0
 
 
-def add_match(puuid, match_id, region):
-    try:
-        # Check if the match has already been processed in puuid_matches
-        check_query = "SELECT processed FROM puuid_matches WHERE match_id = %s and processed = True"
-        if check_result := session.execute(check_query, (match_id,)).one():
-            logger.info(f"Match {match_id} already processed for PUUID {puuid}.")
-            return
+def crawl_async(region, puuids, fetch_details=False):
+    """Crawls the match histories of many players concurrently using the async crawl engine.
 
-        insert_query = """INSERT INTO puuid_matches (dateadded, match_id, puuid, processed) VALUES (toTimestamp(now()), %s, %s, false)
-                   IF NOT EXISTS"""
+    Args:
+        region (str): The routing value shared by the players.
+        puuids (list): The players' unique identifiers.
+        fetch_details (bool, optional): Also fetch the Match details of every discovered match ID and store
+            them in match_payloads.
 
-        # Execute the query
-        result = session.execute(insert_query, (match_id, puuid))
+    Returns:
+        dict: Mapping of puuid to the list of match identifiers retrieved, or None for players whose history
+            could not be retrieved; those are queued to be synced again.
+    """
+    for puuid in puuids:
+        add_puuid(puuid, region)
+    session = _component("session")
+    on_match = None
+    if fetch_details:
+        from python.Pipeline.match_ingest import MatchIngestor
+
+        ingestor = MatchIngestor(session)
+
+        async def on_match(region, match_id, payload):
+            # Storing blocks on Cassandra, so it runs off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, partial(ingestor.store, match_id, payload, region=region)
+            )
 
-        # Check if the row was actually added
-        if result.one().applied:
-            logger.info(f"Match ID {match_id} for PUUID {puuid} successfully added")
-        else:
-            logger.info(f"Match ID {match_id} for PUUID {puuid} already exists")
+    results = run_async_crawl(
+        session,
+        [(region, puuid) for puuid in puuids],
+        fetch_details=fetch_details,
+        on_match=on_match,
+        seen_index=_component("seen_index"),
+    )
+    for puuid, match_ids in results.items():
+        if match_ids is None:
+            retry_later("match_sync", {"region": region, "puuid": puuid}, "match history incomplete")
+    return results
 
-    except Exception as e:
-        print(f"Error adding Match Id {match_id} for PUUID {puuid}: {e}")
-        return
+
+def crawl(region, puuids=None, use_async=False, fetch_details=False, warm_index=False):
+    """Runs one crawl the way the command line does, then saves the seen index.
+
+    Without `puuids`, the region's most recently added PUUID is crawled (or a fixed default if there is none).
+
+    Args:
+        region (str): The routing value to crawl.
+        puuids (list, optional): The players to crawl. The sequential crawl only uses the first one.
+        use_async (bool, optional): Use the concurrent async crawl engine.
+        fetch_details (bool, optional): Also fetch and store match details (async mode only).
+        warm_index (bool, optional): Warm the seen index from Cassandra before crawling.
+
+    Raises:
+        ValueError: If `fetch_details` is set without `use_async`.
+    """
+    if fetch_details and not use_async:
+        raise ValueError("Fetching match details needs the async crawl engine")
+    seen_index = _component("seen_index")
+    if warm_index:
+        seen_index.warm(_component("session"))
+
+    puuids = puuids or [get_most_recent_puuid(region) or DEFAULT_PUUID]
+    if use_async:
+        crawl_async(region, puuids, fetch_details=fetch_details)
+    else:
+        print(f"Using summoner puuid: {puuids[0]}")
+        add_puuid(puuids[0], region)
+        fetch_all_match_ids(region, puuids[0])
+
+    logger.info("Seen index stats: %s", seen_index.stats())
+    if SEEN_INDEX_PATH:
+        seen_index.save(SEEN_INDEX_PATH)
 
 
 if __name__ == "__main__":
-    region = "americas"
-    default_puuid = (
-        "HHk7hueAv-6OIn3vv7xOVPxIB_ARB2z9IAf7p5w14pbRN1COH0bCY5jZEXYioHKIaf3AMj3Ntuhvvg"
+    parser = argparse.ArgumentParser(description="Crawl match IDs for League of Legends players.")
+    parser.add_argument("--region", default="americas")
+    parser.add_argument("--puuid", action="append", help="PUUID to crawl (repeatable)")
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true", help="Use the concurrent async crawl engine"
+    )
+    parser.add_argument(
+        "--details", action="store_true", help="Also fetch and store match details (async mode only)"
+    )
+    parser.add_argument(
+        "--warm-index", action="store_true", help="Warm the seen index from Cassandra before crawling"
     )
+    args = parser.parse_args()
+    if args.details and not args.use_async:
+        parser.error("--details needs --async")
 
-    if summoner_puuid := get_most_recent_puuid(region) or default_puuid:
-        print(f"Using summoner puuid: {summoner_puuid}")
-        add_puuid(summoner_puuid, region)
-        fetch_all_match_ids(region, summoner_puuid)
+    start_exporter()
+    crawl(args.region, args.puuid, args.use_async, args.details, args.warm_index)
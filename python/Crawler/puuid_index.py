@@ -0,0 +1,205 @@
+from collections import namedtuple
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import CASSANDRA_WRITE_CONCURRENCY, PUUID_INDEX_LOOKBACK_MONTHS
+from python.Crawler.frontier import utcnow
+from python.utils.Cassandra import stream_rows
+from python.utils.logger import get_logger
+
+"""Region- and time-ordered index of PUUIDs.
+
+    `puuids` is keyed by PUUID alone, so "the newest players in a region" cannot be answered without scanning
+    the table. `puuids_by_region` stores the same players partitioned by (region, month) and clustered by
+    `dateadded DESC`, so the latest N PUUIDs of a region are a `LIMIT N` read of one partition and older players
+    are reached by paging backwards along the clustering order, one month partition at a time.
+
+    A PUUID that is upserted again gets a second, newer index row; pages drop such repeats within a page.
+
+    Once a page runs past a month partition, the older months are read concurrently in waves that double in
+    size (1, 2, 4, ... partitions), so a sparse region costs a handful of round trips rather than one per month
+    of the lookback window.
+
+Classes:
+    PuuidIndex: Writes and reads the region/time index.
+"""
+
+logger = get_logger("puuid_index.log", namespace="puuid_index")
+
+IndexedPuuid = namedtuple("IndexedPuuid", ["puuid", "dateadded"])
+
+INSERT_INDEX_QUERY = "INSERT INTO puuids_by_region (region, month, dateadded, puuid) VALUES (?, ?, ?, ?)"
+SELECT_LATEST_QUERY = "SELECT puuid, dateadded FROM puuids_by_region WHERE region = ? AND month = ? LIMIT ?"
+SCAN_PUUIDS_QUERY = "SELECT puuid, region, dateadded FROM puuids"
+SELECT_BEFORE_QUERY = """SELECT puuid, dateadded FROM puuids_by_region
+                   WHERE region = ? AND month = ? AND (dateadded, puuid) < (?, ?) LIMIT ?"""
+
+
+def month_bucket(timestamp):
+    return timestamp.year * 100 + timestamp.month
+
+
+def _previous_month(month):
+    year, month = divmod(month, 100)
+    return (year - 1) * 100 + 12 if month == 1 else year * 100 + month - 1
+
+
+class PuuidIndex:
+    """
+    Region- and time-ordered index of PUUIDs backed by `puuids_by_region`.
+    """
+
+    def __init__(self, session, concurrency=None, lookback_months=None):
+        """
+        Prepare the index statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            concurrency (int, optional): Maximum in-flight writes per bulk call.
+                Defaults to CASSANDRA_WRITE_CONCURRENCY.
+            lookback_months (int, optional): How many month partitions a read walks back through before giving
+                up. Defaults to PUUID_INDEX_LOOKBACK_MONTHS.
+        """
+        self.session = session
+        self.concurrency = concurrency or CASSANDRA_WRITE_CONCURRENCY
+        self.lookback_months = lookback_months or PUUID_INDEX_LOOKBACK_MONTHS
+
+        self.insert = session.prepare(INSERT_INDEX_QUERY)
+        self.select_latest = session.prepare(SELECT_LATEST_QUERY)
+        self.select_before = session.prepare(SELECT_BEFORE_QUERY)
+
+    def add_many(self, puuids, region, dateadded):
+        """
+        Indexes PUUIDs added to the puuids table.
+
+        Args:
+            puuids (iterable): Players' unique identifiers.
+            region (str): The routing value the players belong to.
+            dateadded (datetime.datetime): The `dateadded` written to the puuids table (naive UTC).
+
+        Returns:
+            int: Number of index rows written.
+        """
+        month = month_bucket(dateadded)
+        parameters = [(region, month, dateadded, puuid) for puuid in puuids]
+        return self._write(parameters) if parameters else 0
+
+    def _write(self, parameters):
+        results = execute_concurrent_with_args(
+            self.session, self.insert, parameters, concurrency=self.concurrency, raise_on_first_error=False
+        )
+        written = 0
+        for (region, _, _, puuid), (success, result) in zip(parameters, results):
+            if success:
+                written += 1
+            else:
+                logger.error("Error indexing PUUID %s for region %s: %s", puuid, region, result)
+        return written
+
+    def backfill(self, fetch_size=1000):
+        """
+        Indexes every row already in the puuids table, e.g. rows written before the index existed.
+
+        Args:
+            fetch_size (int, optional): Rows per page of the table scan. Defaults to 1000.
+
+        Returns:
+            int: Number of index rows written.
+        """
+        written = 0
+        parameters = []
+        for row in stream_rows(self.session, SCAN_PUUIDS_QUERY, fetch_size=fetch_size):
+            if row.region and row.dateadded:
+                parameters.append((row.region, month_bucket(row.dateadded), row.dateadded, row.puuid))
+            if len(parameters) >= fetch_size:
+                written += self._write(parameters)
+                parameters = []
+        if parameters:
+            written += self._write(parameters)
+        logger.info("Backfilled %d PUUIDs into puuids_by_region", written)
+        return written
+
+    def page(self, region, page_size=100, after=None, now=None):
+        """
+        Reads one page of a region's PUUIDs, newest first.
+
+        Args:
+            region (str): The routing value.
+            page_size (int, optional): Maximum PUUIDs returned. Defaults to 100.
+            after (IndexedPuuid, optional): The last entry of the previous page; reading resumes just after it.
+            now (datetime.datetime, optional): Where the first page starts (naive UTC). Defaults to the
+                current month.
+
+        Returns:
+            list: Up to `page_size` `IndexedPuuid`s in `dateadded` descending order. Fewer than `page_size`
+                means the index has been exhausted within the lookback window.
+        """
+        month = month_bucket(after.dateadded if after is not None else now or utcnow())
+        months_left = self.lookback_months
+        cursor = after
+        entries = []
+        seen = set()
+        wave = 1
+        while len(entries) < page_size and months_left:
+            remaining = page_size - len(entries)
+            if cursor is not None and month == month_bucket(cursor.dateadded):
+                months = [month]
+                parameters = (region, month, cursor.dateadded, cursor.puuid, remaining)
+                results = [self.session.execute(self.select_before, parameters)]
+            else:
+                months = [month]
+                while len(months) < min(wave, months_left):
+                    months.append(_previous_month(months[-1]))
+                results = [
+                    rows
+                    for _, rows in execute_concurrent_with_args(
+                        self.session, self.select_latest, [(region, older, remaining) for older in months]
+                    )
+                ]
+                wave *= 2
+            for month, rows in zip(months, results):
+                rows = list(rows)
+                for row in rows:
+                    cursor = IndexedPuuid(row.puuid, row.dateadded)
+                    if row.puuid not in seen:
+                        seen.add(row.puuid)
+                        entries.append(cursor)
+                # A full read means this partition may hold more; the older months read with it are dropped
+                if len(rows) == remaining:
+                    break
+                month = _previous_month(month)
+                months_left -= 1
+        return entries[:page_size]
+
+    def latest(self, region, limit=1, now=None):
+        """
+        Returns the most recently added PUUIDs of a region.
+
+        Args:
+            region (str): The routing value.
+            limit (int, optional): Number of PUUIDs. Defaults to 1.
+            now (datetime.datetime, optional): Only PUUIDs added in or before this month (naive UTC).
+                Defaults to the current month.
+
+        Returns:
+            list: Up to `limit` `IndexedPuuid`s, newest first.
+        """
+        return self.page(region, page_size=limit, now=now)
+
+    def iterate(self, region, page_size=100, now=None):
+        """
+        Walks a region's PUUIDs from newest to oldest, one page at a time.
+
+        Args:
+            region (str): The routing value.
+            page_size (int, optional): PUUIDs fetched per read. Defaults to 100.
+            now (datetime.datetime, optional): Where the walk starts (naive UTC). Defaults to the current month.
+
+        Yields:
+            IndexedPuuid: Every indexed PUUID in the lookback window, newest first.
+        """
+        after = None
+        while True:
+            entries = self.page(region, page_size=page_size, after=after, now=now)
+            yield from entries
+            if len(entries) < page_size:
+                return
+            after = entries[-1]
@@ -0,0 +1,310 @@
+import argparse
+import math
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import (
+    FRONTIER_BATCH_SIZE,
+    FRONTIER_RETRY_SECONDS,
+    RECRAWL_HALF_LIFE_DAYS,
+    RECRAWL_IDLE_FACTOR,
+    RECRAWL_MAX_SECONDS,
+    RECRAWL_MIN_SECONDS,
+    RECRAWL_PRIOR_GAMES_PER_DAY,
+    RECRAWL_TARGET_PROBABILITY,
+)
+from python.Crawler.frontier import Frontier, utcnow
+from python.Crawler.match_sync import MatchSync
+from python.utils.logger import get_logger
+from python.utils.metrics import counter, start_exporter
+
+"""Activity-aware recrawl of known players.
+
+    A fixed revisit interval spends one Account_Matches call per player per interval, and for most players that
+    call returns an empty page. The scheduler instead keeps a small activity model per PUUID in `puuid_activity`:
+    exponentially decayed sums of the new matches found and of the days observed (their ratio is the player's
+    recent games per day), the time of the last check and the time of the last check that found a game.
+
+    After a player is synced with `MatchSync`, which only requests matches after the player's watermark, the
+    model is updated with the number of new matches and the player is rescheduled in the region's `Frontier`:
+    modelling games as a Poisson process, the next check is due when the chance of at least one new game reaches
+    RECRAWL_TARGET_PROBABILITY. Checks that keep coming back empty decay the rate towards zero, and a player is
+    never checked sooner than RECRAWL_IDLE_FACTOR x the time since their last game was found, so inactive
+    accounts drift to one check per RECRAWL_MAX_SECONDS.
+
+    The scheduler's frontier lives in its own tables (recrawl_frontier and recrawl_frontier_members), so it can
+    run alongside the snowball crawler on the same region without either moving the other's entries.
+
+Classes:
+    Activity: A player's activity model.
+    ActivityModel: Updates activity models and turns them into recrawl intervals.
+    RecrawlScheduler: Syncs due players and reschedules them from their activity.
+"""
+
+logger = get_logger("recrawl_scheduler.log", namespace="recrawl_scheduler")
+
+Activity = namedtuple("Activity", ["games", "days", "last_checked", "last_active", "checks", "productive"])
+
+SELECT_ACTIVITY_QUERY = (
+    "SELECT games, days, last_checked, last_active, checks, productive FROM puuid_activity WHERE puuid = ?"
+)
+UPSERT_ACTIVITY_QUERY = """INSERT INTO puuid_activity (puuid, games, days, last_checked, last_active, checks, productive)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+# Kept apart from the snowball crawler's crawl_frontier (see `Frontier`)
+RECRAWL_FRONTIER_TABLE = "recrawl_frontier"
+
+RECRAWL_CALLS = counter(
+    "leaguetracker_recrawl_api_calls_total",
+    "Account_Matches calls made by the recrawl scheduler by result (new = the page had new matches, or empty).",
+    ("region", "result"),
+)
+
+SECONDS_PER_DAY = 86400
+
+
+class ActivityModel:
+    """
+    Updates players' activity models and computes when they are next due.
+    """
+
+    def __init__(
+        self,
+        target_probability=None,
+        half_life_days=None,
+        prior_games_per_day=None,
+        idle_factor=None,
+        min_seconds=None,
+        max_seconds=None,
+    ):
+        """
+        Args:
+            target_probability (float, optional): Chance of a new game at which a player is due.
+                Defaults to RECRAWL_TARGET_PROBABILITY.
+            half_life_days (float, optional): Half-life of past observations. Defaults to RECRAWL_HALF_LIFE_DAYS.
+            prior_games_per_day (float, optional): Rate assumed for a player whose first sync found matches.
+                Defaults to RECRAWL_PRIOR_GAMES_PER_DAY.
+            idle_factor (float, optional): Minimum interval as a fraction of the time since the last game was
+                found. Defaults to RECRAWL_IDLE_FACTOR.
+            min_seconds (int, optional): Shortest interval. Defaults to RECRAWL_MIN_SECONDS.
+            max_seconds (int, optional): Longest interval. Defaults to RECRAWL_MAX_SECONDS.
+        """
+        target_probability = target_probability or RECRAWL_TARGET_PROBABILITY
+        # Poisson: P(at least one game in t) = 1 - exp(-rate * t) reaches the target at t = -ln(1 - p) / rate
+        self.target_games = -math.log(1 - target_probability)
+        self.half_life_days = half_life_days or RECRAWL_HALF_LIFE_DAYS
+        self.prior_games_per_day = (
+            RECRAWL_PRIOR_GAMES_PER_DAY if prior_games_per_day is None else prior_games_per_day
+        )
+        self.idle_factor = RECRAWL_IDLE_FACTOR if idle_factor is None else idle_factor
+        self.min_seconds = min_seconds or RECRAWL_MIN_SECONDS
+        self.max_seconds = max_seconds or RECRAWL_MAX_SECONDS
+
+    def update(self, activity, new_matches, now):
+        """
+        Adds one check to a player's model.
+
+        Args:
+            activity (Activity or None): The model before the check, or None for a player never checked.
+            new_matches (int): Matches the check found.
+            now (float): Epoch seconds of the check.
+
+        Returns:
+            Activity: The updated model.
+        """
+        productive = 1 if new_matches else 0
+        last_active = now if new_matches else None
+        if activity is None:
+            # A first sync returns the whole history, which says the player is active but not how often
+            games = self.prior_games_per_day if new_matches else 0.0
+            return Activity(games, 1.0, now, last_active, 1, productive)
+
+        days = max(now - activity.last_checked, 60) / SECONDS_PER_DAY
+        decay = 0.5 ** (days / self.half_life_days)
+        return Activity(
+            activity.games * decay + new_matches,
+            activity.days * decay + days,
+            now,
+            last_active or activity.last_active,
+            activity.checks + 1,
+            activity.productive + productive,
+        )
+
+    def rate(self, activity):
+        """Returns the player's recent games per day."""
+        return activity.games / activity.days if activity.days else 0.0
+
+    def interval(self, activity, now):
+        """
+        Returns the seconds until a player is next due.
+
+        Args:
+            activity (Activity): The player's model.
+            now (float): Epoch seconds.
+
+        Returns:
+            float: Seconds, between the minimum and maximum interval.
+        """
+        rate = self.rate(activity)
+        if rate <= 0 or activity.last_active is None:
+            return self.max_seconds
+        seconds = self.target_games / rate * SECONDS_PER_DAY
+        seconds = max(seconds, self.idle_factor * (now - activity.last_active))
+        return min(max(seconds, self.min_seconds), self.max_seconds)
+
+
+class RecrawlScheduler:
+    """
+    Syncs due players of a region and reschedules each from their activity model.
+    """
+
+    def __init__(self, session, region, model=None, batch_size=None, match_sync=None, seen_index=None):
+        """
+        Prepare the activity statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            region (str): The routing value to recrawl.
+            model (ActivityModel, optional): The activity model. Defaults to one configured from the environment.
+            batch_size (int, optional): Players synced per step, concurrently. Defaults to FRONTIER_BATCH_SIZE.
+            match_sync (MatchSync, optional): Syncs match IDs. A new one is created if omitted.
+            seen_index (SeenIndex, optional): Index used by the frontier to skip PUUIDs already enqueued.
+        """
+        self.session = session
+        self.region = region
+        self.model = model or ActivityModel()
+        self.batch_size = batch_size or FRONTIER_BATCH_SIZE
+        self.match_sync = match_sync or MatchSync(session)
+        self.frontier = Frontier(session, region, seen_index=seen_index, table=RECRAWL_FRONTIER_TABLE)
+        # Frontier buckets to pop from; None for all of them
+        self.buckets = None
+
+        self.select_activity = session.prepare(SELECT_ACTIVITY_QUERY)
+        self.upsert_activity = session.prepare(UPSERT_ACTIVITY_QUERY)
+
+        self.checks = 0
+        self.productive_checks = 0
+        self.api_calls = 0
+        self.productive_calls = 0
+
+    def activities(self, puuids):
+        """
+        Reads the activity models of several players.
+
+        Args:
+            puuids (list): Players' unique identifiers.
+
+        Returns:
+            dict: puuid -> Activity, for the players that have one.
+        """
+        results = execute_concurrent_with_args(
+            self.session, self.select_activity, [(puuid,) for puuid in puuids], raise_on_first_error=False
+        )
+        activities = {}
+        for puuid, (success, result) in zip(puuids, results):
+            if not success:
+                logger.error("Error reading activity of PUUID %s: %s", puuid, result)
+                continue
+            row = result.one()
+            if row is not None and row.last_checked is not None:
+                activities[puuid] = Activity(*row)
+        return activities
+
+    def step(self):
+        """
+        Syncs one batch of due players and reschedules each at the time their model predicts a new game.
+
+        Returns:
+            int: Number of players synced (0 if nothing was due).
+        """
+        entries = self.frontier.pop(self.batch_size, buckets=self.buckets)
+        if not entries:
+            return 0
+        activities = self.activities([entry.puuid for entry in entries])
+
+        # MatchSync is synchronous; players are synced in parallel threads sharing the rate limiter
+        with ThreadPoolExecutor(max_workers=len(entries)) as executor:
+            futures = [executor.submit(self.match_sync.sync_counted, self.region, entry.puuid) for entry in entries]
+
+        updates = []
+        for entry, future in zip(entries, futures):
+            try:
+                match_ids, calls = future.result()
+            except Exception as e:
+                logger.error("Error syncing PUUID %s: %s", entry.puuid, e)
+                self.frontier.defer(entry, FRONTIER_RETRY_SECONDS)
+                continue
+
+            now = time.time()
+            activity = self.model.update(activities.get(entry.puuid), len(match_ids), now)
+            interval = self.model.interval(activity, now)
+            updates.append((entry.puuid, *activity))
+            self.frontier.reschedule(entry, utcnow() + timedelta(seconds=interval))
+
+            # Every page but the last is full; a last page with no new match is the empty one
+            productive_calls = min(calls, math.ceil(len(match_ids) / self.match_sync.count))
+            self.checks += 1
+            self.productive_checks += bool(match_ids)
+            self.api_calls += calls
+            self.productive_calls += productive_calls
+            RECRAWL_CALLS.inc(self.region, "new", amount=productive_calls)
+            RECRAWL_CALLS.inc(self.region, "empty", amount=calls - productive_calls)
+            logger.debug(
+                "PUUID %s: %d new matches, %.2f games/day, next check in %.1fh",
+                entry.puuid, len(match_ids), self.model.rate(activity), interval / 3600,
+            )
+
+        if updates:
+            execute_concurrent_with_args(self.session, self.upsert_activity, updates)
+        logger.info("Recrawled %d PUUIDs in %s: %s", len(entries), self.region, self.stats())
+        return len(entries)
+
+    def run(self, max_steps=None, idle_sleep=30):
+        """
+        Recrawls until `max_steps` batches have run, sleeping while nothing is due.
+
+        Args:
+            max_steps (int, optional): Stop after this many non-empty batches. Defaults to running forever.
+            idle_sleep (float, optional): Seconds to wait when no player is due. Defaults to 30.
+        """
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if self.step():
+                steps += 1
+            else:
+                time.sleep(idle_sleep)
+
+    def stats(self):
+        """
+        Returns recrawl counters.
+
+        Returns:
+            dict: Checks, checks that found new matches, API calls, calls whose page had new matches, and
+                productive_fraction (the share of API calls that returned new matches).
+        """
+        return {
+            "checks": self.checks,
+            "productive_checks": self.productive_checks,
+            "api_calls": self.api_calls,
+            "productive_calls": self.productive_calls,
+            "productive_fraction": self.productive_calls / self.api_calls if self.api_calls else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    from python.utils.Cassandra import get_shared_session
+
+    parser = argparse.ArgumentParser(description="Activity-aware recrawl of known players' match IDs.")
+    parser.add_argument("--region", default="americas")
+    parser.add_argument("--seed", action="append", default=[], help="PUUID to add to the frontier")
+    parser.add_argument("--steps", type=int, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    start_exporter()
+    scheduler = RecrawlScheduler(get_shared_session(), args.region)
+    if args.seed:
+        scheduler.frontier.push(args.seed)
+    scheduler.run(max_steps=args.steps)
+    print(scheduler.stats())
@@ -0,0 +1,270 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+from collections import OrderedDict
+from python.config import SEEN_INDEX_CAPACITY, SEEN_INDEX_ERROR_RATE, SEEN_INDEX_LRU_SIZE
+from python.utils.logger import get_logger
+
+"""Memory-bounded index of identifiers already written to Cassandra.
+
+    The same match ID appears in the history of all 10 participants, and the same PUUIDs recur across
+    matches, so the crawler keeps asking Cassandra about keys it wrote seconds ago. `SeenIndex` answers
+    most of those questions in process:
+
+    - a Bloom filter gives definite "never seen" answers, so new keys skip any existence check;
+    - a small exact LRU gives definite "seen" answers for recently written keys, so they are skipped;
+    - keys the Bloom filter reports but the LRU does not know are "uncertain" and fall back to Cassandra.
+
+    The Bloom filter can be warmed from a paged scan of puuid_matches and persisted to a local file.
+
+Classes:
+    BloomFilter: Fixed-size Bloom filter over string keys.
+    SeenIndex: Bloom filter plus exact LRU with hit/miss counters.
+"""
+
+logger = get_logger("seen_index.log", namespace="seen_index")
+
+_FILE_MAGIC = b"LTBLOOM2"
+_HEADER = struct.Struct("<8sQQQQ")
+# Files written before the flags field was added
+_FILE_MAGIC_V1 = b"LTBLOOM1"
+_HEADER_V1 = struct.Struct("<8sQQQ")
+
+# Header flag: the filter was warmed from Cassandra, so keys it has never seen were never written
+FLAG_WARMED = 1
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys using double hashing.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Size the filter for `capacity` keys at the target false-positive rate.
+
+        Args:
+            capacity (int): Expected number of distinct keys.
+            error_rate (float, optional): Target false-positive rate at capacity. Defaults to 0.01.
+        """
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.flags = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Adds `key`; returns True if it was not already (apparently) present."""
+        new = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def estimated_false_positive_rate(self):
+        """float: Expected false-positive rate at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path):
+        """Writes the filter and its `flags` to `path` atomically."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(_HEADER.pack(_FILE_MAGIC, self.num_bits, self.num_hashes, self.count, self.flags))
+            file.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a filter previously written with `save`."""
+        with open(path, "rb") as file:
+            magic = file.read(len(_FILE_MAGIC))
+            if magic == _FILE_MAGIC:
+                _, num_bits, num_hashes, count, flags = _HEADER.unpack(magic + file.read(_HEADER.size - len(magic)))
+            elif magic == _FILE_MAGIC_V1:
+                _, num_bits, num_hashes, count = _HEADER_V1.unpack(magic + file.read(_HEADER_V1.size - len(magic)))
+                flags = 0
+            else:
+                raise ValueError(f"{path} is not a Bloom filter file")
+            bloom = cls.__new__(cls)
+            bloom.num_bits, bloom.num_hashes, bloom.count, bloom.flags = num_bits, num_hashes, count, flags
+            bloom.bits = bytearray(file.read())
+        return bloom
+
+
+class SeenIndex:
+    """
+    Bloom filter plus a small exact LRU answering "has this key already been written?".
+
+    `lookup` returns one of SEEN (definitely written recently), NEW (definitely never written) or
+    UNCERTAIN (possibly written; confirm against Cassandra). NEW only means "never written" across runs once
+    the index has been warmed from Cassandra (directly, or by the process that saved the file it was loaded
+    from), which `warmed` records; otherwise it has only seen its own writes.
+    """
+
+    SEEN = "seen"
+    NEW = "new"
+    UNCERTAIN = "uncertain"
+
+    def __init__(self, capacity=None, error_rate=None, lru_size=None, bloom=None):
+        """
+        Initialize the index.
+
+        Args:
+            capacity (int, optional): Expected distinct keys. Defaults to SEEN_INDEX_CAPACITY.
+            error_rate (float, optional): Bloom filter false-positive target. Defaults to SEEN_INDEX_ERROR_RATE.
+            lru_size (int, optional): Keys kept in the exact LRU. Defaults to SEEN_INDEX_LRU_SIZE.
+            bloom (BloomFilter, optional): Existing filter, e.g. from `BloomFilter.load`.
+        """
+        self.bloom = bloom or BloomFilter(
+            capacity or SEEN_INDEX_CAPACITY, error_rate or SEEN_INDEX_ERROR_RATE
+        )
+        self.lru_size = lru_size or SEEN_INDEX_LRU_SIZE
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncertain = 0
+        self.false_positives = 0
+        # True once the filter holds the keys already stored (see `warm`); persisted by `save`
+        self.warmed = False
+
+    def lookup(self, key):
+        """
+        Classifies `key` without recording it.
+
+        Args:
+            key (str): The identifier to look up.
+
+        Returns:
+            str: SeenIndex.SEEN, SeenIndex.NEW or SeenIndex.UNCERTAIN.
+        """
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self.SEEN
+            if key not in self.bloom:
+                self.misses += 1
+                return self.NEW
+            self.uncertain += 1
+            return self.UNCERTAIN
+
+    def add(self, key):
+        """Records `key` as written."""
+        with self._lock:
+            self.bloom.add(key)
+            self._lru[key] = None
+            self._lru.move_to_end(key)
+            if len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def add_many(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def report_false_positive(self):
+        """Records that an UNCERTAIN key turned out not to exist in Cassandra."""
+        with self._lock:
+            self.false_positives += 1
+
+    def stats(self):
+        """
+        Returns counters for sizing the index.
+
+        Returns:
+            dict: hits, misses, uncertain lookups, observed and estimated false-positive rates,
+                keys held and Bloom filter size in bytes.
+        """
+        with self._lock:
+            negatives = self.misses + self.false_positives
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncertain": self.uncertain,
+                "false_positives": self.false_positives,
+                "observed_false_positive_rate": self.false_positives / negatives if negatives else 0.0,
+                "estimated_false_positive_rate": self.bloom.estimated_false_positive_rate,
+                "keys": len(self.bloom),
+                "bloom_bytes": len(self.bloom.bits),
+            }
+
+    def warm(self, session, fetch_size=5000):
+        """
+        Loads every (match_id, puuid) pair and PUUID already stored, page by page.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            fetch_size (int, optional): Rows per page. Defaults to 5000.
+
+        Returns:
+            int: Number of rows scanned.
+        """
+        from python.utils.Cassandra import stream_rows
+
+        scanned = 0
+        for query, key in (
+            ("SELECT match_id, puuid FROM puuid_matches", lambda row: match_key(row.match_id, row.puuid)),
+            ("SELECT puuid FROM puuids", lambda row: puuid_key(row.puuid)),
+        ):
+            for row in stream_rows(session, query, fetch_size=fetch_size):
+                self.bloom.add(key(row))
+                scanned += 1
+        self.warmed = True
+        logger.info("Warmed seen index from %d rows (%d keys)", scanned, len(self.bloom))
+        return scanned
+
+    def save(self, path):
+        self.bloom.flags = FLAG_WARMED if self.warmed else 0
+        self.bloom.save(path)
+        logger.info("Saved seen index (%d keys) to %s", len(self.bloom), path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        Loads a persisted Bloom filter from `path`, or returns an empty index if it does not exist.
+
+        The index counts as warmed only if the saved one had been warmed from Cassandra; a file saved by a
+        process that only recorded its own writes does not vouch for keys written by anyone else.
+        """
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        bloom = BloomFilter.load(path)
+        index = cls(bloom=bloom, **kwargs)
+        index.warmed = bool(bloom.flags & FLAG_WARMED)
+        logger.info("Loaded seen index (%d keys) from %s", len(index.bloom), path)
+        return index
+
+
+def match_key(match_id, puuid):
+    """Key for a puuid_matches row."""
+    return f"m:{match_id}:{puuid}"
+
+
+def puuid_key(puuid):
+    """Key for a puuids row."""
+    return f"p:{puuid}"
+
+
+def frontier_key(puuid, table="crawl_frontier"):
+    """Key for a crawl_frontier_members row, or a row of another frontier's `table`_members."""
+    return f"f:{puuid}" if table == "crawl_frontier" else f"f:{table}:{puuid}"
@@ -0,0 +1,214 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+from python.config import SHARD_HEARTBEAT_SECONDS
+from python.Crawler.leases import LeaseManager
+from python.Crawler.snowball_crawler import SnowballCrawler
+from python.utils.api_utils import rate_limiter
+from python.utils.logger import get_logger
+
+"""Snowball crawl split across worker processes and hosts by frontier bucket.
+
+    The frontier of a region is already hash-partitioned into FRONTIER_BUCKETS buckets by PUUID. Each worker
+    leases a fair share of them (ceil(buckets / live workers)) through `LeaseManager` and only pops due players
+    from the buckets it holds, so no two workers crawl the same player. Workers rebalance every heartbeat:
+    when a worker joins, the others release their surplus buckets; when one dies, its leases expire and the
+    survivors take its buckets over. Participants discovered in a match are pushed to whichever bucket they
+    hash to, and the worker owning that bucket crawls them.
+
+    All workers of a region share one API key, so each limits itself to 1 / (live workers) of the key's rate
+    limits via `RateLimiter.set_share`.
+
+Classes:
+    ShardedCrawler: One worker of a sharded snowball crawl.
+
+Functions:
+    run_worker(region, steps, seeds, store_details): Entry point of one worker process.
+    run_workers(region, processes, steps, seeds, store_details): Runs worker processes on this host.
+"""
+
+logger = get_logger("sharded_crawler.log", namespace="sharded_crawler")
+
+
+class ShardedCrawler:
+    """
+    Snowball crawler that only crawls the frontier buckets it has leased.
+    """
+
+    def __init__(self, session, region, owner=None, lease_seconds=None, heartbeat_seconds=None, **kwargs):
+        """
+        Initialize the worker.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            region (str): The routing value to crawl.
+            owner (str, optional): This worker's identifier. Defaults to `leases.worker_id()`.
+            lease_seconds (int, optional): Lease TTL. Defaults to SHARD_LEASE_SECONDS.
+            heartbeat_seconds (float, optional): Seconds between heartbeats and rebalances.
+                Defaults to SHARD_HEARTBEAT_SECONDS.
+            **kwargs: Passed through to `SnowballCrawler`.
+        """
+        self.region = region
+        self.heartbeat_seconds = heartbeat_seconds or SHARD_HEARTBEAT_SECONDS
+        self.crawler = SnowballCrawler(session, region, **kwargs)
+        self.crawler.buckets = []
+        self.buckets = self.crawler.frontier.buckets
+        self.leases = LeaseManager(session, f"snowball:{region}", owner, lease_seconds)
+        self._rebalanced = None
+
+    def _resource(self, bucket):
+        return f"frontier:{self.region}:{bucket}"
+
+    def _held_buckets(self):
+        prefix = self._resource("")
+        return sorted(int(resource[len(prefix):]) for resource in self.leases.held if resource.startswith(prefix))
+
+    def rebalance(self):
+        """
+        Releases buckets above this worker's fair share or leases free ones up to it, and sets the rate-limit
+        share from the number of live workers.
+
+        Returns:
+            list: The buckets this worker now holds.
+        """
+        live = max(1, len(self.leases.live_workers()))
+        rate_limiter.set_share(1 / live)
+        fair = math.ceil(self.buckets / live)
+
+        held = self._held_buckets()
+        for bucket in held[fair:]:
+            self.leases.release(self._resource(bucket))
+        held = held[:fair]
+        if len(held) < fair:
+            # Random order keeps workers that start together from contending for the same buckets
+            free = [bucket for bucket in range(self.buckets) if bucket not in held]
+            random.shuffle(free)
+            for bucket in free:
+                if len(held) >= fair:
+                    break
+                if self.leases.acquire(self._resource(bucket)):
+                    held.append(bucket)
+
+        self.crawler.buckets = sorted(held)
+        self._rebalanced = time.monotonic()
+        logger.info(
+            "%s holds %d/%d buckets of %s with %d live workers",
+            self.leases.owner, len(held), self.buckets, self.region, live,
+        )
+        return self.crawler.buckets
+
+    def step(self):
+        """
+        Rebalances if a heartbeat interval has passed, then crawls one batch from the held buckets.
+
+        Returns:
+            int: Number of PUUIDs crawled (0 if nothing was due or no bucket is held).
+        """
+        if self._rebalanced is None or time.monotonic() - self._rebalanced >= self.heartbeat_seconds:
+            self.rebalance()
+        else:
+            # Drop buckets whose lease the heartbeat found lost
+            self.crawler.buckets = self._held_buckets()
+        if not self.crawler.buckets:
+            return 0
+        return self.crawler.step()
+
+    def run(self, max_steps=None, idle_sleep=30):
+        """
+        Joins the group and crawls until `max_steps` batches have run, then releases every lease.
+
+        Args:
+            max_steps (int, optional): Stop after this many non-empty batches. Defaults to running forever.
+            idle_sleep (float, optional): Seconds to wait when nothing is due. Defaults to 30; a worker
+                holding no bucket retries after one heartbeat interval instead.
+        """
+        self.leases.start(self.heartbeat_seconds)
+        try:
+            steps = 0
+            while max_steps is None or steps < max_steps:
+                if self.step():
+                    steps += 1
+                else:
+                    time.sleep(idle_sleep if self.crawler.buckets else self.heartbeat_seconds)
+        finally:
+            self.leases.stop()
+
+
+def run_worker(region, steps=None, seeds=(), store_details=False):
+    """
+    Runs one `ShardedCrawler` on the process-wide session. Each worker process needs its own session, so this is
+    the process entry point; spawned workers each connect their own on first use.
+
+    Args:
+        region (str): The routing value to crawl.
+        steps (int, optional): Stop after this many batches. Defaults to running forever.
+        seeds (iterable, optional): PUUIDs to seed the frontier with before crawling.
+        store_details (bool, optional): Store fetched match payloads in match_payloads.
+    """
+    from python.utils.Cassandra import get_shared_session
+
+    session = get_shared_session()
+    on_match = None
+    if store_details:
+        from python.Pipeline.match_ingest import MatchIngestor
+
+        ingestor = MatchIngestor(session)
+
+        def on_match(region, match_id, payload):
+            ingestor.store(match_id, payload, region=region)
+
+    crawler = ShardedCrawler(session, region, on_match=on_match)
+    if seeds:
+        crawler.crawler.seed(list(seeds))
+    crawler.run(max_steps=steps)
+
+
+def run_workers(region, processes=1, steps=None, seeds=(), store_details=False):
+    """
+    Runs `processes` workers on this host and waits for them. A single worker runs in this process with the
+    metrics exporter started.
+
+    Args:
+        region (str): The routing value to crawl.
+        processes (int, optional): Worker processes to run. Defaults to 1.
+        steps (int, optional): Stop each worker after this many batches. Defaults to running forever.
+        seeds (iterable, optional): PUUIDs to seed the frontier with (by the first worker only).
+        store_details (bool, optional): Store fetched match payloads in match_payloads.
+    """
+    if processes == 1:
+        from python.utils.metrics import start_exporter
+
+        start_exporter()
+        run_worker(region, steps, seeds, store_details)
+        return
+    # Spawned rather than forked: the driver's connections and threads must not be shared with children.
+    # Exporters are not started, as every worker would bind the same METRICS_PORT.
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(region, steps, seeds if index == 0 else (), store_details),
+            name=f"crawl-worker-{index}",
+        )
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded snowball crawl across worker processes.")
+    parser.add_argument("--region", default="americas")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to run on this host")
+    parser.add_argument("--seed", action="append", default=[], help="PUUID to seed the frontier with")
+    parser.add_argument("--steps", type=int, help="Stop each worker after this many batches")
+    parser.add_argument(
+        "--store-details", action="store_true", help="Store fetched match payloads in match_payloads"
+    )
+    args = parser.parse_args()
+
+    run_workers(args.region, args.processes, args.steps, args.seed, args.store_details)
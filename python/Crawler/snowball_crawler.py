@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import time
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import (
+    FRONTIER_BATCH_SIZE,
+    FRONTIER_EXPANSION_MATCHES,
+    FRONTIER_RECRAWL_SECONDS,
+    FRONTIER_RETRY_SECONDS,
+)
+from python.Crawler.async_crawler import AsyncCrawler
+from python.Crawler.frontier import Frontier
+from python.Crawler.match_sync import (
+    ADVANCE_QUERY,
+    INSERT_STATE_QUERY,
+    MARK_PROCESSED_QUERY,
+    SELECT_STATE_QUERY,
+    SyncState,
+)
+from python.Crawler.match_writer import MatchWriter
+from python.utils.puuid_table import IdSet, PuuidTable
+from python.Crawler.seen_index import SeenIndex
+from python.utils.logger import get_logger
+from python.utils.metrics import WAIT_BUCKETS, counter, histogram, start_exporter
+
+"""Frontier-driven snowball crawler.
+
+    Repeatedly takes the most overdue PUUIDs from the durable `Frontier`, crawls their match IDs, fetches the
+    details of each player's most recent matches and enqueues the 10 `metadata.participants` of every match.
+    Crawled players are rescheduled FRONTIER_RECRAWL_SECONDS into the future, so coverage grows from newly
+    discovered players while known players are revisited oldest first.
+
+    A recrawl resumes from the player's `puuid_sync` watermark (see python/Crawler/match_sync.py), so only matches
+    played since the last complete crawl are paged through. A complete crawl moves the watermark, with the same
+    compare-and-set as `MatchSync`, to the time the batch started.
+
+    Participants are interned in a `PuuidTable`, and the players this process has already crawled or enqueued
+    are kept in an `IdSet`, so re-encountered players are skipped without a frontier write at a few bytes each.
+
+Classes:
+    SnowballCrawler: Expands the crawl from match participants.
+"""
+
+logger = get_logger("snowball_crawler.log", namespace="snowball_crawler")
+
+BATCH_SECONDS = histogram(
+    "leaguetracker_crawl_batch_seconds", "Duration of a snowball crawl batch.", ("region",), WAIT_BUCKETS
+)
+PUUIDS_CRAWLED = counter("leaguetracker_puuids_crawled_total", "PUUIDs crawled by the snowball crawler.", ("region",))
+PUUIDS_DISCOVERED = counter(
+    "leaguetracker_puuids_discovered_total", "New PUUIDs enqueued from match participants.", ("region",)
+)
+
+
+class SnowballCrawler:
+    """
+    Expands the crawl from match participants using a durable frontier.
+    """
+
+    def __init__(
+        self,
+        session,
+        region,
+        batch_size=None,
+        expansion_matches=None,
+        recrawl_seconds=None,
+        seen_index=None,
+        on_match=None,
+        graph=None,
+    ):
+        """
+        Initialize the crawler.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            region (str): The routing value to crawl.
+            batch_size (int, optional): PUUIDs crawled per step. Defaults to FRONTIER_BATCH_SIZE.
+            expansion_matches (int, optional): Most recent matches per player whose participants are
+                enqueued. Defaults to FRONTIER_EXPANSION_MATCHES.
+            recrawl_seconds (int, optional): Delay before a crawled player is due again.
+                Defaults to FRONTIER_RECRAWL_SECONDS.
+            seen_index (SeenIndex, optional): Shared seen index. A new one is created if omitted.
+            on_match (callable, optional): Also called with (region, match_id, payload) for every fetched match,
+                on a worker thread so it may block (e.g. `MatchIngestor.store`).
+            graph (ParticipantGraph, optional): Records the participants of every fetched match by PUUID ID.
+        """
+        self.session = session
+        self.region = region
+        self.batch_size = batch_size or FRONTIER_BATCH_SIZE
+        self.expansion_matches = expansion_matches or FRONTIER_EXPANSION_MATCHES
+        self.recrawl_seconds = recrawl_seconds or FRONTIER_RECRAWL_SECONDS
+        self.seen_index = seen_index or SeenIndex()
+        self.on_match = on_match
+        self.graph = graph
+        # Frontier buckets this crawler pops from; None for all of them (see ShardedCrawler)
+        self.buckets = None
+        # Players crawled or enqueued by this process, by ID in `puuids`
+        self.puuids = PuuidTable()
+        self.known = IdSet()
+
+        self.frontier = Frontier(session, region, seen_index=self.seen_index)
+        self.writer = MatchWriter(session, seen_index=self.seen_index)
+        self.crawler = AsyncCrawler(session, seen_index=self.seen_index)
+        self.select_state = session.prepare(SELECT_STATE_QUERY)
+        self.insert_state = session.prepare(INSERT_STATE_QUERY)
+        self.advance = session.prepare(ADVANCE_QUERY)
+        self.mark_processed = session.prepare(MARK_PROCESSED_QUERY)
+        self.crawled = 0
+        self.discovered = 0
+
+    def seed(self, puuids):
+        """
+        Adds starting PUUIDs to the puuids table and the frontier.
+
+        Args:
+            puuids (list): Players' unique identifiers.
+
+        Returns:
+            list: The PUUIDs that were newly enqueued.
+        """
+        self.writer.add_puuids(puuids, self.region, if_not_exists=True)
+        return self.frontier.push(puuids)
+
+    def states(self, puuids):
+        """
+        Reads the sync state of several players.
+
+        Args:
+            puuids (list): Players' unique identifiers.
+
+        Returns:
+            dict: puuid -> SyncState; None for players whose state could not be read.
+        """
+        results = execute_concurrent_with_args(
+            self.session, self.select_state, [(puuid,) for puuid in puuids], raise_on_first_error=False
+        )
+        states = {}
+        for puuid, (success, result) in zip(puuids, results):
+            if not success:
+                logger.error("Error reading sync state of PUUID %s: %s", puuid, result)
+                states[puuid] = None
+                continue
+            row = result.one()
+            states[puuid] = SyncState(*row) if row is not None else SyncState(None, None, None)
+        return states
+
+    def _complete(self, puuid, state, watermark):
+        """Moves a fully crawled player's watermark to `watermark`; returns False if another worker moved it."""
+        if state.watermark is None and state.window_end is None:
+            self.session.execute(self.insert_state, (puuid,))
+        # Everything since the old watermark was crawled, so any window MatchSync left open is covered too
+        applied = self.session.execute(self.advance, (watermark, None, None, puuid, state.watermark)).one().applied
+        if applied:
+            self.session.execute(self.mark_processed, (puuid,))
+        else:
+            logger.warning("Watermark for PUUID %s moved concurrently; leaving it in place", puuid)
+        return applied
+
+    def step(self):
+        """
+        Crawls one batch of due PUUIDs and enqueues the participants of their recent matches.
+
+        Returns:
+            int: Number of PUUIDs crawled (0 if nothing was due).
+        """
+        entries = self.frontier.pop(self.batch_size, buckets=self.buckets)
+        if not entries:
+            return 0
+
+        started = time.perf_counter()
+        # Matches starting from here on are picked up by the next crawl
+        watermark = int(time.time())
+        states = self.states([entry.puuid for entry in entries])
+        for entry in entries:
+            self.known.add(self.puuids.intern(entry.puuid))
+        participants = []
+
+        async def _expand(region, match_id, payload):
+            participant_ids = self.puuids.intern_many(payload.get("metadata", {}).get("participants", []))
+            participants.extend(participant_ids)
+            if self.graph is not None:
+                self.graph.add(match_id, participant_ids)
+            if self.on_match:
+                await asyncio.get_running_loop().run_in_executor(None, self.on_match, region, match_id, payload)
+
+        try:
+            results = asyncio.run(
+                self.crawler.crawl(
+                    [(self.region, entry.puuid) for entry in entries],
+                    fetch_details=True,
+                    on_match=_expand,
+                    details_per_player=self.expansion_matches,
+                    start_times={
+                        puuid: state.watermark
+                        for puuid, state in states.items()
+                        if state is not None and state.watermark is not None
+                    },
+                )
+            )
+        except Exception as e:
+            logger.error("Error crawling frontier batch in %s: %s", self.region, e)
+            for entry in entries:
+                self.frontier.defer(entry, FRONTIER_RETRY_SECONDS)
+            return 0
+
+        unknown = [puuid_id for puuid_id in dict.fromkeys(participants) if puuid_id not in self.known]
+        if unknown:
+            unknown_puuids = [self.puuids.puuid(puuid_id) for puuid_id in unknown]
+            self.writer.add_puuids(unknown_puuids, self.region, if_not_exists=True)
+            discovered = len(self.frontier.push(unknown_puuids))
+            for puuid_id in unknown:
+                self.known.add(puuid_id)
+            self.discovered += discovered
+            PUUIDS_DISCOVERED.inc(self.region, amount=discovered)
+
+        for entry in entries:
+            if results.get(entry.puuid) is None:
+                self.frontier.defer(entry, FRONTIER_RETRY_SECONDS)
+                continue
+            # Without a readable state the watermark is left for the next crawl to move
+            if states[entry.puuid] is not None:
+                self._complete(entry.puuid, states[entry.puuid], watermark)
+            self.frontier.defer(entry, self.recrawl_seconds)
+        self.crawled += len(entries)
+        PUUIDS_CRAWLED.inc(self.region, amount=len(entries))
+        BATCH_SECONDS.observe(time.perf_counter() - started, self.region)
+
+        logger.info(
+            "Crawled %d PUUIDs in %s; %d crawled, %d discovered so far",
+            len(entries), self.region, self.crawled, self.discovered,
+        )
+        return len(entries)
+
+    def run(self, max_steps=None, idle_sleep=30):
+        """
+        Crawls until `max_steps` batches have run, sleeping while nothing is due.
+
+        Args:
+            max_steps (int, optional): Stop after this many non-empty batches. Defaults to running forever.
+            idle_sleep (float, optional): Seconds to wait when the frontier has nothing due. Defaults to 30.
+        """
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if self.step():
+                steps += 1
+            else:
+                time.sleep(idle_sleep)
+
+
+if __name__ == "__main__":
+    from python.config import SEEN_INDEX_PATH
+    from python.utils.Cassandra import get_shared_session
+
+    parser = argparse.ArgumentParser(description="Snowball crawl from match participants.")
+    parser.add_argument("--region", default="americas")
+    parser.add_argument("--seed", action="append", default=[], help="PUUID to seed the frontier with")
+    parser.add_argument("--steps", type=int, help="Stop after this many batches")
+    parser.add_argument(
+        "--store-details", action="store_true", help="Store fetched match payloads in match_payloads"
+    )
+    args = parser.parse_args()
+
+    start_exporter()
+    session = get_shared_session()
+    seen_index = SeenIndex.load(SEEN_INDEX_PATH) if SEEN_INDEX_PATH else SeenIndex()
+    try:
+        on_match = None
+        if args.store_details:
+            from python.Pipeline.match_ingest import MatchIngestor
+
+            ingestor = MatchIngestor(session)
+
+            def on_match(region, match_id, payload):
+                ingestor.store(match_id, payload, region=region)
+
+        crawler = SnowballCrawler(session, args.region, seen_index=seen_index, on_match=on_match)
+        if args.seed:
+            crawler.seed(args.seed)
+        crawler.run(max_steps=args.steps)
+    finally:
+        if SEEN_INDEX_PATH:
+            seen_index.save(SEEN_INDEX_PATH)
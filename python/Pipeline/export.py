@@ -0,0 +1,363 @@
+import argparse
+import calendar
+import csv
+import gzip
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from python.config import (
+    EXPORT_BUFFER_MATCHES,
+    EXPORT_BUFFER_ROWS,
+    EXPORT_FETCH_SIZE,
+    EXPORT_FORMAT,
+    EXPORT_PARALLEL_RANGES,
+    EXPORT_SETTLE_SECONDS,
+    EXPORT_TOKEN_SPLITS,
+)
+from python.Pipeline.flatten import TABLES, MatchFlattener
+from python.Pipeline.match_ingest import region_for_match
+from python.utils.Cassandra import PROFILE_SCAN, stream_rows
+from python.utils.compression import decompress_payload
+from python.utils.logger import get_logger
+from python.utils.metrics import counter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional dependency: pip install LeagueTracker[parquet]
+    pyarrow = None
+
+"""Streaming export of Cassandra tables to partitioned columnar files for analytics.
+
+    Each table is read as EXPORT_TOKEN_SPLITS token ranges, EXPORT_PARALLEL_RANGES of them at a time, every range
+    streamed page by page through the "scan" execution profile. A range worker buffers at most EXPORT_BUFFER_ROWS
+    rows (EXPORT_BUFFER_MATCHES payloads for match_payloads) before writing them out, so memory stays bounded
+    by the parallelism however large the table is, and the parallelism and page size bound the load on the
+    cluster.
+
+    Files are laid out Hive-style by routing value and the UTC day of `dateadded`:
+
+        <directory>/<dataset>/region=<region>/day=<yyyy-mm-dd>/part-<run>-<range>-<flush>.<parquet|csv.gz>
+
+    `puuids` and `puuid_matches` are exported column for column. Stored match payloads are decompressed and
+    flattened with `MatchFlattener` into the relational tables of docs/SQL.dbml, as the datasets
+    matches/Matches, matches/Players and so on. Timestamps are epoch milliseconds (UTC timestamps in Parquet).
+    Parquet needs pyarrow; without it (or with EXPORT_FORMAT=csv) gzip-compressed CSV is written instead.
+
+    Every export covers rows with `dateadded` up to EXPORT_SETTLE_SECONDS before it started, and records that
+    time as the table's watermark in <directory>/_watermarks.json. An incremental export only writes rows after
+    the watermark, so consecutive exports do not overlap. Cassandra has no index on `dateadded`, so an
+    incremental export still scans the table but only transfers the rows of one window to disk. Files are
+    written to <directory>/_staging and moved into place once every range has finished, so a failed export
+    leaves neither partial files nor a moved watermark.
+
+    Usage:
+        python -m python.Pipeline.export --directory exports --table puuid_matches --incremental
+
+Classes:
+    Source: A table to export and how its rows are read.
+    Exporter: Exports tables to partitioned files.
+
+Functions:
+    token_ranges(splits): Splits the Murmur3 token ring into contiguous ranges.
+    available_formats(): The output formats usable in this environment.
+"""
+
+logger = get_logger("export.log", namespace="export")
+
+Source = namedtuple("Source", ["name", "query", "columns"])
+
+# Column typecodes as in python/Pipeline/flatten.py, plus "t" = timestamp (epoch milliseconds)
+SOURCES = {
+    "puuids": Source(
+        "puuids",
+        "SELECT puuid, region, dateadded, lastprocessed FROM puuids WHERE token(puuid) > ? AND token(puuid) <= ?",
+        [("puuid", None), ("region", None), ("dateadded", "t"), ("lastprocessed", "t")],
+    ),
+    "puuid_matches": Source(
+        "puuid_matches",
+        """SELECT match_id, puuid, dateadded, processed FROM puuid_matches
+           WHERE token(match_id) > ? AND token(match_id) <= ?""",
+        [("match_id", None), ("puuid", None), ("dateadded", "t"), ("processed", "b")],
+    ),
+    "match_payloads": Source(
+        "match_payloads",
+        """SELECT match_id, region, codec, payload, dateadded FROM match_payloads
+           WHERE token(match_id) > ? AND token(match_id) <= ?""",
+        None,
+    ),
+}
+
+# Murmur3Partitioner tokens; no key hashes to the minimum, so (TOKEN_MIN, TOKEN_MAX] is the whole ring
+TOKEN_MIN = -(2**63)
+TOKEN_MAX = 2**63 - 1
+
+WATERMARKS_FILE = "_watermarks.json"
+STAGING_DIRECTORY = "_staging"
+
+EXPORT_ROWS = counter("leaguetracker_export_rows_total", "Rows written by the analytics export.", ("table",))
+
+
+def token_ranges(splits):
+    """
+    Splits the token ring into contiguous ranges.
+
+    Args:
+        splits (int): Number of ranges.
+
+    Returns:
+        list: (start, end) pairs; a range holds the tokens start < token <= end.
+    """
+    width = (TOKEN_MAX - TOKEN_MIN) // splits
+    bounds = [TOKEN_MIN + width * index for index in range(splits)] + [TOKEN_MAX]
+    return list(zip(bounds, bounds[1:]))
+
+
+def available_formats():
+    """Returns the output formats usable in this environment."""
+    return ["parquet", "csv"] if pyarrow else ["csv"]
+
+
+def _millis(timestamp):
+    # The driver returns timestamps as naive UTC datetimes
+    if timestamp is None:
+        return None
+    return calendar.timegm(timestamp.utctimetuple()) * 1000 + timestamp.microsecond // 1000
+
+
+def _day(millis):
+    return "unknown" if millis is None else time.strftime("%Y-%m-%d", time.gmtime(millis // 1000))
+
+
+def _region(source, row):
+    if source.name == "puuid_matches":
+        try:
+            return region_for_match(row.match_id)
+        except ValueError:
+            return "unknown"
+    return row.region or "unknown"
+
+
+def _write_parquet(path, columns, types):
+    arrow_types = {
+        None: pyarrow.string(),
+        "q": pyarrow.int64(),
+        "b": pyarrow.bool_(),
+        "t": pyarrow.timestamp("ms", tz="UTC"),
+    }
+    arrays = []
+    for name, values in columns.items():
+        if types[name] == "b":
+            values = [None if value is None else bool(value) for value in values]
+        arrays.append(pyarrow.array(values, type=arrow_types[types[name]]))
+    pyarrow.parquet.write_table(pyarrow.Table.from_arrays(arrays, names=list(columns)), path, compression="zstd")
+
+
+def _write_csv(path, columns, types):
+    with gzip.open(path, "wt", newline="", compresslevel=6) as handle:
+        writer = csv.writer(handle)
+        writer.writerow(list(columns))
+        writer.writerows(zip(*columns.values()))
+
+
+class Exporter:
+    """
+    Exports Cassandra tables to files partitioned by region and day, with parallel token-range scans.
+    """
+
+    def __init__(
+        self,
+        session,
+        directory,
+        fmt=None,
+        parallel=None,
+        splits=None,
+        fetch_size=None,
+        buffer_rows=None,
+        buffer_matches=None,
+        settle_seconds=None,
+        clock=time.time,
+    ):
+        """
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            directory (str): Root directory of the export.
+            fmt (str, optional): "parquet" or "csv". Defaults to EXPORT_FORMAT, falling back to "csv" when
+                pyarrow is not installed.
+            parallel (int, optional): Token ranges scanned at once. Defaults to EXPORT_PARALLEL_RANGES.
+            splits (int, optional): Token ranges per table. Defaults to EXPORT_TOKEN_SPLITS.
+            fetch_size (int, optional): Rows per page. Defaults to EXPORT_FETCH_SIZE.
+            buffer_rows (int, optional): Rows a range worker buffers before writing. Defaults to
+                EXPORT_BUFFER_ROWS.
+            buffer_matches (int, optional): Match payloads a range worker buffers before writing. Defaults to
+                EXPORT_BUFFER_MATCHES.
+            settle_seconds (float, optional): Rows added this recently are left for the next export. Defaults
+                to EXPORT_SETTLE_SECONDS.
+            clock (callable, optional): Wall clock in epoch seconds. Defaults to time.time.
+        """
+        self.session = session
+        self.directory = directory
+        fmt = fmt or EXPORT_FORMAT
+        self.format = fmt if fmt in available_formats() else "csv"
+        if self.format != fmt:
+            logger.warning("Format %s is not available (pyarrow is not installed); writing csv", fmt)
+        self.parallel = parallel or EXPORT_PARALLEL_RANGES
+        self.splits = splits or EXPORT_TOKEN_SPLITS
+        self.fetch_size = fetch_size or EXPORT_FETCH_SIZE
+        self.buffer_rows = buffer_rows or EXPORT_BUFFER_ROWS
+        self.buffer_matches = buffer_matches or EXPORT_BUFFER_MATCHES
+        self.settle_seconds = EXPORT_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self.clock = clock
+        self.flattener = MatchFlattener()
+
+    def watermarks(self):
+        """
+        Reads the watermarks of previous exports.
+
+        Returns:
+            dict: Table name -> epoch milliseconds up to which rows have been exported.
+        """
+        path = os.path.join(self.directory, WATERMARKS_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as handle:
+            return json.load(handle)
+
+    def _save_watermark(self, table, millis):
+        watermarks = self.watermarks()
+        watermarks[table] = millis
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, WATERMARKS_FILE)
+        with open(path + ".tmp", "w") as handle:
+            json.dump(watermarks, handle, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def _write(self, staging, dataset, region, day, name, columns, types):
+        directory = os.path.join(staging, dataset, f"region={region}", f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        if self.format == "parquet":
+            _write_parquet(os.path.join(directory, name + ".parquet"), columns, types)
+        else:
+            _write_csv(os.path.join(directory, name + ".csv.gz"), columns, types)
+
+    def _flush(self, source, partitions, staging, name):
+        files = 0
+        for (region, day), rows in partitions.items():
+            if source.columns is not None:
+                columns = {column: [row[index] for row in rows] for index, (column, _) in enumerate(source.columns)}
+                self._write(staging, source.name, region, day, name, columns, dict(source.columns))
+                files += 1
+                continue
+            # Only the compressed payloads are buffered; they are decoded and flattened per partition
+            batch = self.flattener.flatten(json.loads(decompress_payload(codec, blob)) for codec, blob in rows)
+            for table, columns in batch.items():
+                if len(next(iter(columns.values()))):
+                    self._write(staging, f"matches/{table}", region, day, name, columns, dict(TABLES[table]))
+                    files += 1
+        return files
+
+    def _export_range(self, source, statement, token_range, index, low, high, staging, run):
+        limit = self.buffer_matches if source.columns is None else self.buffer_rows
+        timestamps = [position for position, (_, typecode) in enumerate(source.columns or ()) if typecode == "t"]
+        partitions, buffered, flushes = {}, 0, 0
+        rows = files = 0
+
+        for row in stream_rows(self.session, statement, token_range, self.fetch_size, PROFILE_SCAN):
+            added = _millis(row.dateadded)
+            if added is None and low is not None:
+                continue
+            if added is not None and (added > high or (low is not None and added <= low)):
+                continue
+            if source.columns is None:
+                values = (row.codec, row.payload)
+            else:
+                values = list(row)
+                for position in timestamps:
+                    values[position] = _millis(values[position])
+            partitions.setdefault((_region(source, row), _day(added)), []).append(values)
+            buffered += 1
+            rows += 1
+            if buffered >= limit:
+                files += self._flush(source, partitions, staging, f"part-{run}-{index:04d}-{flushes:04d}")
+                partitions, buffered, flushes = {}, 0, flushes + 1
+        if partitions:
+            files += self._flush(source, partitions, staging, f"part-{run}-{index:04d}-{flushes:04d}")
+
+        EXPORT_ROWS.inc(source.name, amount=rows)
+        return rows, files
+
+    def export(self, table, incremental=False):
+        """
+        Exports one table.
+
+        Args:
+            table (str): "puuids", "puuid_matches" or "match_payloads".
+            incremental (bool, optional): Only export rows added after the table's watermark. Defaults to False
+                (every row up to the new watermark).
+
+        Returns:
+            dict: Rows and files written, the exported window (epoch milliseconds; low is None for a full
+                export) and the elapsed seconds.
+        """
+        source = SOURCES[table]
+        started = time.perf_counter()
+        high = int((self.clock() - self.settle_seconds) * 1000)
+        low = self.watermarks().get(table) if incremental else None
+        if low is not None and low >= high:
+            return {"rows": 0, "files": 0, "low": low, "high": low, "seconds": 0.0}
+
+        run = str(high)
+        staging = os.path.join(self.directory, STAGING_DIRECTORY, f"{table}-{run}")
+        statement = self.session.prepare(source.query)
+        statement.is_idempotent = True
+        ranges = token_ranges(self.splits)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+                results = list(
+                    executor.map(
+                        lambda args: self._export_range(source, statement, args[1], args[0], low, high, staging, run),
+                        enumerate(ranges),
+                    )
+                )
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Every range finished: move the files into place, then advance the watermark
+        for root, _, names in os.walk(staging):
+            target = os.path.join(self.directory, os.path.relpath(root, staging))
+            for name in names:
+                os.makedirs(target, exist_ok=True)
+                os.replace(os.path.join(root, name), os.path.join(target, name))
+        shutil.rmtree(staging, ignore_errors=True)
+        self._save_watermark(table, high)
+
+        stats = {
+            "rows": sum(rows for rows, _ in results),
+            "files": sum(files for _, files in results),
+            "low": low,
+            "high": high,
+            "seconds": time.perf_counter() - started,
+        }
+        logger.info("Exported %s (%d token ranges, %s): %s", table, len(ranges), self.format, stats)
+        return stats
+
+
+if __name__ == "__main__":
+    from python.utils.Cassandra import get_shared_session
+
+    parser = argparse.ArgumentParser(description="Export Cassandra tables to partitioned columnar files.")
+    parser.add_argument("--directory", required=True, help="Root directory of the export")
+    parser.add_argument("--table", action="append", choices=sorted(SOURCES), help="Table to export (repeatable)")
+    parser.add_argument("--incremental", action="store_true", help="Only rows added since the last export")
+    parser.add_argument("--format", choices=["parquet", "csv"], help="Output format")
+    parser.add_argument("--parallel", type=int, help="Token ranges scanned at once")
+    args = parser.parse_args()
+
+    exporter = Exporter(get_shared_session(), args.directory, fmt=args.format, parallel=args.parallel)
+    for table in args.table or sorted(SOURCES):
+        print(table, exporter.export(table, incremental=args.incremental))
@@ -0,0 +1,232 @@
+from array import array
+from collections import namedtuple
+from operator import itemgetter
+from python.utils.logger import get_logger
+
+"""Columnar flattening of Match-V5 payloads into the relational schema (docs/SQL.dbml).
+
+    A batch of match payloads is turned into one column-oriented buffer per target table: numeric columns are
+    `array.array` instances and text columns are lists. Each table's source fields are compiled once into an
+    `operator.itemgetter`, so a participant is read with a single C-level call per table instead of one dict
+    lookup per field, and rows are transposed into typed columns once at the end of the batch.
+
+    Rows are keyed by natural identifiers (MatchID = `metadata.matchId`, e.g. "NA1_5168231556", and PUUID);
+    `info.gameId` alone is only unique within a platform. Surrogate keys such as PlayerID and SummonerID are
+    resolved by the loader. Timestamps are epoch milliseconds.
+
+Classes:
+    Column: One target column and the payload field it comes from.
+    MatchFlattener: Flattens batches of match payloads into column buffers.
+
+Functions:
+    to_numpy(batch): Converts a flattened batch to NumPy arrays (optional dependency).
+"""
+
+logger = get_logger("flatten.log", namespace="flatten")
+
+Column = namedtuple("Column", ["name", "field", "typecode"])
+
+# typecode "q" = int64, "b" = bool stored as int8, None = text (list)
+MATCH_COLUMNS = [
+    Column("GameMode", "gameMode", None),
+    Column("GameType", "gameType", None),
+    Column("GameCreation", "gameCreation", "q"),
+    Column("GameStart", "gameStartTimestamp", "q"),
+    Column("GameEnd", "gameEndTimestamp", "q"),
+    Column("GameDuration", "gameDuration", "q"),
+    Column("MapID", "mapId", "q"),
+    Column("GameVersion", "gameVersion", None),
+    Column("QueueID", "queueId", "q"),
+    Column("EndOfGameResult", "endOfGameResult", None),
+]
+
+PLAYER_COLUMNS = [
+    Column("TeamID", "teamId", "q"),
+    Column("ChampionID", "championId", "q"),
+    Column("TeamPosition", "teamPosition", None),
+    Column("Role", "role", None),
+    Column("Win", "win", "b"),
+    Column("SummonerSpell1ID", "summoner1Id", "q"),
+    Column("SummonerSpell2ID", "summoner2Id", "q"),
+    Column("ProfileIcon", "profileIcon", "q"),
+    Column("IndividualPosition", "individualPosition", None),
+]
+
+PERFORMANCE_COLUMNS = [
+    Column("Kills", "kills", "q"),
+    Column("Deaths", "deaths", "q"),
+    Column("Assists", "assists", "q"),
+    Column("TotalDamageDealt", "totalDamageDealt", "q"),
+    Column("TotalDamageTaken", "totalDamageTaken", "q"),
+    Column("VisionScore", "visionScore", "q"),
+    Column("GoldEarned", "goldEarned", "q"),
+    Column("TurretsDestroyed", "turretKills", "q"),
+    Column("WardsPlaced", "wardsPlaced", "q"),
+    Column("WardsKilled", "wardsKilled", "q"),
+    Column("MinionsKilled", "totalMinionsKilled", "q"),
+    Column("NeutralMinionsKilled", "neutralMinionsKilled", "q"),
+    Column("DamageToChampionsMagic", "magicDamageDealtToChampions", "q"),
+    Column("DamageToChampionsPhysical", "physicalDamageDealtToChampions", "q"),
+    Column("DamageToChampionsTrue", "trueDamageDealtToChampions", "q"),
+]
+
+ITEM_FIELDS = tuple(f"item{slot}" for slot in range(7))
+
+OBJECTIVE_TYPES = ("baron", "champion", "dragon", "horde", "inhibitor", "riftHerald", "tower")
+
+TEAM_POSITIONS = {100: "Blue", 200: "Red"}
+
+# Output layout: table -> [(column, typecode)]
+TABLES = {
+    "Matches": [("MatchID", None)] + [(column.name, column.typecode) for column in MATCH_COLUMNS],
+    "Teams": [
+        ("MatchID", None),
+        ("TeamID", "q"),
+        ("Win", "b"),
+        ("FirstBlood", "b"),
+        ("FirstTower", "b"),
+        ("TeamPosition", None),
+    ],
+    "TeamObjectives": [
+        ("MatchID", None),
+        ("TeamID", "q"),
+        ("ObjectiveType", None),
+        ("Kills", "q"),
+        ("First", "b"),
+    ],
+    "TeamBans": [("MatchID", None), ("TeamID", "q"), ("ChampionID", "q"), ("PickTurn", "q")],
+    "Players": [("MatchID", None), ("PUUID", None)]
+    + [(column.name, column.typecode) for column in PLAYER_COLUMNS],
+    "Performance": [("MatchID", None), ("PUUID", None)]
+    + [(column.name, column.typecode) for column in PERFORMANCE_COLUMNS],
+    "PlayerItems": [("MatchID", None), ("PUUID", None), ("Slot", "q"), ("ItemID", "q")],
+}
+
+
+def _compile(columns):
+    getter = itemgetter(*(column.field for column in columns))
+    fields = [column.field for column in columns]
+    defaults = ["" if column.typecode is None else 0 for column in columns]
+
+    def extract(source):
+        try:
+            return getter(source)
+        except KeyError:
+            # Older payloads can miss newer fields; fall back to per-field defaults for this entity only
+            return tuple(source.get(field, default) for field, default in zip(fields, defaults))
+
+    return extract
+
+
+def _columns(table, rows, prefix=None):
+    columns = dict(prefix or {})
+    for position, (name, typecode) in enumerate(TABLES[table][len(columns):]):
+        values = map(itemgetter(position), rows)
+        columns[name] = array(typecode, values) if typecode else list(values)
+    return columns
+
+
+class MatchFlattener:
+    """
+    Flattens batches of Match-V5 payloads into column buffers per target table.
+    """
+
+    def __init__(self):
+        self._match = _compile(MATCH_COLUMNS)
+        self._player = _compile(PLAYER_COLUMNS)
+        self._performance = _compile(PERFORMANCE_COLUMNS)
+        self._items = itemgetter(*ITEM_FIELDS)
+
+    def flatten(self, matches):
+        """
+        Flattens a batch of match payloads.
+
+        Args:
+            matches (iterable): Decoded Match-V5 payloads (dicts with "metadata" and "info").
+
+        Returns:
+            dict: Mapping of table name to {column name: array.array or list}, with every column of a table
+                the same length.
+        """
+        rows = {table: [] for table in TABLES}
+        match_rows, team_rows, objective_rows = rows["Matches"], rows["Teams"], rows["TeamObjectives"]
+        ban_rows, player_rows = rows["TeamBans"], rows["Players"]
+        performance_rows, item_rows = rows["Performance"], rows["PlayerItems"]
+        # Players and Performance share one (MatchID, PUUID) key column pair
+        participant_match_ids, participant_puuids = [], []
+        extract_match, extract_player = self._match, self._player
+        extract_performance, extract_items = self._performance, self._items
+
+        for match in matches:
+            info = match["info"]
+            # Riot match IDs are "<platformId>_<gameId>"; rebuilt for payloads stored without metadata
+            match_id = match.get("metadata", {}).get("matchId") or f"{info['platformId']}_{info['gameId']}"
+            match_rows.append((match_id,) + extract_match(info))
+
+            for team in info.get("teams", ()):
+                team_id = team["teamId"]
+                objectives = team.get("objectives", {})
+                team_rows.append(
+                    (
+                        match_id,
+                        team_id,
+                        team.get("win", False),
+                        objectives.get("champion", {}).get("first", False),
+                        objectives.get("tower", {}).get("first", False),
+                        TEAM_POSITIONS.get(team_id, ""),
+                    )
+                )
+                for objective_type, objective in objectives.items():
+                    objective_rows.append(
+                        (match_id, team_id, objective_type, objective["kills"], objective["first"])
+                    )
+                for ban in team.get("bans", ()):
+                    ban_rows.append((match_id, team_id, ban["championId"], ban["pickTurn"]))
+
+            participants = info["participants"]
+            participant_match_ids.extend([match_id] * len(participants))
+            for participant in participants:
+                puuid = participant["puuid"]
+                participant_puuids.append(puuid)
+                player_rows.append(extract_player(participant))
+                performance_rows.append(extract_performance(participant))
+                item_rows.extend(
+                    [
+                        (match_id, puuid, slot, item_id)
+                        for slot, item_id in enumerate(extract_items(participant))
+                        if item_id
+                    ]
+                )
+
+        batch = {}
+        for table, table_rows in rows.items():
+            if table in ("Players", "Performance"):
+                keys = {"MatchID": list(participant_match_ids), "PUUID": list(participant_puuids)}
+                batch[table] = _columns(table, table_rows, prefix=keys)
+            else:
+                batch[table] = _columns(table, table_rows)
+        return batch
+
+
+def to_numpy(batch):
+    """
+    Converts the numeric columns of a flattened batch to NumPy arrays without copying.
+
+    Args:
+        batch (dict): Output of `MatchFlattener.flatten`.
+
+    Returns:
+        dict: The same layout with `array.array` columns replaced by `numpy.ndarray` views.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    import numpy
+
+    return {
+        table: {
+            name: numpy.frombuffer(values, dtype=values.typecode) if isinstance(values, array) else values
+            for name, values in columns.items()
+        }
+        for table, columns in batch.items()
+    }
@@ -0,0 +1,170 @@
+import json
+import re
+from itertools import accumulate, repeat
+
+"""Projected decoding of Match-V5 payloads.
+
+    Most of a match payload is per-participant `challenges`, `missions` and `perks` maps that no table uses. A
+    projection names the subtrees to materialize; every other nested object or array is left as a `LazyValue` that
+    points into the original text and is only parsed when asked for. Scalars of a projected object are kept and are
+    parsed in the same C-level `json.loads` pass as the object itself, which is cheaper than picking them one by
+    one in Python.
+
+    A projection is a dict of key -> True (materialize the whole subtree) or a nested projection (applied to an
+    object, or to each element of an array of objects). Keys missing from a projection that hold a container become
+    `LazyValue`s.
+
+    Subtree boundaries come from the positions and nesting depths of the payload's brackets, found with C-level
+    string scans, so skipping a subtree never tokenizes it.
+    Object keys are located by scanning back from the value for the closing quote of the key, which assumes keys
+    without escaped quotes (true of every Riot API payload).
+
+Classes:
+    LazyValue: A raw, not yet decoded JSON subtree.
+
+Functions:
+    decode_projected(payload, projection): Decodes a payload, materializing only the projected subtrees.
+"""
+
+# Strings and brackets, for payloads whose strings contain escaped quotes
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+_DEPTH_STEP = {"{": 1, "[": 1, "}": -1, "]": -1}
+
+# Tables in docs/SQL.dbml read scalar match, team and participant fields only (see python/Pipeline/flatten.py)
+MATCH_PROJECTION = {
+    "metadata": True,
+    "info": {
+        "teams": True,
+        "participants": {},
+    },
+}
+
+# Just the match ID and participant PUUIDs, e.g. to mark puuid_matches rows processed
+METADATA_PROJECTION = {"metadata": True}
+
+
+class LazyValue:
+    """
+    A JSON subtree left undecoded.
+    """
+
+    __slots__ = ("raw", "_value", "_decoded")
+
+    def __init__(self, raw):
+        """
+        Args:
+            raw (str): The subtree's JSON text.
+        """
+        self.raw = raw
+        self._value = None
+        self._decoded = False
+
+    def decode(self):
+        """
+        Parses the subtree on first use.
+
+        Returns:
+            dict or list: The decoded subtree.
+        """
+        if not self._decoded:
+            self._value = json.loads(self.raw)
+            self._decoded = True
+        return self._value
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __repr__(self):
+        return f"LazyValue({len(self.raw)} chars)"
+
+
+def _structural_brackets(text):
+    if '\\"' in text:
+        return [match.start() for match in _TOKEN.finditer(text) if match.group() in "{}[]"]
+
+    # Without escaped quotes, a bracket is inside a string exactly when an odd number of quotes precede it.
+    # str.find/str.count do the scanning in C, so only the brackets themselves cost a Python-level step.
+    positions = []
+    for bracket in "{}[]":
+        pos = text.find(bracket)
+        while pos != -1:
+            positions.append(pos)
+            pos = text.find(bracket, pos + 1)
+    positions.sort()
+    quotes = accumulate(map(text.count, repeat('"'), [0] + positions, positions))
+    return [pos for pos, count in zip(positions, quotes) if not count & 1]
+
+
+def _children(depths, index):
+    """Yields (open, close) bracket indexes of the containers directly inside the container opened at `index`."""
+    depth = depths[index]
+    child = index + 1
+    # After a child closes the depth is back to `depth`; the next bracket either opens a sibling or closes the parent
+    while child < len(depths) and depths[child] > depth:
+        close = depths.index(depth, child + 1)
+        yield child, close
+        child = close + 1
+
+
+def _key_before(text, pos):
+    colon = text.rfind(":", 0, pos)
+    key_end = text.rfind('"', 0, colon)
+    return text[text.rfind('"', 0, key_end) + 1:key_end]
+
+
+def _collect_cuts(text, positions, depths, index, projection, path, cuts):
+    for child, close in _children(depths, index):
+        start = positions[child]
+        key = _key_before(text, start)
+        spec = projection.get(key)
+        if spec is True:
+            continue
+        if spec is None:
+            cuts.append((start, positions[close] + 1, path + (key,)))
+        elif text[start] == "{":
+            _collect_cuts(text, positions, depths, child, spec, path + (key,), cuts)
+        else:
+            elements = list(_children(depths, child))
+            # Arrays of objects apply the projection to every element; other arrays are decoded as-is
+            if all(text[positions[element]] == "{" for element, _ in elements):
+                for element_index, (element, _) in enumerate(elements):
+                    _collect_cuts(
+                        text, positions, depths, element, spec, path + (key, element_index), cuts
+                    )
+
+
+def decode_projected(payload, projection):
+    """
+    Decodes a JSON object, materializing only the subtrees named by `projection`.
+
+    Args:
+        payload (bytes or str): A JSON document whose top level is an object.
+        projection (dict): The subtrees to materialize (see the module docstring).
+
+    Returns:
+        dict: The decoded object. Unprojected nested objects and arrays are `LazyValue`s.
+    """
+    text = payload.decode("utf-8") if isinstance(payload, (bytes, bytearray)) else payload
+    positions = _structural_brackets(text)
+    # Nesting depth after each bracket, computed without a Python-level loop
+    depths = list(accumulate(map(_DEPTH_STEP.__getitem__, map(text.__getitem__, positions))))
+    cuts = []
+    _collect_cuts(text, positions, depths, 0, projection, (), cuts)
+
+    # Unprojected subtrees are replaced by null so the rest decodes in one json.loads call, which also shares
+    # repeated key strings across all participants
+    pieces = []
+    copied = 0
+    for cut_start, cut_end, _ in cuts:
+        pieces.append(text[copied:cut_start])
+        pieces.append("null")
+        copied = cut_end
+    pieces.append(text[copied:])
+    decoded = json.loads("".join(pieces))
+
+    for cut_start, cut_end, path in cuts:
+        parent = decoded
+        for step in path[:-1]:
+            parent = parent[step]
+        parent[path[-1]] = LazyValue(text[cut_start:cut_end])
+    return decoded
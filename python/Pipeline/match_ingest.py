@@ -0,0 +1,257 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from cassandra.query import BatchStatement, BatchType
+from python.config import INGEST_CONCURRENCY, INGEST_FETCH_SIZE, PLATFORM_REGIONS
+from python.Pipeline.lazy_decode import METADATA_PROJECTION, decode_projected
+from python.utils.api_utils import get_url, call_endpoint
+from python.utils.Cassandra import stream_rows
+from python.utils.compression import compress_payload, default_codec
+from python.utils.logger import get_logger
+from python.utils.metrics import MATCHES_INGESTED, start_exporter
+from python.utils.retry_queue import get_retry_queue
+
+"""Streaming match-detail ingestion.
+
+    Drains unprocessed rows from puuid_matches page by page, fetches each match's Match-V5 JSON with bounded
+    concurrency, stores the raw response body compressed in match_payloads and marks the match's rows processed
+    with one single-partition batch per match. With a `RollupEngine`, every stored match is also counted into the
+    champion and player rollups (see python/Pipeline/rollups.py).
+
+    A match that fails is queued as a "match_detail" operation on the retry queue (see
+    python/utils/retry_queue.py), which this ingestor retries with back-off; later runs skip matches that are
+    waiting there or have been dead-lettered instead of requesting them again.
+
+Classes:
+    MatchIngestor: Fetches, compresses and stores match payloads.
+
+Functions:
+    region_for_match(match_id): Routing value for a match ID's platform prefix.
+"""
+
+logger = get_logger("match_ingest.log", namespace="match_ingest")
+
+SCAN_QUERY = "SELECT match_id, puuid, processed FROM puuid_matches"
+INSERT_PAYLOAD_QUERY = """INSERT INTO match_payloads (match_id, region, codec, payload, raw_size, dateadded)
+                   VALUES (?, ?, ?, ?, ?, toTimestamp(now()))"""
+MARK_PROCESSED_QUERY = "UPDATE puuid_matches SET processed = true WHERE match_id = ? AND puuid = ?"
+
+
+def region_for_match(match_id):
+    """
+    Returns the routing value for a match ID.
+
+    Args:
+        match_id (str): A match identifier such as 'NA1_5168231556'.
+
+    Returns:
+        str: The routing value (e.g. 'americas').
+
+    Raises:
+        ValueError: If the platform prefix is unknown.
+    """
+    platform = match_id.split("_", 1)[0].upper()
+    if platform not in PLATFORM_REGIONS:
+        raise ValueError(f"Unknown platform '{platform}' in match ID {match_id}")
+    return PLATFORM_REGIONS[platform]
+
+
+class MatchIngestor:
+    """
+    Fetches, compresses and stores Match-V5 payloads for unprocessed matches.
+    """
+
+    def __init__(self, session, concurrency=None, fetch_size=None, codec=None, rollups=None, retry_queue=None):
+        """
+        Prepare the ingestion statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            concurrency (int, optional): Maximum match requests in flight. Defaults to INGEST_CONCURRENCY.
+            fetch_size (int, optional): Rows per page when scanning puuid_matches. Defaults to INGEST_FETCH_SIZE.
+            codec (str, optional): Payload codec, "zstd" or "gzip". Defaults to `default_codec()`.
+            rollups (RollupEngine, optional): Rollups to add every stored match to.
+            retry_queue (RetryQueue, optional): Queue for matches that failed. Defaults to `get_retry_queue()`.
+        """
+        self.session = session
+        self.concurrency = concurrency or INGEST_CONCURRENCY
+        self.fetch_size = fetch_size or INGEST_FETCH_SIZE
+        self.codec = codec or default_codec()
+        self.rollups = rollups
+        self.retry_queue = retry_queue or get_retry_queue()
+
+        self.insert_payload = session.prepare(INSERT_PAYLOAD_QUERY)
+        self.mark_processed = session.prepare(MARK_PROCESSED_QUERY)
+
+        self.matches_stored = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.failures = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+
+        if self.retry_queue is not None:
+            self.retry_queue.register("match_detail", lambda payload: self._fetch_and_store(payload["match_id"]))
+
+    def unprocessed_matches(self):
+        """
+        Streams unprocessed matches from puuid_matches one page at a time.
+
+        Rows of a match share a partition and are returned together, so each match is yielded once with
+        every PUUID row that still needs marking.
+
+        Yields:
+            tuple: (match_id, list of puuids).
+        """
+        current_match, puuids = None, []
+        for row in stream_rows(self.session, SCAN_QUERY, fetch_size=self.fetch_size):
+            if row.match_id != current_match:
+                if puuids:
+                    yield current_match, puuids
+                current_match, puuids = row.match_id, []
+            if row.processed is not True:
+                puuids.append(row.puuid)
+        if puuids:
+            yield current_match, puuids
+
+    def store(self, match_id, payload, puuids=None, region=None):
+        """
+        Compresses and stores one payload, then marks the match processed for every given PUUID.
+
+        Args:
+            match_id (str): The match identifier.
+            payload (bytes or dict): The raw response body, or an already decoded payload.
+            puuids (list, optional): puuid_matches rows to mark. Defaults to the payload's participants.
+            region (str, optional): The match's routing value. Defaults to `region_for_match(match_id)`.
+        """
+        decoded = payload
+        if isinstance(payload, dict):
+            puuids = puuids or payload.get("metadata", {}).get("participants", [])
+            payload = json.dumps(payload, separators=(",", ":")).encode()
+        elif puuids is None:
+            # Only metadata is needed here; `info` is skipped without being decoded
+            puuids = decode_projected(payload, METADATA_PROJECTION).get("metadata", {}).get("participants", [])
+
+        codec, blob = compress_payload(payload, self.codec)
+        self.session.execute(
+            self.insert_payload,
+            (match_id, region or region_for_match(match_id), codec, blob, len(payload)),
+        )
+
+        # Every row of a match lives in one partition, so the batch is applied as a single mutation
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for puuid in puuids:
+            batch.add(self.mark_processed, (match_id, puuid))
+        if puuids:
+            self.session.execute(batch)
+        if self.rollups is not None:
+            self.rollups.add(match_id, decoded)
+
+        MATCHES_INGESTED.inc()
+        with self._lock:
+            self.matches_stored += 1
+            self.raw_bytes += len(payload)
+            self.stored_bytes += len(blob)
+
+    def _fetch_and_store(self, match_id, puuids=None):
+        region = region_for_match(match_id)
+        payload = call_endpoint(
+            get_url("Match", region=region, matchId=match_id),
+            region=region,
+            method="Match",
+            raw=True,
+        )
+        if payload is None:
+            raise RuntimeError("no payload returned")
+        self.store(match_id, payload, puuids, region)
+
+    def _ingest_one(self, match_id, puuids):
+        try:
+            self._fetch_and_store(match_id, puuids)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            logger.error("Error ingesting match %s: %s", match_id, e)
+            if self.retry_queue is not None:
+                self.retry_queue.enqueue("match_detail", {"match_id": match_id}, e)
+
+    def run(self, limit=None):
+        """
+        Ingests unprocessed matches until the table is drained or `limit` matches have been attempted.
+
+        Args:
+            limit (int, optional): Maximum matches to attempt.
+
+        Returns:
+            dict: Ingestion statistics (see `stats`).
+        """
+        started = time.perf_counter()
+        in_flight = set()
+        attempted = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for match_id, puuids in self.unprocessed_matches():
+                if limit is not None and attempted >= limit:
+                    break
+                if self.retry_queue is not None and self.retry_queue.contains("match_detail", {"match_id": match_id}):
+                    self.deferred += 1
+                    continue
+                attempted += 1
+                if len(in_flight) >= self.concurrency:
+                    _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                in_flight.add(executor.submit(self._ingest_one, match_id, puuids))
+            wait(in_flight)
+        if self.rollups is not None:
+            self.rollups.flush()
+
+        stats = self.stats(time.perf_counter() - started)
+        logger.info("Ingestion finished: %s", stats)
+        return stats
+
+    def stats(self, elapsed=None):
+        """
+        Returns ingestion counters.
+
+        Args:
+            elapsed (float, optional): Wall-clock seconds, used to compute matches per second.
+
+        Returns:
+            dict: Matches stored, failures, matches skipped because they wait in the retry queue, raw and stored
+                bytes, compression ratio and rate.
+        """
+        with self._lock:
+            stats = {
+                "matches_stored": self.matches_stored,
+                "failures": self.failures,
+                "deferred": self.deferred,
+                "raw_bytes": self.raw_bytes,
+                "stored_bytes": self.stored_bytes,
+                "compression_ratio": self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0,
+            }
+        if elapsed:
+            stats["matches_per_second"] = stats["matches_stored"] / elapsed
+        return stats
+
+
+if __name__ == "__main__":
+    from python.utils.Cassandra import CassandraClient
+
+    parser = argparse.ArgumentParser(description="Ingest match details for unprocessed matches.")
+    parser.add_argument("--limit", type=int, help="Stop after this many matches")
+    parser.add_argument("--rollups", action="store_true", help="Count stored matches into the rollup tables")
+    args = parser.parse_args()
+
+    start_exporter()
+    cassandra_client = CassandraClient(keyspace="raw_league_data")
+    cassandra_client.connect()
+    try:
+        session = cassandra_client.get_session()
+        rollups = None
+        if args.rollups:
+            from python.Pipeline.rollups import RollupEngine
+
+            rollups = RollupEngine(session)
+        MatchIngestor(session, rollups=rollups).run(limit=args.limit)
+    finally:
+        cassandra_client.close()
@@ -0,0 +1,291 @@
+import threading
+import time
+from itertools import islice
+from python.config import POSTGRES_DATABASE
+from python.Pipeline.flatten import TABLES, MatchFlattener
+from python.utils.logger import get_logger
+from python.utils.metrics import LatencyRecorder
+from python.utils.PostgreSQL import PostgresPool
+from python.utils.puuid_table import PuuidTable
+
+"""COPY-based bulk loader for the relational match tables (Docker/sql_init/03_create_match_tables.sql).
+
+    Each table of a flattened batch (see `python.Pipeline.flatten`) is streamed with `COPY ... FROM STDIN` into a
+    session-local staging table, then moved into its target with one `INSERT ... SELECT ... ON CONFLICT DO UPDATE`
+    per table. A whole batch is one transaction on one pooled connection, so reloading a match is idempotent and a
+    failed batch leaves nothing behind.
+
+Classes:
+    PostgresLoader: Loads flattened match batches into PostgreSQL.
+"""
+
+logger = get_logger("pg_loader.log", namespace="pg_loader")
+
+# Parents before children: Players must exist before Performance and PlayerItems resolve PlayerID
+LOAD_ORDER = ("Matches", "Teams", "TeamObjectives", "TeamBans", "Players", "Performance", "PlayerItems")
+
+SUMMONERS_QUERY = "SELECT SummonerID, PUUID FROM Summoners"
+
+_STAGING_TYPES = {"q": "bigint", "b": "boolean", None: "text"}
+
+UPSERT_QUERIES = {
+    "Matches": """
+        INSERT INTO Matches (MatchID, GameMode, GameType, GameCreation, GameStart, GameEnd, GameDuration, MapID,
+                             GameVersion, QueueID, EndOfGameResult)
+        SELECT DISTINCT ON (MatchID) MatchID, GameMode, GameType,
+               to_timestamp(GameCreation / 1000.0) AT TIME ZONE 'UTC',
+               to_timestamp(GameStart / 1000.0) AT TIME ZONE 'UTC',
+               to_timestamp(GameEnd / 1000.0) AT TIME ZONE 'UTC',
+               GameDuration, MapID, GameVersion, QueueID, EndOfGameResult
+        FROM stage_matches
+        ON CONFLICT (MatchID) DO UPDATE SET
+            GameMode = EXCLUDED.GameMode, GameType = EXCLUDED.GameType, GameCreation = EXCLUDED.GameCreation,
+            GameStart = EXCLUDED.GameStart, GameEnd = EXCLUDED.GameEnd, GameDuration = EXCLUDED.GameDuration,
+            MapID = EXCLUDED.MapID, GameVersion = EXCLUDED.GameVersion, QueueID = EXCLUDED.QueueID,
+            EndOfGameResult = EXCLUDED.EndOfGameResult
+    """,
+    "Teams": """
+        INSERT INTO Teams (MatchID, TeamID, Win, FirstBlood, FirstTower, TeamPosition)
+        SELECT DISTINCT ON (MatchID, TeamID) MatchID, TeamID, Win, FirstBlood, FirstTower, TeamPosition
+        FROM stage_teams
+        ON CONFLICT (MatchID, TeamID) DO UPDATE SET
+            Win = EXCLUDED.Win, FirstBlood = EXCLUDED.FirstBlood, FirstTower = EXCLUDED.FirstTower,
+            TeamPosition = EXCLUDED.TeamPosition
+    """,
+    "TeamObjectives": """
+        INSERT INTO TeamObjectives (MatchID, TeamID, ObjectiveType, Kills, First)
+        SELECT DISTINCT ON (MatchID, TeamID, ObjectiveType) MatchID, TeamID, ObjectiveType, Kills, First
+        FROM stage_teamobjectives
+        ON CONFLICT (MatchID, TeamID, ObjectiveType) DO UPDATE SET Kills = EXCLUDED.Kills, First = EXCLUDED.First
+    """,
+    "TeamBans": """
+        INSERT INTO TeamBans (MatchID, TeamID, ChampionID, PickTurn)
+        SELECT DISTINCT ON (MatchID, TeamID, PickTurn) MatchID, TeamID, ChampionID, PickTurn
+        FROM stage_teambans
+        ON CONFLICT (MatchID, TeamID, PickTurn) DO UPDATE SET ChampionID = EXCLUDED.ChampionID
+    """,
+    "Players": """
+        INSERT INTO Players (MatchID, PUUID, SummonerID, TeamID, ChampionID, TeamPosition, Role, Win,
+                             SummonerSpell1ID, SummonerSpell2ID, ProfileIcon, IndividualPosition)
+        SELECT DISTINCT ON (s.MatchID, s.PUUID) s.MatchID, s.PUUID, summoner.SummonerID, s.TeamID, s.ChampionID,
+               s.TeamPosition, s.Role, s.Win, s.SummonerSpell1ID, s.SummonerSpell2ID, s.ProfileIcon,
+               s.IndividualPosition
+        FROM stage_players s
+        LEFT JOIN Summoners summoner ON summoner.PUUID = s.PUUID
+        ON CONFLICT (MatchID, PUUID) DO UPDATE SET
+            SummonerID = COALESCE(EXCLUDED.SummonerID, Players.SummonerID), TeamID = EXCLUDED.TeamID,
+            ChampionID = EXCLUDED.ChampionID, TeamPosition = EXCLUDED.TeamPosition, Role = EXCLUDED.Role,
+            Win = EXCLUDED.Win, SummonerSpell1ID = EXCLUDED.SummonerSpell1ID,
+            SummonerSpell2ID = EXCLUDED.SummonerSpell2ID, ProfileIcon = EXCLUDED.ProfileIcon,
+            IndividualPosition = EXCLUDED.IndividualPosition
+    """,
+    "Performance": """
+        INSERT INTO Performance (PlayerID, Kills, Deaths, Assists, TotalDamageDealt, TotalDamageTaken, VisionScore,
+                                 GoldEarned, TurretsDestroyed, WardsPlaced, WardsKilled, MinionsKilled,
+                                 NeutralMinionsKilled, DamageToChampionsMagic, DamageToChampionsPhysical,
+                                 DamageToChampionsTrue)
+        SELECT DISTINCT ON (player.PlayerID) player.PlayerID, s.Kills, s.Deaths, s.Assists, s.TotalDamageDealt,
+               s.TotalDamageTaken, s.VisionScore, s.GoldEarned, s.TurretsDestroyed, s.WardsPlaced, s.WardsKilled,
+               s.MinionsKilled, s.NeutralMinionsKilled, s.DamageToChampionsMagic, s.DamageToChampionsPhysical,
+               s.DamageToChampionsTrue
+        FROM stage_performance s
+        JOIN Players player ON player.MatchID = s.MatchID AND player.PUUID = s.PUUID
+        ON CONFLICT (PlayerID) DO UPDATE SET
+            Kills = EXCLUDED.Kills, Deaths = EXCLUDED.Deaths, Assists = EXCLUDED.Assists,
+            TotalDamageDealt = EXCLUDED.TotalDamageDealt, TotalDamageTaken = EXCLUDED.TotalDamageTaken,
+            VisionScore = EXCLUDED.VisionScore, GoldEarned = EXCLUDED.GoldEarned,
+            TurretsDestroyed = EXCLUDED.TurretsDestroyed, WardsPlaced = EXCLUDED.WardsPlaced,
+            WardsKilled = EXCLUDED.WardsKilled, MinionsKilled = EXCLUDED.MinionsKilled,
+            NeutralMinionsKilled = EXCLUDED.NeutralMinionsKilled,
+            DamageToChampionsMagic = EXCLUDED.DamageToChampionsMagic,
+            DamageToChampionsPhysical = EXCLUDED.DamageToChampionsPhysical,
+            DamageToChampionsTrue = EXCLUDED.DamageToChampionsTrue
+    """,
+    "PlayerItems": """
+        INSERT INTO PlayerItems (PlayerID, ItemID, Slot)
+        SELECT DISTINCT ON (player.PlayerID, s.Slot) player.PlayerID, s.ItemID, s.Slot
+        FROM stage_playeritems s
+        JOIN Players player ON player.MatchID = s.MatchID AND player.PUUID = s.PUUID
+        ON CONFLICT (PlayerID, Slot) DO UPDATE SET ItemID = EXCLUDED.ItemID
+    """,
+}
+
+
+def staging_table(table):
+    return f"stage_{table.lower()}"
+
+
+def staging_ddl(table):
+    """
+    Builds the session-local staging table for one target table, typed after the flattener's column layout.
+
+    Args:
+        table (str): A table name from `TABLES`.
+
+    Returns:
+        str: A CREATE TEMP TABLE statement whose rows are discarded at commit.
+    """
+    columns = ", ".join(f"{name} {_STAGING_TYPES[typecode]}" for name, typecode in TABLES[table])
+    return f"CREATE TEMP TABLE IF NOT EXISTS {staging_table(table)} ({columns}) ON COMMIT DELETE ROWS"
+
+
+def _escape(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+        )
+    return str(int(value))
+
+
+class CopyStream:
+    """
+    File-like reader that encodes column buffers as COPY text format on demand.
+
+    `cursor.copy_expert` pulls fixed-size chunks through `read`, so a table is never materialized as one string.
+    """
+
+    def __init__(self, columns, rows_per_chunk=1000):
+        """
+        Args:
+            columns (list): Equal-length column buffers in staging-table column order.
+            rows_per_chunk (int, optional): Rows encoded per refill. Defaults to 1000.
+        """
+        self._rows = zip(*columns)
+        # array.array columns hold plain ints; only text columns need escaping
+        self._encoders = [str if hasattr(column, "typecode") else _escape for column in columns]
+        self._rows_per_chunk = rows_per_chunk
+        self._buffer = ""
+        self.rows = 0
+
+    def _refill(self):
+        chunk = list(islice(self._rows, self._rows_per_chunk))
+        self.rows += len(chunk)
+        encoders = self._encoders
+        self._buffer += "".join(
+            "\t".join([encode(value) for encode, value in zip(encoders, row)]) + "\n" for row in chunk
+        )
+        return bool(chunk)
+
+    def read(self, size=-1):
+        while (size < 0 or len(self._buffer) < size) and self._refill():
+            pass
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class PostgresLoader:
+    """
+    Loads flattened match batches into PostgreSQL with COPY into staging tables and one upsert per table.
+    """
+
+    def __init__(self, pool=None, database=None):
+        """
+        Initialize the loader.
+
+        Args:
+            pool (PostgresPool, optional): Connection pool to borrow from. Defaults to a new pool on `database`.
+            database (str, optional): Database for the default pool. Defaults to POSTGRES_DATABASE.
+        """
+        self.pool = pool or PostgresPool(database or POSTGRES_DATABASE)
+        self.flattener = MatchFlattener()
+        self.latency = LatencyRecorder()
+        self.rows_copied = 0
+        self.rows_upserted = 0
+        self.batches = 0
+        self.load_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, batch):
+        """
+        Loads one flattened batch in a single transaction.
+
+        Args:
+            batch (dict): Output of `MatchFlattener.flatten`.
+
+        Returns:
+            dict: Mapping of table name to rows inserted or updated in the target table.
+        """
+        started = time.perf_counter()
+        upserted = {}
+        copied = 0
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                for table in LOAD_ORDER:
+                    columns = batch.get(table)
+                    if not columns or not len(next(iter(columns.values()))):
+                        continue
+                    table_started = time.perf_counter()
+                    cursor.execute(staging_ddl(table))
+                    names = [name for name, _ in TABLES[table]]
+                    stream = CopyStream([columns[name] for name in names])
+                    cursor.copy_expert(
+                        f"COPY {staging_table(table)} ({', '.join(names)}) FROM STDIN", stream
+                    )
+                    cursor.execute(UPSERT_QUERIES[table])
+                    upserted[table] = cursor.rowcount
+                    copied += stream.rows
+                    self.latency.record(table, time.perf_counter() - table_started)
+
+        elapsed = time.perf_counter() - started
+        self.latency.record("batch", elapsed)
+        with self._lock:
+            self.batches += 1
+            self.rows_copied += copied
+            self.rows_upserted += sum(upserted.values())
+            self.load_seconds += elapsed
+        logger.info("Loaded batch of %d rows in %.3fs: %s", copied, elapsed, upserted)
+        return upserted
+
+    def load_matches(self, matches):
+        """
+        Flattens and loads a batch of decoded match payloads.
+
+        Args:
+            matches (iterable): Decoded Match-V5 payloads.
+
+        Returns:
+            dict: Mapping of table name to rows inserted or updated in the target table.
+        """
+        return self.load(self.flattener.flatten(matches))
+
+    def summoner_ids(self, capacity=1024):
+        """
+        Reads every Summoners row into a `PuuidTable`, so PUUIDs can be resolved to SummonerID in memory.
+
+        Rows are streamed through a server-side cursor, so the table is the only full copy held.
+
+        Args:
+            capacity (int, optional): Expected summoners. Defaults to 1024.
+
+        Returns:
+            PuuidTable: PUUIDs interned with their SummonerID bound (see `PuuidTable.summoner_id`).
+        """
+        with self.pool.connection() as connection:
+            with connection.cursor(name="summoner_ids") as cursor:
+                cursor.itersize = 10_000
+                cursor.execute(SUMMONERS_QUERY)
+                return PuuidTable.from_summoners(cursor, capacity)
+
+    def stats(self):
+        """
+        Returns loader counters.
+
+        Returns:
+            dict: Batches, rows copied and upserted, rows per second over time spent loading, and per-table and
+                per-batch latency percentiles.
+        """
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows_copied": self.rows_copied,
+                "rows_upserted": self.rows_upserted,
+                "rows_per_second": self.rows_copied / self.load_seconds if self.load_seconds else 0.0,
+                "latency": self.latency.stats(),
+            }
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,370 @@
+import argparse
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import itemgetter
+from cassandra.concurrent import execute_concurrent_with_args
+from python.config import INGEST_FETCH_SIZE, ROLLUP_FLUSH_MATCHES, ROLLUP_FLUSH_SECONDS
+from python.Pipeline.lazy_decode import decode_projected
+from python.utils.Cassandra import PROFILE_READ, stream_rows
+from python.utils.compression import decompress_payload
+from python.utils.logger import get_logger
+from python.utils.metrics import ROLLUP_MATCHES
+
+"""Champion and player aggregates maintained at ingest time.
+
+    `RollupEngine.add` decodes only the match scalars and participant scalars of a payload and appends one row
+    per participant to column buffers. Every ROLLUP_FLUSH_MATCHES matches or ROLLUP_FLUSH_SECONDS seconds the
+    buffered matches are claimed in rollup_matches with INSERT ... IF NOT EXISTS, the rows of the claimed ones
+    are merged into one delta per champion key and per player in a single pass over the columns, and each delta
+    is written as one counter update. A match that is replayed (re-ingested, or offered by two ingestors) loses
+    its claim and is skipped, so it is counted once.
+
+    Counter updates are not idempotent and are never retried: a flush that fails after claiming leaves its
+    matches under-counted. `rebuild` recomputes both tables from match_payloads in one scan; it truncates the
+    rollup tables first, so other rollup writers must be stopped while it runs.
+
+Classes:
+    RollupEngine: Buffers per-participant rows and flushes merged deltas to the rollup tables.
+
+Functions:
+    patch_of(game_version): The patch ("14.23") of a gameVersion string.
+    champion_win_rates(session, patch, position): Games, wins and win rate per champion key of a patch.
+    player_totals(session, puuid): A player's rollup totals and KDA.
+"""
+
+logger = get_logger("rollups.log", namespace="rollups")
+
+CLAIM_QUERY = "INSERT INTO rollup_matches (match_id, applied) VALUES (?, toTimestamp(now())) IF NOT EXISTS"
+MARK_QUERY = "INSERT INTO rollup_matches (match_id, applied) VALUES (?, toTimestamp(now()))"
+CHAMPION_UPDATE_QUERY = """UPDATE champion_rollups SET games = games + ?, wins = wins + ?
+                   WHERE patch = ? AND champion_id = ? AND team_position = ?"""
+PLAYER_UPDATE_QUERY = """UPDATE player_rollups SET games = games + ?, wins = wins + ?, kills = kills + ?,
+                   deaths = deaths + ?, assists = assists + ?, damage_to_champions = damage_to_champions + ?,
+                   damage_dealt = damage_dealt + ?, damage_taken = damage_taken + ? WHERE puuid = ?"""
+PAYLOAD_SCAN_QUERY = "SELECT match_id, codec, payload FROM match_payloads"
+CHAMPION_STATS_QUERY = "SELECT champion_id, team_position, games, wins FROM champion_rollups WHERE patch = ?"
+PLAYER_STATS_QUERY = """SELECT games, wins, kills, deaths, assists, damage_to_champions, damage_dealt, damage_taken
+                   FROM player_rollups WHERE puuid = ?"""
+TRUNCATE_QUERIES = ("TRUNCATE rollup_matches", "TRUNCATE champion_rollups", "TRUNCATE player_rollups")
+
+# Match and participant scalars only; teams and every nested participant object stay undecoded
+ROLLUP_PROJECTION = {"metadata": True, "info": {"participants": {}}}
+
+PARTICIPANT_FIELDS = (
+    "puuid", "championId", "teamPosition", "win", "kills", "deaths", "assists",
+    "magicDamageDealtToChampions", "physicalDamageDealtToChampions", "trueDamageDealtToChampions",
+    "totalDamageDealt", "totalDamageTaken",
+)
+_DEFAULTS = ("", 0, "", False) + (0,) * (len(PARTICIPANT_FIELDS) - 4)
+# Column buffers: (name, typecode); None = list
+_COLUMNS = (
+    ("puuid", None), ("champion", "q"), ("position", None), ("win", "b"), ("kills", "q"), ("deaths", "q"),
+    ("assists", "q"), ("damage_to_champions", "q"), ("damage_dealt", "q"), ("damage_taken", "q"),
+)
+
+
+def patch_of(game_version):
+    """
+    Returns the patch of a game version.
+
+    Args:
+        game_version (str): Match-V5 `info.gameVersion`, e.g. '14.23.640.4153'.
+
+    Returns:
+        str: Major and minor version, e.g. '14.23'.
+    """
+    return ".".join(game_version.split(".", 2)[:2])
+
+
+def champion_win_rates(session, patch, position=None):
+    """
+    Reads the champion rollups of one patch.
+
+    Args:
+        session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+        patch (str): The patch, e.g. '14.23'.
+        position (str, optional): Only this teamPosition (e.g. 'TOP'). Defaults to every position.
+
+    Returns:
+        list: Dicts with champion_id, team_position, games, wins and win_rate, most played first.
+    """
+    rows = [
+        {
+            "champion_id": row.champion_id,
+            "team_position": row.team_position,
+            "games": row.games,
+            "wins": row.wins or 0,
+            "win_rate": (row.wins or 0) / row.games if row.games else 0.0,
+        }
+        for row in session.execute(
+            session.prepare(CHAMPION_STATS_QUERY), (patch,), execution_profile=PROFILE_READ
+        )
+        if position is None or row.team_position == position
+    ]
+    return sorted(rows, key=lambda row: row["games"], reverse=True)
+
+
+def player_totals(session, puuid):
+    """
+    Reads a player's rollup totals.
+
+    Args:
+        session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+        puuid (str): The player's unique identifier.
+
+    Returns:
+        dict or None: The counters plus kda ((kills + assists) / max(deaths, 1)), or None for an unknown player.
+    """
+    row = session.execute(session.prepare(PLAYER_STATS_QUERY), (puuid,), execution_profile=PROFILE_READ).one()
+    if row is None:
+        return None
+    totals = {field: value or 0 for field, value in row._asdict().items()}
+    totals["kda"] = (totals["kills"] + totals["assists"]) / max(totals["deaths"], 1)
+    return totals
+
+
+def _empty_columns():
+    return {name: array(typecode) if typecode else [] for name, typecode in _COLUMNS}
+
+
+class RollupEngine:
+    """
+    Buffers per-participant rows of ingested matches and flushes merged deltas to the rollup tables.
+    """
+
+    def __init__(self, session, flush_matches=None, flush_seconds=None, claim=True):
+        """
+        Prepare the rollup statements on `session`.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            flush_matches (int, optional): Buffered matches that trigger a flush. Defaults to ROLLUP_FLUSH_MATCHES.
+            flush_seconds (float, optional): Seconds after which `add` flushes a non-empty buffer.
+                Defaults to ROLLUP_FLUSH_SECONDS.
+            claim (bool, optional): Claim matches with a lightweight transaction before counting them.
+                Only `rebuild`, which runs alone on truncated tables, turns this off. Defaults to True.
+        """
+        self.session = session
+        self.flush_matches = flush_matches or ROLLUP_FLUSH_MATCHES
+        self.flush_seconds = flush_seconds or ROLLUP_FLUSH_SECONDS
+        self.claim = claim
+
+        self.claim_match = session.prepare(CLAIM_QUERY if claim else MARK_QUERY)
+        self.update_champion = session.prepare(CHAMPION_UPDATE_QUERY)
+        self.update_player = session.prepare(PLAYER_UPDATE_QUERY)
+        self._participant = itemgetter(*PARTICIPANT_FIELDS)
+
+        self.matches_applied = 0
+        self.duplicates = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Buffered matches: IDs, patches, and the range of participant rows each one owns
+        self._match_ids, self._patches, self._row_ends = [], [], array("q")
+        self._buffered = set()
+        self._columns = _empty_columns()
+        self._buffered_since = time.monotonic()
+
+    def _extract(self, participant):
+        try:
+            return self._participant(participant)
+        except KeyError:
+            return tuple(participant.get(field, default) for field, default in zip(PARTICIPANT_FIELDS, _DEFAULTS))
+
+    def add(self, match_id, payload):
+        """
+        Buffers one match, flushing first if the buffer is due.
+
+        Args:
+            match_id (str): The match identifier, e.g. 'NA1_5168231556'.
+            payload (bytes, str or dict): The raw response body, or an already decoded payload.
+        """
+        if not isinstance(payload, dict):
+            payload = decode_projected(payload, ROLLUP_PROJECTION)
+        info = payload["info"]
+        rows = [self._extract(participant) for participant in info.get("participants", ())]
+        patch = patch_of(info.get("gameVersion", ""))
+
+        with self._lock:
+            if match_id in self._buffered:
+                return
+            self._buffered.add(match_id)
+            columns = self._columns
+            columns["puuid"].extend(row[0] for row in rows)
+            columns["champion"].extend(row[1] for row in rows)
+            columns["position"].extend(row[2] for row in rows)
+            columns["win"].extend(row[3] for row in rows)
+            columns["kills"].extend(row[4] for row in rows)
+            columns["deaths"].extend(row[5] for row in rows)
+            columns["assists"].extend(row[6] for row in rows)
+            columns["damage_to_champions"].extend(row[7] + row[8] + row[9] for row in rows)
+            columns["damage_dealt"].extend(row[10] for row in rows)
+            columns["damage_taken"].extend(row[11] for row in rows)
+            self._match_ids.append(match_id)
+            self._patches.append(patch)
+            self._row_ends.append(len(columns["puuid"]))
+            due = (
+                len(self._match_ids) >= self.flush_matches
+                or time.monotonic() - self._buffered_since >= self.flush_seconds
+            )
+        if due:
+            self.flush()
+
+    def _claim(self, match_ids):
+        """Claims `match_ids` in rollup_matches; returns one flag per match, True if this writer may count it."""
+        results = execute_concurrent_with_args(
+            self.session, self.claim_match, [(match_id,) for match_id in match_ids], raise_on_first_error=False
+        )
+        claimed = []
+        for match_id, (success, result) in zip(match_ids, results):
+            if not success:
+                logger.error("Error claiming match %s for rollups: %s", match_id, result)
+                claimed.append(False)
+                continue
+            row = result.one() if self.claim else None
+            claimed.append(row.applied if row is not None else True)
+        return claimed
+
+    @staticmethod
+    def _merge(match_ids, patches, row_ends, columns, claimed):
+        """Merges the rows of claimed matches into champion and player deltas."""
+        match_rows = [row_ends[index] - (row_ends[index - 1] if index else 0) for index in range(len(match_ids))]
+        patch_column = [patch for patch, rows in zip(patches, match_rows) for _ in range(rows)]
+        if all(claimed):
+            keep = None
+        else:
+            keep = [flag for flag, rows in zip(claimed, match_rows) for _ in range(rows)]
+            patch_column = list(compress(patch_column, keep))
+            columns = {name: list(compress(values, keep)) for name, values in columns.items()}
+
+        # Games and wins per champion key are counted with C-level Counter updates over zipped columns
+        keys = list(zip(patch_column, columns["champion"], columns["position"]))
+        champion_games = Counter(keys)
+        champion_wins = Counter(compress(keys, columns["win"]))
+
+        players = {}
+        for puuid, *values in zip(
+            columns["puuid"], columns["win"], columns["kills"], columns["deaths"], columns["assists"],
+            columns["damage_to_champions"], columns["damage_dealt"], columns["damage_taken"],
+        ):
+            totals = players.get(puuid)
+            if totals is None:
+                players[puuid] = [1, *values]
+            else:
+                totals[0] += 1
+                for position, value in enumerate(values, 1):
+                    totals[position] += value
+        return champion_games, champion_wins, players
+
+    def flush(self):
+        """
+        Claims the buffered matches and writes the merged deltas of the claimed ones.
+
+        Returns:
+            int: Number of matches counted by this flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                match_ids, patches, row_ends, columns = self._match_ids, self._patches, self._row_ends, self._columns
+                self._reset()
+            if not match_ids:
+                return 0
+
+            claimed = self._claim(match_ids)
+            applied = sum(claimed)
+            ROLLUP_MATCHES.inc("applied", amount=applied)
+            ROLLUP_MATCHES.inc("duplicate", amount=len(claimed) - applied)
+            if not applied:
+                with self._lock:
+                    self.duplicates += len(claimed)
+                return 0
+
+            champion_games, champion_wins, players = self._merge(match_ids, patches, row_ends, columns, claimed)
+            champion_parameters = [
+                (games, champion_wins.get(key, 0), *key) for key, games in champion_games.items()
+            ]
+            player_parameters = [(*totals, puuid) for puuid, totals in players.items()]
+            failures = 0
+            for statement, parameters in (
+                (self.update_champion, champion_parameters),
+                (self.update_player, player_parameters),
+            ):
+                results = execute_concurrent_with_args(
+                    self.session, statement, parameters, raise_on_first_error=False
+                )
+                for params, (success, result) in zip(parameters, results):
+                    if not success:
+                        failures += 1
+                        logger.error("Error updating rollup %s: %s", params[-1], result)
+
+            with self._lock:
+                self.matches_applied += applied
+                self.duplicates += len(claimed) - applied
+                self.failures += failures
+            logger.info(
+                "Flushed %d matches (%d duplicates) into %d champion and %d player rollups",
+                applied, len(claimed) - applied, len(champion_parameters), len(player_parameters),
+            )
+            return applied
+
+    def stats(self):
+        """
+        Returns rollup counters.
+
+        Returns:
+            dict: Matches applied, duplicates skipped and failed counter updates.
+        """
+        with self._lock:
+            return {"matches_applied": self.matches_applied, "duplicates": self.duplicates, "failures": self.failures}
+
+    @classmethod
+    def rebuild(cls, session, fetch_size=None, flush_matches=50_000):
+        """
+        Truncates the rollup tables and recomputes them from every stored payload in one scan of match_payloads.
+
+        Args:
+            session (cassandra.cluster.Session): Session connected to the raw_league_data keyspace.
+            fetch_size (int, optional): Rows per page of the scan. Defaults to INGEST_FETCH_SIZE.
+            flush_matches (int, optional): Matches merged per flush; larger flushes write each player's
+                delta fewer times. Defaults to 50000.
+
+        Returns:
+            dict: Rollup statistics (see `stats`).
+        """
+        for query in TRUNCATE_QUERIES:
+            session.execute(query)
+        engine = cls(session, flush_matches=flush_matches, flush_seconds=float("inf"), claim=False)
+        for row in stream_rows(session, PAYLOAD_SCAN_QUERY, fetch_size=fetch_size or INGEST_FETCH_SIZE):
+            try:
+                engine.add(row.match_id, decompress_payload(row.codec, row.payload))
+            except Exception as e:
+                logger.error("Error decoding payload of %s: %s", row.match_id, e)
+        engine.flush()
+        stats = engine.stats()
+        logger.info("Rollup rebuild finished: %s", stats)
+        return stats
+
+
+if __name__ == "__main__":
+    from python.utils.Cassandra import CassandraClient
+
+    parser = argparse.ArgumentParser(description="Champion and player rollups.")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recompute the rollups from match_payloads (stop other writers first)"
+    )
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.error("rollups are maintained by `python -m python.Pipeline.match_ingest --rollups`; use --rebuild")
+    cassandra_client = CassandraClient(keyspace="raw_league_data")
+    cassandra_client.connect()
+    try:
+        RollupEngine.rebuild(cassandra_client.get_session())
+    finally:
+        cassandra_client.close()
@@ -0,0 +1,246 @@
+import argparse
+
+"""The `leaguetracker` command line (also `python -m python`).
+
+    Subcommands:
+        crawl     Crawl match IDs for players (sequential, async, sharded across processes, or recrawling
+                  known players when their activity predicts new matches).
+        backfill  Backfill players' match histories in parallel time windows.
+        ingest    Fetch and store match details for unprocessed matches.
+        stats     Print champion win rates of a patch or a player's totals from the rollups.
+        retry     Drain the retry queue, or list and replay its dead letters.
+        export    Export tables to Parquet or compressed CSV files partitioned by region and day.
+
+    Only argparse is imported up front. Each subcommand imports its modules, and with them the Cassandra driver,
+    when it runs, and every command shares the one process-wide session from `get_shared_session`. `--help`
+    therefore starts without loading the driver or touching the network.
+
+Functions:
+    build_parser(): The argument parser with every subcommand.
+    main(argv): Runs the command line.
+"""
+
+
+def _crawl(args):
+    if args.details and (args.recrawl or not (args.use_async or args.processes)):
+        raise SystemExit("leaguetracker crawl: --details needs --async or --processes")
+    if args.recrawl:
+        from python.Crawler.recrawl_scheduler import RecrawlScheduler
+        from python.utils.Cassandra import get_shared_session
+        from python.utils.metrics import start_exporter
+
+        start_exporter()
+        scheduler = RecrawlScheduler(get_shared_session(), args.region)
+        if args.puuid:
+            scheduler.frontier.push(args.puuid)
+        scheduler.run(max_steps=args.steps)
+        print(scheduler.stats())
+        return
+    if args.processes:
+        from python.Crawler.sharded_crawler import run_workers
+
+        run_workers(args.region, args.processes, args.steps, args.puuid or (), args.details)
+        return
+    from python.Crawler.puuid_crawler import crawl
+    from python.utils.metrics import start_exporter
+
+    start_exporter()
+    crawl(args.region, args.puuid, args.use_async, args.details, args.warm_index)
+
+
+def _backfill(args):
+    from python.config import SEEN_INDEX_PATH
+    from python.Crawler.backfill import run_backfill
+    from python.Crawler.puuid_index import PuuidIndex
+    from python.Crawler.seen_index import SeenIndex
+    from python.utils.Cassandra import get_shared_session
+    from python.utils.metrics import start_exporter
+
+    start_exporter()
+    session = get_shared_session()
+    seen_index = SeenIndex.load(SEEN_INDEX_PATH) if SEEN_INDEX_PATH else SeenIndex()
+    try:
+        puuids = list(args.puuid)
+        if args.latest:
+            puuids.extend(entry.puuid for entry in PuuidIndex(session).page(args.region, page_size=args.latest))
+        run_backfill(
+            session,
+            [(args.region, puuid) for puuid in dict.fromkeys(puuids)],
+            parallel_windows=args.parallel_windows,
+            seen_index=seen_index,
+        )
+    finally:
+        if SEEN_INDEX_PATH:
+            seen_index.save(SEEN_INDEX_PATH)
+
+
+def _ingest(args):
+    from python.Pipeline.match_ingest import MatchIngestor
+    from python.utils.Cassandra import get_shared_session
+    from python.utils.metrics import start_exporter
+
+    start_exporter()
+    session = get_shared_session()
+    rollups = None
+    if args.rollups:
+        from python.Pipeline.rollups import RollupEngine
+
+        rollups = RollupEngine(session)
+    print(MatchIngestor(session, rollups=rollups).run(limit=args.limit))
+
+
+def _stats(args):
+    from python.Pipeline.rollups import champion_win_rates, player_totals
+    from python.utils.Cassandra import get_shared_session
+
+    session = get_shared_session()
+    if args.puuid:
+        totals = player_totals(session, args.puuid)
+        if totals is None:
+            print(f"No rollups for {args.puuid}")
+            return 1
+        for field, value in totals.items():
+            print(f"{field:>20}  {value:.2f}" if isinstance(value, float) else f"{field:>20}  {value}")
+        return 0
+
+    rows = champion_win_rates(session, args.patch, args.position)[: args.limit]
+    if not rows:
+        print(f"No rollups for patch {args.patch}")
+        return 1
+    print(f"{'champion':>8}  {'position':<8}  {'games':>8}  {'win rate':>8}")
+    for row in rows:
+        print(
+            f"{row['champion_id']:>8}  {row['team_position'] or '-':<8}  {row['games']:>8}  {row['win_rate']:>8.1%}"
+        )
+    return 0
+
+
+def _retry(args):
+    import json
+    from python.config import RETRY_QUEUE_PATH
+    from python.utils.retry_queue import RetryQueue
+
+    path = args.path or RETRY_QUEUE_PATH
+    if not path:
+        print("RETRY_QUEUE_PATH is not set; pass --path")
+        return 1
+    queue = RetryQueue(path)
+    try:
+        if args.list:
+            for item in queue.dead_letters(args.kind, args.limit):
+                print(f"{item.id}\t{item.kind}\t{item.attempts}\t{json.dumps(item.payload)}\t{item.last_error}")
+        if args.replay:
+            print(f"Replayed {queue.replay(args.kind)} dead letters")
+        if args.drain:
+            from python.Crawler.match_sync import MatchSync
+            from python.Pipeline.match_ingest import MatchIngestor
+            from python.utils.Cassandra import get_shared_session
+
+            # Constructing the components registers their handlers on the queue
+            session = get_shared_session()
+            MatchSync(session, retry_queue=queue)
+            MatchIngestor(session, retry_queue=queue)
+            while any(queue.drain().values()):
+                pass
+        print(queue.stats())
+    finally:
+        queue.close()
+    return 0
+
+
+def _export(args):
+    from python.Pipeline.export import SOURCES, Exporter
+    from python.utils.Cassandra import get_shared_session
+    from python.utils.metrics import start_exporter
+
+    start_exporter()
+    exporter = Exporter(get_shared_session(), args.directory, fmt=args.format, parallel=args.parallel)
+    for table in args.table or sorted(SOURCES):
+        print(table, exporter.export(table, incremental=args.incremental))
+
+
+def build_parser():
+    """
+    Builds the argument parser with every subcommand.
+
+    Returns:
+        argparse.ArgumentParser: The parser; each subcommand sets `handler` to the function that runs it.
+    """
+    parser = argparse.ArgumentParser(prog="leaguetracker", description="League of Legends match data tracker.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    crawl = commands.add_parser("crawl", help="Crawl match IDs for players")
+    crawl.add_argument("--region", default="americas")
+    crawl.add_argument("--puuid", action="append", help="PUUID to crawl (repeatable)")
+    crawl.add_argument("--async", dest="use_async", action="store_true", help="Use the concurrent async crawl engine")
+    crawl.add_argument(
+        "--details", action="store_true", help="Also fetch and store match details (with --async or --processes)"
+    )
+    crawl.add_argument("--warm-index", action="store_true", help="Warm the seen index from Cassandra before crawling")
+    crawl.add_argument(
+        "--processes", type=int, help="Run a sharded snowball crawl with this many worker processes on this host"
+    )
+    crawl.add_argument(
+        "--recrawl", action="store_true", help="Recrawl the region's frontier on an activity-aware schedule"
+    )
+    crawl.add_argument("--steps", type=int, help="Stop a sharded or recrawl worker after this many batches")
+    crawl.set_defaults(handler=_crawl)
+
+    backfill = commands.add_parser("backfill", help="Backfill match histories in parallel time windows")
+    backfill.add_argument("--region", default="americas")
+    backfill.add_argument("--puuid", action="append", default=[], help="PUUID to backfill")
+    backfill.add_argument("--latest", type=int, help="Also backfill the region's N most recently added PUUIDs")
+    backfill.add_argument("--parallel-windows", type=int, help="Windows in flight per player")
+    backfill.set_defaults(handler=_backfill)
+
+    ingest = commands.add_parser("ingest", help="Ingest match details for unprocessed matches")
+    ingest.add_argument("--limit", type=int, help="Stop after this many matches")
+    ingest.add_argument("--rollups", action="store_true", help="Count stored matches into the rollup tables")
+    ingest.set_defaults(handler=_ingest)
+
+    stats = commands.add_parser("stats", help="Print champion win rates or a player's totals")
+    target = stats.add_mutually_exclusive_group(required=True)
+    target.add_argument("--patch", help="Patch to list champion win rates for, e.g. 14.23")
+    target.add_argument("--puuid", help="Player to print totals for")
+    stats.add_argument("--position", help="Only this teamPosition, e.g. TOP")
+    stats.add_argument("--limit", type=int, default=20, help="Champion rows to print")
+    stats.set_defaults(handler=_stats)
+
+    retry = commands.add_parser("retry", help="Drain the retry queue, or list and replay dead letters")
+    retry.add_argument("--path", help="Queue file (defaults to RETRY_QUEUE_PATH)")
+    retry.add_argument("--kind", help="Only dead letters of this operation kind, e.g. match_detail")
+    retry.add_argument("--list", action="store_true", help="Print the dead letters")
+    retry.add_argument("--limit", type=int, help="Dead letters to print")
+    retry.add_argument("--replay", action="store_true", help="Move the dead letters back into the queue")
+    retry.add_argument("--drain", action="store_true", help="Retry every due operation now")
+    retry.set_defaults(handler=_retry)
+
+    export = commands.add_parser("export", help="Export tables to partitioned Parquet or compressed CSV files")
+    export.add_argument("--directory", required=True, help="Root directory of the export")
+    export.add_argument(
+        "--table", action="append", choices=["match_payloads", "puuid_matches", "puuids"],
+        help="Table to export (repeatable; defaults to all)",
+    )
+    export.add_argument("--incremental", action="store_true", help="Only rows added since the last export")
+    export.add_argument("--format", choices=["parquet", "csv"], help="Output format (defaults to EXPORT_FORMAT)")
+    export.add_argument("--parallel", type=int, help="Token ranges scanned at once")
+    export.set_defaults(handler=_export)
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the command line.
+
+    Args:
+        argv (list, optional): Arguments without the program name. Defaults to `sys.argv[1:]`.
+
+    Returns:
+        int: The process exit status.
+    """
+    args = build_parser().parse_args(argv)
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import os
+import time
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.stub_server import StubRiotServer
+
+"""Benchmark: offset-paged history crawl vs the time-sliced parallel backfill against a local stub Riot API.
+
+    Usage:
+        python -m python.benchmarks.bench_backfill --players 5 --matches 1000 --latency 0.05
+
+    Both paths collect the full match ID history of the same players. The offset crawl (`AsyncCrawler`) already
+    runs players concurrently but pages each history one request at a time; the backfill keeps several time windows
+    per player in flight. The application rate limit is raised so the comparison measures request latency rather
+    than quota.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offset paging vs time-sliced backfill benchmark.")
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--matches", type=int, default=1000, help="Match history length per player")
+    parser.add_argument("--interval", type=int, default=3 * 3600, help="Seconds between a player's matches")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub HTTP latency in seconds")
+    parser.add_argument("--parallel-windows", type=int, default=8, help="Backfill windows in flight per player")
+    args = parser.parse_args()
+
+    now = int(time.time())
+    with StubRiotServer(
+        latency=args.latency, matches_per_puuid=args.matches, match_interval=args.interval, now=now
+    ) as server:
+        os.environ["RIOT_API_HOST"] = server.host_template
+        os.environ.setdefault("RIOT_API_KEY", "RGAPI-benchmark")
+        os.environ.setdefault("RIOT_APP_RATE_LIMIT", "100000:1")
+
+        from python.Crawler.async_crawler import run_async_crawl
+        from python.Crawler.backfill import Backfiller
+
+        targets = [("americas", f"bench-puuid-{i}") for i in range(args.players)]
+
+        served_before = server.requests_served
+        started = time.perf_counter()
+        offset_results = run_async_crawl(FakeSession(), targets)
+        offset_elapsed = time.perf_counter() - started
+        offset_requests = server.requests_served - served_before
+
+        backfiller = Backfiller(FakeSession(), parallel_windows=args.parallel_windows)
+        served_before = server.requests_served
+        started = time.perf_counter()
+        backfill_results = asyncio.run(backfiller.backfill(targets, now=now))
+        backfill_elapsed = time.perf_counter() - started
+        backfill_requests = server.requests_served - served_before
+
+    assert all(len(ids) == args.matches for ids in offset_results.values())
+    assert all(count == args.matches for count in backfill_results.values())
+    print(f"players={args.players} matches/player={args.matches} http_latency={args.latency}s")
+    print(f"offset:   {offset_requests} requests in {offset_elapsed:.2f}s")
+    print(
+        f"backfill: {backfill_requests} requests in {backfill_elapsed:.2f}s "
+        f"({backfiller.windows_fetched} windows)"
+    )
+    print(f"speedup: {offset_elapsed / backfill_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.stub_server import StubRiotServer
+
+"""Benchmark: serial crawl path vs the async crawl engine against a local stub Riot API.
+
+    Usage:
+        python -m python.benchmarks.bench_crawl --players 20 --latency 0.05
+
+    Both paths crawl the same players' match ID histories and write every ID to a fake Cassandra session,
+    and the benchmark reports requests/second for each.
+"""
+
+
+def serial_crawl(session, targets, count=100):
+    """Mirrors `fetch_all_match_ids`: one blocking page request and one write per match ID at a time."""
+    from python.utils.api_utils import get_url, call_endpoint
+
+    requests_made = 0
+    for region, puuid in targets:
+        url = get_url("Account_Matches", region=region, puuid=puuid)
+        start = 0
+        while True:
+            matches = call_endpoint(url, {"start": start, "count": count})
+            requests_made += 1
+            if not matches:
+                break
+            for match_id in matches:
+                session.execute(
+                    "INSERT INTO puuid_matches (dateadded, match_id, puuid, processed) "
+                    "VALUES (toTimestamp(now()), %s, %s, false) IF NOT EXISTS",
+                    (match_id, puuid),
+                )
+            start += count
+    return requests_made
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs async crawl benchmark.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--matches", type=int, default=250, help="Match history length per player")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub HTTP latency in seconds")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Fake Cassandra latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=20, help="In-flight requests per region")
+    args = parser.parse_args()
+
+    with StubRiotServer(latency=args.latency, matches_per_puuid=args.matches) as server:
+        os.environ["RIOT_API_HOST"] = server.host_template
+        os.environ.setdefault("RIOT_API_KEY", "RGAPI-benchmark")
+
+        from python.Crawler.async_crawler import run_async_crawl
+
+        regions = ("americas", "europe", "asia")
+        targets = [(regions[i % 3], f"bench-puuid-{i}") for i in range(args.players)]
+
+        session = FakeSession(latency=args.db_latency)
+        started = time.perf_counter()
+        serial_requests = serial_crawl(session, targets)
+        serial_elapsed = time.perf_counter() - started
+
+        session = FakeSession(latency=args.db_latency)
+        crawler_kwargs = {"concurrency_per_region": args.concurrency}
+        served_before = server.requests_served
+        started = time.perf_counter()
+        run_async_crawl(session, targets, **crawler_kwargs)
+        async_elapsed = time.perf_counter() - started
+        async_requests = server.requests_served - served_before
+
+    print(f"players={args.players} matches/player={args.matches} http_latency={args.latency}s")
+    print(f"serial: {serial_requests} requests in {serial_elapsed:.2f}s -> {serial_requests / serial_elapsed:.1f} req/s")
+    print(f"async:  {async_requests} requests in {async_elapsed:.2f}s -> {async_requests / async_elapsed:.1f} req/s")
+    print(f"speedup: {serial_elapsed / async_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import json
+import time
+import tracemalloc
+
+from python.benchmarks.payloads import synthetic_matches
+from python.Pipeline.lazy_decode import MATCH_PROJECTION, METADATA_PROJECTION, decode_projected
+
+"""Micro-benchmark: full `json.loads` of match payloads vs projected decoding.
+
+    Usage:
+        python -m python.benchmarks.bench_decode --matches 500
+
+    Reports decode time per match and the memory allocated by keeping one decoded batch alive.
+"""
+
+
+def _measure(decode, payloads, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for payload in payloads:
+            decode(payload)
+    elapsed = (time.perf_counter() - started) / (repeat * len(payloads))
+
+    tracemalloc.start()
+    decoded = [decode(payload) for payload in payloads]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decoded
+    return elapsed, retained / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Projected match decoding benchmark.")
+    parser.add_argument("--matches", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = [json.dumps(match).encode() for match in synthetic_matches(args.matches)]
+    print(f"{args.matches} payloads, {sum(map(len, payloads)) / args.matches / 1024:.1f} KiB/match")
+
+    cases = [
+        ("json.loads (full)", json.loads),
+        ("projected (schema fields)", lambda payload: decode_projected(payload, MATCH_PROJECTION)),
+        ("projected (metadata only)", lambda payload: decode_projected(payload, METADATA_PROJECTION)),
+    ]
+    baseline = None
+    for name, decode in cases:
+        elapsed, retained = _measure(decode, payloads, args.repeat)
+        baseline = baseline or (elapsed, retained)
+        print(f"{name:28s} {elapsed * 1e6:8.0f} us/match ({baseline[0] / elapsed:.1f}x), "
+              f"{retained / 1024:6.1f} KiB retained/match ({baseline[1] / retained:.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import itertools
+import time
+
+from python.benchmarks.payloads import synthetic_matches
+from python.Pipeline.flatten import (
+    ITEM_FIELDS,
+    MATCH_COLUMNS,
+    PERFORMANCE_COLUMNS,
+    PLAYER_COLUMNS,
+    MatchFlattener,
+    TEAM_POSITIONS,
+)
+
+"""Benchmark: columnar MatchFlattener vs a naive per-row, per-field flattener.
+
+    Usage:
+        python -m python.benchmarks.bench_flatten --matches 10000
+"""
+
+
+def naive_flatten(matches):
+    """Row-oriented reference: one dict per row, every field looked up from the top of the document."""
+    tables = {name: [] for name in ("Matches", "Teams", "TeamObjectives", "TeamBans", "Players",
+                                    "Performance", "PlayerItems")}
+    for match in matches:
+        row = {}
+        for column in MATCH_COLUMNS:
+            row[column.name] = match["info"].get(column.field)
+        tables["Matches"].append(row)
+        for t in range(len(match["info"]["teams"])):
+            team_id = match["info"]["teams"][t]["teamId"]
+            tables["Teams"].append({
+                "MatchID": match["info"]["gameId"],
+                "TeamID": team_id,
+                "Win": match["info"]["teams"][t]["win"],
+                "FirstBlood": match["info"]["teams"][t]["objectives"]["champion"]["first"],
+                "FirstTower": match["info"]["teams"][t]["objectives"]["tower"]["first"],
+                "TeamPosition": TEAM_POSITIONS.get(team_id, ""),
+            })
+            for objective_type in match["info"]["teams"][t]["objectives"]:
+                tables["TeamObjectives"].append({
+                    "MatchID": match["info"]["gameId"],
+                    "TeamID": team_id,
+                    "ObjectiveType": objective_type,
+                    "Kills": match["info"]["teams"][t]["objectives"][objective_type]["kills"],
+                    "First": match["info"]["teams"][t]["objectives"][objective_type]["first"],
+                })
+            for b in range(len(match["info"]["teams"][t]["bans"])):
+                tables["TeamBans"].append({
+                    "MatchID": match["info"]["gameId"],
+                    "TeamID": team_id,
+                    "ChampionID": match["info"]["teams"][t]["bans"][b]["championId"],
+                    "PickTurn": match["info"]["teams"][t]["bans"][b]["pickTurn"],
+                })
+        for p in range(len(match["info"]["participants"])):
+            for table, columns in (("Players", PLAYER_COLUMNS), ("Performance", PERFORMANCE_COLUMNS)):
+                row = {"MatchID": match["info"]["gameId"], "PUUID": match["info"]["participants"][p]["puuid"]}
+                for column in columns:
+                    row[column.name] = match["info"]["participants"][p].get(column.field)
+                tables[table].append(row)
+            for slot, field in enumerate(ITEM_FIELDS):
+                if match["info"]["participants"][p][field]:
+                    tables["PlayerItems"].append({
+                        "MatchID": match["info"]["gameId"],
+                        "PUUID": match["info"]["participants"][p]["puuid"],
+                        "Slot": slot,
+                        "ItemID": match["info"]["participants"][p][field],
+                    })
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match flattening benchmark.")
+    parser.add_argument("--matches", type=int, default=10000)
+    parser.add_argument("--unique", type=int, default=200, help="Distinct synthetic payloads to cycle through")
+    args = parser.parse_args()
+
+    unique = list(synthetic_matches(min(args.unique, args.matches)))
+    matches = list(itertools.islice(itertools.cycle(unique), args.matches))
+
+    started = time.perf_counter()
+    naive = naive_flatten(matches)
+    naive_elapsed = time.perf_counter() - started
+
+    flattener = MatchFlattener()
+    started = time.perf_counter()
+    columnar = flattener.flatten(matches)
+    columnar_elapsed = time.perf_counter() - started
+
+    for table, rows in naive.items():
+        assert len(rows) == len(next(iter(columnar[table].values()))), table
+
+    total_rows = sum(len(rows) for rows in naive.values())
+    print(f"{args.matches} matches -> {total_rows} rows across {len(naive)} tables")
+    print(f"naive per-row:   {naive_elapsed:.2f}s ({args.matches / naive_elapsed:.0f} matches/s)")
+    print(f"MatchFlattener:  {columnar_elapsed:.2f}s ({args.matches / columnar_elapsed:.0f} matches/s)")
+    print(f"speedup: {naive_elapsed / columnar_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
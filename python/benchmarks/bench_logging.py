@@ -0,0 +1,56 @@
+import argparse
+import tempfile
+import time
+
+import python.utils.logger as logger_module
+
+"""Benchmark: caller-side cost of per-item log lines with inline vs queued logging.
+
+    Usage:
+        python -m python.benchmarks.bench_logging --messages 100000
+
+    Each mode logs the same per-match INFO line from the calling thread and reports the time spent in the
+    logging calls, which is what a crawl profile sees. Queued modes then wait for the background writer so the
+    files are complete, and that drain time is reported separately.
+"""
+
+MODES = (
+    ("inline, f-string", False, "", True),
+    ("inline, lazy %", False, "", False),
+    ("queued, lazy %", True, "", False),
+    ("queued, lazy %, sampled", True, "100:1", False),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline vs queued logging benchmark.")
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger_module.LOG_DIR = log_dir
+        logger_module.LOG_MAX_BYTES = 64 * 1024 * 1024
+        print(f"{'mode':<26s} {'per call':>10s} {'drain':>8s}")
+        for position, (name, queued, rate_limit, eager) in enumerate(MODES):
+            logger_module.LOG_QUEUED = queued
+            logger_module.LOG_RATE_LIMIT = rate_limit
+            logger = logger_module.get_logger(f"bench_{position}.log", namespace=f"bench_logging_{position}")
+            puuid = "bench-puuid"
+
+            started = time.perf_counter()
+            if eager:
+                for index in range(args.messages):
+                    logger.info(f"Wrote match NA1_{index} for PUUID {puuid}")
+            else:
+                for index in range(args.messages):
+                    logger.info("Wrote match NA1_%d for PUUID %s", index, puuid)
+            elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            logger_module.flush_logging()
+            drain = time.perf_counter() - started
+            print(f"{name:<26s} {elapsed / args.messages * 1e6:>8.2f}us {drain:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import os
+import timeit
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.stub_server import StubRiotServer
+
+"""Benchmark: cost of recording metrics, and the metrics an async crawl produces against the stub Riot API.
+
+    Usage:
+        python -m python.benchmarks.bench_metrics --players 20 --latency 0.05
+
+    Crawls the stub server and prints the API, rate-limit and match-write series from the exposition text, i.e.
+    what a scrape would show, then the per-call cost of `Histogram.observe` and `Counter.inc`.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub HTTP latency in seconds")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with StubRiotServer(latency=args.latency) as server:
+        # python.config reads RIOT_API_HOST at import, so nothing from the package is imported before this
+        os.environ["RIOT_API_HOST"] = server.host_template
+        os.environ.setdefault("RIOT_API_KEY", "RGAPI-benchmark")
+
+        from python.Crawler.async_crawler import run_async_crawl
+        from python.utils.metrics import REGISTRY, Counter, Histogram
+
+        run_async_crawl(FakeSession(), [("americas", f"bench-puuid-{i}") for i in range(args.players)])
+
+    histogram = Histogram("bench_seconds", "Benchmark histogram.", ("endpoint",))
+    counter = Counter("bench_total", "Benchmark counter.", ("endpoint", "status"))
+    observe = timeit.timeit(lambda: histogram.observe(0.03, "Match"), number=args.calls) / args.calls
+    inc = timeit.timeit(lambda: counter.inc("Match", 200), number=args.calls) / args.calls
+    print(f"Histogram.observe: {observe * 1e6:.2f}us/call, Counter.inc: {inc * 1e6:.2f}us/call")
+
+    for line in REGISTRY.render().splitlines():
+        if not line.startswith("#") and "_bucket" not in line:
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+from python.benchmarks.fakes import MemorySession
+from python.benchmarks.stub_server import StubRiotServer
+
+"""Benchmark: the crawl -> ingest -> flatten pipeline end to end, offline.
+
+    Usage:
+        python -m python.benchmarks.bench_pipeline --players 20 --latency 0.02 --server-limit 500:1
+
+    Crawls match IDs for synthetic players from the stub Riot API into an in-memory stand-in for the
+    puuid_matches and match_payloads tables, ingests every crawled match from it, then decodes and flattens the
+    stored payloads. For each stage it reports throughput, p50/p99 latency per unit of work (HTTP request for
+    crawl and ingest, batch for flatten) and peak traced memory. With --server-limit the stub answers like
+    Riot's application limit and the 429s it sent are reported, which exercises the limiter's header handling.
+
+    Nothing needs network access, Cassandra or a Riot API key, so the numbers are comparable across commits on a
+    laptop. Peak memory comes from tracemalloc, which slows every stage; pass --no-trace-memory for throughput
+    numbers alone.
+"""
+
+
+def _report(stage, units, unit_name, elapsed, latency, peak):
+    p50, p99 = latency.get("p50", 0.0), latency.get("p99", 0.0)
+    memory = f"{peak / 2**20:8.1f} MiB" if peak is not None else "       n/a"
+    print(
+        f"{stage:<8s} {units:>7d} {unit_name:<9s} {units / elapsed if elapsed else 0:>9.1f}/s "
+        f"{p50 * 1000:>8.2f}ms {p99 * 1000:>8.2f}ms {memory}"
+    )
+
+
+def _measure(trace_memory, function, *args):
+    """Runs `function`, returning (result, elapsed seconds, peak traced bytes or None)."""
+    if trace_memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline crawl, ingest and flatten benchmark.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--matches-per-player", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub HTTP latency in seconds")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="In-memory session latency in seconds")
+    parser.add_argument("--server-limit", default="", help='Stub application limit as "count:seconds"')
+    parser.add_argument("--batch-size", type=int, default=100, help="Matches per flatten batch")
+    parser.add_argument("--no-trace-memory", dest="trace_memory", action="store_false")
+    args = parser.parse_args()
+
+    server_limit = None
+    if args.server_limit:
+        count, seconds = args.server_limit.split(":")
+        server_limit = (int(count), int(seconds))
+
+    with StubRiotServer(
+        latency=args.latency, matches_per_puuid=args.matches_per_player, rate_limit=server_limit
+    ) as server:
+        # python.config reads these at import, so nothing from the package is imported before this. The client
+        # limit starts high so the stub's limit, learnt from its headers, is the one that applies.
+        os.environ["RIOT_API_HOST"] = server.host_template
+        os.environ.setdefault("RIOT_API_KEY", "RGAPI-benchmark")
+        os.environ.setdefault("RIOT_APP_RATE_LIMIT", "100000:1")
+
+        from python.Crawler.async_crawler import run_async_crawl
+        from python.Pipeline.flatten import MatchFlattener
+        from python.Pipeline.lazy_decode import MATCH_PROJECTION, decode_projected
+        from python.Pipeline.match_ingest import MatchIngestor
+        from python.utils.compression import decompress_payload
+        from python.utils.http_transport import get_transport
+        from python.utils.metrics import LatencyRecorder
+
+        if args.trace_memory:
+            tracemalloc.start()
+        session = MemorySession(latency=args.db_latency)
+        transport = get_transport()
+        targets = [("americas", f"bench-puuid-{i}") for i in range(args.players)]
+
+        print(f"{'stage':<8s} {'units':>17s} {'throughput':>11s} {'p50':>10s} {'p99':>10s} {'peak mem':>12s}")
+
+        transport.latency = LatencyRecorder(max_samples=100_000)
+        _, elapsed, peak = _measure(args.trace_memory, run_async_crawl, session, targets)
+        latency = transport.latency.stats().get("Account_Matches", {})
+        _report("crawl", latency.get("count", 0), "requests", elapsed, latency, peak)
+
+        transport.latency = LatencyRecorder(max_samples=100_000)
+        stats, elapsed, peak = _measure(args.trace_memory, MatchIngestor(session).run)
+        latency = transport.latency.stats().get("Match", {})
+        _report("ingest", stats["matches_stored"], "matches", elapsed, latency, peak)
+
+        def flatten_stored():
+            # Flattening is timed per batch, the unit the loader works in
+            flattener = MatchFlattener()
+            batches = LatencyRecorder(max_samples=100_000)
+            payloads = [(codec, payload) for _, codec, payload, _ in session.match_payloads.values()]
+            rows = 0
+            for offset in range(0, len(payloads), args.batch_size):
+                started = time.perf_counter()
+                flattened = flattener.flatten(
+                    decode_projected(decompress_payload(codec, payload), MATCH_PROJECTION)
+                    for codec, payload in payloads[offset:offset + args.batch_size]
+                )
+                batches.record("batch", time.perf_counter() - started)
+                rows += sum(len(next(iter(columns.values()))) for columns in flattened.values())
+            return batches.stats().get("batch", {}), rows
+
+        (latency, rows), elapsed, peak = _measure(args.trace_memory, flatten_stored)
+        _report("flatten", len(session.match_payloads), "matches", elapsed, latency, peak)
+
+        print(
+            f"{len(session.puuid_matches)} puuid_matches rows, {len(session.match_payloads)} payloads, "
+            f"{rows} flattened rows; stub served {server.requests_served} requests, {server.rate_limited} 429s; "
+            f"{stats['failures']} ingest failures"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import bisect
+import random
+import statistics
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.payloads import random_puuid
+from python.Crawler.puuid_index import (
+    SELECT_BEFORE_QUERY,
+    SELECT_LATEST_QUERY,
+    PuuidIndex,
+    month_bucket,
+)
+
+"""Benchmark: "latest PUUIDs per region" via the puuids_by_region index vs scanning puuids.
+
+    Usage:
+        python -m python.benchmarks.bench_puuid_index --sizes 10000 100000 1000000
+
+    Both access paths run against in-memory tables that model Cassandra's layout: `puuids` is an unordered heap
+    that must be filtered and sorted, while `puuids_by_region` keeps each (region, month) partition in clustering
+    order so a LIMIT read only touches the rows it returns.
+"""
+
+Row = namedtuple("Row", ["puuid", "dateadded"])
+
+REGIONS = ("americas", "europe", "asia", "sea")
+
+
+class ClusteredSession(FakeSession):
+    """
+    FakeSession that answers the puuids_by_region reads from sorted in-memory partitions.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.partitions = defaultdict(list)
+        self.puuids = []
+
+    def load(self, rows):
+        for region, dateadded, puuid in rows:
+            self.puuids.append((puuid, region, dateadded))
+            self.partitions[(region, month_bucket(dateadded))].append((dateadded, puuid))
+        for partition in self.partitions.values():
+            partition.sort()
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        if text == SELECT_LATEST_QUERY:
+            region, month, limit = parameters
+            partition = self.partitions.get((region, month), [])
+            rows = partition[-limit:]
+        elif text == SELECT_BEFORE_QUERY:
+            region, month, dateadded, puuid, limit = parameters
+            partition = self.partitions.get((region, month), [])
+            end = bisect.bisect_left(partition, (dateadded, puuid))
+            rows = partition[max(0, end - limit):end]
+        else:
+            # Legacy path: every row of puuids is read, filtered on region and sorted client-side
+            (region,) = parameters
+            rows = sorted(
+                ((dateadded, puuid) for puuid, row_region, dateadded in self.puuids if row_region == region),
+                reverse=True,
+            )
+            return [Row(puuid, dateadded) for dateadded, puuid in rows]
+        return [Row(puuid, dateadded) for dateadded, puuid in reversed(rows)]
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Region/time PUUID index benchmark.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--latest", type=int, default=20, help="N in 'latest N PUUIDs'")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pool = [random_puuid(rng) for _ in range(5000)]
+    now = datetime(2026, 10, 18)
+    session = ClusteredSession()
+    index = PuuidIndex(session)
+    loaded = 0
+
+    print(f"{'rows':>10s} {'scan + sort':>12s} {'index LIMIT':>12s} {'10 pages':>10s}")
+    for size in sorted(args.sizes):
+        # Rows spread over the last 18 months; PUUIDs are suffixed to stay unique
+        session.load(
+            (
+                rng.choice(REGIONS),
+                now - timedelta(seconds=rng.randrange(18 * 30 * 86400)),
+                f"{rng.choice(pool)}-{position}",
+            )
+            for position in range(loaded, size)
+        )
+        loaded = size
+
+        scan = _timed(lambda: session.execute("SELECT puuid, dateadded FROM puuids", ("americas",))[:1], 1)
+        latest = _timed(lambda: index.page("americas", page_size=args.latest, now=now), args.repeat)
+
+        def ten_pages():
+            after = None
+            for _ in range(10):
+                after = index.page("americas", page_size=args.latest, after=after, now=now)[-1]
+
+        paging = _timed(ten_pages, args.repeat)
+        print(f"{size:>10d} {scan * 1e3:>10.1f}ms {latest * 1e3:>10.3f}ms {paging * 1e3:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import base64
+import os
+import time
+import tracemalloc
+
+from python.utils.puuid_table import IdSet, PuuidTable
+
+"""Benchmark: memory and speed of PuuidTable + IdSet vs a set of PUUID strings.
+
+    Usage:
+        python -m python.benchmarks.bench_puuid_table --puuids 1000000
+
+    Both sides hold the same random canonical PUUIDs as a "known players" set; memory is what tracemalloc sees
+    allocated for the structure (the strings included, since a crawler keeps them alive through the set).
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PUUID interning benchmark.")
+    parser.add_argument("--puuids", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = [os.urandom(58) for _ in range(args.puuids)]
+    puuids = [base64.urlsafe_b64encode(value).decode()[:78] for value in raw]
+
+    def build_set():
+        return {base64.urlsafe_b64encode(value).decode()[:78] for value in raw}
+
+    def build_table():
+        table, known = PuuidTable(capacity=args.puuids), IdSet()
+        for puuid in puuids:
+            known.add(table.intern(puuid))
+        return table, known
+
+    # Timed untraced, then built again under tracemalloc for memory
+    timings, sizes = {}, {}
+    for name, build in (("set", build_set), ("table", build_table)):
+        started = time.perf_counter()
+        build()
+        timings[name] = time.perf_counter() - started
+        tracemalloc.start()
+        built = build()
+        sizes[name] = tracemalloc.get_traced_memory()[0] / len(puuids)
+        tracemalloc.stop()
+        del built
+
+    table, known = build_table()
+    started = time.perf_counter()
+    hits = sum(table.lookup(puuid) in known for puuid in puuids)
+    lookup_elapsed = time.perf_counter() - started
+    assert hits == len(puuids)
+
+    print(f"set of str:         {sizes['set']:6.1f} B/PUUID, built in {timings['set']:.2f}s")
+    print(
+        f"PuuidTable + IdSet: {sizes['table']:6.1f} B/PUUID, built in {timings['table']:.2f}s "
+        f"({timings['table'] / len(puuids) * 1e6:.2f}us per intern), "
+        f"{lookup_elapsed / len(puuids) * 1e6:.2f}us per lookup"
+    )
+
+
+if __name__ == "__main__":
+    main()
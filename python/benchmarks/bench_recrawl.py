@@ -0,0 +1,85 @@
+import argparse
+import bisect
+import random
+
+from python.config import FRONTIER_RECRAWL_SECONDS
+from python.Crawler.recrawl_scheduler import SECONDS_PER_DAY, ActivityModel
+
+"""Benchmark: activity-aware recrawl vs a fixed revisit interval, on a simulated player population.
+
+    Usage:
+        python -m python.benchmarks.bench_recrawl --players 5000 --days 60
+
+    Each player plays a Poisson stream of games: a share of accounts never plays, the others play at a
+    log-normally distributed rate, and some of them quit partway through. Both policies start from a first sync
+    at time 0 (which finds the player's history) and count one API call per check. Staleness is the mean time
+    between a game and the check that finds it.
+"""
+
+
+def population(players, days, inactive, rng):
+    horizon = days * SECONDS_PER_DAY
+    histories = []
+    for _ in range(players):
+        games = []
+        if rng.random() >= inactive:
+            rate = rng.lognormvariate(0, 1) / SECONDS_PER_DAY
+            quits = horizon * rng.random() if rng.random() < 0.3 else horizon
+            now = rng.expovariate(rate)
+            while now < quits:
+                games.append(now)
+                now += rng.expovariate(rate)
+        histories.append(games)
+    return histories
+
+
+def simulate(histories, days, next_interval):
+    horizon = days * SECONDS_PER_DAY
+    calls = productive = found = 0
+    staleness = 0.0
+    for games in histories:
+        state, now, seen = None, 0.0, 0
+        # The first sync walks the history before the simulation starts
+        new = 1 if games else 0
+        while now < horizon:
+            interval, state = next_interval(state, new, now)
+            now += interval
+            if now >= horizon:
+                break
+            upto = bisect.bisect_right(games, now)
+            new = upto - seen
+            calls += 1
+            productive += bool(new)
+            found += new
+            staleness += sum(now - game for game in games[seen:upto])
+            seen = upto
+    return calls, productive, found, staleness / found if found else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recrawl scheduling benchmark.")
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--inactive", type=float, default=0.4, help="Share of accounts that never play")
+    args = parser.parse_args()
+
+    histories = population(args.players, args.days, args.inactive, random.Random(0))
+    model = ActivityModel()
+
+    def fixed(state, new, now):
+        return FRONTIER_RECRAWL_SECONDS, state
+
+    def adaptive(state, new, now):
+        state = model.update(state, new, now)
+        return model.interval(state, now), state
+
+    print(f"{'policy':<10} {'API calls':>10} {'productive':>11} {'games found':>12} {'staleness':>10}")
+    for name, policy in (("fixed 24h", fixed), ("activity", adaptive)):
+        calls, productive, found, staleness = simulate(histories, args.days, policy)
+        print(
+            f"{name:<10} {calls:>10} {productive / calls:>10.1%} {found:>12} {staleness / 3600:>9.1f}h"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import tempfile
+import time
+
+from python.benchmarks.fakes import MemorySession
+from python.benchmarks.stub_server import StubRiotServer
+
+"""Benchmark: re-processing matches with the on-disk response cache.
+
+    Usage:
+        python -m python.benchmarks.bench_response_cache --players 20 --latency 0.05
+
+    Crawls match IDs from the stub Riot API and ingests every match twice into an in-memory session, as a re-run
+    after a crash would, with RESPONSE_CACHE_PATH pointing at a temporary file. Reports the requests the stub
+    served, elapsed time and cache hit ratios for each pass; the second pass should not reach the stub.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response cache benchmark.")
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--matches-per-player", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub HTTP latency in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, StubRiotServer(
+        latency=args.latency, matches_per_puuid=args.matches_per_player
+    ) as server:
+        # python.config reads these at import, so nothing from the package is imported before this
+        os.environ["RIOT_API_HOST"] = server.host_template
+        os.environ.setdefault("RIOT_API_KEY", "RGAPI-benchmark")
+        os.environ.setdefault("RIOT_APP_RATE_LIMIT", "100000:1")
+        os.environ["RESPONSE_CACHE_PATH"] = os.path.join(directory, "responses.sqlite")
+
+        from python.Crawler.async_crawler import run_async_crawl
+        from python.Pipeline.match_ingest import MatchIngestor
+        from python.utils.response_cache import get_response_cache
+
+        session = MemorySession()
+        run_async_crawl(session, [("americas", f"bench-puuid-{i}") for i in range(args.players)])
+
+        for attempt in ("first pass", "re-run"):
+            for key in session.puuid_matches:
+                session.puuid_matches[key] = None
+            served = server.requests_served
+            started = time.perf_counter()
+            stats = MatchIngestor(session).run()
+            elapsed = time.perf_counter() - started
+            cache = get_response_cache().stats()
+            ratio = cache["endpoints"].get("Match", {}).get("hit_ratio", 0.0)
+            print(
+                f"{attempt:<10s}: {stats['matches_stored']} matches in {elapsed:.2f}s, "
+                f"{server.requests_served - served} API requests, cumulative Match hit ratio {ratio:.2f}, "
+                f"cache {cache['entries']} entries / {cache['stored_bytes'] / 1e6:.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
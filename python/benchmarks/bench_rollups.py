@@ -0,0 +1,66 @@
+import argparse
+import json
+import random
+import time
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.payloads import random_puuid, synthetic_matches
+from python.Pipeline.rollups import RollupEngine
+
+"""Benchmark: rollup maintenance with in-memory delta merging vs one counter update per participant.
+
+    Usage:
+        python -m python.benchmarks.bench_rollups --matches 5000 --players 20000 --latency 0.0005
+
+    Both sides count the same raw payloads into a FakeSession with a simulated round trip per statement. The
+    per-row side decodes each payload fully and issues one champion and one player update per participant.
+"""
+
+
+def per_row(session, payloads):
+    for match_id, payload in payloads:
+        info = json.loads(payload)["info"]
+        for p in info["participants"]:
+            session.execute("UPDATE champion_rollups", (1, int(p["win"]), info["gameVersion"], p["championId"]))
+            session.execute("UPDATE player_rollups", (1, int(p["win"]), p["kills"], p["puuid"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rollup maintenance benchmark.")
+    parser.add_argument("--matches", type=int, default=5_000)
+    parser.add_argument("--players", type=int, default=20_000, help="Distinct PUUIDs participants are drawn from")
+    parser.add_argument("--flush-matches", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0005, help="Simulated seconds per statement")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pool = [random_puuid(rng) for _ in range(args.players)]
+    payloads = [
+        (match["metadata"]["matchId"], json.dumps(match).encode())
+        for match in synthetic_matches(args.matches, puuid_pool=pool)
+    ]
+
+    session = FakeSession(latency=args.latency)
+    engine = RollupEngine(session, flush_matches=args.flush_matches, flush_seconds=float("inf"))
+    started = time.perf_counter()
+    for match_id, payload in payloads:
+        engine.add(match_id, payload)
+    engine.flush()
+    merged_elapsed = time.perf_counter() - started
+    merged_statements = session.total_statements
+
+    # The per-row side pays the same latency serially, so it runs on a sample and is extrapolated
+    sample = payloads[: max(1, args.matches // 20)]
+    session = FakeSession(latency=args.latency)
+    started = time.perf_counter()
+    per_row(session, sample)
+    per_row_elapsed = (time.perf_counter() - started) * len(payloads) / len(sample)
+    per_row_statements = session.total_statements * len(payloads) // len(sample)
+
+    print(f"merged deltas: {merged_statements:8d} statements, {args.matches / merged_elapsed:8.0f} matches/s")
+    print(f"per row:       {per_row_statements:8d} statements, {args.matches / per_row_elapsed:8.0f} matches/s "
+          f"(extrapolated from {len(sample)} matches)")
+
+
+if __name__ == "__main__":
+    main()
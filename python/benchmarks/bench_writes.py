@@ -0,0 +1,59 @@
+import argparse
+import time
+
+from python.benchmarks.fakes import FakeSession
+from python.Crawler.match_writer import MatchWriter
+
+"""Benchmark: legacy per-row add_match vs the prepared, concurrent MatchWriter against a mocked session.
+
+    Usage:
+        python -m python.benchmarks.bench_writes --pages 20 --db-latency 0.002
+
+    The fake session answers every statement after `--db-latency` seconds, so the numbers reflect
+    round trips saved rather than Cassandra's own write cost.
+"""
+
+LEGACY_CHECK_QUERY = "SELECT processed FROM puuid_matches WHERE match_id = %s and processed = True"
+LEGACY_INSERT_QUERY = """INSERT INTO puuid_matches (dateadded, match_id, puuid, processed) VALUES (toTimestamp(now()), %s, %s, false)
+                   IF NOT EXISTS"""
+
+
+def legacy_add_match(session, puuid, match_id):
+    """The pre-bulk `add_match`: an unprepared SELECT, then an LWT INSERT, one row at a time."""
+    if session.execute(LEGACY_CHECK_QUERY, (match_id,)).one():
+        return
+    session.execute(LEGACY_INSERT_QUERY, (match_id, puuid))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match ID write path benchmark.")
+    parser.add_argument("--pages", type=int, default=20, help="Pages of 100 match IDs to write")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Fake Cassandra latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 128])
+    args = parser.parse_args()
+
+    pages = [[f"NA1_{page:04d}{index:03d}" for index in range(100)] for page in range(args.pages)]
+    total = args.pages * 100
+
+    session = FakeSession(latency=args.db_latency)
+    started = time.perf_counter()
+    for page in pages:
+        for match_id in page:
+            legacy_add_match(session, "bench-puuid", match_id)
+    elapsed = time.perf_counter() - started
+    print(f"legacy add_match: {total} rows, {session.total_statements} statements "
+          f"in {elapsed:.2f}s -> {total / elapsed:.0f} rows/s")
+
+    for concurrency in args.concurrency:
+        session = FakeSession(latency=args.db_latency)
+        writer = MatchWriter(session, concurrency=concurrency)
+        started = time.perf_counter()
+        for page in pages:
+            writer.add_matches("bench-puuid", page)
+        elapsed = time.perf_counter() - started
+        print(f"MatchWriter (concurrency={concurrency}): {total} rows, {session.total_statements} statements "
+              f"in {elapsed:.2f}s -> {total / elapsed:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from cassandra.query import BatchStatement, PreparedStatement
+
+"""In-memory stand-ins for the cassandra-driver session used by the offline benchmarks.
+
+Classes:
+    FakeSession: Records statements and answers them after a configurable latency.
+    MemorySession: FakeSession that also keeps puuid_matches and match_payloads rows in memory.
+"""
+
+AppliedRow = namedtuple("AppliedRow", ["applied"])
+PuuidMatchRow = namedtuple("PuuidMatchRow", ["match_id", "puuid", "processed"])
+
+
+class _Scheduler:
+    """
+    Single background thread that completes futures once their simulated latency has elapsed.
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def call_later(self, delay, callback, *args):
+        with self._condition:
+            heapq.heappush(
+                self._queue, (time.perf_counter() + delay, next(self._counter), callback, args)
+            )
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                due, _, callback, args = self._queue[0]
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._queue)
+            callback(*args)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = _Scheduler()
+    return _scheduler
+
+
+class FakeResultSet(list):
+    # Every result is a single page
+    paging_state = None
+
+    @property
+    def current_rows(self):
+        return self
+
+    def one(self):
+        return self[0] if self else None
+
+
+class FakeResponseFuture:
+    """
+    Minimal ResponseFuture supporting callbacks and blocking `result()`.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.has_more_pages = False
+        self._col_names = None
+        self._col_types = None
+
+    def _complete(self, result=None, error=None):
+        with self._lock:
+            self._result, self._error = result, error
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._fire(*callback)
+
+    def _fire(self, callback, errback, callback_args, callback_kwargs, errback_args, errback_kwargs):
+        if self._error is None:
+            callback(self._result, *callback_args, **(callback_kwargs or {}))
+        else:
+            errback(self._error, *errback_args, **(errback_kwargs or {}))
+
+    def add_callbacks(
+        self, callback, errback, callback_args=(), callback_kwargs=None, errback_args=(), errback_kwargs=None
+    ):
+        entry = (callback, errback, callback_args, callback_kwargs, errback_args, errback_kwargs)
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(entry)
+                return
+        self._fire(*entry)
+
+    def clear_callbacks(self):
+        with self._lock:
+            self._callbacks = []
+
+    def result(self):
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return FakeResultSet(self._result)
+
+
+class FakeBoundStatement:
+    def __init__(self, prepared_statement, values):
+        self.prepared_statement = prepared_statement
+        self.query_string = prepared_statement.query_string
+        self.values = values
+        self.keyspace = None
+        self.routing_key = None
+        self.custom_payload = None
+        self.is_idempotent = False
+
+
+class FakePreparedStatement(PreparedStatement):
+    # Subclassing lets real BatchStatements accept fake prepared statements
+    def __init__(self, query_string):
+        self.query_string = query_string
+        self.query_id = str(hash(query_string)).encode()
+        self.consistency_level = None
+        self.serial_consistency_level = None
+        self.is_idempotent = False
+
+    def bind(self, values):
+        return FakeBoundStatement(self, values)
+
+
+class FakeSession:
+    """
+    Stand-in for `cassandra.cluster.Session` that records every statement it executes.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+        Initialize the fake session.
+
+        Args:
+            latency (float, optional): Simulated round-trip time per statement in seconds. Defaults to 0.
+        """
+        self.latency = latency
+        self.statements = Counter()
+        self._lock = threading.Lock()
+
+    def _record(self, query):
+        if isinstance(query, BatchStatement):
+            text = f"BATCH[{len(query)}]"
+        else:
+            text = getattr(query, "query_string", query)
+        with self._lock:
+            self.statements[" ".join(str(text).split())] += 1
+
+    def _rows(self, query):
+        text = str(getattr(query, "query_string", query))
+        # Conditional updates (lightweight transactions) always apply
+        return [AppliedRow(True)] if re.search(r"\bIF\b", text) else []
+
+    def prepare(self, query):
+        return FakePreparedStatement(query)
+
+    def _answer(self, query, parameters):
+        return self._rows(query)
+
+    def execute(self, query, parameters=None, **kwargs):
+        self._record(query)
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResultSet(self._answer(query, parameters))
+
+    def execute_async(self, query, parameters=None, **kwargs):
+        self._record(query)
+        future = FakeResponseFuture()
+        rows = self._answer(query, parameters)
+        if self.latency:
+            _get_scheduler().call_later(self.latency, future._complete, rows)
+        else:
+            future._complete(rows)
+        return future
+
+    def submit(self, fn, *args, **kwargs):
+        if not hasattr(self, "_executor"):
+            self._executor = ThreadPoolExecutor(max_workers=2)
+        return self._executor.submit(fn, *args, **kwargs)
+
+    @property
+    def total_statements(self):
+        return sum(self.statements.values())
+
+
+class MemorySession(FakeSession):
+    """
+    FakeSession that stores the puuid_matches and match_payloads tables, so a crawl, an ingestion and a flatten
+    can be chained end to end without Cassandra. Other statements are only recorded.
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.puuid_matches = {}
+        self.match_payloads = {}
+        self._query_strings = {}
+        self._tables_lock = threading.Lock()
+
+    def prepare(self, query):
+        statement = super().prepare(query)
+        self._query_strings[statement.query_id] = query
+        return statement
+
+    def _answer(self, query, parameters):
+        if isinstance(query, BatchStatement):
+            for _, query_id, values in query._statements_and_parameters:
+                self._apply(self._query_strings.get(query_id, query_id), values)
+            return []
+        text = str(getattr(query, "query_string", query))
+        if parameters is None:
+            parameters = getattr(query, "values", None)
+        rows = self._apply(text, parameters)
+        return self._rows(query) if rows is None else rows
+
+    def _apply(self, text, parameters):
+        text = " ".join(str(text).split())
+        with self._tables_lock:
+            if text.startswith("INSERT INTO puuid_matches"):
+                match_id, puuid = parameters[:2]
+                self.puuid_matches.setdefault((match_id, puuid), None)
+                return []
+            if text.startswith("UPDATE puuid_matches SET processed = true"):
+                self.puuid_matches[tuple(parameters)] = True
+                return []
+            if text.startswith("INSERT INTO match_payloads"):
+                match_id, *values = parameters
+                self.match_payloads[match_id] = tuple(values)
+                return []
+            if text.startswith("SELECT match_id, puuid, processed FROM puuid_matches"):
+                # Rows of a match share a partition, so they come back together
+                return [PuuidMatchRow(*key, processed) for key, processed in sorted(self.puuid_matches.items())]
+        return None
@@ -0,0 +1,68 @@
+import copy
+import random
+import string
+
+from python.benchmarks.stub_server import load_match_example
+
+"""Synthetic Match-V5 payloads shaped like `match_example.json`.
+
+    Every payload keeps the example's structure but gets its own match ID, participant PUUIDs and
+    randomized numeric stats, so compression and parsing benchmarks do not see identical documents.
+"""
+
+_PUUID_ALPHABET = string.ascii_letters + string.digits + "-_"
+
+
+def random_puuid(rng):
+    return "".join(rng.choice(_PUUID_ALPHABET) for _ in range(78))
+
+
+def _jitter(value, rng):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return rng.randint(0, max(1, value * 2)) if value > 0 else value
+    if isinstance(value, float):
+        return value * rng.uniform(0.5, 1.5)
+    if isinstance(value, dict):
+        return {key: _jitter(item, rng) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_jitter(item, rng) for item in value]
+    return value
+
+
+def synthetic_matches(count, seed=0, puuid_pool=None):
+    """
+    Generates `count` synthetic match payloads.
+
+    Args:
+        count (int): Number of payloads.
+        seed (int, optional): Random seed. Defaults to 0.
+        puuid_pool (list, optional): PUUIDs to draw participants from, so players recur across matches.
+
+    Yields:
+        dict: A Match-V5 payload.
+    """
+    rng = random.Random(seed)
+    example = load_match_example()
+    for index in range(count):
+        match = copy.deepcopy(example)
+        match_id = f"NA1_{5_000_000_000 + index}"
+        puuids = (
+            rng.sample(puuid_pool, 10) if puuid_pool else [random_puuid(rng) for _ in range(10)]
+        )
+        match["metadata"]["matchId"] = match_id
+        match["metadata"]["participants"] = puuids
+        info = match["info"]
+        info["gameId"] = 5_000_000_000 + index
+        info["gameCreation"] += index * 60_000
+        info["gameStartTimestamp"] += index * 60_000
+        info["gameEndTimestamp"] += index * 60_000
+        info["gameDuration"] = rng.randint(900, 2700)
+        for participant, puuid in zip(info["participants"], puuids):
+            stats = _jitter(participant, rng)
+            stats["puuid"] = puuid
+            stats["win"] = participant["teamId"] == 100
+            participant.clear()
+            participant.update(stats)
+        yield match
@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+"""Local stub of the Riot Match-V5 API for offline benchmarks.
+
+    Serves match ID pages and match payloads shaped like `match_example.json` under
+    `http://127.0.0.1:<port>/<region>/...` so the crawler can be pointed at it via RIOT_API_HOST. An optional
+    application rate limit is enforced like Riot's: every response reports it in X-App-Rate-Limit(-Count) and
+    requests over the limit get a 429 with Retry-After.
+
+Classes:
+    StubRiotServer: Threaded HTTP server with configurable latency and match history size.
+"""
+
+MATCH_EXAMPLE_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, "match_example.json"
+)
+
+MATCH_IDS_PATH = re.compile(r"^/(?P<region>[^/]+)/lol/match/v5/matches/by-puuid/(?P<puuid>[^/]+)/ids$")
+MATCH_PATH = re.compile(r"^/(?P<region>[^/]+)/lol/match/v5/matches/(?P<match_id>[^/]+)$")
+
+
+def load_match_example():
+    """Loads `match_example.json` from the repository root.
+
+    Returns:
+        dict: The example Match-V5 payload.
+    """
+    with open(MATCH_EXAMPLE_PATH, encoding="utf-8") as file:
+        return json.load(file)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.record_request()
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        retry_after, headers = stub.admit()
+        if retry_after:
+            headers["Retry-After"] = str(math.ceil(retry_after))
+            headers["X-Rate-Limit-Type"] = "application"
+            self._send_json(429, {"status": {"message": "Rate limit exceeded", "status_code": 429}}, headers)
+            return
+
+        parsed = urlparse(self.path)
+        if match := MATCH_IDS_PATH.match(parsed.path):
+            query = parse_qs(parsed.query)
+            start = int(query.get("start", ["0"])[0])
+            count = int(query.get("count", ["20"])[0])
+            first, last = stub.history_slice(
+                int(query["startTime"][0]) if "startTime" in query else None,
+                int(query["endTime"][0]) if "endTime" in query else None,
+            )
+            end = min(first + start + count, last)
+            puuid = match.group("puuid")
+            ids = [stub.match_id(puuid, index) for index in range(first + start, end)]
+            self._send_json(200, ids, headers)
+        elif match := MATCH_PATH.match(parsed.path):
+            self._send_json(200, stub.match_payload(match.group("match_id")), headers)
+        else:
+            self._send_json(404, {"status": {"message": "Not found", "status_code": 404}}, headers)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubRiotServer:
+    """
+    Threaded stub of the Riot API serving synthetic match histories.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        matches_per_puuid=250,
+        match_interval=3600,
+        now=None,
+        rate_limit=None,
+        host="127.0.0.1",
+        port=0,
+    ):
+        """
+        Initialize the stub server.
+
+        Args:
+            latency (float, optional): Seconds to sleep before answering each request. Defaults to 0.
+            matches_per_puuid (int, optional): Length of every player's match history. Defaults to 250.
+            match_interval (int, optional): Seconds between consecutive matches of a history, which
+                `startTime`/`endTime` filter on. Defaults to 3600.
+            now (int, optional): Epoch seconds of every player's newest match. Defaults to the current time.
+            rate_limit (tuple, optional): Application limit as (requests, window_seconds); requests over it get
+                a 429. Defaults to no limit.
+            host (str, optional): Interface to bind. Defaults to "127.0.0.1".
+            port (int, optional): Port to bind; 0 picks a free port. Defaults to 0.
+        """
+        self.latency = latency
+        self.matches_per_puuid = matches_per_puuid
+        self.match_interval = match_interval
+        self.now = int(now if now is not None else time.time())
+        self.rate_limit = rate_limit
+        self.requests_served = 0
+        self.rate_limited = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._lock = threading.Lock()
+        self._payload_template = json.dumps(load_match_example()).encode()
+        self._example_id = load_match_example()["metadata"]["matchId"].encode()
+        self._server = _Server((host, port), _Handler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def host_template(self):
+        """str: Value for RIOT_API_HOST that routes every region to this server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{{region}}"
+
+    def record_request(self):
+        with self._lock:
+            self.requests_served += 1
+
+    def admit(self):
+        """Counts a request against the application limit.
+
+        Returns:
+            tuple: (seconds until the window resets if the request is over the limit, else 0; rate-limit headers)
+        """
+        if not self.rate_limit:
+            return 0, {}
+        limit, seconds = self.rate_limit
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= seconds:
+                self._window_start, self._window_count = now, 0
+            retry_after = 0
+            if self._window_count >= limit:
+                self.rate_limited += 1
+                retry_after = seconds - (now - self._window_start)
+            else:
+                self._window_count += 1
+            headers = {
+                "X-App-Rate-Limit": f"{limit}:{seconds}",
+                "X-App-Rate-Limit-Count": f"{self._window_count}:{seconds}",
+            }
+        return retry_after, headers
+
+    def match_time(self, index):
+        """Epoch seconds at which the `index`-th newest match of every history was played."""
+        return self.now - index * self.match_interval
+
+    def history_slice(self, start_time=None, end_time=None):
+        """Returns the [first, last) history indexes played within [start_time, end_time], newest first."""
+        first, last = 0, self.matches_per_puuid
+        if end_time is not None:
+            first = max(first, -(-(self.now - end_time) // self.match_interval))
+        if start_time is not None:
+            last = min(last, (self.now - start_time) // self.match_interval + 1)
+        return first, max(first, last)
+
+    def match_id(self, puuid, index):
+        return f"NA1_{zlib.crc32(puuid.encode()) % 10**6:06d}{index:04d}"
+
+    def match_payload(self, match_id):
+        return self._payload_template.replace(self._example_id, match_id.encode())
+
+    def start(self):
+        """Starts serving on a background thread and returns the server."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and releases the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
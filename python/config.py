@@ -1,5 +1,151 @@
+import os
+
+# Routing host template; override RIOT_API_HOST to point the crawler at a local stub server
+RIOT_API_HOST = os.getenv("RIOT_API_HOST", "https://{region}.api.riotgames.com")
+
 BASE_URLS = {
-    "Account_Name": "https://{region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}",
-    "Account_Matches": "https://{region}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids",
-    "Match": "https://{region}.api.riotgames.com/lol/match/v5/matches/{matchId}"
+    "Account_Name": RIOT_API_HOST + "/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}",
+    "Account_Matches": RIOT_API_HOST + "/lol/match/v5/matches/by-puuid/{puuid}/ids",
+    "Match": RIOT_API_HOST + "/lol/match/v5/matches/{matchId}"
 }
+
+# Regional routing values for Match-V5 / Account-V1
+REGIONS = ("americas", "europe", "asia", "sea")
+
+# Platform prefix of a match ID (e.g. "NA1_5168231556") to its regional routing value
+PLATFORM_REGIONS = {
+    "NA1": "americas", "BR1": "americas", "LA1": "americas", "LA2": "americas",
+    "EUW1": "europe", "EUN1": "europe", "TR1": "europe", "RU": "europe", "ME1": "europe",
+    "KR": "asia", "JP1": "asia",
+    "OC1": "sea", "PH2": "sea", "SG2": "sea", "TH2": "sea", "TW2": "sea", "VN2": "sea",
+}
+
+# Async crawl tuning
+CRAWL_CONCURRENCY_PER_REGION = int(os.getenv("CRAWL_CONCURRENCY_PER_REGION", "20"))
+
+# Rate limiting (per routing value); adapted at runtime from X-App-Rate-Limit / X-Method-Rate-Limit
+RIOT_APP_RATE_LIMIT = os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+MAX_RATE_LIMIT_RETRIES = int(os.getenv("MAX_RATE_LIMIT_RETRIES", "3"))
+
+# HTTP transport (pooled keep-alive connections per routing host)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "64"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+# On-disk response cache under call_endpoint (one SQLite file; empty disables). Match payloads never change once
+# a game has ended and are kept until evicted by size; Account_Matches lists expire after the TTL.
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(2 * 1024**3)))
+RESPONSE_CACHE_MATCH_IDS_TTL = int(os.getenv("RESPONSE_CACHE_MATCH_IDS_TTL", "300"))
+
+# Durable retry queue for failed API calls and writes (one SQLite file; empty disables). Retry n of an operation is
+# due RETRY_BASE_SECONDS x 2^(n-1) later (capped, jittered); after RETRY_MAX_ATTEMPTS it moves to the dead letters
+RETRY_QUEUE_PATH = os.getenv("RETRY_QUEUE_PATH", "")
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "8"))
+RETRY_BASE_SECONDS = float(os.getenv("RETRY_BASE_SECONDS", "30"))
+RETRY_MAX_SECONDS = float(os.getenv("RETRY_MAX_SECONDS", str(6 * 3600)))
+RETRY_CLAIM_SECONDS = float(os.getenv("RETRY_CLAIM_SECONDS", "300"))
+RETRY_DRAIN_INTERVAL = float(os.getenv("RETRY_DRAIN_INTERVAL", "5"))
+RETRY_DRAIN_BATCH = int(os.getenv("RETRY_DRAIN_BATCH", "50"))
+
+# Cassandra connection; CASSANDRA_LOCAL_DC empty lets the driver take the datacenter of the first contact point
+CASSANDRA_CONTACT_POINTS = [host.strip() for host in os.getenv("CASSANDRA_CONTACT_POINTS", "localhost").split(",")]
+CASSANDRA_PORT = int(os.getenv("CASSANDRA_PORT", "9042"))
+CASSANDRA_LOCAL_DC = os.getenv("CASSANDRA_LOCAL_DC") or None
+# Execution profiles: "write" for crawl data, "read" for serving, "scan" for full-table streams (the default profile
+# uses the write settings). Speculative executions apply to idempotent reads only; a delay of 0 disables them.
+CASSANDRA_READ_CONSISTENCY = os.getenv("CASSANDRA_READ_CONSISTENCY", "LOCAL_QUORUM")
+CASSANDRA_SCAN_CONSISTENCY = os.getenv("CASSANDRA_SCAN_CONSISTENCY", "LOCAL_ONE")
+CASSANDRA_REQUEST_TIMEOUT = float(os.getenv("CASSANDRA_REQUEST_TIMEOUT", "10"))
+CASSANDRA_SCAN_TIMEOUT = float(os.getenv("CASSANDRA_SCAN_TIMEOUT", "60"))
+CASSANDRA_SPECULATIVE_DELAY = float(os.getenv("CASSANDRA_SPECULATIVE_DELAY", "0.05"))
+CASSANDRA_SPECULATIVE_ATTEMPTS = int(os.getenv("CASSANDRA_SPECULATIVE_ATTEMPTS", "2"))
+CASSANDRA_FETCH_SIZE = int(os.getenv("CASSANDRA_FETCH_SIZE", "5000"))
+
+# Cassandra bulk writes
+CASSANDRA_WRITE_CONCURRENCY = int(os.getenv("CASSANDRA_WRITE_CONCURRENCY", "64"))
+CASSANDRA_WRITE_CONSISTENCY = os.getenv("CASSANDRA_WRITE_CONSISTENCY", "LOCAL_ONE")
+
+# In-process seen-key index (Bloom filter + exact LRU) in front of puuid/match writes
+SEEN_INDEX_CAPACITY = int(os.getenv("SEEN_INDEX_CAPACITY", "10000000"))
+SEEN_INDEX_ERROR_RATE = float(os.getenv("SEEN_INDEX_ERROR_RATE", "0.01"))
+SEEN_INDEX_LRU_SIZE = int(os.getenv("SEEN_INDEX_LRU_SIZE", "100000"))
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH")
+
+# Snowball frontier crawl
+FRONTIER_BUCKETS = int(os.getenv("FRONTIER_BUCKETS", "16"))
+FRONTIER_BATCH_SIZE = int(os.getenv("FRONTIER_BATCH_SIZE", "20"))
+FRONTIER_EXPANSION_MATCHES = int(os.getenv("FRONTIER_EXPANSION_MATCHES", "5"))
+FRONTIER_RECRAWL_SECONDS = int(os.getenv("FRONTIER_RECRAWL_SECONDS", str(24 * 3600)))
+FRONTIER_RETRY_SECONDS = int(os.getenv("FRONTIER_RETRY_SECONDS", "600"))
+
+# Activity-aware recrawl of known players: a player is next due when the chance that they have played since their
+# last check reaches RECRAWL_TARGET_PROBABILITY under their decayed games-per-day rate, but no sooner than
+# RECRAWL_IDLE_FACTOR x the time since their last game was found
+RECRAWL_TARGET_PROBABILITY = float(os.getenv("RECRAWL_TARGET_PROBABILITY", "0.6"))
+RECRAWL_HALF_LIFE_DAYS = float(os.getenv("RECRAWL_HALF_LIFE_DAYS", "14"))
+RECRAWL_PRIOR_GAMES_PER_DAY = float(os.getenv("RECRAWL_PRIOR_GAMES_PER_DAY", "1"))
+RECRAWL_IDLE_FACTOR = float(os.getenv("RECRAWL_IDLE_FACTOR", "0.5"))
+RECRAWL_MIN_SECONDS = int(os.getenv("RECRAWL_MIN_SECONDS", "3600"))
+RECRAWL_MAX_SECONDS = int(os.getenv("RECRAWL_MAX_SECONDS", str(30 * 86400)))
+
+# Sharded snowball crawl; a worker that misses heartbeats for SHARD_LEASE_SECONDS loses its frontier buckets
+SHARD_LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "60"))
+SHARD_HEARTBEAT_SECONDS = float(os.getenv("SHARD_HEARTBEAT_SECONDS", "15"))
+
+# Match-detail ingestion
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "20"))
+INGEST_FETCH_SIZE = int(os.getenv("INGEST_FETCH_SIZE", "1000"))
+PAYLOAD_CODEC = os.getenv("PAYLOAD_CODEC", "zstd")
+PAYLOAD_COMPRESSION_LEVEL = int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "6"))
+
+# Champion and player rollups; deltas merged in memory are flushed after this many matches or seconds
+ROLLUP_FLUSH_MATCHES = int(os.getenv("ROLLUP_FLUSH_MATCHES", "500"))
+ROLLUP_FLUSH_SECONDS = float(os.getenv("ROLLUP_FLUSH_SECONDS", "30"))
+
+# Analytics export (python/Pipeline/export.py): each table is scanned as EXPORT_TOKEN_SPLITS token ranges,
+# EXPORT_PARALLEL_RANGES at a time; a range worker writes its buffered rows out every EXPORT_BUFFER_ROWS rows
+# (EXPORT_BUFFER_MATCHES match payloads). Rows added in the last EXPORT_SETTLE_SECONDS wait for the next export.
+# EXPORT_FORMAT is "parquet" (needs pyarrow, falls back to csv) or "csv" (gzip-compressed)
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "parquet")
+EXPORT_PARALLEL_RANGES = int(os.getenv("EXPORT_PARALLEL_RANGES", "4"))
+EXPORT_TOKEN_SPLITS = int(os.getenv("EXPORT_TOKEN_SPLITS", "64"))
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+EXPORT_BUFFER_ROWS = int(os.getenv("EXPORT_BUFFER_ROWS", "200000"))
+EXPORT_BUFFER_MATCHES = int(os.getenv("EXPORT_BUFFER_MATCHES", "2000"))
+EXPORT_SETTLE_SECONDS = float(os.getenv("EXPORT_SETTLE_SECONDS", "300"))
+
+# PostgreSQL (relational match tables)
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+POSTGRES_DATABASE = os.getenv("POSTGRES_DATABASE", "GameAnalytics")
+POSTGRES_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+POSTGRES_POOL_MAX = int(os.getenv("POSTGRES_POOL_MAX", "8"))
+
+# Region/time index of PUUIDs (puuids_by_region, one partition per region and month)
+PUUID_INDEX_LOOKBACK_MONTHS = int(os.getenv("PUUID_INDEX_LOOKBACK_MONTHS", "24"))
+
+# Time-sliced match-ID backfill (epoch seconds; Match-V5 only filters by time from 2021-06-16 onwards)
+BACKFILL_HISTORY_START = int(os.getenv("BACKFILL_HISTORY_START", "1623801600"))
+BACKFILL_INITIAL_WINDOW_SECONDS = int(os.getenv("BACKFILL_INITIAL_WINDOW_SECONDS", str(7 * 86400)))
+BACKFILL_MIN_WINDOW_SECONDS = int(os.getenv("BACKFILL_MIN_WINDOW_SECONDS", "3600"))
+BACKFILL_MAX_WINDOW_SECONDS = int(os.getenv("BACKFILL_MAX_WINDOW_SECONDS", str(365 * 86400)))
+BACKFILL_TARGET_MATCHES_PER_WINDOW = int(os.getenv("BACKFILL_TARGET_MATCHES_PER_WINDOW", "90"))
+BACKFILL_PARALLEL_WINDOWS = int(os.getenv("BACKFILL_PARALLEL_WINDOWS", "4"))
+
+# Logging; LOG_QUEUED hands records to one background writer thread instead of writing inline
+LOG_DIR = os.getenv("LOG_DIR", "python/utils/Logs")
+LOG_QUEUED = os.getenv("LOG_QUEUED", "false").lower() in ("1", "true", "yes")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# "count:seconds" budget per INFO/DEBUG message template, e.g. "10:60"; empty disables sampling
+LOG_RATE_LIMIT = os.getenv("LOG_RATE_LIMIT", "")
+
+# Metrics (Prometheus text format); export over HTTP on METRICS_PORT and/or to the METRICS_TEXTFILE path
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE")
+METRICS_TEXTFILE_INTERVAL = float(os.getenv("METRICS_TEXTFILE_INTERVAL", "15"))
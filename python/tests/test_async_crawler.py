@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import python.Crawler.async_crawler as async_crawler
+import python.Crawler.puuid_crawler as puuid_crawler
+from python.benchmarks.fakes import FakeResponseFuture, MemorySession
+from python.Crawler.async_crawler import AsyncCrawler, run_async_crawl
+from python.Crawler.match_sync import MatchSync
+from python.Crawler.match_writer import MatchWriter
+from python.Crawler.seen_index import SeenIndex
+from python.tests.test_snowball_crawler import RiotStub, _Limiter
+from python.utils.retry_queue import RetryQueue
+
+PLAYED = {f"NA1_{i}": (i, ["p1", f"q{i}"]) for i in range(5)}
+
+
+class SlowRiot(RiotStub):
+    """RiotStub that takes a while per call and records the most calls in flight at once."""
+
+    def __init__(self, played):
+        super().__init__(played)
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        return super().__call__(*args, **kwargs)
+
+
+class FailingSession(MemorySession):
+    """MemorySession on which writes of the given match IDs fail."""
+
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = failing
+
+    def execute_async(self, query, parameters=None, **kwargs):
+        if parameters and parameters[0] in self.failing:
+            future = FakeResponseFuture()
+            future._complete(error=OSError("write timed out"))
+            return future
+        return super().execute_async(query, parameters, **kwargs)
+
+
+def _stub(monkeypatch, riot=None):
+    riot = riot or RiotStub(dict(PLAYED))
+    monkeypatch.setattr(async_crawler, "call_endpoint", riot)
+    monkeypatch.setattr(async_crawler, "rate_limiter", _Limiter())
+    return riot
+
+
+def test_details_per_player_is_passed_through(monkeypatch):
+    _stub(monkeypatch)
+    fetched = []
+    results = run_async_crawl(
+        MemorySession(), [("americas", "p1")], fetch_details=True,
+        on_match=lambda region, match_id, payload: fetched.append(match_id), details_per_player=2, count=3,
+    )
+    assert results == {"p1": ["NA1_4", "NA1_3", "NA1_2", "NA1_1", "NA1_0"]}
+    assert fetched == ["NA1_4", "NA1_3"]
+
+
+def test_crawl_async_stores_fetched_details(monkeypatch):
+    _stub(monkeypatch)
+    session = MemorySession()
+    writer = MatchWriter(session)
+    monkeypatch.setattr(
+        puuid_crawler, "_components",
+        {"session": session, "seen_index": SeenIndex(capacity=1000), "match_writer": writer,
+         "match_sync": MatchSync(session, writer=writer)},
+    )
+    puuid_crawler.crawl_async("americas", ["p1"], fetch_details=True)
+    assert set(session.match_payloads) == set(PLAYED)
+    assert ("NA1_0", "q0") in session.puuid_matches
+
+
+def test_requests_in_flight_are_bounded_per_region(monkeypatch):
+    riot = _stub(monkeypatch, SlowRiot(dict(PLAYED)))
+    targets = [("americas", f"q{i}") for i in range(5)] + [("europe", "p1")]
+    results = run_async_crawl(MemorySession(), targets, concurrency_per_region=2, max_workers=8)
+    assert results["q3"] == ["NA1_3"] and len(results["p1"]) == 5
+    # Two americas requests plus the europe one; never more than two per region
+    assert riot.most_in_flight == 3
+
+
+def test_incomplete_history_is_none_but_earlier_pages_are_written(monkeypatch):
+    riot = _stub(monkeypatch)
+    pages = riot.__call__
+
+    def failing_second_page(url, params=None, **kwargs):
+        return None if params and params["start"] == 2 else pages(url, params, **kwargs)
+
+    monkeypatch.setattr(async_crawler, "call_endpoint", failing_second_page)
+    session = MemorySession()
+    assert run_async_crawl(session, [("americas", "p1")], count=2) == {"p1": None}
+    assert set(session.puuid_matches) == {("NA1_4", "p1"), ("NA1_3", "p1")}
+
+
+def test_failed_writes_are_queued_for_retry(monkeypatch):
+    _stub(monkeypatch)
+    session = FailingSession({"NA1_1", "NA1_3"})
+    crawler = AsyncCrawler(session)
+    crawler.retry_queue = RetryQueue(":memory:")
+    results = asyncio.run(crawler.crawl([("americas", "p1")]))
+    # The history is complete; only the rows that failed are left to the retry queue
+    assert results == {"p1": ["NA1_4", "NA1_3", "NA1_2", "NA1_1", "NA1_0"]}
+    assert crawler.matches_written == 3
+    assert crawler.retry_queue.contains("match_ids", {"puuid": "p1", "match_ids": ["NA1_3", "NA1_1"]})
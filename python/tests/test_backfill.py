@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+import python.Crawler.async_crawler as async_crawler
+from python.benchmarks.fakes import FakeResponseFuture, FakeSession
+from python.Crawler.backfill import (
+    CHECKPOINT_QUERY,
+    FINISH_QUERY,
+    INSERT_PROGRESS_QUERY,
+    SELECT_PROGRESS_QUERY,
+    run_backfill,
+)
+from python.Crawler.match_sync import ADVANCE_QUERY
+
+ProgressRow = namedtuple(
+    "ProgressRow", ["history_start", "history_end", "completed_until", "window_seconds", "done"]
+)
+
+HOUR = 3600
+NOW = 1_000 * HOUR
+
+
+class ProgressSession(FakeSession):
+    def __init__(self, progress=None):
+        super().__init__()
+        self.progress = progress
+        self.executed = []
+
+    def execute_async(self, query, parameters=None, **kwargs):
+        text = query.query_string
+        self.executed.append((text, parameters))
+        if text == SELECT_PROGRESS_QUERY:
+            future = FakeResponseFuture()
+            future._complete([self.progress] if self.progress else [])
+            return future
+        return super().execute_async(query, parameters, **kwargs)
+
+
+class _Limiter:
+    async def acquire_async(self, region, method=None):
+        pass
+
+
+def _history(times, calls):
+    """Account_Matches stand-in serving a history played at `times` (epoch seconds, newest first)."""
+
+    def call_endpoint(url, params, region=None, method=None, throttle=True, lookup_cache=True):
+        calls.append(dict(params))
+        ids = [f"NA1_{t}" for t in times if params["startTime"] <= t <= params["endTime"]]
+        return ids[params["start"]:params["start"] + params["count"]]
+
+    return call_endpoint
+
+
+def _setup(monkeypatch, times):
+    calls = []
+    monkeypatch.setattr(async_crawler, "call_endpoint", _history(times, calls))
+    monkeypatch.setattr(async_crawler, "rate_limiter", _Limiter())
+    return calls
+
+
+def _kwargs():
+    return {
+        "history_start": 0,
+        "initial_window": 24 * HOUR,
+        "min_window": HOUR,
+        "max_window": 2_000 * HOUR,
+        "parallel_windows": 4,
+    }
+
+
+def test_backfill_collects_whole_history_and_hands_over_to_sync(monkeypatch):
+    # Dense recent play (one match an hour), a long break, then a few old matches
+    times = [NOW - HOUR * i for i in range(300)] + [100 * HOUR, 50 * HOUR]
+    calls = _setup(monkeypatch, times)
+    session = ProgressSession()
+
+    assert run_backfill(session, [("americas", "p1")], now=NOW, **_kwargs()) == {"p1": len(times)}
+
+    written = [params for text, params in session.executed if text.startswith("INSERT INTO puuid_matches")]
+    assert {match_id for match_id, *_ in written} == {f"NA1_{t}" for t in times}
+    # Windows adapt to the density instead of staying at the initial day
+    assert max(call["endTime"] - call["startTime"] for call in calls) > 24 * HOUR
+    assert len(calls) < 20
+
+    texts = [text for text, _ in session.executed]
+    assert INSERT_PROGRESS_QUERY in texts and FINISH_QUERY in texts
+    checkpoints = [params[0] for text, params in session.executed if text == CHECKPOINT_QUERY]
+    assert checkpoints == sorted(checkpoints, reverse=True) and checkpoints[-1] == 0
+    advance = [params for text, params in session.executed if text == ADVANCE_QUERY]
+    assert advance == [(NOW, None, None, "p1", None)]
+
+
+def test_backfill_resumes_from_checkpoint(monkeypatch):
+    times = [NOW - HOUR * i for i in range(300)]
+    calls = _setup(monkeypatch, times)
+    session = ProgressSession(ProgressRow(0, NOW, NOW - 100 * HOUR, 10 * HOUR, False))
+
+    assert run_backfill(session, [("americas", "p1")], now=NOW + HOUR, **_kwargs()) == {"p1": 200}
+    assert all(call["endTime"] <= NOW - 100 * HOUR for call in calls)
+    assert INSERT_PROGRESS_QUERY not in [text for text, _ in session.executed]
+
+    session = ProgressSession(ProgressRow(0, NOW, 0, 10 * HOUR, True))
+    calls.clear()
+    assert run_backfill(session, [("americas", "p1")], now=NOW, **_kwargs()) == {"p1": None}
+    assert calls == []
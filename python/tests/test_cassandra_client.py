@@ -0,0 +1,92 @@
+from cassandra import ConsistencyLevel
+from cassandra.cluster import EXEC_PROFILE_DEFAULT
+from cassandra.policies import ConstantSpeculativeExecutionPolicy, TokenAwarePolicy
+
+from python.benchmarks.fakes import FakeResponseFuture, FakeResultSet, FakeSession
+from python.Pipeline.rollups import PLAYER_STATS_QUERY, player_totals
+from python.utils.Cassandra import (
+    PROFILE_READ,
+    PROFILE_SCAN,
+    PROFILE_WRITE,
+    CassandraClient,
+    default_profiles,
+    stream_rows,
+)
+
+
+class PagedSession(FakeSession):
+    """Serves range(total) in pages of the statement's fetch_size, recording each request."""
+
+    def __init__(self, total):
+        super().__init__()
+        self.total = total
+        self.requests = []
+
+    def execute_async(self, query, parameters=None, execution_profile=None, paging_state=None, **kwargs):
+        start = paging_state or 0
+        self.requests.append((query.fetch_size, execution_profile, start))
+        end = min(start + query.fetch_size, self.total)
+        page = FakeResultSet(range(start, end))
+        page.paging_state = end if end < self.total else None
+        future = FakeResponseFuture()
+        future._complete(page)
+        future.result = lambda: page
+        return future
+
+
+def test_stream_rows_prefetches_pages():
+    session = PagedSession(25)
+    rows = stream_rows(session, "SELECT x FROM t", fetch_size=10)
+    assert next(rows) == 0
+    # The second page was requested before the first one was consumed
+    assert session.requests == [(10, PROFILE_SCAN, 0), (10, PROFILE_SCAN, 10)]
+    assert list(rows) == list(range(1, 25))
+    assert len(session.requests) == 3
+
+    resumed = PagedSession(25)
+    assert list(stream_rows(resumed, "SELECT x FROM t", fetch_size=10, paging_state=20)) == list(range(20, 25))
+
+
+def test_profiles_and_prepared_cache():
+    profiles = default_profiles(local_dc="dc1")
+    assert set(profiles) == {EXEC_PROFILE_DEFAULT, PROFILE_WRITE, PROFILE_READ, PROFILE_SCAN}
+    assert profiles[PROFILE_WRITE].consistency_level == ConsistencyLevel.LOCAL_ONE
+    assert profiles[PROFILE_READ].consistency_level == ConsistencyLevel.LOCAL_QUORUM
+    assert isinstance(profiles[PROFILE_READ].speculative_execution_policy, ConstantSpeculativeExecutionPolicy)
+    assert not isinstance(profiles[PROFILE_WRITE].speculative_execution_policy, ConstantSpeculativeExecutionPolicy)
+    assert all(isinstance(profile.load_balancing_policy, TokenAwarePolicy) for profile in profiles.values())
+    assert len({id(profile.load_balancing_policy) for profile in profiles.values()}) == len(profiles)
+
+    client = CassandraClient(keyspace="raw_league_data")
+    client.adopt(FakeSession())
+    select = client.prepare("SELECT puuid FROM puuids WHERE puuid = ?")
+    assert client.prepare("SELECT puuid FROM puuids WHERE puuid = ?") is select
+    assert select.is_idempotent
+    assert not client.prepare("UPDATE puuids SET region = ? WHERE puuid = ?").is_idempotent
+
+
+class ReadSession(FakeSession):
+    """Records the statements executed under each execution profile."""
+
+    def __init__(self):
+        super().__init__()
+        self.executed = []
+
+    def execute(self, query, parameters=None, execution_profile=None, **kwargs):
+        self.executed.append((query, execution_profile))
+        return super().execute(query, parameters, **kwargs)
+
+
+def test_adopted_session_prepares_through_the_client():
+    session = ReadSession()
+    client = CassandraClient(keyspace="raw_league_data")
+    assert client.adopt(session) is session
+
+    # A caller handed only the bare session gets the cached, idempotent statement
+    assert player_totals(session, "p1") is None
+    assert player_totals(session, "p2") is None
+    (first, profile), (second, _) = session.executed
+    assert first is second
+    assert first.query_string == PLAYER_STATS_QUERY
+    assert first.is_idempotent
+    assert profile == PROFILE_READ
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import pytest
+
+from python.__main__ import build_parser, main
+
+HELP_BUDGET_SECONDS = 0.15
+
+# Times the import and --help in a fresh interpreter, excluding interpreter startup
+PROBE = """
+import contextlib, io, sys, time
+started = time.perf_counter()
+import python.__main__ as cli
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+        cli.main(["--help"])
+    except SystemExit:
+        pass
+elapsed = time.perf_counter() - started
+print(elapsed, int(any(name.split(".")[0] == "cassandra" for name in sys.modules)))
+"""
+
+
+def test_help_is_fast_and_loads_no_driver():
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    elapsed, driver_loaded = output.split()
+    assert driver_loaded == "0"
+    assert float(elapsed) < HELP_BUDGET_SECONDS
+
+
+def test_subcommands_parse():
+    parser = build_parser()
+    args = parser.parse_args(["crawl", "--region", "europe", "--puuid", "a", "--puuid", "b", "--async"])
+    assert (args.region, args.puuid, args.use_async, args.processes) == ("europe", ["a", "b"], True, None)
+    assert parser.parse_args(["ingest", "--rollups"]).rollups
+    assert parser.parse_args(["stats", "--patch", "14.23"]).limit == 20
+    with pytest.raises(SystemExit):
+        parser.parse_args(["stats"])
+
+
+def test_importing_the_crawler_does_not_connect():
+    import python.Crawler.puuid_crawler as puuid_crawler
+
+    assert puuid_crawler._components == {}
+    with pytest.raises(AttributeError):
+        puuid_crawler.no_such_attribute
+
+
+def test_details_without_a_detail_fetching_crawl_is_rejected():
+    with pytest.raises(SystemExit, match="--details"):
+        main(["crawl", "--details"])
@@ -0,0 +1,112 @@
+import csv
+import gzip
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from cassandra.metadata import Murmur3Token
+
+from python.benchmarks.fakes import FakeSession
+from python.benchmarks.stub_server import load_match_example
+from python.Pipeline.export import SOURCES, Exporter, token_ranges
+from python.utils.compression import compress_payload
+
+MatchRow = namedtuple("MatchRow", ["match_id", "puuid", "dateadded", "processed"])
+PayloadRow = namedtuple("PayloadRow", ["match_id", "region", "codec", "payload", "dateadded"])
+
+# 2024-01-02 00:00 UTC
+NOW = 1_704_153_600
+
+
+class TableSession(FakeSession):
+    """Serves each table's rows to the token-range scan their partition key hashes into."""
+
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+        self.ranges = []
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        for source in SOURCES.values():
+            if text == source.query:
+                start, end = query.values
+                self.ranges.append((start, end))
+                return [
+                    row
+                    for row in self.tables[source.name]
+                    if start < Murmur3Token.hash_fn(row[0].encode()) <= end
+                ]
+        return self._rows(query)
+
+
+def _read(path):
+    with gzip.open(path, "rt", newline="") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _files(directory):
+    return sorted(
+        os.path.relpath(os.path.join(root, name), directory)
+        for root, _, names in os.walk(directory)
+        for name in names
+    )
+
+
+def test_token_ranges_cover_the_ring():
+    ranges = token_ranges(8)
+    assert ranges[0][0] == -(2**63) and ranges[-1][1] == 2**63 - 1
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+
+def test_export_partitions_by_region_and_day_and_resumes_from_watermark(tmp_path):
+    matches = [
+        MatchRow(f"NA1_{i}", f"p{i}", datetime(2024, 1, 1, i % 24), i % 2 == 0) for i in range(50)
+    ] + [MatchRow("EUW1_1", "p1", datetime(2023, 12, 31, 12), None)]
+    session = TableSession({"puuid_matches": matches})
+    exporter = Exporter(
+        session, str(tmp_path), fmt="csv", parallel=3, splits=8, buffer_rows=10, settle_seconds=0,
+        clock=lambda: NOW,
+    )
+
+    stats = exporter.export("puuid_matches")
+    assert (stats["rows"], stats["low"], stats["high"]) == (51, None, NOW * 1000)
+    assert len(session.ranges) == 8
+    files = _files(tmp_path)
+    assert "_watermarks.json" in files and not any(name.startswith("_staging") for name in files)
+    americas = [name for name in files if name.startswith("puuid_matches/region=americas/day=2024-01-01/")]
+    # Buffers of 10 rows are written out as they fill, so one range yields several part files
+    assert len(americas) > 8
+    rows = [row for name in americas for row in _read(tmp_path / name)]
+    assert sorted(row["match_id"] for row in rows) == sorted(f"NA1_{i}" for i in range(50))
+    assert {row["processed"] for row in rows} == {"True", "False"}
+    (europe,) = [name for name in files if name.startswith("puuid_matches/region=europe/day=2023-12-31/")]
+    assert _read(tmp_path / europe)[0]["processed"] == ""
+
+    # Only rows added after the watermark are exported next time
+    matches.append(MatchRow("NA1_new", "p1", datetime(2024, 1, 2, 0, 30), None))
+    exporter.clock = lambda: NOW + 3600
+    stats = exporter.export("puuid_matches", incremental=True)
+    assert (stats["rows"], stats["files"], stats["low"]) == (1, 1, NOW * 1000)
+    (new,) = [name for name in _files(tmp_path) if "day=2024-01-02" in name]
+    assert _read(tmp_path / new)[0]["match_id"] == "NA1_new"
+    assert json.loads((tmp_path / "_watermarks.json").read_text()) == {"puuid_matches": (NOW + 3600) * 1000}
+
+
+def test_match_payloads_are_flattened(tmp_path):
+    match = load_match_example()
+    codec, blob = compress_payload(json.dumps(match).encode(), "gzip")
+    session = TableSession(
+        {"match_payloads": [PayloadRow(match["metadata"]["matchId"], "americas", codec, blob, datetime(2024, 1, 1))]}
+    )
+    stats = Exporter(session, str(tmp_path), fmt="csv", splits=4, settle_seconds=0, clock=lambda: NOW).export(
+        "match_payloads"
+    )
+    assert stats["rows"] == 1
+
+    partition = tmp_path / "matches" / "Players" / "region=americas" / "day=2024-01-01"
+    (players,) = os.listdir(partition)
+    rows = _read(partition / players)
+    assert [row["PUUID"] for row in rows] == match["metadata"]["participants"]
+    assert {row["MatchID"] for row in rows} == {match["metadata"]["matchId"]}
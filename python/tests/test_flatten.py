@@ -0,0 +1,42 @@
+from python.benchmarks.payloads import synthetic_matches
+from python.benchmarks.stub_server import load_match_example
+from python.Pipeline.flatten import TABLES, MatchFlattener
+
+
+def test_flatten_example_match():
+    match = load_match_example()
+    batch = MatchFlattener().flatten([match])
+    info = match["info"]
+
+    assert batch["Matches"]["MatchID"] == [match["metadata"]["matchId"]]
+    assert batch["Players"]["MatchID"] == [match["metadata"]["matchId"]] * len(info["participants"])
+    assert batch["Players"]["PUUID"] == [p["puuid"] for p in info["participants"]]
+    assert list(batch["Performance"]["Kills"]) == [p["kills"] for p in info["participants"]]
+    assert len(batch["TeamBans"]["ChampionID"]) == sum(len(team["bans"]) for team in info["teams"])
+    items = sum(bool(p[f"item{slot}"]) for p in info["participants"] for slot in range(7))
+    assert len(batch["PlayerItems"]["ItemID"]) == items
+
+
+def test_flatten_columns_are_aligned():
+    batch = MatchFlattener().flatten(synthetic_matches(20))
+    for table, layout in TABLES.items():
+        assert list(batch[table]) == [name for name, _ in layout]
+        assert len({len(values) for values in batch[table].values()}) == 1, table
+    assert len(batch["Matches"]["MatchID"]) == 20
+    assert len(batch["Players"]["MatchID"]) == 200
+
+
+def test_flatten_defaults_missing_fields():
+    match = load_match_example()
+    del match["info"]["participants"][0]["role"]
+    batch = MatchFlattener().flatten([match])
+    assert batch["Players"]["Role"][0] == ""
+
+
+def test_match_id_includes_the_platform():
+    # gameId is only unique per platform, so two regions can share it
+    matches = [load_match_example(), load_match_example()]
+    del matches[1]["metadata"]
+    matches[1]["info"]["platformId"] = "EUW1"
+    batch = MatchFlattener().flatten(matches)
+    assert batch["Matches"]["MatchID"] == [matches[0]["metadata"]["matchId"], f"EUW1_{matches[1]['info']['gameId']}"]
@@ -0,0 +1,119 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import python.Crawler.frontier as frontier
+from python.benchmarks.fakes import AppliedRow, FakeSession
+from python.Crawler.frontier import (
+    DELETE_ENTRY_QUERY,
+    FRONTIER_TABLE,
+    INSERT_ENTRY_QUERY,
+    INSERT_MEMBER_QUERY,
+    SELECT_DUE_QUERY,
+    UPDATE_MEMBER_QUERY,
+    Frontier,
+)
+
+DueRow = namedtuple("DueRow", ["due", "puuid"])
+
+T0 = datetime(2024, 1, 1)
+
+
+class FrontierSession(FakeSession):
+    """Keeps crawl_frontier, crawl_frontier_members and other frontiers' tables in memory."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = set()
+        self.members = {}
+        # (entries, members) by entry table
+        self.tables = {FRONTIER_TABLE: (self.entries, self.members)}
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        if parameters is None:
+            parameters = getattr(query, "values", None)
+        table = re.search(r"\b(\w*frontier)(?:_members)?\b", str(text))
+        if table is None:
+            return self._rows(query)
+        entries, members = self.tables.setdefault(table.group(1), (set(), {}))
+        text = text.replace(table.group(1), FRONTIER_TABLE)
+        if text == SELECT_DUE_QUERY:
+            region, bucket, now, limit = parameters
+            due = sorted(
+                (due, puuid) for entry_region, entry_bucket, due, puuid in entries
+                if (entry_region, entry_bucket) == (region, bucket) and due <= now
+            )
+            return [DueRow(*row) for row in due[:limit]]
+        if text == INSERT_MEMBER_QUERY:
+            puuid, *position = parameters
+            if puuid in members:
+                return [AppliedRow(False)]
+            members[puuid] = tuple(position)
+            return [AppliedRow(True)]
+        if text == UPDATE_MEMBER_QUERY:
+            due, puuid = parameters
+            region, bucket, _ = members[puuid]
+            members[puuid] = (region, bucket, due)
+            return []
+        if text == INSERT_ENTRY_QUERY:
+            entries.add(tuple(parameters))
+            return []
+        if text == DELETE_ENTRY_QUERY:
+            entries.discard(tuple(parameters))
+            return []
+        return self._rows(query)
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_pop_returns_most_overdue_across_buckets():
+    session = FrontierSession()
+    queue = Frontier(session, "americas", buckets=4)
+    for hours, puuid in [(3, "p3"), (1, "p1"), (2, "p2"), (5, "p5"), (4, "p4")]:
+        assert queue.push([puuid], due=T0 + timedelta(hours=hours)) == [puuid]
+    assert len({queue.bucket(f"p{i}") for i in range(1, 6)}) > 1
+
+    assert [entry.puuid for entry in queue.pop(3, now=T0 + timedelta(hours=10))] == ["p1", "p2", "p3"]
+    assert [entry.puuid for entry in queue.pop(10, now=T0 + timedelta(hours=2))] == ["p1", "p2"]
+    assert queue.pop(10, now=T0) == []
+    # Already enqueued players keep their position
+    assert queue.push(["p1", "p6"], due=T0) == ["p6"]
+
+
+def test_defer_moves_entry_and_restart_resumes(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(frontier, "utcnow", clock)
+    session = FrontierSession()
+    queue = Frontier(session, "americas", buckets=2)
+    queue.push(["a", "b", "c"])
+
+    first, *rest = queue.pop(10)
+    queue.defer(first, 3600)
+    assert [entry.puuid for entry in queue.pop(10)] == [entry.puuid for entry in rest]
+    assert session.members[first.puuid][2] == T0 + timedelta(hours=1)
+    assert len(session.entries) == 3
+
+    # Popping does not remove entries, so a new process sees the same queue, deferred entry last
+    clock.now = T0 + timedelta(hours=2)
+    restarted = Frontier(session, "americas", buckets=2)
+    assert [entry.puuid for entry in restarted.pop(10)] == [entry.puuid for entry in rest] + [first.puuid]
+
+
+def test_frontiers_on_other_tables_are_independent():
+    session = FrontierSession()
+    crawl = Frontier(session, "americas", buckets=2)
+    recrawl = Frontier(session, "americas", buckets=2, table="recrawl_frontier")
+    # The same player is queued once in each, and rescheduling one leaves the other in place
+    assert crawl.push(["p1"], due=T0) == ["p1"]
+    assert recrawl.push(["p1"], due=T0) == ["p1"]
+    recrawl.reschedule(recrawl.pop(1, now=T0)[0], T0 + timedelta(days=1))
+    assert [entry.due for entry in crawl.pop(10, now=T0)] == [T0]
+    assert recrawl.pop(10, now=T0) == []
+    assert set(session.tables) == {"crawl_frontier", "recrawl_frontier"}
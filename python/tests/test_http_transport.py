@@ -0,0 +1,87 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from python.benchmarks.stub_server import StubRiotServer
+from python.utils.http_transport import RiotTransport
+from python.utils.rate_limiter import RateLimiter
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.calls += 1
+        server.ports.add(self.client_address[1])
+        if server.calls <= server.failures:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps(["NA1_1", "NA1_2"]).encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    httpd.calls = 0
+    httpd.failures = 0
+    httpd.ports = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_for(httpd):
+    host, port = httpd.server_address[:2]
+    return f"http://{host}:{port}/americas/lol/match/v5/matches/by-puuid/abc/ids"
+
+
+def test_retries_5xx_then_decodes_gzip(server):
+    server.failures = 2
+    transport = RiotTransport("RGAPI-test", backoff_base=0.001)
+    response = transport.get(url_for(server), method="Account_Matches")
+    assert response.status_code == 200
+    assert response.json() == ["NA1_1", "NA1_2"]
+    assert server.calls == 3
+    assert transport.latency.stats()["Account_Matches"]["count"] == 3
+
+
+def test_gives_up_after_max_retries(server):
+    server.failures = 10
+    transport = RiotTransport("RGAPI-test", max_retries=1, backoff_base=0.001)
+    assert transport.get(url_for(server)).status_code == 503
+    assert server.calls == 2
+
+
+def test_reuses_connections(server):
+    transport = RiotTransport("RGAPI-test")
+    for _ in range(5):
+        transport.get(url_for(server))
+    assert len(server.ports) == 1
+
+
+def test_honours_stub_rate_limit():
+    limiter = RateLimiter("100:1")
+    with StubRiotServer(rate_limit=(3, 1)) as stub:
+        transport = RiotTransport("RGAPI-test", rate_limiter=limiter)
+        url = stub.host_template.format(region="americas") + "/lol/match/v5/matches/by-puuid/abc/ids"
+        statuses = [transport.get(url, region="americas").status_code for _ in range(5)]
+    assert statuses == [200] * 5
+    assert limiter.app_limits == [(3, 1)]
+    assert stub.requests_served - stub.rate_limited == 5
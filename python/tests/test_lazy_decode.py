@@ -0,0 +1,43 @@
+import json
+
+from python.benchmarks.stub_server import load_match_example
+from python.Pipeline.flatten import MatchFlattener
+from python.Pipeline.lazy_decode import MATCH_PROJECTION, METADATA_PROJECTION, LazyValue, decode_projected
+
+
+def test_projection_keeps_schema_fields_and_defers_subtrees():
+    match = load_match_example()
+    decoded = decode_projected(json.dumps(match).encode(), MATCH_PROJECTION)
+
+    assert decoded["metadata"] == match["metadata"]
+    assert decoded["info"]["teams"] == match["info"]["teams"]
+    participant = decoded["info"]["participants"][0]
+    assert participant["puuid"] == match["info"]["participants"][0]["puuid"]
+    assert isinstance(participant["challenges"], LazyValue)
+    assert participant["challenges"].decode() == match["info"]["participants"][0]["challenges"]
+
+    flattener = MatchFlattener()
+    assert flattener.flatten([decoded]) == flattener.flatten([match])
+
+
+def test_metadata_projection_leaves_info_raw():
+    match = load_match_example()
+    decoded = decode_projected(json.dumps(match, indent=2), METADATA_PROJECTION)
+    assert decoded["metadata"]["participants"] == match["metadata"]["participants"]
+    assert decoded["info"].decode() == match["info"]
+
+
+def test_brackets_and_escaped_quotes_inside_strings():
+    document = {
+        "name": 'say "}{" [',
+        "skipped": {"a": ["]", {"b": "{"}]},
+        "kept": {"list": [], "nested": {"x": "}"}},
+        "empty": {},
+    }
+    for text in (json.dumps(document), json.dumps(document).replace('\\"', "'")):
+        expected = json.loads(text)
+        decoded = decode_projected(text, {"kept": True, "empty": {}})
+        assert decoded["kept"] == expected["kept"]
+        assert decoded["name"] == expected["name"]
+        assert decoded["empty"] == {}
+        assert decoded["skipped"].decode() == expected["skipped"]
@@ -0,0 +1,116 @@
+from collections import namedtuple
+
+from python.benchmarks.fakes import AppliedRow, FakeSession
+from python.Crawler.leases import (
+    ACQUIRE_QUERY,
+    HEARTBEAT_QUERY,
+    LEAVE_QUERY,
+    RELEASE_QUERY,
+    RENEW_QUERY,
+    WORKERS_QUERY,
+    LeaseManager,
+)
+from python.Crawler.seen_index import SeenIndex
+from python.Crawler.sharded_crawler import ShardedCrawler
+from python.utils.api_utils import rate_limiter
+
+WorkerRow = namedtuple("WorkerRow", ["worker"])
+
+
+class LeaseSession(FakeSession):
+    """crawl_leases and crawl_workers with TTLs measured on a settable clock."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+        self.leases = {}
+        self.workers = {}
+
+    def _live(self, table):
+        for key, (_, expires) in list(table.items()):
+            if expires <= self.now:
+                del table[key]
+        return table
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        leases, workers = self._live(self.leases), self._live(self.workers)
+        if text == ACQUIRE_QUERY:
+            resource, owner, ttl = parameters
+            if resource in leases:
+                return [AppliedRow(False)]
+            leases[resource] = (owner, self.now + ttl)
+            return [AppliedRow(True)]
+        if text == RENEW_QUERY:
+            ttl, owner, resource, expected = parameters
+            if leases.get(resource, (None,))[0] != expected:
+                return [AppliedRow(False)]
+            leases[resource] = (owner, self.now + ttl)
+            return [AppliedRow(True)]
+        if text == RELEASE_QUERY:
+            resource, owner = parameters
+            if leases.get(resource, (None,))[0] == owner:
+                del leases[resource]
+            return [AppliedRow(True)]
+        if text == HEARTBEAT_QUERY:
+            group, worker, _, _, ttl = parameters
+            workers[(group, worker)] = (worker, self.now + ttl)
+            return []
+        if text == LEAVE_QUERY:
+            workers.pop(tuple(parameters), None)
+            return []
+        if text == WORKERS_QUERY:
+            return [WorkerRow(worker) for (group, worker) in workers if group == parameters[0]]
+        return self._rows(query)
+
+
+def test_leases_are_exclusive_and_taken_over_after_expiry():
+    session = LeaseSession()
+    first = LeaseManager(session, "snowball:americas", owner="a", lease_seconds=60)
+    second = LeaseManager(session, "snowball:americas", owner="b", lease_seconds=60)
+    first.heartbeat()
+    second.heartbeat()
+    assert first.acquire("frontier:americas:0")
+    assert not second.acquire("frontier:americas:0")
+    assert sorted(first.live_workers()) == ["a", "b"]
+
+    # Heartbeats keep the lease alive past its original TTL
+    session.now = 50
+    assert first.heartbeat() == []
+    session.now = 100
+    assert not second.acquire("frontier:americas:0")
+
+    # "a" stops heartbeating: its lease and membership expire and "b" takes over
+    session.now = 111
+    second.heartbeat()
+    assert second.live_workers() == ["b"]
+    assert second.acquire("frontier:americas:0")
+    assert first.heartbeat() == ["frontier:americas:0"]
+    assert first.held == set()
+
+
+def test_workers_split_buckets_and_rate_limit():
+    session = LeaseSession()
+
+    def worker(owner):
+        crawler = ShardedCrawler(
+            session, "americas", owner=owner, lease_seconds=60, seen_index=SeenIndex(capacity=1000, lru_size=10)
+        )
+        crawler.leases.heartbeat()
+        return crawler
+
+    first = worker("a")
+    assert len(first.rebalance()) == 16
+    assert rate_limiter.share == 1.0
+
+    second = worker("b")
+    assert second.rebalance() == []
+    assert len(first.rebalance()) == 8
+    assert rate_limiter.share == 0.5
+    assert sorted(first.rebalance() + second.rebalance()) == list(range(16))
+
+    # "b" dies; once its leases expire, "a" takes every bucket back
+    session.now = 61
+    first.leases.heartbeat()
+    assert len(first.rebalance()) == 16
+    rate_limiter.set_share(1.0)
@@ -0,0 +1,37 @@
+import logging
+
+import python.utils.logger as logger_module
+from python.utils.logger import RateLimitFilter, flush_logging, get_logger
+
+
+def _record(message, level=logging.INFO, *args):
+    return logging.LogRecord("crawler", level, __file__, 1, message, args, None)
+
+
+def test_rate_limit_filter_samples_info_per_template():
+    now = [0.0]
+    rate_limit = RateLimitFilter(2, 10, clock=lambda: now[0])
+
+    passed = [rate_limit.filter(_record("Wrote %d match IDs", logging.INFO, i)) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert rate_limit.filter(_record("Other template"))
+    assert rate_limit.filter(_record("Rate limited on %s", logging.WARNING, "americas"))
+
+    now[0] = 10.0
+    record = _record("Wrote %d match IDs", logging.INFO, 5)
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "Wrote 5 match IDs [3 similar messages suppressed]"
+
+
+def test_queued_loggers_write_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(logger_module, "LOG_QUEUED", True)
+    first = get_logger("queued_first.log", namespace="test_queued_first")
+    second = get_logger("queued_second.log", namespace="test_queued_second")
+
+    first.info("Wrote %d match IDs for PUUID %s", 3, "p1")
+    second.error("Request Error: %s", "timeout")
+    flush_logging()
+
+    assert (tmp_path / "queued_first.log").read_text().endswith("INFO - Wrote 3 match IDs for PUUID p1\n")
+    assert (tmp_path / "queued_second.log").read_text().endswith("ERROR - Request Error: timeout\n")
@@ -0,0 +1,57 @@
+import json
+
+import python.Pipeline.match_ingest as match_ingest
+from python.benchmarks.fakes import MemorySession
+from python.Pipeline.match_ingest import MatchIngestor
+from python.utils.retry_queue import RetryQueue
+
+
+def _payload(match_id, participants):
+    return json.dumps({"metadata": {"matchId": match_id, "participants": participants}, "info": {}}).encode()
+
+
+def test_unprocessed_matches_groups_rows_by_match():
+    session = MemorySession()
+    session.puuid_matches.update({
+        ("NA1_1", "a"): None, ("NA1_1", "b"): True, ("NA1_1", "c"): None,
+        ("NA1_2", "d"): True,
+        ("NA1_3", "e"): None,
+    })
+    ingestor = MatchIngestor(session, fetch_size=2, retry_queue=RetryQueue(":memory:"))
+    # Fully processed matches are skipped, and only the rows still to mark are returned
+    assert list(ingestor.unprocessed_matches()) == [("NA1_1", ["a", "c"]), ("NA1_3", ["e"])]
+
+
+def test_store_marks_every_participant_in_one_batch():
+    session = MemorySession()
+    ingestor = MatchIngestor(session, codec="gzip", retry_queue=RetryQueue(":memory:"))
+    ingestor.store("EUW1_7", _payload("EUW1_7", ["a", "b", "c"]))
+    assert session.statements["BATCH[3]"] == 1
+    assert session.puuid_matches == {("EUW1_7", "a"): True, ("EUW1_7", "b"): True, ("EUW1_7", "c"): True}
+    region, codec, _, raw_size = session.match_payloads["EUW1_7"]
+    assert (region, codec) == ("europe", "gzip")
+    assert ingestor.stats()["raw_bytes"] == raw_size
+
+
+def test_run_skips_queued_matches_and_queues_failures(monkeypatch):
+    requested = []
+
+    def call_endpoint(url, params=None, region=None, method=None, raw=False):
+        match_id = url.rsplit("/", 1)[1]
+        requested.append(match_id)
+        return None if match_id == "NA1_3" else _payload(match_id, ["a"])
+
+    monkeypatch.setattr(match_ingest, "call_endpoint", call_endpoint)
+    session = MemorySession()
+    session.puuid_matches.update({("NA1_1", "a"): None, ("NA1_2", "a"): None, ("NA1_3", "a"): None})
+    queue = RetryQueue(":memory:")
+    queue.enqueue("match_detail", {"match_id": "NA1_1"}, "earlier failure")
+    ingestor = MatchIngestor(session, concurrency=2, retry_queue=queue)
+
+    stats = ingestor.run()
+    # NA1_1 waits in the retry queue, so it is not requested again; NA1_3 fails and joins it
+    assert sorted(requested) == ["NA1_2", "NA1_3"]
+    assert (stats["matches_stored"], stats["failures"], stats["deferred"]) == (1, 1, 1)
+    assert queue.contains("match_detail", {"match_id": "NA1_3"})
+    assert session.puuid_matches[("NA1_2", "a")] is True
+    assert session.puuid_matches[("NA1_3", "a")] is None
@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+import python.Crawler.match_sync as match_sync
+from python.benchmarks.fakes import AppliedRow, FakeResultSet, FakeSession
+from python.Crawler.match_sync import ADVANCE_QUERY, SELECT_STATE_QUERY, MatchSync
+
+StateRow = namedtuple("StateRow", ["watermark", "window_end", "next_start"])
+
+
+class SyncSession(FakeSession):
+    def __init__(self):
+        super().__init__()
+        self.rows = {}
+
+    def execute(self, query, parameters=None, **kwargs):
+        text = getattr(query, "query_string", query)
+        if text == SELECT_STATE_QUERY:
+            self._record(query)
+            row = self.rows.get(parameters[0])
+            return FakeResultSet([row] if row else [])
+        if text == ADVANCE_QUERY:
+            self._record(query)
+            watermark, window_end, next_start, puuid, expected = parameters
+            current = self.rows.get(puuid, StateRow(None, None, None))
+            if current.watermark != expected:
+                return FakeResultSet([AppliedRow(False)])
+            self.rows[puuid] = StateRow(watermark, window_end, next_start)
+            return FakeResultSet([AppliedRow(True)])
+        return super().execute(query, parameters, **kwargs)
+
+
+def _api(pages, calls):
+    def call_endpoint(url, params, region=None, method=None):
+        calls.append(dict(params))
+        page = pages.pop(0)
+        return page(params) if callable(page) else page
+
+    return call_endpoint
+
+
+def test_first_sync_walks_history_then_resync_costs_one_call(monkeypatch):
+    calls = []
+    pages = [[f"NA1_{i}" for i in range(100)], ["NA1_100"], ["NA1_200"]]
+    monkeypatch.setattr(match_sync, "call_endpoint", _api(pages, calls))
+    session = SyncSession()
+    sync = MatchSync(session)
+
+    assert len(sync.sync("americas", "p1", now=1_000)) == 101
+    assert [call["start"] for call in calls] == [0, 100]
+    assert all("startTime" not in call and call["endTime"] == 1_000 for call in calls)
+    assert sync.state("p1") == (1_000, None, None)
+
+    calls.clear()
+    assert sync.sync("americas", "p1", now=2_000) == ["NA1_200"]
+    assert calls == [{"start": 0, "count": 100, "endTime": 2_000, "startTime": 1_000}]
+    assert sync.state("p1").watermark == 2_000
+
+
+def test_failed_page_resumes_from_checkpoint(monkeypatch):
+    calls = []
+    pages = [[f"NA1_{i}" for i in range(100)], None, ["NA1_100"]]
+    monkeypatch.setattr(match_sync, "call_endpoint", _api(pages, calls))
+    sync = MatchSync(SyncSession())
+
+    assert len(sync.sync("americas", "p1", now=1_000)) == 100
+    assert sync.state("p1") == (None, 1_000, 100)
+
+    assert sync.sync("americas", "p1", now=5_000) == ["NA1_100"]
+    assert calls[-1] == {"start": 100, "count": 100, "endTime": 1_000}
+    assert sync.state("p1").watermark == 1_000
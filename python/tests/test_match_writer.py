@@ -0,0 +1,45 @@
+from cassandra import ConsistencyLevel
+
+from python.benchmarks.fakes import FakeSession
+from python.Crawler.match_writer import INSERT_MATCH_LWT_QUERY, MatchWriter, UPSERT_MATCH_QUERY
+from python.Crawler.seen_index import SeenIndex
+
+
+class FailingSession(FakeSession):
+    def execute_async(self, query, parameters=None, **kwargs):
+        future = super().execute_async(query, parameters, **kwargs)
+        if parameters and parameters[0] == "NA1_bad":
+            future._error = RuntimeError("write timeout")
+        return future
+
+
+def test_only_rows_a_warmed_index_has_never_seen_skip_the_transaction():
+    # Without a warmed index any row may already exist, and rewriting it would move its dateadded
+    session = FakeSession()
+    writer = MatchWriter(session, concurrency=8, consistency="one")
+    assert writer.add_matches("puuid-1", [f"NA1_{i}" for i in range(100)]) == 100
+    assert session.statements == {INSERT_MATCH_LWT_QUERY: 100}
+    assert "processed" not in UPSERT_MATCH_QUERY
+    assert writer.insert_match.consistency_level == ConsistencyLevel.ONE
+
+    index = SeenIndex(capacity=1000)
+    index.warmed = True
+    session = FakeSession()
+    writer = MatchWriter(session, seen_index=index)
+    assert writer.add_matches("puuid-1", [f"NA1_{i}" for i in range(100)]) == 100
+    assert session.statements == {UPSERT_MATCH_QUERY: 100}
+
+
+def test_add_matches_reports_failed_rows():
+    session = FailingSession()
+    writer = MatchWriter(session)
+    assert writer.add_matches("puuid-1", ["NA1_1", "NA1_bad", "NA1_2"]) == 2
+
+
+def test_empty_page_is_a_no_op():
+    session = FakeSession()
+    writer = MatchWriter(session)
+    assert writer.add_matches("puuid-1", []) == 0
+    assert writer.add_puuids([], "americas") == 0
+    assert session.total_statements == 0
+
@@ -0,0 +1,109 @@
+import urllib.request
+
+from cassandra.query import BatchStatement
+
+from python.benchmarks.fakes import FakePreparedStatement
+from python.benchmarks.stub_server import StubRiotServer
+from python.utils.http_transport import RiotTransport
+from python.utils.metrics import (
+    API_LATENCY,
+    API_RESPONSES,
+    CASSANDRA_LATENCY,
+    Counter,
+    Histogram,
+    Registry,
+    instrument_session,
+    start_http_server,
+    statement_label,
+)
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests.", ("endpoint", "status")))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0)))
+    requests.inc("Match", 200)
+    requests.inc("Match", 200, amount=2)
+    requests.inc('we"ird', 429)
+    for seconds in (0.05, 0.5, 5.0):
+        latency.observe(seconds, "Match")
+
+    lines = registry.render().splitlines()
+    assert lines[:4] == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="Match",status="200"} 3',
+        'requests_total{endpoint="we\\"ird",status="429"} 1',
+    ]
+    assert lines[6:] == [
+        'latency_seconds_bucket{endpoint="Match",le="0.1"} 1',
+        'latency_seconds_bucket{endpoint="Match",le="1.0"} 2',
+        'latency_seconds_bucket{endpoint="Match",le="+Inf"} 3',
+        'latency_seconds_sum{endpoint="Match"} 5.55',
+        'latency_seconds_count{endpoint="Match"} 3',
+    ]
+
+
+def test_statement_labels():
+    insert = FakePreparedStatement("INSERT INTO puuid_matches (match_id, puuid) VALUES (?, ?)")
+    assert statement_label(insert) == "insert puuid_matches"
+    assert statement_label(insert.bind(("NA1_1", "p1"))) == "insert puuid_matches"
+    assert statement_label("SELECT puuid, dateadded\n FROM puuids_by_region WHERE region = ?") == "select puuids_by_region"
+    assert statement_label("UPDATE puuid_sync SET watermark = ? WHERE puuid = ?") == "update puuid_sync"
+    assert statement_label(BatchStatement()) == "batch"
+    assert statement_label("TRUNCATE puuids") == "other"
+
+
+class _Future:
+    def __init__(self, query):
+        self.query = query
+        self.callbacks = []
+
+    def add_callbacks(self, callback, errback):
+        self.callbacks.append((callback, errback))
+
+
+class _Session:
+    def __init__(self):
+        self.listeners = []
+
+    def add_request_init_listener(self, listener):
+        self.listeners.append(listener)
+
+    def execute_async(self, query):
+        future = _Future(query)
+        for listener in self.listeners:
+            listener(future)
+        return future
+
+
+def test_instrumented_session_and_http_export():
+    session = instrument_session(_Session())
+    query = FakePreparedStatement("DELETE FROM crawl_frontier WHERE region = ?")
+    before = CASSANDRA_LATENCY.count("delete crawl_frontier", "ok")
+    for _ in range(2):
+        callback, _ = session.execute_async(query.bind(("americas",))).callbacks[0]
+        callback([])
+    assert CASSANDRA_LATENCY.count("delete crawl_frontier", "ok") == before + 2
+    # Simple statements are labelled per execution, never cached by object identity
+    for text in ("SELECT * FROM puuids", "UPDATE puuid_sync SET watermark = 1 WHERE puuid = 'p'"):
+        callback, _ = session.execute_async(text).callbacks[0]
+        callback([])
+    assert CASSANDRA_LATENCY.count("update puuid_sync", "ok") >= 1
+
+    responses = API_RESPONSES.value("Account_Matches", 200)
+    with StubRiotServer() as stub:
+        url = stub.host_template.format(region="americas") + "/lol/match/v5/matches/by-puuid/abc/ids"
+        RiotTransport("RGAPI-test").get(url, method="Account_Matches")
+    assert API_RESPONSES.value("Account_Matches", 200) == responses + 1
+    assert API_LATENCY.count("Account_Matches") >= 1
+
+    exporter = start_http_server(0)
+    try:
+        host, port = exporter.server_address[:2]
+        body = urllib.request.urlopen(f"http://{host}:{port}/metrics").read().decode()
+    finally:
+        exporter.shutdown()
+        exporter.server_close()
+    assert 'leaguetracker_api_responses_total{endpoint="Account_Matches",status="200"}' in body
+    assert 'leaguetracker_cassandra_statement_seconds_count{statement="delete crawl_frontier",outcome="ok"}' in body
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+
+from python.benchmarks.payloads import synthetic_matches
+from python.Pipeline.flatten import MatchFlattener
+from python.Pipeline.pg_loader import LOAD_ORDER, CopyStream, PostgresLoader
+
+
+class RecordingCursor:
+    def __init__(self, copied):
+        self.copied = copied
+        self.statements = []
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(" ".join(query.split()))
+        self.rowcount = 3
+
+    def copy_expert(self, query, stream, size=8192):
+        chunks = []
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.copied[query] = "".join(chunks)
+
+
+class RecordingPool:
+    def __init__(self):
+        self.copied = {}
+        self.cursors = []
+
+    @contextmanager
+    def connection(self):
+        pool = self
+
+        class Connection:
+            def cursor(self):
+                cursor = RecordingCursor(pool.copied)
+                pool.cursors.append(cursor)
+                return cursor
+
+        yield Connection()
+
+    def close(self):
+        pass
+
+
+def test_copy_stream_encodes_text_format():
+    from array import array
+
+    stream = CopyStream([array("q", [1, 2]), ["a\tb", None], array("b", [1, 0])], rows_per_chunk=1)
+    assert stream.read(4) == "1\ta\\"
+    assert stream.read() == "tb\t1\n2\t\\N\t0\n"
+    assert stream.rows == 2
+
+
+def test_loader_copies_then_upserts_each_table_once():
+    pool = RecordingPool()
+    loader = PostgresLoader(pool=pool)
+    batch = MatchFlattener().flatten(synthetic_matches(5))
+    upserted = loader.load(batch)
+
+    statements = pool.cursors[0].statements
+    inserts = [statement.split()[2] for statement in statements if statement.startswith("INSERT INTO")]
+    assert inserts == list(LOAD_ORDER)
+    assert set(upserted) == set(LOAD_ORDER)
+
+    players = next(data for query, data in pool.copied.items() if "stage_players" in query)
+    assert len(players.splitlines()) == 50
+
+    stats = loader.stats()
+    assert stats["batches"] == 1
+    assert stats["rows_copied"] == sum(len(next(iter(columns.values()))) for columns in batch.values())
+    assert stats["latency"]["batch"]["count"] == 1
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import python.Crawler.puuid_index as puuid_index
+from python.benchmarks.bench_puuid_index import ClusteredSession
+from python.benchmarks.fakes import FakeSession
+from python.Crawler.match_writer import MatchWriter
+from python.Crawler.puuid_index import INSERT_INDEX_QUERY, PuuidIndex
+
+
+def _session(count):
+    session = ClusteredSession()
+    start = datetime(2026, 8, 20)
+    # One row every 6 hours spans the August, September and October partitions
+    session.load(("americas", start + timedelta(hours=6 * i), f"p{i:03d}") for i in range(count))
+    session.load([("europe", start, "eu-1")])
+    return session
+
+
+def test_latest_reads_newest_first_within_region():
+    index = PuuidIndex(_session(200))
+    latest = index.page("americas", page_size=3, now=datetime(2026, 10, 18))
+    assert [entry.puuid for entry in latest] == ["p199", "p198", "p197"]
+
+
+def test_paging_walks_back_across_month_partitions():
+    index = PuuidIndex(_session(200))
+    walked = [entry.puuid for entry in index.iterate("americas", page_size=7, now=datetime(2026, 10, 18))]
+    assert walked == [f"p{i:03d}" for i in reversed(range(200))]
+
+
+def test_repeated_puuid_appears_once_per_page():
+    session = _session(5)
+    session.load([("americas", datetime(2026, 8, 21, 12, 30), "p000")])
+    index = PuuidIndex(session, lookback_months=4)
+    page = [entry.puuid for entry in index.page("americas", page_size=10, now=datetime(2026, 8, 31))]
+    assert page.count("p000") == 1
+    assert len(page) == 5
+
+
+def test_writer_indexes_new_puuids():
+    session = FakeSession()
+    writer = MatchWriter(session)
+    assert writer.add_puuids(["a", "b"], "americas", if_not_exists=True) == 2
+    assert session.statements[INSERT_INDEX_QUERY] == 2
+
+
+def test_sparse_region_reads_older_months_in_concurrent_waves(monkeypatch):
+    waves = []
+
+    def execute_concurrent(session, statement, parameters, **kwargs):
+        waves.append([month for _, month, _ in parameters])
+        return [(True, session._answer(statement, params)) for params in parameters]
+
+    monkeypatch.setattr(puuid_index, "execute_concurrent_with_args", execute_concurrent)
+    session = ClusteredSession()
+    session.load([("americas", datetime(2025, 12, 5), "old"), ("americas", datetime(2025, 11, 5), "older")])
+    index = PuuidIndex(session, lookback_months=24)
+
+    page = index.page("americas", page_size=10, now=datetime(2026, 10, 18))
+    assert [entry.puuid for entry in page] == ["old", "older"]
+    # 1 + 2 + 4 + 8 + 9 partitions in five round trips instead of 24 sequential reads
+    assert [len(wave) for wave in waves] == [1, 2, 4, 8, 9]
+    assert waves[3][0] == 202603 and waves[3][-1] == 202508
+
+    # A full month stops the wave; the rest of the page resumes inside that month
+    assert [entry.puuid for entry in index.page("americas", page_size=1, now=datetime(2026, 10, 18))] == ["old"]
+    assert index.page("americas", page_size=1, after=page[0], now=datetime(2026, 10, 18))[0].puuid == "older"
@@ -0,0 +1,63 @@
+import base64
+import os
+
+import pytest
+
+from python.utils.puuid_table import (
+    RECORD_SIZE,
+    IdSet,
+    ParticipantGraph,
+    PuuidTable,
+    decode_puuid,
+    encode_puuid,
+)
+
+PUUID = "HHk7hueAv-6OIn3vv7xOVPxIB_ARB2z9IAf7p5w14pbRN1COH0bCY5jZEXYioHKIaf3AMj3Ntuhvvg"
+
+
+def random_puuid():
+    return base64.urlsafe_b64encode(os.urandom(58)).decode()[:78]
+
+
+def test_encoding_round_trips():
+    for puuid in (PUUID, random_puuid(), "bench-puuid-7", "x" * 58):
+        record = encode_puuid(puuid)
+        assert len(record) == RECORD_SIZE
+        assert decode_puuid(record) == puuid
+    # Canonical PUUIDs are stored as their 58 decoded bytes
+    assert encode_puuid(PUUID)[0] == 0
+    # Non-zero padding bits would be lost in decoding, and the string is too long to keep verbatim
+    with pytest.raises(ValueError):
+        encode_puuid(PUUID[:-1] + "h")
+
+
+def test_interning_is_dense_and_stable():
+    puuids = [random_puuid() for _ in range(5000)]
+    table = PuuidTable(capacity=16)
+    ids = table.intern_many(puuids + puuids[:100])
+    assert list(ids) == list(range(5000)) + list(range(100))
+    assert len(table) == 5000
+    assert table.lookup(puuids[4321]) == 4321
+    assert table.lookup(random_puuid()) is None
+    assert table.puuid(1234) == puuids[1234]
+    assert table.nbytes < 5000 * 80
+
+
+def test_summoner_ids_and_adjacency():
+    table = PuuidTable.from_summoners([(7, PUUID), (9, "bench-puuid-1")])
+    assert table.summoner_id(table.lookup(PUUID)) == 7
+    assert table.summoner_id(table.intern("bench-puuid-2")) is None
+
+    known = IdSet()
+    assert known.add(1000) and not known.add(1000)
+    assert 1000 in known and 999 not in known and len(known) == 1
+
+    graph = ParticipantGraph()
+    graph.add("NA1_5168231556", [0, 1, 2])
+    graph.add("EUW1_42", [2, 3])
+    assert graph.match_id(1) == "EUW1_42"
+    assert list(graph.participants(0)) == [0, 1, 2]
+    offsets, matches = graph.matches_by_participant()
+    assert list(matches[offsets[2]:offsets[3]]) == [0, 1]
+    with pytest.raises(ValueError):
+        graph.add("not-a-match", [0])
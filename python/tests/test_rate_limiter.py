@@ -0,0 +1,102 @@
+import asyncio
+
+from python.utils.rate_limiter import RateLimiter, parse_rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def take_all(limiter, region, method=None):
+    taken = 0
+    while limiter.reserve(region, method) == 0:
+        taken += 1
+    return taken
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("100:120,20:1") == [(20, 1), (100, 120)]
+    assert parse_rate_limit("") == []
+
+
+def test_enforces_short_window():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1,100:120", clock=clock)
+    assert take_all(limiter, "americas") == 20
+    assert limiter.reserve("americas") == 1.0
+    clock.now += 1
+    assert take_all(limiter, "americas") == 20
+
+
+def test_enforces_long_window_exactly():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1,100:120", clock=clock)
+    taken = 0
+    for _ in range(10):
+        taken += take_all(limiter, "americas")
+        clock.now += 1
+    assert taken == 100
+    # The first request was made 10 seconds ago, so the next slot frees 110 seconds from now
+    assert limiter.reserve("americas") == 110.0
+
+
+def test_regions_are_independent():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1", clock=clock)
+    assert take_all(limiter, "americas") == 20
+    assert take_all(limiter, "europe") == 20
+
+
+def test_adapts_limits_from_headers():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1", clock=clock)
+    limiter.update_from_headers(
+        "americas",
+        {"X-App-Rate-Limit": "5:1", "X-Method-Rate-Limit": "3:10"},
+        method="Match",
+    )
+    assert take_all(limiter, "americas", "Match") == 3
+    assert take_all(limiter, "americas") == 2
+
+
+def test_syncs_counts_from_headers():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1", clock=clock)
+    limiter.reserve("americas")
+    limiter.update_from_headers("americas", {"X-App-Rate-Limit-Count": "15:1"})
+    assert take_all(limiter, "americas") == 5
+
+
+def test_share_splits_limits_and_counts():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1", clock=clock)
+    limiter.set_share(0.25)
+    assert take_all(limiter, "americas") == 5
+    clock.now += 1
+    limiter.update_from_headers("americas", {"X-App-Rate-Limit": "40:1", "X-App-Rate-Limit-Count": "12:1"})
+    assert take_all(limiter, "americas") == 7
+
+
+def test_retry_after_blocks_scope():
+    clock = FakeClock()
+    limiter = RateLimiter("20:1", clock=clock)
+    limiter.penalize("americas", 7, limit_type="application")
+    assert limiter.reserve("americas") == 7.0
+    assert limiter.reserve("europe") == 0
+    clock.now += 7
+    assert limiter.reserve("americas") == 0
+
+
+def test_acquire_async_waits_for_slot():
+    limiter = RateLimiter([(2, 0.05)])
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire_async("americas")
+
+    asyncio.run(run())
+    assert limiter.wait_seconds > 0
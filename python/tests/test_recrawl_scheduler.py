@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from python.benchmarks.fakes import FakeSession
+from python.Crawler.frontier import FRONTIER_TABLE, INSERT_ENTRY_QUERY, SELECT_DUE_QUERY
+from python.Crawler.recrawl_scheduler import (
+    RECRAWL_FRONTIER_TABLE,
+    SECONDS_PER_DAY,
+    SELECT_ACTIVITY_QUERY,
+    UPSERT_ACTIVITY_QUERY,
+    Activity,
+    ActivityModel,
+    RecrawlScheduler,
+)
+
+DueRow = namedtuple("DueRow", ["due", "puuid"])
+
+RECRAWL_SELECT_DUE_QUERY = SELECT_DUE_QUERY.replace(FRONTIER_TABLE, RECRAWL_FRONTIER_TABLE)
+RECRAWL_INSERT_ENTRY_QUERY = INSERT_ENTRY_QUERY.replace(FRONTIER_TABLE, RECRAWL_FRONTIER_TABLE)
+
+DAY = SECONDS_PER_DAY
+
+
+def test_model_backs_off_inactive_players():
+    model = ActivityModel(
+        target_probability=0.5, half_life_days=14, prior_games_per_day=1, idle_factor=0.5,
+        min_seconds=3600, max_seconds=30 * DAY,
+    )
+    # Never played: checked as rarely as allowed
+    assert model.interval(model.update(None, 0, 0), 0) == 30 * DAY
+
+    # Four games a day: due when P(new game) = 0.5, i.e. ln 2 / 4 days
+    active = model.update(None, 50, 0)
+    for day in range(1, 15):
+        active = model.update(active, 4, day * DAY)
+    assert abs(model.rate(active) - 4) < 0.5
+    assert 3 * 3600 < model.interval(active, 14 * DAY) < 5 * 3600
+
+    # The player stops: empty checks decay the rate and the idle time stretches the interval
+    intervals, now, idle = [], 14 * DAY, active
+    for _ in range(16):
+        interval = model.interval(idle, now)
+        intervals.append(interval)
+        now += interval
+        idle = model.update(idle, 0, now)
+    assert intervals == sorted(intervals)
+    assert intervals[8] > 2 * DAY and intervals[-1] == 30 * DAY
+    assert idle.checks == 1 + 14 + 16 and idle.productive == 15
+
+
+class RecrawlSession(FakeSession):
+    """One region's due recrawl_frontier entries in bucket 0, and puuid_activity rows."""
+
+    def __init__(self, due):
+        super().__init__()
+        self.due = due
+        self.activity = {}
+        self.rescheduled = {}
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        if parameters is None:
+            parameters = getattr(query, "values", None)
+        if text == RECRAWL_SELECT_DUE_QUERY:
+            return [DueRow(datetime(2024, 1, 1), puuid) for puuid in self.due] if parameters[1] == 0 else []
+        if text == SELECT_ACTIVITY_QUERY:
+            row = self.activity.get(parameters[0])
+            return [row] if row else []
+        if text == UPSERT_ACTIVITY_QUERY:
+            self.activity[parameters[0]] = Activity(*parameters[1:])
+            return []
+        if text == RECRAWL_INSERT_ENTRY_QUERY:
+            self.rescheduled[parameters[3]] = parameters[2]
+        return self._rows(query)
+
+
+class StubSync:
+    count = 100
+
+    def __init__(self, new_matches, barrier=None):
+        self.new_matches = new_matches
+        self.barrier = barrier
+        self.api_calls = 0
+
+    def sync_counted(self, region, puuid):
+        found = self.new_matches[puuid]
+        calls = found // self.count + 1
+        if self.barrier is None:
+            self.api_calls += calls
+        else:
+            # Every sync is in flight before any finishes, and each bumps the shared total mid-sync
+            self.barrier.wait()
+            for _ in range(calls):
+                self.api_calls += 1
+                time.sleep(0.01)
+        return [f"NA1_{index}" for index in range(found)], calls
+
+
+def test_scheduler_reports_productive_calls_and_reschedules():
+    session = RecrawlSession(["active", "idle", "bulk"])
+    scheduler = RecrawlScheduler(
+        session, "americas", match_sync=StubSync({"active": 3, "idle": 0, "bulk": 100})
+    )
+    assert scheduler.step() == 3
+    # bulk: one full page plus an empty one; idle: one empty page
+    assert scheduler.stats() == {
+        "checks": 3,
+        "productive_checks": 2,
+        "api_calls": 4,
+        "productive_calls": 2,
+        "productive_fraction": 0.5,
+    }
+    assert set(session.activity) == {"active", "idle", "bulk"}
+    assert session.activity["idle"].last_active is None
+    assert session.rescheduled["idle"] > session.rescheduled["active"]
+
+
+def test_overlapping_syncs_count_their_own_calls():
+    new_matches = {"active": 3, "idle": 0, "bulk": 250}
+    session = RecrawlSession(list(new_matches))
+    match_sync = StubSync(new_matches, barrier=threading.Barrier(len(new_matches)))
+    scheduler = RecrawlScheduler(session, "americas", match_sync=match_sync)
+    assert scheduler.step() == 3
+    # bulk: three pages with matches; active: one; idle: one empty page
+    assert scheduler.api_calls == match_sync.api_calls == 5
+    assert scheduler.productive_calls == 4
@@ -0,0 +1,56 @@
+import python.utils.api_utils as api_utils
+from python.benchmarks.stub_server import StubRiotServer
+from python.utils.http_transport import RiotTransport
+from python.utils.response_cache import ResponseCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttls_and_hit_ratio():
+    clock = Clock()
+    cache = ResponseCache(":memory:", ttls={"Match": None, "Account_Matches": 300}, codec="gzip", clock=clock)
+    cache.put("Match", "https://americas/matches/NA1_1", None, b'{"info": {}}')
+    cache.put("Account_Matches", "https://americas/ids", {"start": 0, "count": 100}, b'["NA1_1"]')
+    cache.put("Account_Name", "https://americas/accounts/a/b", None, b"{}")
+
+    # Parameter order and None values do not change the key
+    assert cache.get("Account_Matches", "https://americas/ids", {"count": 100, "start": 0, "type": None}) == b'["NA1_1"]'
+    clock.now += 301
+    assert cache.get("Account_Matches", "https://americas/ids", {"start": 0, "count": 100}) is None
+    assert cache.get("Match", "https://americas/matches/NA1_1") == b'{"info": {}}'
+    assert not cache.caches("Account_Name")
+    assert cache.entries == 1
+
+    stats = cache.stats()["endpoints"]
+    assert stats["Match"] == {"hits": 1, "misses": 0, "hit_ratio": 1.0}
+    assert stats["Account_Matches"]["hit_ratio"] == 0.5
+
+
+def test_evicts_least_recently_used_by_size():
+    clock = Clock()
+    cache = ResponseCache(":memory:", max_bytes=2_000, ttls={"Match": None}, codec="gzip", clock=clock)
+    for index in range(10):
+        clock.now += 1
+        cache.put("Match", f"https://americas/matches/NA1_{index}", None, bytes(range(256)) * 2)
+    assert cache.stored_bytes <= 2_000
+    assert cache.get("Match", "https://americas/matches/NA1_0") is None
+    assert cache.get("Match", "https://americas/matches/NA1_9") is not None
+
+
+def test_call_endpoint_serves_repeats_from_cache(monkeypatch):
+    cache = ResponseCache(":memory:", codec="gzip")
+    monkeypatch.setattr(api_utils, "get_response_cache", lambda: cache)
+    with StubRiotServer() as stub:
+        monkeypatch.setattr(api_utils, "get_transport", lambda limiter: RiotTransport("RGAPI-test"))
+        url = stub.host_template.format(region="americas") + "/lol/match/v5/matches/NA1_42"
+        first = api_utils.call_endpoint(url, method="Match", raw=True)
+        assert api_utils.call_endpoint(url, method="Match", raw=True) == first
+        assert api_utils.call_endpoint(url, method="Match")["metadata"]["matchId"] == "NA1_42"
+        assert stub.requests_served == 1
+    assert cache_key("Match", url) == f"Match {url}"
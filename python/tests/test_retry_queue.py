@@ -0,0 +1,74 @@
+import python.Crawler.match_sync as match_sync
+from python.Crawler.match_sync import MatchSync
+from python.tests.test_match_sync import SyncSession, _api
+from python.utils.retry_queue import RetryQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backoff_dead_letters_and_replay():
+    clock = Clock()
+    queue = RetryQueue(":memory:", max_attempts=3, base_delay=10, max_delay=15, clock=clock, rng=lambda: 1.0)
+    attempts = []
+
+    def handler(payload):
+        attempts.append(clock.now)
+        if payload["fail"]:
+            raise RuntimeError("still down")
+
+    assert queue.enqueue("fetch", {"id": 1, "fail": True}, "HTTP 503")
+    assert not queue.enqueue("fetch", {"fail": True, "id": 1}), "the same operation is queued once"
+    queue.enqueue("other", {"id": 2})
+    assert queue.drain() == {"succeeded": 0, "retried": 0, "dead": 0}, "no handler, nothing due"
+
+    queue.register("fetch", handler)
+    clock.now += 9
+    assert queue.drain()["retried"] == 0
+    clock.now += 1
+    assert queue.drain() == {"succeeded": 0, "retried": 1, "dead": 0}
+    # Second retry waits 2 x base, capped at max_delay
+    clock.now += 14
+    assert queue.drain()["dead"] == 0
+    clock.now += 1
+    assert queue.drain() == {"succeeded": 0, "retried": 0, "dead": 1}
+    assert attempts == [1_010.0, 1_025.0]
+
+    (dead,) = queue.dead_letters()
+    assert (dead.kind, dead.payload, dead.attempts) == ("fetch", {"id": 1, "fail": True}, 3)
+    assert dead.last_error == "RuntimeError: still down"
+    assert queue.contains("fetch", {"id": 1, "fail": True})
+    assert queue.stats() == {"pending": {"other": 1}, "dead": {"fetch": 1}}
+    # Failing again while dead-lettered does not queue (or later bury) a second copy
+    assert not queue.enqueue("fetch", {"id": 1, "fail": True}, "HTTP 503")
+    assert queue.stats() == {"pending": {"other": 1}, "dead": {"fetch": 1}}
+
+    assert queue.replay("fetch") == 1
+    queue.register("fetch", lambda payload: None)
+    assert queue.drain() == {"succeeded": 1, "retried": 0, "dead": 0}
+    assert queue.stats() == {"pending": {"other": 1}, "dead": {}}
+
+
+def test_failed_sync_is_queued_and_resumed_from_checkpoint(monkeypatch):
+    clock = Clock()
+    queue = RetryQueue(":memory:", base_delay=10, clock=clock, rng=lambda: 0.0)
+    calls = []
+    pages = [[f"NA1_{i}" for i in range(100)], None, None, ["NA1_100"]]
+    monkeypatch.setattr(match_sync, "call_endpoint", _api(pages, calls))
+    sync = MatchSync(SyncSession(), retry_queue=queue)
+
+    assert len(sync.sync("americas", "p1", now=1_000)) == 100
+    assert queue.stats()["pending"] == {"match_sync": 1}
+
+    clock.now += 5
+    assert queue.drain() == {"succeeded": 0, "retried": 1, "dead": 0}
+    clock.now += 10
+    assert queue.drain() == {"succeeded": 1, "retried": 0, "dead": 0}
+    assert [call["start"] for call in calls] == [0, 100, 100, 100]
+    assert sync.state("p1").watermark == 1_000
+    assert queue.stats() == {"pending": {}, "dead": {}}
@@ -5,7 +5,7 @@ import python.utils.Cassandra
 import datetime
 
 from dotenv import load_dotenv
-from python.utils.api_utils import get_url, test_endpoint
+from python.utils.api_utils import get_url, call_endpoint
 from python.utils.logger import get_logger
 
 logger = get_logger("test_riot_api.log", namespace="test_riot_api")
@@ -22,7 +22,7 @@ if __name__ == "__main__":
     summoner_url = get_url(
         "Account_Name", gameName=summoner_name, tagLine=summoner_tag, region=region
     )
-    summoner_data = test_endpoint(summoner_url)
+    summoner_data = call_endpoint(summoner_url)
 
     if summoner_data:
         logger.info("Summoner Data Exists")
@@ -46,7 +46,7 @@ if __name__ == "__main__":
 
         filtered_params = {k: v for k, v in query_params.items() if v is not None}
         # Get Match Data IDs
-        match_data = test_endpoint(match_url, filtered_params)
+        match_data = call_endpoint(match_url, filtered_params)
 
         if match_data:
             logger.info("Match Data Exists")
@@ -55,7 +55,7 @@ if __name__ == "__main__":
                 match_id = match
                 print("Match ID:", match_id)
                 match_url = get_url("Match", matchId=match_id, region=region)
-                match_data = test_endpoint(match_url)
+                match_data = call_endpoint(match_url)
                 if match_data:
                     logger.info("Match Data Exists")
                     # print("Match Data:", match_data)
@@ -0,0 +1,116 @@
+import json
+import random
+from collections import Counter, namedtuple
+
+from python.benchmarks.fakes import AppliedRow, MemorySession
+from python.benchmarks.payloads import random_puuid, synthetic_matches
+from python.Pipeline.match_ingest import MatchIngestor
+from python.Pipeline.rollups import (
+    CHAMPION_UPDATE_QUERY,
+    CLAIM_QUERY,
+    MARK_QUERY,
+    PAYLOAD_SCAN_QUERY,
+    PLAYER_UPDATE_QUERY,
+    RollupEngine,
+    patch_of,
+)
+
+PayloadRow = namedtuple("PayloadRow", ["match_id", "codec", "payload"])
+
+
+class RollupSession(MemorySession):
+    """MemorySession that also keeps rollup_matches and the two counter tables."""
+
+    def __init__(self):
+        super().__init__()
+        self.claimed = set()
+        self.champions = Counter()
+        self.players = Counter()
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        if parameters is None:
+            parameters = getattr(query, "values", None)
+        if text == CLAIM_QUERY:
+            applied = parameters[0] not in self.claimed
+            self.claimed.add(parameters[0])
+            return [AppliedRow(applied)]
+        if text == MARK_QUERY:
+            self.claimed.add(parameters[0])
+            return []
+        if text == CHAMPION_UPDATE_QUERY:
+            games, wins, *key = parameters
+            self.champions[(*key, "games")] += games
+            self.champions[(*key, "wins")] += wins
+            return []
+        if text == PLAYER_UPDATE_QUERY:
+            *values, puuid = parameters
+            for index, value in enumerate(values):
+                self.players[(puuid, index)] += value
+            return []
+        if text == PAYLOAD_SCAN_QUERY:
+            return [PayloadRow(match_id, codec, payload) for match_id, (_, codec, payload, _) in
+                    self.match_payloads.items()]
+        if str(text).startswith("TRUNCATE"):
+            self.claimed.clear()
+            self.champions.clear()
+            self.players.clear()
+            return []
+        return super()._answer(query, parameters)
+
+
+def expected_totals(matches):
+    champions, players = Counter(), Counter()
+    for match in matches:
+        patch = patch_of(match["info"]["gameVersion"])
+        for p in match["info"]["participants"]:
+            key = (patch, p["championId"], p["teamPosition"])
+            champions[(*key, "games")] += 1
+            champions[(*key, "wins")] += p["win"]
+            players[(p["puuid"], 2)] += p["kills"]
+    return champions, players
+
+
+def test_rollups_count_each_match_once():
+    pool = [random_puuid(random.Random(seed)) for seed in range(30)]
+    matches = list(synthetic_matches(40, puuid_pool=pool))
+    session = RollupSession()
+    ingestor = MatchIngestor(session, rollups=RollupEngine(session, flush_matches=16))
+    for match in matches:
+        ingestor.store(match["metadata"]["matchId"], json.dumps(match).encode())
+    ingestor.rollups.flush()
+
+    champions, players = expected_totals(matches)
+    assert session.champions == champions
+    assert all(session.players[key] == value for key, value in players.items())
+    assert sum(session.players[(puuid, 0)] for puuid in pool) == 400
+    assert ingestor.rollups.stats()["matches_applied"] == 40
+
+    # Replays, from this engine or a second writer, are claimed already and leave the totals unchanged
+    replay = RollupEngine(session)
+    for match in matches[:10]:
+        ingestor.rollups.add(match["metadata"]["matchId"], match)
+        replay.add(match["metadata"]["matchId"], match)
+    assert ingestor.rollups.flush() == 0 and replay.flush() == 0
+    assert replay.stats()["duplicates"] == 10
+    assert session.champions == champions
+
+    # A rebuild from match_payloads reproduces the incremental totals
+    incremental = (Counter(session.champions), Counter(session.players))
+    stats = RollupEngine.rebuild(session)
+    assert stats["matches_applied"] == 40
+    assert (session.champions, session.players) == incremental
+
+
+def test_patch_and_missing_fields():
+    assert patch_of("14.23.640.4153") == "14.23"
+    assert patch_of("") == ""
+    match = next(synthetic_matches(1))
+    del match["info"]["participants"][0]["teamPosition"]
+    session = RollupSession()
+    engine = RollupEngine(session)
+    engine.add(match["metadata"]["matchId"], json.dumps(match))
+    assert engine.flush() == 1
+    patch = patch_of(match["info"]["gameVersion"])
+    champion = match["info"]["participants"][0]["championId"]
+    assert session.champions[(patch, champion, "", "games")] >= 1
@@ -0,0 +1,81 @@
+import struct
+
+from python.benchmarks.fakes import FakeSession
+from python.Crawler.match_writer import INSERT_PUUID_LWT_QUERY, UPSERT_PUUID_QUERY, MatchWriter
+from python.Crawler.seen_index import BloomFilter, SeenIndex
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"NA1_{i}")
+    assert all(f"NA1_{i}" in bloom for i in range(10000))
+
+    false_positives = sum(f"EUW1_{i}" in bloom for i in range(10000))
+    assert false_positives / 10000 < 0.02
+    assert 0.005 < bloom.estimated_false_positive_rate < 0.02
+
+
+def test_bloom_filter_round_trips_through_file(tmp_path):
+    bloom = BloomFilter(1000)
+    bloom.add("NA1_1")
+    path = tmp_path / "seen.bloom"
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert "NA1_1" in loaded
+    assert loaded.count == 1
+    assert loaded.num_bits == bloom.num_bits
+    assert loaded.flags == 0
+
+    # Files from before the flags field load as not warmed
+    legacy = tmp_path / "legacy.bloom"
+    legacy.write_bytes(struct.pack("<8sQQQ", b"LTBLOOM1", bloom.num_bits, bloom.num_hashes, 1) + bytes(bloom.bits))
+    assert "NA1_1" in BloomFilter.load(legacy) and BloomFilter.load(legacy).flags == 0
+
+
+def test_seen_index_classifies_keys():
+    index = SeenIndex(capacity=1000, lru_size=2)
+    assert index.lookup("a") == SeenIndex.NEW
+    index.add_many(["a", "b", "c"])
+    assert index.lookup("c") == SeenIndex.SEEN
+    # "a" fell out of the LRU but is still in the Bloom filter
+    assert index.lookup("a") == SeenIndex.UNCERTAIN
+    assert index.stats()["hits"] == 1
+
+
+def test_writer_skips_recently_written_rows():
+    session = FakeSession()
+    writer = MatchWriter(session, seen_index=SeenIndex(capacity=1000))
+    page = [f"NA1_{i}" for i in range(100)]
+
+    assert writer.add_matches("puuid-1", page) == 100
+    assert writer.add_matches("puuid-1", page) == 0
+    assert writer.add_matches("puuid-2", page[:10]) == 10
+    assert session.total_statements == 110
+
+
+def test_cold_index_keeps_conditional_puuid_inserts(tmp_path):
+    # A fresh index only knows this run's writes, so "new" PUUIDs may already exist in Cassandra
+    session = FakeSession()
+    cold = SeenIndex(capacity=1000)
+    writer = MatchWriter(session, seen_index=cold)
+    assert writer.add_puuids(["p1", "p2"], "americas", if_not_exists=True) == 2
+    assert session.statements[INSERT_PUUID_LWT_QUERY] == 2
+    assert session.statements[UPSERT_PUUID_QUERY] == 0
+
+    # A file saved by an index that was never warmed does not vouch for other writers' PUUIDs
+    cold.save(str(tmp_path / "cold.bloom"))
+    assert not SeenIndex.load(str(tmp_path / "cold.bloom"), capacity=1000).warmed
+
+    # Warmed from Cassandra, saved and reloaded: unseen PUUIDs skip the transaction
+    warmed = SeenIndex(capacity=1000)
+    warmed.warm(FakeSession())
+    warmed.save(str(tmp_path / "warm.bloom"))
+    warm = SeenIndex.load(str(tmp_path / "warm.bloom"), capacity=1000)
+    assert warm.warmed
+    session = FakeSession()
+    writer = MatchWriter(session, seen_index=warm)
+    assert writer.add_puuids(["p3", "p4"], "americas", if_not_exists=True) == 2
+    assert session.statements[UPSERT_PUUID_QUERY] == 2
+    assert session.statements[INSERT_PUUID_LWT_QUERY] == 0
@@ -0,0 +1,95 @@
+import threading
+from datetime import timedelta
+
+import python.Crawler.async_crawler as async_crawler
+import python.Crawler.frontier as frontier
+from python.benchmarks.fakes import AppliedRow
+from python.Crawler.match_sync import ADVANCE_QUERY, SELECT_STATE_QUERY, SyncState
+from python.Crawler.seen_index import SeenIndex
+from python.Crawler.snowball_crawler import SnowballCrawler
+from python.tests.test_frontier import T0, Clock, FrontierSession
+
+
+class CrawlSession(FrontierSession):
+    """FrontierSession that also keeps puuid_sync."""
+
+    def __init__(self):
+        super().__init__()
+        self.sync = {}
+
+    def _answer(self, query, parameters):
+        text = getattr(query, "query_string", query)
+        if text == SELECT_STATE_QUERY:
+            row = self.sync.get(parameters[0])
+            return [row] if row else []
+        if text == ADVANCE_QUERY:
+            watermark, window_end, next_start, puuid, expected = parameters
+            if self.sync.get(puuid, SyncState(None, None, None)).watermark != expected:
+                return [AppliedRow(False)]
+            self.sync[puuid] = SyncState(watermark, window_end, next_start)
+            return [AppliedRow(True)]
+        return super()._answer(query, parameters)
+
+
+class _Limiter:
+    async def acquire_async(self, region, method=None):
+        pass
+
+
+class RiotStub:
+    """Serves match histories and Match payloads; `played` maps match ID -> (start time, participants)."""
+
+    def __init__(self, played):
+        self.played = played
+        self.history_calls = []
+
+    def __call__(self, url, params=None, region=None, method=None, throttle=True, lookup_cache=True):
+        if method == "Match":
+            match_id = url.rsplit("/", 1)[1]
+            return {"metadata": {"matchId": match_id, "participants": self.played[match_id][1]}}
+        puuid = url.split("/")[-2]
+        self.history_calls.append((puuid, params.get("startTime")))
+        ids = [
+            match_id
+            for match_id, (started, participants) in sorted(self.played.items(), key=lambda item: -item[1][0])
+            if puuid in participants and started >= params.get("startTime", 0)
+        ]
+        return ids[params["start"]:params["start"] + params["count"]]
+
+
+def test_recrawl_resumes_from_watermark_after_restart(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(frontier, "utcnow", clock)
+    riot = RiotStub({"NA1_1": (100, ["p1", "p2", "p3"])})
+    monkeypatch.setattr(async_crawler, "call_endpoint", riot)
+    monkeypatch.setattr(async_crawler, "rate_limiter", _Limiter())
+    session = CrawlSession()
+    stored = []
+
+    def on_match(region, match_id, payload):
+        stored.append((match_id, threading.current_thread() is threading.main_thread()))
+
+    crawler = SnowballCrawler(
+        session, "americas", batch_size=10, recrawl_seconds=3600, seen_index=SeenIndex(capacity=1000),
+        on_match=on_match,
+    )
+    crawler.seed(["p1"])
+    assert crawler.step() == 1
+    assert riot.history_calls == [("p1", None)]
+    # The callback may block, so it runs off the event loop's thread
+    assert stored == [("NA1_1", False)]
+    assert set(session.members) == {"p1", "p2", "p3"}
+    watermark = session.sync["p1"].watermark
+    assert watermark is not None
+
+    # A new game, then a restart once p1 is due again: discovered players first, p1 only from its watermark
+    riot.played["NA1_2"] = (watermark + 60, ["p1", "p4"])
+    riot.history_calls.clear()
+    clock.now = T0 + timedelta(hours=2)
+    restarted = SnowballCrawler(session, "americas", batch_size=10, seen_index=SeenIndex(capacity=1000))
+    assert restarted.step() == 3
+    assert sorted(riot.history_calls) == [("p1", watermark), ("p2", None), ("p3", None)]
+    assert "p4" in session.members
+    assert all(session.sync[puuid].watermark >= watermark for puuid in ("p1", "p2", "p3"))
+    assert restarted.step() == 1
+    assert restarted.step() == 0
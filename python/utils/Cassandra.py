@@ -1,31 +1,178 @@
+import atexit
 import os
+import threading
 from dotenv import load_dotenv
-from cassandra.cluster import Cluster
+from cassandra import ConsistencyLevel
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, Cluster, ExecutionProfile
 from cassandra.auth import PlainTextAuthProvider
+from cassandra.policies import ConstantSpeculativeExecutionPolicy, DCAwareRoundRobinPolicy, TokenAwarePolicy
+from cassandra.query import PreparedStatement, SimpleStatement
+from python.config import (
+    CASSANDRA_CONTACT_POINTS,
+    CASSANDRA_FETCH_SIZE,
+    CASSANDRA_LOCAL_DC,
+    CASSANDRA_PORT,
+    CASSANDRA_READ_CONSISTENCY,
+    CASSANDRA_REQUEST_TIMEOUT,
+    CASSANDRA_SCAN_CONSISTENCY,
+    CASSANDRA_SCAN_TIMEOUT,
+    CASSANDRA_SPECULATIVE_ATTEMPTS,
+    CASSANDRA_SPECULATIVE_DELAY,
+    CASSANDRA_WRITE_CONSISTENCY,
+)
 from python.utils.logger import get_logger  # Assuming this is your custom logger
+from python.utils.metrics import instrument_session
+
+"""Cassandra connections.
+
+    Every cluster routes token-aware to the replicas of a statement's partition within the local datacenter and
+    is built with named execution profiles (configured in python/config.py):
+
+        default / "write"  CASSANDRA_WRITE_CONSISTENCY, for crawl and ingest writes.
+        "read"             CASSANDRA_READ_CONSISTENCY with speculative executions, for serving reads.
+        "scan"             CASSANDRA_SCAN_CONSISTENCY with a long timeout, for full-table streams.
+
+    Pass `execution_profile=PROFILE_READ` (etc.) to `session.execute`/`execute_async` to pick one. The driver
+    only speculates on statements marked idempotent, which `CassandraClient.prepare` does for SELECTs. A
+    client's session routes `session.prepare` through that cache, so callers handed the bare session (such as
+    the one from `get_shared_session`) get it too.
+
+Classes:
+    CassandraClient: Connects to a keyspace and caches prepared statements.
+
+Functions:
+    stream_rows(session, query, parameters, fetch_size, execution_profile, paging_state): Yields the rows of
+        a large query page by page, fetching the next page while the current one is consumed.
+    default_profiles(local_dc): The execution profiles configured by the environment.
+    get_shared_session(keyspace): The process-wide session for a keyspace, connected on first use.
+"""
 
 load_dotenv()
 
+PROFILE_WRITE = "write"
+PROFILE_READ = "read"
+PROFILE_SCAN = "scan"
+
+# Process-wide clients by keyspace, connected on first use (see `get_shared_session`)
+_shared_clients = {}
+_shared_lock = threading.Lock()
+
+
+def _consistency(name):
+    return ConsistencyLevel.name_to_value[name.upper()]
+
+
+def default_profiles(local_dc=None):
+    """
+    Builds the execution profiles from the environment.
+
+    Args:
+        local_dc (str, optional): Datacenter to route to. Defaults to CASSANDRA_LOCAL_DC.
+
+    Returns:
+        dict: Profile name (and EXEC_PROFILE_DEFAULT) -> `ExecutionProfile`.
+    """
+
+    def routing():
+        # Each profile needs its own policy instance; the driver initializes policies per profile
+        return TokenAwarePolicy(DCAwareRoundRobinPolicy(local_dc=local_dc or CASSANDRA_LOCAL_DC))
+
+    def write_profile():
+        return ExecutionProfile(
+            load_balancing_policy=routing(),
+            consistency_level=_consistency(CASSANDRA_WRITE_CONSISTENCY),
+            serial_consistency_level=ConsistencyLevel.LOCAL_SERIAL,
+            request_timeout=CASSANDRA_REQUEST_TIMEOUT,
+        )
+
+    speculation = None
+    if CASSANDRA_SPECULATIVE_DELAY > 0 and CASSANDRA_SPECULATIVE_ATTEMPTS > 0:
+        speculation = ConstantSpeculativeExecutionPolicy(CASSANDRA_SPECULATIVE_DELAY, CASSANDRA_SPECULATIVE_ATTEMPTS)
+    return {
+        EXEC_PROFILE_DEFAULT: write_profile(),
+        PROFILE_WRITE: write_profile(),
+        PROFILE_READ: ExecutionProfile(
+            load_balancing_policy=routing(),
+            consistency_level=_consistency(CASSANDRA_READ_CONSISTENCY),
+            serial_consistency_level=ConsistencyLevel.LOCAL_SERIAL,
+            request_timeout=CASSANDRA_REQUEST_TIMEOUT,
+            speculative_execution_policy=speculation,
+        ),
+        PROFILE_SCAN: ExecutionProfile(
+            load_balancing_policy=routing(),
+            consistency_level=_consistency(CASSANDRA_SCAN_CONSISTENCY),
+            request_timeout=CASSANDRA_SCAN_TIMEOUT,
+        ),
+    }
+
+
+def stream_rows(session, query, parameters=None, fetch_size=None, execution_profile=PROFILE_SCAN, paging_state=None):
+    """
+    Yields every row of a query, one page at a time.
+
+    The request for the next page is sent before the rows of the current one are yielded, so the round trip
+    overlaps with whatever the caller does with them. Only one page is held in memory besides the one in flight.
+
+    Args:
+        session (cassandra.cluster.Session): The session to query.
+        query (str or Statement): CQL text, or a simple or prepared statement.
+        parameters (tuple, optional): Bind values.
+        fetch_size (int, optional): Rows per page. Defaults to CASSANDRA_FETCH_SIZE.
+        execution_profile (str, optional): Execution profile name. Defaults to "scan".
+        paging_state (bytes, optional): Resume from the page a previous stream stopped at.
+
+    Yields:
+        The rows, as produced by the profile's row factory.
+    """
+    if isinstance(query, str):
+        query = SimpleStatement(query, fetch_size=fetch_size or CASSANDRA_FETCH_SIZE)
+    elif isinstance(query, PreparedStatement):
+        query = query.bind(parameters or ())
+        query.fetch_size = fetch_size or CASSANDRA_FETCH_SIZE
+        parameters = None
+    else:
+        query.fetch_size = fetch_size or query.fetch_size or CASSANDRA_FETCH_SIZE
+
+    future = session.execute_async(
+        query, parameters, execution_profile=execution_profile, paging_state=paging_state
+    )
+    while future is not None:
+        result = future.result()
+        rows, paging_state = result.current_rows, result.paging_state
+        future = (
+            session.execute_async(query, parameters, execution_profile=execution_profile, paging_state=paging_state)
+            if paging_state
+            else None
+        )
+        yield from rows
+
 
 class CassandraClient:
     """
     A class to handle Cassandra database connections.
     """
 
-    def __init__(self, keyspace, contact_points=None, port=9042):
+    def __init__(self, keyspace, contact_points=None, port=None, local_dc=None, profiles=None):
         """
         Initialize the Cassandra client with the provided keyspace, contact points, and port.
 
         Args:
             keyspace (str): The keyspace to connect to.
-            contact_points (list, optional): List of Cassandra nodes to connect to. Defaults to ["localhost"].
-            port (int, optional): The port number for Cassandra connections. Defaults to 9042.
+            contact_points (list, optional): List of Cassandra nodes to connect to.
+                Defaults to CASSANDRA_CONTACT_POINTS.
+            port (int, optional): The port number for Cassandra connections. Defaults to CASSANDRA_PORT.
+            local_dc (str, optional): Datacenter to route requests to. Defaults to CASSANDRA_LOCAL_DC.
+            profiles (dict, optional): Execution profiles by name, added to or replacing `default_profiles()`.
         """
         self.keyspace = keyspace
-        self.contact_points = contact_points or ["localhost"]
-        self.port = port
+        self.contact_points = contact_points or CASSANDRA_CONTACT_POINTS
+        self.port = port or CASSANDRA_PORT
+        self.profiles = {**default_profiles(local_dc), **(profiles or {})}
         self.cluster = None
         self.session = None
+        self._prepared = {}
+        self._prepared_lock = threading.Lock()
+        self._prepare_on_session = None
         self.logger = get_logger("Cassandra.log", namespace="Cassandra")
 
     def connect(self):
@@ -55,10 +202,17 @@ class CassandraClient:
                 password=cassandra_password,
             )
             self.cluster = Cluster(
-                self.contact_points, auth_provider=auth_provider, port=self.port
+                self.contact_points,
+                auth_provider=auth_provider,
+                port=self.port,
+                execution_profiles=self.profiles,
             )
-            self.session = self.cluster.connect()
-            self.session.set_keyspace(self.keyspace)
+            session = self.cluster.connect()
+            session.set_keyspace(self.keyspace)
+            session.default_fetch_size = CASSANDRA_FETCH_SIZE
+            # Per-statement latency histograms (see python/utils/metrics.py)
+            instrument_session(session)
+            self.adopt(session)
             self.logger.info(
                 f"Successfully connected to Cassandra keyspace: {self.keyspace}"
             )
@@ -81,6 +235,57 @@ class CassandraClient:
             raise Exception("Session is not initialized. Call 'connect()' first.")
         return self.session
 
+    def adopt(self, session):
+        """
+        Makes `session` this client's session and routes its `prepare` through `CassandraClient.prepare`.
+
+        Modules that call `session.prepare` directly then share the client's statement cache, and their SELECTs
+        are marked idempotent, so the "read" profile's speculative executions apply to them.
+
+        Args:
+            session (cassandra.cluster.Session): A connected session.
+
+        Returns:
+            cassandra.cluster.Session: `session`, for chaining.
+        """
+        self._prepare_on_session = session.prepare
+        session.prepare = self.prepare
+        self.session = session
+        return session
+
+    def prepare(self, query, idempotent=None):
+        """
+        Prepares `query` once per client; later calls return the cached statement without a round trip.
+
+        Args:
+            query (str): CQL text.
+            idempotent (bool, optional): Whether the statement may be retried or speculatively executed.
+                Defaults to True for SELECTs and False otherwise.
+
+        Returns:
+            cassandra.query.PreparedStatement: The prepared statement.
+        """
+        statement = self._prepared.get(query)
+        if statement is None:
+            with self._prepared_lock:
+                statement = self._prepared.get(query)
+                if statement is None:
+                    self.get_session()  # Raises unless connected
+                    statement = self._prepare_on_session(query)
+                    if idempotent is None:
+                        idempotent = query.lstrip().upper().startswith("SELECT")
+                    statement.is_idempotent = idempotent
+                    self._prepared[query] = statement
+        return statement
+
+    def stream(self, query, parameters=None, fetch_size=None, execution_profile=PROFILE_SCAN, paging_state=None):
+        """
+        Yields every row of a query page by page on this client's session (see `stream_rows`).
+        """
+        if isinstance(query, str) and parameters:
+            query = self.prepare(query)
+        return stream_rows(self.get_session(), query, parameters, fetch_size, execution_profile, paging_state)
+
     def close(self):
         """
         Closes the Cassandra cluster connection gracefully.
@@ -90,7 +295,32 @@ class CassandraClient:
                 self.logger.info("Closing Cassandra cluster connection...")
                 self.cluster.shutdown()
                 self.session = None  # Reset session to None after closing
+                self._prepared.clear()
                 self.logger.info("Cassandra cluster connection closed.")
             except Exception as error:
                 self.logger.error(f"Error closing connection to Cassandra: {error}")
                 raise
+
+
+def get_shared_session(keyspace="raw_league_data"):
+    """
+    Returns the process-wide session for `keyspace`, connecting on first use.
+
+    Every caller in a process shares one cluster connection per keyspace, which is closed at exit. Nothing
+    connects at import time, so modules that need a session can be imported without a reachable cluster. The
+    session's `prepare` is the client's caching one (see `CassandraClient.adopt`).
+
+    Args:
+        keyspace (str, optional): The keyspace to connect to. Defaults to "raw_league_data".
+
+    Returns:
+        cassandra.cluster.Session: The connected session.
+    """
+    with _shared_lock:
+        client = _shared_clients.get(keyspace)
+        if client is None:
+            client = CassandraClient(keyspace=keyspace)
+            client.connect()
+            _shared_clients[keyspace] = client
+            atexit.register(client.close)
+        return client.get_session()
@@ -1,21 +1,100 @@
 import os
+import threading
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import pool
+from python.config import POSTGRES_HOST, POSTGRES_POOL_MAX, POSTGRES_POOL_MIN, POSTGRES_PORT
 from python.utils.logger import get_logger
 from psycopg2 import sql
 
 logger = get_logger("PostgreSQL.log", namespace="PostgreSQL")
 
 
+def _connection_kwargs(database):
+    return {
+        "host": POSTGRES_HOST,
+        "port": POSTGRES_PORT,
+        "database": database,
+        "user": os.getenv("POSTGRES_USER"),
+        "password": os.getenv("POSTGRES_PASSWORD"),
+    }
+
+
 def get_postgres_connection(database):
     try:
-        connection = psycopg2.connect(
-            host="localhost",
-            port="5432",
-            database=database,
-            user=os.getenv("POSTGRES_USER"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-        )
+        connection = psycopg2.connect(**_connection_kwargs(database))
         return connection
     except Exception as error:
         logger.error(f"Error connecting to PostgreSQL: {error}")
         raise
+
+
+class PostgresPool:
+    """
+    A bounded, thread-safe pool of PostgreSQL connections to one database.
+    """
+
+    def __init__(self, database, min_connections=None, max_connections=None):
+        """
+        Initialize the pool. Connections are opened lazily up to `max_connections`.
+
+        Args:
+            database (str): The database to connect to.
+            min_connections (int, optional): Connections kept open. Defaults to POSTGRES_POOL_MIN.
+            max_connections (int, optional): Upper bound on open connections; callers block for a free one
+                once it is reached. Defaults to POSTGRES_POOL_MAX.
+        """
+        self.database = database
+        self.min_connections = min_connections or POSTGRES_POOL_MIN
+        self.max_connections = max_connections or POSTGRES_POOL_MAX
+        self._pool = None
+        self._available = threading.BoundedSemaphore(self.max_connections)
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                try:
+                    self._pool = pool.ThreadedConnectionPool(
+                        self.min_connections, self.max_connections, **_connection_kwargs(self.database)
+                    )
+                    logger.info(
+                        f"Opened PostgreSQL pool for {self.database} "
+                        f"({self.min_connections}-{self.max_connections} connections)"
+                    )
+                except Exception as error:
+                    logger.error(f"Error connecting to PostgreSQL: {error}")
+                    raise
+            return self._pool
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for one transaction: committed on success, rolled back on error.
+
+        Yields:
+            psycopg2.extensions.connection: A pooled connection.
+        """
+        # ThreadedConnectionPool raises instead of waiting when exhausted, so bound borrowers here
+        with self._available:
+            connection_pool = self._get_pool()
+            connection = connection_pool.getconn()
+            broken = False
+            try:
+                yield connection
+                connection.commit()
+            except Exception:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    broken = True
+                raise
+            finally:
+                connection_pool.putconn(connection, close=broken or bool(connection.closed))
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                logger.info("Closed PostgreSQL pool for %s", self.database)
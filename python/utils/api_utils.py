@@ -1,12 +1,17 @@
-import os
+import json
 import requests
 
 from python.utils.logger import get_logger
-from python.config import BASE_URLS
+from python.utils.http_transport import get_transport
+from python.utils.rate_limiter import RateLimiter
+from python.utils.response_cache import get_response_cache
+from python.config import BASE_URLS, RIOT_APP_RATE_LIMIT
 
 # Create logs directory if it doesn't exist
 logger = get_logger("api_utils.log", namespace="api_utils")
-api_key = os.getenv("RIOT_API_KEY")
+
+# Shared by every caller in the process (threads and asyncio tasks alike)
+rate_limiter = RateLimiter(RIOT_APP_RATE_LIMIT)
 
 
 def get_url(endpoint_key, **kwargs):
@@ -17,26 +22,74 @@ def get_url(endpoint_key, **kwargs):
     return url_template.format(**kwargs)
 
 
-def call_endpoint(url, params=None):
-    api_key = os.getenv("RIOT_API_KEY")
-    if not api_key:
-        print("Error: RIOT_API_KEY is missing. Ensure it's set in the .env file.")
+def cached_response(url, params=None, method=None, raw=False):
+    """Returns a response from the response cache without calling the API.
+
+    Args:
+        url (str): The fully formatted endpoint URL (see `get_url`).
+        params (dict, optional): Query parameters.
+        method (str, optional): Endpoint key from BASE_URLS; only cached endpoints are looked up.
+        raw (bool, optional): Return the undecoded body bytes instead of parsed JSON. Defaults to False.
+
+    Returns:
+        dict or list or bytes or None: The cached body, or None if it is not cached (or caching is disabled).
+    """
+    cache = get_response_cache()
+    if cache is None or not cache.caches(method):
+        return None
+    body = cache.get(method, url, params)
+    if body is None:
+        return None
+    return body if raw else json.loads(body)
+
+
+def call_endpoint(url, params=None, region=None, method=None, throttle=True, raw=False, lookup_cache=True):
+    """Calls a Riot API endpoint through the shared transport and returns the decoded JSON.
+
+    Requests reuse pooled keep-alive connections, take a rate-limit slot per attempt, back off on 429
+    for the Retry-After period and retry 5xx responses and connection errors with jittered back-off.
+    With RESPONSE_CACHE_PATH set, cached endpoints (see `python.utils.response_cache`) are answered from
+    the on-disk cache when possible, without taking a rate-limit slot, and successful responses are stored.
+
+    Args:
+        url (str): The fully formatted endpoint URL (see `get_url`).
+        params (dict, optional): Query parameters.
+        region (str, optional): Routing value the limits are scoped to. Defaults to the URL's hostname label.
+        method (str, optional): Endpoint key from BASE_URLS used for method-level limits and latency records.
+        throttle (bool, optional): Take a rate-limit slot before the first attempt. Pass False when the
+            caller has already acquired one (e.g. via `rate_limiter.acquire_async`). Defaults to True.
+        raw (bool, optional): Return the undecoded body bytes instead of parsed JSON. Defaults to False.
+        lookup_cache (bool, optional): Try the response cache first. Pass False when the caller has already
+            missed it via `cached_response`; the response is still stored. Defaults to True.
+
+    Returns:
+        dict or list or bytes or None: The response body, or None if the request failed.
+    """
+    if lookup_cache:
+        cached = cached_response(url, params, method, raw)
+        if cached is not None:
+            return cached
+
+    transport = get_transport(rate_limiter)
+    if not transport:
         logger.error(
             "Error: RIOT_API_KEY is missing. Ensure it's set in the .env file."
         )
         return None
 
-    headers = {"X-Riot-Token": api_key}
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = transport.get(
+            url, params, region=region, method=method, throttle=throttle
+        )
         response.raise_for_status()
-        logger.info(f"API call to {response.url} successful.")
-        return response.json()
+        logger.info("API call to %s successful.", response.url)
+        cache = get_response_cache()
+        if cache is not None:
+            cache.put(method, url, params, response.content)
+        return response.content if raw else response.json()
     except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP Error: {e.response.status_code} - {e.response.reason}")
-        print(f"HTTP Error: {e.response.status_code} - {e.response.reason}")
+        logger.error("HTTP Error: %s - %s", e.response.status_code, e.response.reason)
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"Request Error: {e}")
-        print(f"Request Error: {e}")
+        logger.error("Request Error: %s", e)
     return None
@@ -0,0 +1,61 @@
+import gzip
+
+from python.config import PAYLOAD_CODEC, PAYLOAD_COMPRESSION_LEVEL
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency: pip install LeagueTracker[zstd]
+    zstandard = None
+
+
+def available_codecs():
+    """Returns the payload codecs usable in this environment."""
+    return ["zstd", "gzip"] if zstandard else ["gzip"]
+
+
+def default_codec():
+    """Returns PAYLOAD_CODEC, falling back to gzip when zstandard is not installed."""
+    return PAYLOAD_CODEC if PAYLOAD_CODEC in available_codecs() else "gzip"
+
+
+def compress_payload(data, codec=None, level=None):
+    """
+    Compresses a raw payload.
+
+    Args:
+        data (bytes): The payload to compress.
+        codec (str, optional): "zstd" or "gzip". Defaults to `default_codec()`.
+        level (int, optional): Compression level. Defaults to PAYLOAD_COMPRESSION_LEVEL.
+
+    Returns:
+        tuple: (codec, compressed bytes).
+    """
+    codec = codec or default_codec()
+    level = level or PAYLOAD_COMPRESSION_LEVEL
+    if codec == "zstd":
+        if not zstandard:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        return codec, zstandard.ZstdCompressor(level=level).compress(data)
+    if codec == "gzip":
+        return codec, gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+    raise ValueError(f"Unknown payload codec '{codec}'")
+
+
+def decompress_payload(codec, data):
+    """
+    Decompresses a payload written by `compress_payload`.
+
+    Args:
+        codec (str): The codec the payload was written with.
+        data (bytes): The compressed payload.
+
+    Returns:
+        bytes: The raw payload.
+    """
+    if codec == "zstd":
+        if not zstandard:
+            raise ValueError("zstd decompression requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown payload codec '{codec}'")
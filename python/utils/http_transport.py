@@ -0,0 +1,190 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from python.utils.logger import get_logger
+from python.utils.metrics import API_LATENCY, API_RESPONSES, LatencyRecorder
+from python.config import (
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_TIMEOUT,
+    MAX_RATE_LIMIT_RETRIES,
+)
+
+logger = get_logger("http_transport.log", namespace="http_transport")
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+def get_routing_value(url):
+    """Returns the routing value (e.g. 'americas') from a Riot API URL's hostname."""
+    return (urlparse(url).hostname or "").split(".")[0]
+
+
+class RiotTransport:
+    """
+    Pooled, keep-alive HTTP transport for the Riot API.
+
+    One `requests.Session` is shared by every caller so connections to each routing host are reused
+    instead of paying TCP+TLS setup per call. The transport also owns the wire-level policies: the API
+    key header, gzip negotiation, rate limiting, 429 back-off and bounded retries with jitter for 5xx
+    responses and connection errors.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        rate_limiter=None,
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=HTTP_MAX_RETRIES,
+        backoff_base=HTTP_BACKOFF_BASE,
+        backoff_max=HTTP_BACKOFF_MAX,
+        timeout=HTTP_TIMEOUT,
+    ):
+        """
+        Initialize the transport.
+
+        Args:
+            api_key (str): Riot API key sent as X-Riot-Token.
+            rate_limiter (RateLimiter, optional): Limiter consulted before every attempt.
+            pool_connections (int, optional): Number of per-host pools to keep.
+            pool_maxsize (int, optional): Maximum keep-alive connections per host.
+            max_retries (int, optional): Retries for 5xx responses and connection errors.
+            backoff_base (float, optional): Base delay in seconds for exponential back-off.
+            backoff_max (float, optional): Upper bound on a single back-off delay in seconds.
+            timeout (float, optional): Connect/read timeout per attempt in seconds.
+        """
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.latency = LatencyRecorder()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"X-Riot-Token": api_key, "Accept-Encoding": "gzip, deflate"}
+        )
+
+    def _backoff(self, attempt):
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def get(self, url, params=None, region=None, method=None, throttle=True):
+        """
+        Sends a GET request, retrying 429s, 5xx responses and connection errors.
+
+        Args:
+            url (str): The fully formatted endpoint URL.
+            params (dict, optional): Query parameters.
+            region (str, optional): Routing value for rate limiting. Defaults to the URL's hostname label.
+            method (str, optional): Endpoint key used for method limits and latency records.
+            throttle (bool, optional): Take a rate-limit slot before the first attempt. Defaults to True.
+
+        Returns:
+            requests.Response: The final response (which may still be an error status).
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed to get a response.
+        """
+        region = region or get_routing_value(url)
+        key = method or urlparse(url).hostname
+        rate_limited = 0
+        failures = 0
+
+        while True:
+            if self.rate_limiter and (throttle or rate_limited or failures):
+                self.rate_limiter.acquire(region, method)
+
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                elapsed = time.perf_counter() - started
+                self.latency.record(key, elapsed)
+                API_LATENCY.observe(elapsed, key)
+                API_RESPONSES.inc(key, "error")
+                if failures >= self.max_retries:
+                    raise
+                delay = self._backoff(failures)
+                failures += 1
+                logger.warning("Request Error: %s; retry %d in %.2fs", e, failures, delay)
+                time.sleep(delay)
+                continue
+            elapsed = time.perf_counter() - started
+            self.latency.record(key, elapsed)
+            API_LATENCY.observe(elapsed, key)
+            API_RESPONSES.inc(key, response.status_code)
+
+            if self.rate_limiter:
+                self.rate_limiter.update_from_headers(region, response.headers, method)
+
+            if response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+                rate_limited += 1
+                if self.rate_limiter:
+                    self.rate_limiter.penalize(
+                        region,
+                        float(response.headers.get("Retry-After", 1)),
+                        method,
+                        response.headers.get("X-Rate-Limit-Type"),
+                    )
+                else:
+                    time.sleep(float(response.headers.get("Retry-After", 1)))
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES and failures < self.max_retries:
+                delay = self._backoff(failures)
+                failures += 1
+                logger.warning(
+                    "HTTP Error: %s from %s; retry %d in %.2fs", response.status_code, key, failures, delay
+                )
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(rate_limiter=None):
+    """
+    Returns the process-wide transport, creating it on first use.
+
+    The API key is read from RIOT_API_KEY once, when the transport is created.
+
+    Args:
+        rate_limiter (RateLimiter, optional): Limiter to attach when the transport is created.
+
+    Returns:
+        RiotTransport or None: The shared transport, or None if RIOT_API_KEY is not set.
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                api_key = os.getenv("RIOT_API_KEY")
+                if not api_key:
+                    return None
+                _transport = RiotTransport(api_key, rate_limiter=rate_limiter)
+    return _transport
@@ -1,6 +1,147 @@
+import atexit
 import os
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from python.config import LOG_BACKUP_COUNT, LOG_DIR, LOG_MAX_BYTES, LOG_QUEUED, LOG_RATE_LIMIT
+
+"""Per-namespace file loggers.
+
+    By default every namespace writes synchronously to its own rotating file. With LOG_QUEUED set, loggers only
+    put records on a queue; a single background listener formats them and routes each one to its namespace's
+    file, so neither formatting nor file writes and rotation run on the caller's thread. Message arguments are
+    formatted by the listener, so they must not be mutated after the call.
+
+    Hot paths log with lazy %-style arguments (`logger.info("Wrote %d rows", n)`), which keeps the message
+    template constant. LOG_RATE_LIMIT uses that template to sample repetitive INFO/DEBUG messages per namespace.
+
+Classes:
+    RateLimitFilter: Lets through a bounded number of records per message template and period.
+
+Functions:
+    get_logger(log_file_name, namespace): Creates or returns a configured namespace logger.
+    flush_logging(): Waits until every queued record has been written.
+"""
+
+_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Templates tracked by a RateLimitFilter before its state is reset (f-string messages never repeat)
+_MAX_TEMPLATES = 10_000
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `limit` records per logger and message template every `period` seconds.
+    """
+
+    def __init__(self, limit, period, clock=time.monotonic):
+        """
+        Args:
+            limit (int): Records allowed per template and period.
+            period (float): Length of a period in seconds.
+            clock (callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self.clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec):
+        """Builds a filter from a "count:seconds" string, or returns None for an empty one."""
+        if not spec:
+            return None
+        limit, period = spec.split(":")
+        return cls(int(limit), float(period))
+
+    def filter(self, record):
+        # Warnings and errors are never sampled
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = self.clock()
+        with self._lock:
+            if len(self._windows) >= _MAX_TEMPLATES:
+                self._windows.clear()
+            started, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.period:
+                started, count = now, 0
+            if count >= self.limit:
+                self._windows[key] = (started, count, suppressed + 1)
+                return False
+            self._windows[key] = (started, count + 1, 0)
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread instead of doing it in `prepare`."""
+
+    def prepare(self, record):
+        return record
+
+
+class _NamespaceRouter(logging.Handler):
+    """Listener-side handler that passes each record to the file handler of the logger that created it."""
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+
+    def emit(self, record):
+        handler = self.handlers.get(record.name)
+        if handler is not None:
+            handler.handle(record)
+
+
+_queue = None
+_listener = None
+_router = None
+_listener_lock = threading.Lock()
+
+
+def _queue_handler():
+    """Returns a queue handler feeding the shared background listener, starting it on first use."""
+    global _queue, _listener, _router
+    with _listener_lock:
+        if _listener is None:
+            _queue = queue.SimpleQueue()
+            _router = _NamespaceRouter()
+            _listener = QueueListener(_queue, _router)
+            _listener.start()
+            atexit.register(_listener.stop)
+    return _DeferredQueueHandler(_queue)
+
+
+def flush_logging():
+    """
+    Blocks until every record queued so far has been written. A no-op unless LOG_QUEUED is set.
+    """
+    with _listener_lock:
+        if _listener is not None:
+            # stop() drains the queue before joining the writer thread
+            _listener.stop()
+            _listener.start()
+
+
+def _file_handler(log_file_name):
+    # Configure a rotating file handler to manage log file size and backups
+    file_handler = RotatingFileHandler(
+        os.path.join(LOG_DIR, log_file_name),  # Full path to the log file
+        maxBytes=LOG_MAX_BYTES,  # Maximum log file size before rotation (1 MB unless configured)
+        backupCount=LOG_BACKUP_COUNT,  # Number of backup files to keep (5 unless configured)
+        delay=True,  # Open the file on the first record rather than at import time
+    )
+
+    # Define the log message format for consistent and detailed output
+    file_handler.setFormatter(logging.Formatter(_FORMAT))
+    file_handler.setLevel(logging.INFO)  # Set the handler's logging level to INFO
+    return file_handler
 
 
 def get_logger(
@@ -13,6 +154,8 @@ def get_logger(
     - Rotating logs to prevent excessive file sizes.
     - Allowing customizable log file names and namespaces for module-specific logging.
     - Ensuring logs are isolated and do not propagate to the root logger.
+    - Optionally moving formatting and file writes to a background thread (LOG_QUEUED) and sampling
+      repetitive messages (LOG_RATE_LIMIT).
 
     Args:
         log_file_name (str): The name of the log file. Defaults to "default.log".
@@ -28,14 +171,8 @@ def get_logger(
 
     # Ensure the logger is not reconfigured if already set up
     if not logger.handlers:
-        # Define the directory for log files
-        log_dir = "python/utils/Logs"
-
-        # Check if the log directory exists; create it if necessary
-        if not os.path.exists(log_dir):
-            os.makedirs(
-                log_dir
-            )  # Ensure the directory is created before attempting to write logs
+        # Ensure the log directory exists before attempting to write logs
+        os.makedirs(LOG_DIR, exist_ok=True)
 
         # Set the logging level to INFO for standard informational logs
         logger.setLevel(logging.INFO)
@@ -43,20 +180,21 @@ def get_logger(
         # Prevent duplicate logs by disabling propagation to the root logger
         logger.propagate = False
 
-        # Configure a rotating file handler to manage log file size and backups
-        file_handler = RotatingFileHandler(
-            os.path.join(log_dir, log_file_name),  # Full path to the log file
-            maxBytes=1024 * 1024,  # Maximum log file size before rotation (1 MB)
-            backupCount=5,  # Keep up to 5 backup files
-        )
+        file_handler = _file_handler(log_file_name)
+        if LOG_QUEUED:
+            # The logger only enqueues; the shared listener writes to this namespace's file
+            handler = _queue_handler()
+            _router.handlers[logger_name] = file_handler
+        else:
+            handler = file_handler
 
-        # Define the log message format for consistent and detailed output
-        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(logging.INFO)  # Set the handler's logging level to INFO
+        # Sampled records are dropped before they are queued or formatted
+        rate_limit = RateLimitFilter.parse(LOG_RATE_LIMIT)
+        if rate_limit is not None:
+            handler.addFilter(rate_limit)
 
-        # Attach the file handler to the logger
-        logger.addHandler(file_handler)
+        # Attach the handler to the logger
+        logger.addHandler(handler)
 
     # Return the fully configured logger instance
     return logger
@@ -0,0 +1,397 @@
+import atexit
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from python.config import METRICS_ENABLED, METRICS_PORT, METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL
+
+"""In-process metrics exported in the Prometheus text format.
+
+    Counters and histograms are plain dicts of label values guarded by one lock per metric, so recording a sample
+    costs a dict lookup and, for histograms, a bisect over the bucket bounds. Metrics are kept in one process-wide
+    registry and rendered on demand, either to a file (for node_exporter's textfile collector) or over HTTP.
+    Rates such as matches ingested per second come from `rate()` over the counters.
+
+    METRICS_ENABLED=false turns off the Cassandra request listener and the exporters; the remaining counters and
+    histograms are cheap enough to always record.
+
+    Label values must have bounded cardinality: endpoint keys, regions, status codes and statement labels (verb and
+    table, see `statement_label`), never PUUIDs or match IDs.
+
+Classes:
+    Counter: Monotonic counter with labels.
+    Histogram: Cumulative-bucket histogram with labels.
+    Registry: Set of metrics rendered together.
+    LatencyRecorder: Recent latency samples per key, summarized as count, mean and percentiles.
+
+Functions:
+    instrument_session(session): Records the latency of every statement a cassandra-driver session runs.
+    write_textfile(path): Atomically writes the current metrics to `path`.
+    start_http_server(port, addr): Serves the metrics on /metrics from a background thread.
+    start_exporter(): Starts the exporters configured by METRICS_PORT and METRICS_TEXTFILE.
+"""
+
+# Seconds; from fast cache hits to the 10s request timeout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; rate-limit waits run up to the 120s application window
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_STATEMENT = re.compile(
+    r"^\s*(?:(SELECT)\b.*?\bFROM|(INSERT)\s+INTO|(UPDATE)|(DELETE)\b.*?\bFROM)\s+(\w+)", re.IGNORECASE | re.DOTALL
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter, one series per combination of label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Args:
+            name (str): Metric name, conventionally ending in `_total`.
+            documentation (str): The HELP text.
+            labelnames (tuple, optional): Label names; `inc` takes one value per name in this order.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Adds `amount` to the series for `labels`."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Histogram with cumulative `le` buckets, one series per combination of label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            name (str): Metric name, conventionally ending in the unit (e.g. `_seconds`).
+            documentation (str): The HELP text.
+            labelnames (tuple, optional): Label names; `observe` takes one value per name in this order.
+            buckets (tuple, optional): Ascending upper bounds; +Inf is implied. Defaults to LATENCY_BUCKETS.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Records one sample for `labels`."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then the sum of all samples
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, *labels):
+        series = self._series.get(labels)
+        return series[-1] if series else 0.0
+
+    def samples(self):
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(values[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    """
+    Set of metrics rendered together in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Adds `metric`, or returns the metric already registered under its name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """
+        Renders every metric with at least one series.
+
+        Returns:
+            str: The exposition text, ending in a newline.
+        """
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            samples = list(metric.samples())
+            if samples:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+class LatencyRecorder:
+    """
+    Thread-safe record of latencies keyed by endpoint or operation.
+    """
+
+    def __init__(self, max_samples=1024):
+        """
+        Args:
+            max_samples (int, optional): Recent samples kept per key for percentiles. Defaults to 1024.
+        """
+        self.max_samples = max_samples
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            if key not in self._samples:
+                self._samples[key] = deque(maxlen=self.max_samples)
+                self._totals[key] = [0, 0.0]
+            self._samples[key].append(seconds)
+            self._totals[key][0] += 1
+            self._totals[key][1] += seconds
+
+    def stats(self):
+        """
+        Summarizes the recorded latencies.
+
+        Returns:
+            dict: Mapping of key to {"count", "mean", "p50", "p99"} in seconds.
+        """
+        with self._lock:
+            summary = {}
+            for key, samples in self._samples.items():
+                ordered = sorted(samples)
+                count, total = self._totals[key]
+                summary[key] = {
+                    "count": count,
+                    "mean": total / count,
+                    "p50": ordered[int(0.50 * (len(ordered) - 1))],
+                    "p99": ordered[int(0.99 * (len(ordered) - 1))],
+                }
+            return summary
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    """Returns the registered counter called `name`, creating it on first use."""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+    """Returns the registered histogram called `name`, creating it on first use."""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Metrics recorded by the shared modules; crawlers add their own through `counter`/`histogram`
+API_LATENCY = histogram(
+    "leaguetracker_api_request_seconds", "Riot API request latency per attempt.", ("endpoint",)
+)
+API_RESPONSES = counter(
+    "leaguetracker_api_responses_total", "Riot API responses by status code (\"error\" for no response).",
+    ("endpoint", "status"),
+)
+RATE_LIMIT_WAIT = histogram(
+    "leaguetracker_rate_limit_wait_seconds", "Time callers spent blocked waiting for a rate-limit slot.",
+    ("region",), WAIT_BUCKETS,
+)
+RATE_LIMITED = counter(
+    "leaguetracker_rate_limited_total", "429 responses by region and X-Rate-Limit-Type.", ("region", "limit_type")
+)
+CASSANDRA_LATENCY = histogram(
+    "leaguetracker_cassandra_statement_seconds", "Cassandra statement latency by verb and table.",
+    ("statement", "outcome"),
+)
+MATCH_IDS_WRITTEN = counter("leaguetracker_match_ids_written_total", "Match IDs written to puuid_matches.")
+MATCHES_INGESTED = counter("leaguetracker_matches_ingested_total", "Match payloads stored in match_payloads.")
+RESPONSE_CACHE_LOOKUPS = counter(
+    "leaguetracker_response_cache_lookups_total", "Response cache lookups by endpoint and result (hit or miss).",
+    ("endpoint", "result"),
+)
+ROLLUP_MATCHES = counter(
+    "leaguetracker_rollup_matches_total", "Matches offered to the rollups by result (applied or duplicate).",
+    ("result",),
+)
+
+
+def statement_label(query):
+    """
+    Reduces a CQL statement to a low-cardinality label such as "insert puuid_matches".
+
+    Args:
+        query: A query string, or a simple, prepared, bound or batch statement.
+
+    Returns:
+        str: "<verb> <table>", "batch", or "other".
+    """
+    if hasattr(query, "_statements_and_parameters"):
+        return "batch"
+    text = getattr(query, "prepared_statement", query)
+    text = getattr(text, "query_string", text)
+    match = _STATEMENT.match(str(text))
+    if not match:
+        return "other"
+    verb = next(group for group in match.groups()[:4] if group)
+    return f"{verb.lower()} {match.group(5).lower()}"
+
+
+def instrument_session(session):
+    """
+    Records the latency of every statement `session` executes, synchronous or asynchronous.
+
+    Uses the driver's request-init listener, so no call site changes. Labels of prepared statements are cached by
+    query id, of which there are a bounded number, so only the first execution parses the query string; simple
+    statements and batches are labelled on every execution.
+
+    Args:
+        session (cassandra.cluster.Session): The session to instrument.
+
+    Returns:
+        cassandra.cluster.Session: `session`, for chaining.
+    """
+    if not METRICS_ENABLED:
+        return session
+    labels = {}
+
+    def _on_request(response_future):
+        query = response_future.query
+        query_id = getattr(getattr(query, "prepared_statement", query), "query_id", None)
+        label = labels.get(query_id) if query_id is not None else None
+        if label is None:
+            label = statement_label(query)
+            if query_id is not None:
+                labels[query_id] = label
+        started = time.perf_counter()
+        response_future.add_callbacks(
+            lambda _: CASSANDRA_LATENCY.observe(time.perf_counter() - started, label, "ok"),
+            lambda _: CASSANDRA_LATENCY.observe(time.perf_counter() - started, label, "error"),
+        )
+
+    session.add_request_init_listener(_on_request)
+    return session
+
+
+def write_textfile(path, registry=REGISTRY):
+    """
+    Writes the metrics to `path` through a temporary file, so readers never see a partial file.
+
+    Args:
+        path (str): Destination, e.g. a node_exporter textfile collector `.prom` file.
+        registry (Registry, optional): Metrics to write. Defaults to the process-wide registry.
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(registry.render())
+    os.replace(temporary, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """
+    Serves the metrics on http://<addr>:<port>/metrics from a daemon thread.
+
+    Args:
+        port (int): Port to bind; 0 picks a free port.
+        addr (str, optional): Interface to bind. Defaults to "127.0.0.1".
+        registry (Registry, optional): Metrics to serve. Defaults to the process-wide registry.
+
+    Returns:
+        http.server.ThreadingHTTPServer: The running server (see `server_address` for the bound port).
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_exporter():
+    """
+    Starts the exporters configured in the environment: an HTTP endpoint on METRICS_PORT and/or a textfile at
+    METRICS_TEXTFILE rewritten every METRICS_TEXTFILE_INTERVAL seconds and once more at exit.
+    """
+    if not METRICS_ENABLED:
+        return
+    if METRICS_PORT:
+        start_http_server(int(METRICS_PORT))
+    if METRICS_TEXTFILE:
+
+        def _write_periodically():
+            while True:
+                time.sleep(METRICS_TEXTFILE_INTERVAL)
+                write_textfile(METRICS_TEXTFILE)
+
+        threading.Thread(target=_write_periodically, daemon=True).start()
+        atexit.register(write_textfile, METRICS_TEXTFILE)
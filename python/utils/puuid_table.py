@@ -0,0 +1,328 @@
+import base64
+import binascii
+from array import array
+from python.config import PLATFORM_REGIONS
+
+"""Compact in-memory identity layer for PUUIDs.
+
+    A PUUID is 78 base64url characters encoding 58 bytes; as a Python `str` it costs about 130 bytes, plus the
+    set or dict entry pointing at it. `PuuidTable` stores each PUUID once, as a fixed-width 59-byte record (a tag
+    byte and the decoded bytes) in one bytearray, and assigns it a dense integer ID: its record number. Lookups
+    go through an open-addressing table of IDs in an `array`, so no per-PUUID Python object is kept, about 75
+    bytes per PUUID in total. Identifiers that are not canonical 78-character PUUIDs (test fixtures, stub
+    servers) are stored verbatim under a different tag, so encoding is lossless for any string of up to 58 bytes.
+
+    Dense IDs index the other array-backed structures: `IdSet` (a bitset, e.g. the players discovered by this
+    process) and `ParticipantGraph` (match-participant adjacency in CSR form). `PuuidTable.bind_summoner_id`
+    maps them to the serial `SummonerID` keys of the relational Summoners table.
+
+Classes:
+    PuuidTable: Interns PUUIDs to dense integer IDs.
+    IdSet: Growable bitset of dense IDs.
+    ParticipantGraph: Match-participant adjacency over dense IDs.
+
+Functions:
+    encode_puuid(puuid): Encodes a PUUID to its fixed-width record.
+    decode_puuid(record): Decodes a record back to the PUUID string.
+"""
+
+PUUID_LENGTH = 78
+RECORD_SIZE = 59
+
+# First byte of a record: canonical base64url PUUID, else the length of a verbatim UTF-8 identifier
+_CANONICAL = 0
+
+# Load factor above which the lookup table doubles
+_MAX_LOAD = 0.7
+_EMPTY = -1
+
+_PLATFORMS = tuple(PLATFORM_REGIONS)
+_PLATFORM_INDEX = {platform: index for index, platform in enumerate(_PLATFORMS)}
+
+
+def encode_puuid(puuid):
+    """
+    Encodes a PUUID to a RECORD_SIZE-byte record.
+
+    Args:
+        puuid (str): A PUUID, or any identifier of at most RECORD_SIZE - 1 UTF-8 bytes.
+
+    Returns:
+        bytes: The record.
+
+    Raises:
+        ValueError: If `puuid` is neither a canonical PUUID nor short enough to store verbatim.
+    """
+    if len(puuid) == PUUID_LENGTH:
+        try:
+            decoded = base64.urlsafe_b64decode(puuid + "==")
+        except (binascii.Error, ValueError):
+            decoded = None
+        # Re-encoding rejects characters the decoder skipped and non-zero padding bits
+        if decoded is not None and base64.urlsafe_b64encode(decoded)[:PUUID_LENGTH] == puuid.encode():
+            return bytes((_CANONICAL,)) + decoded
+    raw = puuid.encode()
+    if not 0 < len(raw) < RECORD_SIZE:
+        raise ValueError(f"Cannot encode identifier of {len(raw)} bytes: {puuid!r}")
+    return bytes((len(raw),)) + raw.ljust(RECORD_SIZE - 1, b"\0")
+
+
+def decode_puuid(record):
+    """
+    Decodes a record written by `encode_puuid`.
+
+    Args:
+        record (bytes): A RECORD_SIZE-byte record.
+
+    Returns:
+        str: The original identifier.
+    """
+    tag = record[0]
+    if tag == _CANONICAL:
+        return base64.urlsafe_b64encode(bytes(record[1:RECORD_SIZE])).decode()[:PUUID_LENGTH]
+    return bytes(record[1:1 + tag]).decode()
+
+
+class PuuidTable:
+    """
+    Interns PUUIDs to dense integer IDs (0, 1, 2, ... in insertion order).
+    """
+
+    def __init__(self, capacity=1024):
+        """
+        Initialize an empty table.
+
+        Args:
+            capacity (int, optional): Expected PUUIDs; the table grows past it. Defaults to 1024.
+        """
+        self._records = bytearray()
+        self._slots = array("i", [_EMPTY]) * self._table_size(capacity)
+        self._summoner_ids = array("i")
+
+    @staticmethod
+    def _table_size(capacity):
+        size = 8
+        while size * _MAX_LOAD < capacity:
+            size *= 2
+        return size
+
+    def __len__(self):
+        return len(self._records) // RECORD_SIZE
+
+    def __contains__(self, puuid):
+        return self.lookup(puuid) is not None
+
+    def _record(self, puuid_id):
+        start = puuid_id * RECORD_SIZE
+        return self._records[start:start + RECORD_SIZE]
+
+    def _probe(self, record):
+        """Returns the slot holding `record`'s ID, or the empty slot where it would go."""
+        slots = self._slots
+        mask = len(slots) - 1
+        slot = hash(record) & mask
+        while True:
+            puuid_id = slots[slot]
+            if puuid_id == _EMPTY or self._record(puuid_id) == record:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        self._slots = array("i", [_EMPTY]) * (len(self._slots) * 2)
+        mask = len(self._slots) - 1
+        for puuid_id in range(len(self)):
+            slot = hash(bytes(self._record(puuid_id))) & mask
+            while self._slots[slot] != _EMPTY:
+                slot = (slot + 1) & mask
+            self._slots[slot] = puuid_id
+
+    def intern(self, puuid):
+        """
+        Returns the ID of `puuid`, assigning the next one if it is new.
+
+        Args:
+            puuid (str): The player's unique identifier.
+
+        Returns:
+            int: The dense ID.
+        """
+        record = encode_puuid(puuid)
+        slot = self._probe(record)
+        puuid_id = self._slots[slot]
+        if puuid_id != _EMPTY:
+            return puuid_id
+        puuid_id = len(self)
+        self._records += record
+        self._summoner_ids.append(0)
+        self._slots[slot] = puuid_id
+        if len(self) > len(self._slots) * _MAX_LOAD:
+            self._grow()
+        return puuid_id
+
+    def intern_many(self, puuids):
+        """Interns every PUUID, returning their IDs in order as an array."""
+        return array("q", map(self.intern, puuids))
+
+    def lookup(self, puuid):
+        """Returns the ID of `puuid`, or None if it was never interned."""
+        puuid_id = self._slots[self._probe(encode_puuid(puuid))]
+        return None if puuid_id == _EMPTY else puuid_id
+
+    def puuid(self, puuid_id):
+        """Returns the PUUID string of an ID."""
+        if not 0 <= puuid_id < len(self):
+            raise IndexError(f"PUUID ID {puuid_id} out of range")
+        return decode_puuid(self._record(puuid_id))
+
+    def bind_summoner_id(self, puuid, summoner_id):
+        """
+        Records the Summoners.SummonerID of `puuid`, interning it if needed.
+
+        Returns:
+            int: The dense ID of `puuid`.
+        """
+        puuid_id = self.intern(puuid)
+        self._summoner_ids[puuid_id] = summoner_id
+        return puuid_id
+
+    def summoner_id(self, puuid_id):
+        """Returns the SummonerID bound to an ID, or None if none was bound (serial keys start at 1)."""
+        return self._summoner_ids[puuid_id] or None
+
+    @classmethod
+    def from_summoners(cls, rows, capacity=1024):
+        """
+        Builds a table from (SummonerID, PUUID) rows, e.g. `SELECT SummonerID, PUUID FROM Summoners`.
+
+        Args:
+            rows (iterable): Pairs of (summoner_id, puuid).
+            capacity (int, optional): Expected PUUIDs. Defaults to 1024.
+
+        Returns:
+            PuuidTable: The table, with every SummonerID bound.
+        """
+        table = cls(capacity)
+        for summoner_id, puuid in rows:
+            table.bind_summoner_id(puuid, summoner_id)
+        return table
+
+    @property
+    def nbytes(self):
+        """int: Bytes held by the records, lookup table and SummonerID array."""
+        return (
+            len(self._records)
+            + len(self._slots) * self._slots.itemsize
+            + len(self._summoner_ids) * self._summoner_ids.itemsize
+        )
+
+
+class IdSet:
+    """
+    Growable bitset of dense IDs, one bit per ID.
+    """
+
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, puuid_id):
+        byte = puuid_id >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (puuid_id & 7)))
+
+    def add(self, puuid_id):
+        """Adds an ID; returns True if it was not already present."""
+        byte, bit = puuid_id >> 3, 1 << (puuid_id & 7)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        if self._bits[byte] & bit:
+            return False
+        self._bits[byte] |= bit
+        self._count += 1
+        return True
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+def _split_match_id(match_id):
+    platform, _, game_id = match_id.partition("_")
+    if platform not in _PLATFORM_INDEX or not game_id.isdigit():
+        raise ValueError(f"Not a Match-V5 match ID: {match_id!r}")
+    return _PLATFORM_INDEX[platform], int(game_id)
+
+
+class ParticipantGraph:
+    """
+    Match-participant adjacency in compressed sparse row form: match i's participant IDs are
+    `participants[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self):
+        self._platforms = bytearray()
+        self._game_ids = array("q")
+        self._offsets = array("q", [0])
+        self._participants = array("i")
+
+    def __len__(self):
+        return len(self._game_ids)
+
+    def add(self, match_id, participant_ids):
+        """
+        Appends a match and its participants.
+
+        Args:
+            match_id (str): Match-V5 match ID such as "NA1_5168231556".
+            participant_ids (iterable): Dense IDs of the participants (see `PuuidTable.intern_many`).
+
+        Returns:
+            int: The match's index in the graph.
+        """
+        platform, game_id = _split_match_id(match_id)
+        self._platforms.append(platform)
+        self._game_ids.append(game_id)
+        self._participants.extend(participant_ids)
+        self._offsets.append(len(self._participants))
+        return len(self) - 1
+
+    def match_id(self, index):
+        """Returns the match ID string of the match at `index`."""
+        return f"{_PLATFORMS[self._platforms[index]]}_{self._game_ids[index]}"
+
+    def participants(self, index):
+        """Returns the participant IDs of the match at `index` as an array."""
+        return self._participants[self._offsets[index]:self._offsets[index + 1]]
+
+    def matches_by_participant(self):
+        """
+        Builds the reverse adjacency with a counting sort.
+
+        Returns:
+            tuple: (offsets, matches) arrays; the match indexes of participant p are
+                `matches[offsets[p]:offsets[p + 1]]`.
+        """
+        size = max(self._participants, default=-1) + 1
+        counts = array("q", bytes(8 * (size + 1)))
+        for participant in self._participants:
+            counts[participant + 1] += 1
+        for index in range(size):
+            counts[index + 1] += counts[index]
+        offsets = array("q", counts)
+        matches = array("i", bytes(4 * len(self._participants)))
+        for index in range(len(self)):
+            for participant in self.participants(index):
+                matches[counts[participant]] = index
+                counts[participant] += 1
+        return offsets, matches
+
+    @property
+    def nbytes(self):
+        return (
+            len(self._platforms)
+            + len(self._game_ids) * self._game_ids.itemsize
+            + len(self._offsets) * self._offsets.itemsize
+            + len(self._participants) * self._participants.itemsize
+        )
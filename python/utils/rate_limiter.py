@@ -0,0 +1,285 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+from python.utils.logger import get_logger
+from python.utils.metrics import RATE_LIMIT_WAIT, RATE_LIMITED
+
+logger = get_logger("rate_limiter.log", namespace="rate_limiter")
+
+# Riot personal/development key limits: 20 requests every 1 second, 100 requests every 2 minutes
+DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+
+
+def parse_rate_limit(header_value):
+    """
+    Parses a Riot rate-limit header value into (limit, window_seconds) pairs.
+
+    Args:
+        header_value (str): A header value such as "20:1,100:120".
+
+    Returns:
+        list: Pairs of (limit, window_seconds) sorted by window length, e.g. [(20, 1), (100, 120)].
+    """
+    limits = []
+    for part in (header_value or "").split(","):
+        if ":" not in part:
+            continue
+        limit, seconds = part.strip().split(":", 1)
+        limits.append((int(limit), int(seconds)))
+    return sorted(limits, key=lambda pair: pair[1])
+
+
+class _Window:
+    """
+    Sliding log of request timestamps enforcing `limit` requests per `seconds`.
+    """
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.timestamps = deque()
+
+    def _expire(self, now):
+        while self.timestamps and now - self.timestamps[0] >= self.seconds:
+            self.timestamps.popleft()
+
+    def wait_time(self, now, share=1.0):
+        self._expire(now)
+        limit = max(1, int(self.limit * share))
+        if len(self.timestamps) < limit:
+            return 0.0
+        # The slot frees up when the request that pushed us to the limit ages out of the window
+        return self.timestamps[len(self.timestamps) - limit] + self.seconds - now
+
+    def sync_count(self, count, now):
+        """Pads the log so it holds at least `count` requests, as reported by the server."""
+        self._expire(now)
+        for _ in range(count - len(self.timestamps)):
+            self.timestamps.append(now)
+
+
+class _Scope:
+    """
+    All windows for one rate-limit scope (an application or method limit on one routing value).
+    """
+
+    def __init__(self, limits, share=1.0):
+        self.windows = [_Window(limit, seconds) for limit, seconds in limits]
+        self.blocked_until = 0.0
+        self.share = share
+
+    @property
+    def limits(self):
+        return [(window.limit, window.seconds) for window in self.windows]
+
+    def set_limits(self, limits):
+        current = {window.seconds: window for window in self.windows}
+        windows = []
+        for limit, seconds in limits:
+            window = current.get(seconds) or _Window(limit, seconds)
+            window.limit = limit
+            windows.append(window)
+        self.windows = windows
+
+    def wait_time(self, now):
+        wait = max(self.blocked_until - now, 0.0)
+        for window in self.windows:
+            wait = max(wait, window.wait_time(now, self.share))
+        return wait
+
+    def record(self, now):
+        for window in self.windows:
+            window.timestamps.append(now)
+
+
+class RateLimiter:
+    """
+    Thread-safe, multi-window rate limiter scoped per routing value (and optionally per method).
+
+    Application limits apply to every request on a routing value (e.g. "americas"); method limits
+    apply to a single endpoint key (e.g. "Match") on that routing value. Limits start from the
+    configured defaults and are replaced by whatever Riot reports in the X-App-Rate-Limit and
+    X-Method-Rate-Limit response headers.
+
+    Processes sharing one API key each take a `share` of every limit (see `set_share`).
+    """
+
+    def __init__(self, app_limits=DEFAULT_APP_RATE_LIMIT, clock=time.monotonic):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            app_limits (str or list, optional): Application limits as a header string ("20:1,100:120")
+                or a list of (limit, window_seconds) pairs. Defaults to DEFAULT_APP_RATE_LIMIT.
+            clock (callable, optional): Monotonic clock returning seconds. Defaults to time.monotonic.
+        """
+        if isinstance(app_limits, str):
+            app_limits = parse_rate_limit(app_limits)
+        self.app_limits = list(app_limits)
+        self.method_limits = {}
+        self.clock = clock
+        self.share = 1.0
+        self.wait_seconds = 0.0
+        self._scopes = {}
+        self._lock = threading.Lock()
+
+    def _scope(self, region, method=None):
+        key = (region, method)
+        if key not in self._scopes:
+            limits = self.app_limits if method is None else self.method_limits.get(method, [])
+            self._scopes[key] = _Scope(limits, self.share)
+        return self._scopes[key]
+
+    def set_share(self, share):
+        """
+        Limits this process to a fraction of every application and method limit.
+
+        Used when several workers crawl with one API key: with `share` set to 1/N on each of N workers, their
+        combined rate stays within the key's limits. Counts reported in the response headers are key-wide, so
+        they are scaled by the same fraction before being synced.
+
+        Args:
+            share (float): Fraction of the key's limits in (0, 1].
+        """
+        with self._lock:
+            if share != self.share:
+                logger.info("Rate limit share set to %.3f", share)
+            self.share = share
+            for scope in self._scopes.values():
+                scope.share = share
+
+    def _scopes_for(self, region, method):
+        scopes = [self._scope(region)]
+        if method is not None:
+            scopes.append(self._scope(region, method))
+        return scopes
+
+    def reserve(self, region, method=None):
+        """
+        Takes a request slot if one is free in every window that applies.
+
+        Args:
+            region (str): The routing value the request is sent to.
+            method (str, optional): The endpoint key (e.g. "Match") for method-level limits.
+
+        Returns:
+            float: 0 if the slot was taken, otherwise the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = self.clock()
+            scopes = self._scopes_for(region, method)
+            wait = max(scope.wait_time(now) for scope in scopes)
+            if wait > 0:
+                return wait
+            for scope in scopes:
+                scope.record(now)
+            return 0.0
+
+    def _record_wait(self, region, wait):
+        # Every acquisition is observed, so the histogram's count is the number of requests throttled
+        RATE_LIMIT_WAIT.observe(wait, region)
+        if wait:
+            with self._lock:
+                self.wait_seconds += wait
+
+    def acquire(self, region, method=None):
+        """
+        Blocks the calling thread until a request slot is available, then takes it.
+
+        Args:
+            region (str): The routing value the request is sent to.
+            method (str, optional): The endpoint key for method-level limits.
+
+        Returns:
+            float: Total seconds spent waiting.
+        """
+        waited = 0.0
+        while (wait := self.reserve(region, method)) > 0:
+            time.sleep(wait)
+            waited += wait
+        self._record_wait(region, waited)
+        return waited
+
+    async def acquire_async(self, region, method=None):
+        """
+        Waits without blocking the event loop until a request slot is available, then takes it.
+
+        Args:
+            region (str): The routing value the request is sent to.
+            method (str, optional): The endpoint key for method-level limits.
+
+        Returns:
+            float: Total seconds spent waiting.
+        """
+        waited = 0.0
+        while (wait := self.reserve(region, method)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(region, waited)
+        return waited
+
+    def update_from_headers(self, region, headers, method=None):
+        """
+        Adapts limits and counts to the values reported in Riot's rate-limit response headers.
+
+        Args:
+            region (str): The routing value the response came from.
+            headers (Mapping): Response headers (case-insensitive mapping, e.g. requests' headers).
+            method (str, optional): The endpoint key the request was made to.
+        """
+        app_limit = headers.get("X-App-Rate-Limit")
+        app_count = headers.get("X-App-Rate-Limit-Count")
+        method_limit = headers.get("X-Method-Rate-Limit")
+        method_count = headers.get("X-Method-Rate-Limit-Count")
+
+        with self._lock:
+            now = self.clock()
+            if app_limit and (limits := parse_rate_limit(app_limit)) != self.app_limits:
+                logger.info("App rate limit for %s updated to %s", region, app_limit)
+                self.app_limits = limits
+                for (scope_region, scope_method), scope in self._scopes.items():
+                    if scope_method is None:
+                        scope.set_limits(limits)
+            if app_count:
+                self._sync_counts(self._scope(region), app_count, now)
+
+            if method is None:
+                return
+            if method_limit and (limits := parse_rate_limit(method_limit)) != self.method_limits.get(method):
+                logger.info("Method rate limit for %s updated to %s", method, method_limit)
+                self.method_limits[method] = limits
+                for (scope_region, scope_method), scope in self._scopes.items():
+                    if scope_method == method:
+                        scope.set_limits(limits)
+            if method_count:
+                self._sync_counts(self._scope(region, method), method_count, now)
+
+    @staticmethod
+    def _sync_counts(scope, header_value, now):
+        counts = dict((seconds, count) for count, seconds in parse_rate_limit(header_value))
+        for window in scope.windows:
+            if window.seconds in counts:
+                window.sync_count(int(counts[window.seconds] * scope.share), now)
+
+    def penalize(self, region, retry_after, method=None, limit_type=None):
+        """
+        Blocks a scope after a 429 response until the Retry-After period has elapsed.
+
+        Args:
+            region (str): The routing value that returned the 429.
+            retry_after (float): Seconds from the Retry-After header.
+            method (str, optional): The endpoint key the request was made to.
+            limit_type (str, optional): The X-Rate-Limit-Type header ("application", "method" or "service").
+        """
+        with self._lock:
+            if limit_type == "method" and method is not None:
+                scope = self._scope(region, method)
+            else:
+                scope = self._scope(region)
+            scope.blocked_until = max(scope.blocked_until, self.clock() + float(retry_after))
+        RATE_LIMITED.inc(region, limit_type or "unknown")
+        logger.warning(
+            "Rate limited on %s (%s limit), backing off %ss", region, limit_type or "unknown", retry_after
+        )
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+from python.config import RESPONSE_CACHE_MATCH_IDS_TTL, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_PATH
+from python.utils.compression import compress_payload, decompress_payload
+from python.utils.logger import get_logger
+from python.utils.metrics import RESPONSE_CACHE_LOOKUPS
+
+"""Persistent, size-bounded cache of Riot API response bodies.
+
+    Entries live compressed in a single SQLite file, keyed by endpoint key, URL and query parameters. How long an
+    entry stays valid depends on its endpoint: Match payloads are immutable once a game has ended and never
+    expire, Account_Matches pages change as players keep playing and expire after a short TTL, and any other
+    endpoint is not cached. When the stored bytes exceed the size limit the least recently used entries are
+    evicted.
+
+    Recency is refreshed at most once per TOUCH_INTERVAL per entry, so a run re-reading cached matches costs one
+    indexed read per hit instead of a write. The file is safe to share between threads and processes.
+
+Classes:
+    ResponseCache: SQLite-backed cache with per-endpoint TTLs, size-based eviction and hit counters.
+
+Functions:
+    get_response_cache(): Returns the process-wide cache configured by RESPONSE_CACHE_PATH, or None.
+"""
+
+logger = get_logger("response_cache.log", namespace="response_cache")
+
+# Seconds an entry stays valid per endpoint key; None never expires, missing keys are not cached
+DEFAULT_TTLS = {"Match": None, "Account_Matches": RESPONSE_CACHE_MATCH_IDS_TTL}
+
+# Seconds between recency updates of one entry
+TOUCH_INTERVAL = 3600
+# Eviction frees space down to this fraction of the size limit, so it does not run on every insert
+EVICTION_TARGET = 0.9
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+)"""
+ACCESSED_INDEX = "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+SELECT_QUERY = "SELECT codec, body, expires, accessed FROM responses WHERE key = ?"
+SIZE_QUERY = "SELECT size FROM responses WHERE key = ?"
+UPSERT_QUERY = """INSERT OR REPLACE INTO responses (key, endpoint, codec, body, size, expires, accessed)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+TOUCH_QUERY = "UPDATE responses SET accessed = ? WHERE key = ?"
+DELETE_QUERY = "DELETE FROM responses WHERE key = ?"
+OLDEST_QUERY = "SELECT key, size FROM responses ORDER BY accessed LIMIT ?"
+TOTAL_SIZE_QUERY = "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses"
+
+
+def cache_key(method, url, params=None):
+    """
+    Builds the cache key of a request; parameter order and None-valued parameters do not matter.
+
+    Args:
+        method (str): Endpoint key from BASE_URLS.
+        url (str): The fully formatted endpoint URL.
+        params (dict, optional): Query parameters.
+
+    Returns:
+        str: "<method> <url>[?<sorted params>]".
+    """
+    key = f"{method} {url}"
+    if params:
+        query = urlencode(sorted((name, value) for name, value in params.items() if value is not None))
+        if query:
+            key = f"{key}?{query}"
+    return key
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of compressed response bodies with per-endpoint TTLs and LRU eviction by size.
+    """
+
+    def __init__(self, path, max_bytes=RESPONSE_CACHE_MAX_BYTES, ttls=None, codec=None, clock=time.time):
+        """
+        Open (creating if needed) the cache file at `path`.
+
+        Args:
+            path (str): SQLite file, or ":memory:".
+            max_bytes (int, optional): Upper bound on stored (compressed) bytes. Defaults to
+                RESPONSE_CACHE_MAX_BYTES.
+            ttls (dict, optional): Endpoint key to TTL in seconds (None never expires). Defaults to DEFAULT_TTLS.
+            codec (str, optional): Codec for stored bodies. Defaults to `default_codec()`.
+            clock (callable, optional): Wall clock in epoch seconds. Defaults to time.time.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.codec = codec
+        self.clock = clock
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; every statement is its own transaction
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(SCHEMA)
+        self._connection.execute(ACCESSED_INDEX)
+        self.stored_bytes, self.entries = self._connection.execute(TOTAL_SIZE_QUERY).fetchone()
+
+    def caches(self, method):
+        """Returns True if responses of endpoint `method` are cached."""
+        return method in self.ttls
+
+    def get(self, method, url, params=None):
+        """
+        Looks up a response body.
+
+        Args:
+            method (str): Endpoint key from BASE_URLS.
+            url (str): The fully formatted endpoint URL.
+            params (dict, optional): Query parameters.
+
+        Returns:
+            bytes or None: The raw body, or None on a miss (including expired entries).
+        """
+        key = cache_key(method, url, params)
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(SELECT_QUERY, (key,)).fetchone()
+            if row is not None and row[2] is not None and row[2] <= now:
+                self._delete(key)
+                row = None
+            if row is None:
+                self._misses[method] = self._misses.get(method, 0) + 1
+                RESPONSE_CACHE_LOOKUPS.inc(method, "miss")
+                return None
+            codec, body, _, accessed = row
+            if now - accessed >= TOUCH_INTERVAL:
+                self._connection.execute(TOUCH_QUERY, (now, key))
+            self._hits[method] = self._hits.get(method, 0) + 1
+        RESPONSE_CACHE_LOOKUPS.inc(method, "hit")
+        return decompress_payload(codec, body)
+
+    def put(self, method, url, params, body):
+        """
+        Stores a response body if `method` is cached, evicting old entries when over the size limit.
+
+        Args:
+            method (str): Endpoint key from BASE_URLS.
+            url (str): The fully formatted endpoint URL.
+            params (dict): Query parameters, or None.
+            body (bytes): The raw response body.
+        """
+        if method not in self.ttls:
+            return
+        key = cache_key(method, url, params)
+        ttl = self.ttls[method]
+        now = self.clock()
+        codec, blob = compress_payload(body, self.codec)
+        with self._lock:
+            previous = self._connection.execute(SIZE_QUERY, (key,)).fetchone()
+            self._connection.execute(
+                UPSERT_QUERY, (key, method, codec, blob, len(blob), None if ttl is None else now + ttl, now)
+            )
+            if previous is None:
+                self.entries += 1
+            self.stored_bytes += len(blob) - (previous[0] if previous else 0)
+            if self.stored_bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, key):
+        size = self._connection.execute(SIZE_QUERY, (key,)).fetchone()
+        if size is not None:
+            self._connection.execute(DELETE_QUERY, (key,))
+            self.stored_bytes -= size[0]
+            self.entries -= 1
+
+    def _evict(self):
+        # Other processes sharing the file may have added or evicted entries since the counters were read
+        self.stored_bytes, self.entries = self._connection.execute(TOTAL_SIZE_QUERY).fetchone()
+        target = self.max_bytes * EVICTION_TARGET
+        evicted = 0
+        while self.stored_bytes > target and self.entries:
+            oldest = self._connection.execute(OLDEST_QUERY, (256,)).fetchall()
+            if not oldest:
+                break
+            self._connection.execute("BEGIN")
+            for key, size in oldest:
+                if self.stored_bytes <= target:
+                    break
+                self._connection.execute(DELETE_QUERY, (key,))
+                self.stored_bytes -= size
+                self.entries -= 1
+                evicted += 1
+            self._connection.execute("COMMIT")
+        if evicted:
+            logger.info("Evicted %d entries; %d bytes in %d entries remain", evicted, self.stored_bytes, self.entries)
+
+    def stats(self):
+        """
+        Returns lookup counters since this cache was opened, and the current size.
+
+        Returns:
+            dict: {"entries", "stored_bytes", "endpoints": {endpoint: {"hits", "misses", "hit_ratio"}}}.
+        """
+        with self._lock:
+            endpoints = {}
+            for method in set(self._hits) | set(self._misses):
+                hits, misses = self._hits.get(method, 0), self._misses.get(method, 0)
+                endpoints[method] = {"hits": hits, "misses": misses, "hit_ratio": hits / (hits + misses)}
+            return {"entries": self.entries, "stored_bytes": self.stored_bytes, "endpoints": endpoints}
+
+    def close(self):
+        """Closes the SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Returns the process-wide cache, opening RESPONSE_CACHE_PATH on first use.
+
+    Returns:
+        ResponseCache or None: The shared cache, or None if RESPONSE_CACHE_PATH is not set.
+    """
+    global _cache
+    if _cache is None and RESPONSE_CACHE_PATH:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(RESPONSE_CACHE_PATH)
+                logger.info(
+                    "Opened response cache %s: %d entries, %d bytes", RESPONSE_CACHE_PATH, _cache.entries,
+                    _cache.stored_bytes,
+                )
+    return _cache
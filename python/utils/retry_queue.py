@@ -0,0 +1,414 @@
+import argparse
+import atexit
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from python.config import (
+    RETRY_BASE_SECONDS,
+    RETRY_CLAIM_SECONDS,
+    RETRY_DRAIN_BATCH,
+    RETRY_DRAIN_INTERVAL,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_SECONDS,
+    RETRY_QUEUE_PATH,
+)
+from python.utils.logger import get_logger
+from python.utils.metrics import counter
+
+"""Durable retry queue and dead letters for failed API calls and writes.
+
+    A failed operation is recorded as a kind (e.g. "match_sync") and a JSON payload in a local SQLite file, and
+    retried later by the handler registered for its kind: attempt n is due RETRY_BASE_SECONDS x 2^(n-1) after the
+    previous one (capped at RETRY_MAX_SECONDS, with jitter). A handler fails by raising or returning False. After
+    RETRY_MAX_ATTEMPTS attempts the item moves to the `dead_letters` table, where it stays until it is replayed.
+
+    Items are drained by a background thread, so the worker that hit the failure only pays for one SQLite insert.
+    Each drain claims its items for RETRY_CLAIM_SECONDS, so processes sharing the file do not run the same item
+    twice, and items whose kind has no handler in this process are left for one that has. An operation is queued
+    at most once: enqueueing a (kind, payload) pair that is already waiting or dead-lettered is a no-op, so an
+    operation that keeps failing has one dead letter until it is replayed.
+
+    Usage:
+        python -m python.utils.retry_queue --list
+        python -m python.utils.retry_queue --replay --kind match_detail
+
+Classes:
+    RetryItem: A queued or dead-lettered operation.
+    RetryQueue: SQLite-backed retry queue with exponential back-off and dead letters.
+
+Functions:
+    get_retry_queue(): Returns the process-wide queue configured by RETRY_QUEUE_PATH, or None.
+    retry_later(kind, payload, error): Queues an operation on the process-wide queue, if there is one.
+"""
+
+logger = get_logger("retry_queue.log", namespace="retry_queue")
+
+RetryItem = namedtuple("RetryItem", ["id", "kind", "payload", "attempts", "next_attempt", "last_error"])
+
+RETRY_ITEMS = counter(
+    "leaguetracker_retry_items_total",
+    "Retry queue items by kind and outcome (queued, succeeded, retried, dead or replayed).",
+    ("kind", "outcome"),
+)
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS retries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    UNIQUE (kind, payload)
+)""",
+    "CREATE INDEX IF NOT EXISTS retries_next_attempt ON retries (next_attempt)",
+    """CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    created REAL NOT NULL,
+    failed REAL NOT NULL
+)""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS dead_letters_operation ON dead_letters (kind, payload)",
+)
+# Operations that are waiting or dead-lettered are not queued again
+ENQUEUE_QUERY = """INSERT OR IGNORE INTO retries (kind, payload, attempts, next_attempt, last_error, created)
+    SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM dead_letters WHERE kind = ? AND payload = ?)"""
+DUE_QUERY = """SELECT id, kind, payload, attempts, next_attempt, last_error FROM retries
+    WHERE next_attempt <= ? AND kind IN ({kinds}) ORDER BY next_attempt LIMIT ?"""
+CLAIM_QUERY = "UPDATE retries SET next_attempt = ? WHERE id = ?"
+DELETE_QUERY = "DELETE FROM retries WHERE id = ?"
+RESCHEDULE_QUERY = "UPDATE retries SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?"
+BURY_QUERY = """INSERT OR IGNORE INTO dead_letters (kind, payload, attempts, last_error, created, failed)
+    SELECT kind, payload, ?, ?, created, ? FROM retries WHERE id = ?"""
+CONTAINS_QUERY = """SELECT 1 FROM retries WHERE kind = ? AND payload = ?
+    UNION ALL SELECT 1 FROM dead_letters WHERE kind = ? AND payload = ? LIMIT 1"""
+PENDING_QUERY = "SELECT kind, COUNT(*) FROM retries GROUP BY kind"
+DEAD_COUNT_QUERY = "SELECT kind, COUNT(*) FROM dead_letters{where} GROUP BY kind"
+DEAD_QUERY = "SELECT id, kind, payload, attempts, failed, last_error FROM dead_letters"
+REPLAY_QUERY = """INSERT OR IGNORE INTO retries (kind, payload, attempts, next_attempt, last_error, created)
+    SELECT kind, payload, 0, ?, last_error, created FROM dead_letters"""
+DELETE_DEAD_QUERY = "DELETE FROM dead_letters"
+
+
+def _encode(payload):
+    # Canonical JSON, so the same operation always maps to the same row
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
+
+
+class RetryQueue:
+    """
+    SQLite-backed queue of failed operations, retried with exponential back-off by per-kind handlers.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_attempts=None,
+        base_delay=None,
+        max_delay=None,
+        claim_seconds=None,
+        clock=time.time,
+        rng=random.random,
+    ):
+        """
+        Open (creating if needed) the queue file at `path`.
+
+        Args:
+            path (str): SQLite file, or ":memory:".
+            max_attempts (int, optional): Attempts, including the one that queued the item, before it is
+                dead-lettered. Defaults to RETRY_MAX_ATTEMPTS.
+            base_delay (float, optional): Seconds before the first retry. Defaults to RETRY_BASE_SECONDS.
+            max_delay (float, optional): Longest wait between attempts. Defaults to RETRY_MAX_SECONDS.
+            claim_seconds (float, optional): How long a drain owns the items it took. Defaults to
+                RETRY_CLAIM_SECONDS.
+            clock (callable, optional): Wall clock in epoch seconds. Defaults to time.time.
+            rng (callable, optional): Uniform [0, 1) source for the jitter. Defaults to random.random.
+        """
+        self.path = path
+        self.max_attempts = max_attempts or RETRY_MAX_ATTEMPTS
+        self.base_delay = RETRY_BASE_SECONDS if base_delay is None else base_delay
+        self.max_delay = max_delay or RETRY_MAX_SECONDS
+        self.claim_seconds = claim_seconds or RETRY_CLAIM_SECONDS
+        self.clock = clock
+        self.rng = rng
+        self.handlers = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; multi-statement changes open their own transaction
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+
+    def register(self, kind, handler):
+        """
+        Sets the handler that retries operations of `kind`.
+
+        Args:
+            kind (str): The operation kind.
+            handler (callable): Called with the decoded payload; fails by raising or returning False.
+        """
+        self.handlers[kind] = handler
+
+    def backoff(self, attempts):
+        """Returns the seconds to wait after the `attempts`-th failed attempt."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        # Equal jitter: half fixed, half random, so items failing together do not retry together
+        return delay * (0.5 + self.rng() / 2)
+
+    def enqueue(self, kind, payload, error=None):
+        """
+        Queues a failed operation for its first retry.
+
+        Args:
+            kind (str): The operation kind.
+            payload (dict): JSON-serializable arguments for the kind's handler.
+            error (str or Exception, optional): Why the operation failed.
+
+        Returns:
+            bool: True if the item was queued, False if the same operation was already waiting or dead-lettered.
+        """
+        now = self.clock()
+        encoded = _encode(payload)
+        with self._lock:
+            queued = self._connection.execute(
+                ENQUEUE_QUERY,
+                (kind, encoded, 1, now + self.backoff(1), None if error is None else str(error), now, kind, encoded),
+            ).rowcount
+        if queued:
+            RETRY_ITEMS.inc(kind, "queued")
+            logger.info("Queued %s %s for retry: %s", kind, payload, error)
+        return bool(queued)
+
+    def contains(self, kind, payload):
+        """Returns True if the operation is waiting for a retry or has been dead-lettered."""
+        encoded = _encode(payload)
+        with self._lock:
+            return self._connection.execute(CONTAINS_QUERY, (kind, encoded, kind, encoded)).fetchone() is not None
+
+    def _claim(self, limit):
+        now = self.clock()
+        kinds = list(self.handlers)
+        if not kinds:
+            return []
+        query = DUE_QUERY.format(kinds=", ".join("?" * len(kinds)))
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._connection.execute(query, (now, *kinds, limit)).fetchall()
+                self._connection.executemany(CLAIM_QUERY, [(now + self.claim_seconds, row[0]) for row in rows])
+            finally:
+                self._connection.execute("COMMIT")
+        return [RetryItem(row[0], row[1], json.loads(row[2]), *row[3:]) for row in rows]
+
+    def _fail(self, item, error):
+        attempts = item.attempts + 1
+        now = self.clock()
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.execute(BURY_QUERY, (attempts, error, now, item.id))
+                self._connection.execute(DELETE_QUERY, (item.id,))
+                self._connection.execute("COMMIT")
+            else:
+                self._connection.execute(RESCHEDULE_QUERY, (attempts, now + self.backoff(attempts), error, item.id))
+        if attempts >= self.max_attempts:
+            RETRY_ITEMS.inc(item.kind, "dead")
+            logger.error("Dead-lettered %s %s after %d attempts: %s", item.kind, item.payload, attempts, error)
+            return "dead"
+        RETRY_ITEMS.inc(item.kind, "retried")
+        logger.warning("Retry %d of %s %s failed: %s", attempts, item.kind, item.payload, error)
+        return "retried"
+
+    def drain(self, limit=None):
+        """
+        Retries the due items that have a handler.
+
+        Args:
+            limit (int, optional): Maximum items to attempt. Defaults to RETRY_DRAIN_BATCH.
+
+        Returns:
+            dict: Items that succeeded, were rescheduled and were dead-lettered.
+        """
+        outcomes = {"succeeded": 0, "retried": 0, "dead": 0}
+        for item in self._claim(limit or RETRY_DRAIN_BATCH):
+            try:
+                error = None if self.handlers[item.kind](item.payload) is not False else "handler returned False"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error is None:
+                with self._lock:
+                    self._connection.execute(DELETE_QUERY, (item.id,))
+                RETRY_ITEMS.inc(item.kind, "succeeded")
+                outcomes["succeeded"] += 1
+            else:
+                outcomes[self._fail(item, error)] += 1
+        if any(outcomes.values()):
+            logger.info("Retry drain: %s", outcomes)
+        return outcomes
+
+    def start(self, interval=None):
+        """
+        Drains due items from a daemon thread every `interval` seconds until `stop` is called.
+
+        Args:
+            interval (float, optional): Seconds between drains. Defaults to RETRY_DRAIN_INTERVAL.
+        """
+        if self._thread is not None:
+            return
+        interval = interval or RETRY_DRAIN_INTERVAL
+
+        def _run():
+            while not self._stop.wait(interval):
+                try:
+                    # A full batch means more may be due; keep going without waiting
+                    while sum(self.drain().values()) >= RETRY_DRAIN_BATCH and not self._stop.is_set():
+                        pass
+                except Exception as e:
+                    logger.error("Error draining retry queue: %s", e)
+
+        self._thread = threading.Thread(target=_run, name="retry-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background drain, letting the item in progress finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
+
+    def dead_letters(self, kind=None, limit=None):
+        """
+        Lists dead-lettered operations, oldest failure first.
+
+        Args:
+            kind (str, optional): Only this kind.
+            limit (int, optional): Maximum items to return.
+
+        Returns:
+            list: RetryItem tuples, with the failure time in `next_attempt`.
+        """
+        query, parameters = DEAD_QUERY, []
+        if kind is not None:
+            query += " WHERE kind = ?"
+            parameters.append(kind)
+        query += " ORDER BY failed"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [RetryItem(row[0], row[1], json.loads(row[2]), *row[3:]) for row in rows]
+
+    def replay(self, kind=None):
+        """
+        Moves dead-lettered operations back into the queue with a fresh attempt budget, due immediately.
+
+        Args:
+            kind (str, optional): Only this kind. Defaults to every kind.
+
+        Returns:
+            int: Number of operations replayed.
+        """
+        where, parameters = ("", ()) if kind is None else (" WHERE kind = ?", (kind,))
+        with self._lock:
+            counts = dict(self._connection.execute(DEAD_COUNT_QUERY.format(where=where), parameters).fetchall())
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.execute(REPLAY_QUERY + where, (self.clock(), *parameters))
+            self._connection.execute(DELETE_DEAD_QUERY + where, parameters)
+            self._connection.execute("COMMIT")
+        for replayed_kind, count in counts.items():
+            RETRY_ITEMS.inc(replayed_kind, "replayed", amount=count)
+        logger.info("Replayed dead letters: %s", counts)
+        return sum(counts.values())
+
+    def stats(self):
+        """
+        Returns the number of waiting and dead-lettered items per kind.
+
+        Returns:
+            dict: {"pending": {kind: count}, "dead": {kind: count}}.
+        """
+        with self._lock:
+            return {
+                "pending": dict(self._connection.execute(PENDING_QUERY).fetchall()),
+                "dead": dict(self._connection.execute(DEAD_COUNT_QUERY.format(where="")).fetchall()),
+            }
+
+    def close(self):
+        """Stops the background drain and closes the SQLite connection."""
+        self.stop()
+        with self._lock:
+            self._connection.close()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_retry_queue():
+    """
+    Returns the process-wide queue, opening RETRY_QUEUE_PATH and starting its background drain on first use.
+
+    Returns:
+        RetryQueue or None: The shared queue, or None if RETRY_QUEUE_PATH is not set.
+    """
+    global _queue
+    if _queue is None and RETRY_QUEUE_PATH:
+        with _queue_lock:
+            if _queue is None:
+                _queue = RetryQueue(RETRY_QUEUE_PATH)
+                _queue.start()
+                atexit.register(_queue.stop)
+                logger.info("Retry queue at %s: %s", RETRY_QUEUE_PATH, _queue.stats())
+    return _queue
+
+
+def retry_later(kind, payload, error=None):
+    """
+    Queues a failed operation on the process-wide queue.
+
+    Args:
+        kind (str): The operation kind.
+        payload (dict): JSON-serializable arguments for the kind's handler.
+        error (str or Exception, optional): Why the operation failed.
+
+    Returns:
+        bool: True if the operation was queued; False if it was already waiting or no queue is configured.
+    """
+    queue = get_retry_queue()
+    return queue.enqueue(kind, payload, error) if queue is not None else False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and replay the retry queue's dead letters.")
+    parser.add_argument("--path", default=RETRY_QUEUE_PATH, help="Queue file (defaults to RETRY_QUEUE_PATH)")
+    parser.add_argument("--kind", help="Only this operation kind")
+    parser.add_argument("--list", action="store_true", help="Print the dead letters")
+    parser.add_argument("--replay", action="store_true", help="Move the dead letters back into the queue")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("RETRY_QUEUE_PATH is not set; pass --path")
+
+    queue = RetryQueue(args.path)
+    if args.list:
+        for item in queue.dead_letters(args.kind):
+            print(f"{item.id}\t{item.kind}\t{item.attempts}\t{json.dumps(item.payload)}\t{item.last_error}")
+    if args.replay:
+        print(f"Replayed {queue.replay(args.kind)} dead letters")
+    print(queue.stats())
+    queue.close()
@@ -11,6 +11,10 @@ setup(
         "psycopg2",  # If needed for PostgreSQL
         "cassandra-driver"  # If needed for Cassandra
     ],
+    extras_require={  # Optional features
+        "zstd": ["zstandard"],  # zstd-compressed match payloads (falls back to gzip)
+        "parquet": ["pyarrow"],  # Parquet analytics exports (falls back to gzip-compressed CSV)
+    },
     entry_points={  # Optional: Add scripts for easy execution
         "console_scripts": [
             "leaguetracker=python.__main__:main",